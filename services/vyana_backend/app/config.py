@@ -39,6 +39,41 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str
     GOOGLE_REDIRECT_URI: str
     GOOGLE_CALENDAR_ID: str = "primary"
+    # Refresh Google access tokens in the background this many seconds before expiry
+    GOOGLE_TOKEN_REFRESH_MARGIN: int = 300
+    # Local Gmail mirror (listings, summaries and unread counts read from SQLite)
+    GMAIL_MIRROR_ENABLED: bool = True
+    GMAIL_MIRROR_MAX_MESSAGES: int = 2000
+    # Seconds between incremental (history.list) syncs triggered by reads
+    GMAIL_SYNC_INTERVAL: float = 60.0
+    # Fetch full messages during sync so bodies are searchable (metadata only if false)
+    GMAIL_INDEX_BODIES: bool = True
+    # Size budget of the on-disk attachment cache (least recently used files evicted)
+    GMAIL_ATTACHMENT_CACHE_MB: int = 500
+    # Public origin prefixed to attachment links in email HTML, e.g. https://vyana.example.com
+    # (links are root-relative when empty, which works behind a TLS-terminating proxy)
+    GMAIL_ATTACHMENT_BASE_URL: str = ""
+    # Local calendar event store (range queries answered from SQLite)
+    CALENDAR_STORE_ENABLED: bool = True
+    # Seconds between incremental (syncToken) syncs triggered by reads
+    CALENDAR_SYNC_INTERVAL: float = 60.0
+    # Days of events kept locally before and after today
+    CALENDAR_SYNC_PAST_DAYS: int = 30
+    CALENDAR_SYNC_FUTURE_DAYS: int = 365
+    # Working hours (IST) used when finding free slots
+    WORKING_HOURS_START: str = "09:00"
+    WORKING_HOURS_END: str = "18:00"
+    WORKING_DAYS: str = "mon,tue,wed,thu,fri"
+    # Local Google Contacts mirror (name/email/phone lookups answered in memory)
+    CONTACTS_MIRROR_ENABLED: bool = True
+    # Seconds between incremental (syncToken) syncs triggered by reads
+    CONTACTS_SYNC_INTERVAL: float = 300.0
+    # Local Google Tasks mirror (task views answered from SQLite, writes queued for Google)
+    TASKS_MIRROR_ENABLED: bool = True
+    # Seconds between incremental (updatedMin) polls triggered by reads
+    TASKS_SYNC_INTERVAL: float = 60.0
+    # Seconds queued task changes wait before being sent, so a burst shares one batch request
+    TASKS_OUTBOX_FLUSH_DELAY: float = 0.5
 
     # Zerodha MCP Configuration (Optional - for Kite Connect API)
     ZERODHA_API_KEY: str = ""
@@ -53,14 +88,48 @@ class Settings(BaseSettings):
     REDIS_URL: str = "redis://localhost:6379/0"
     CACHE_TTL: int = 3600  # Cache TTL in seconds (1 hour default)
     CACHE_ENABLED: bool = True
+    # In-process cache in front of Redis (also used alone while Redis is down)
+    CACHE_L1_MAX_MB: int = 32
+    # Seconds a key missing from Redis is remembered as missing
+    CACHE_NEGATIVE_TTL: int = 30
+    # In-process tier answering paraphrased repeats of cached chat questions (opt-in:
+    # a near-duplicate match can still reuse the answer to a subtly different question)
+    CHAT_SEMANTIC_CACHE_ENABLED: bool = False
+    # Cosine similarity (0-1) a message needs to reuse a cached answer
+    CHAT_SEMANTIC_CACHE_THRESHOLD: float = 0.9
+    CHAT_SEMANTIC_CACHE_MAX_ENTRIES: int = 2000
 
     # Feature Toggles (Can be overriden by env or at runtime via API if we adding mutable state)
     ENABLE_TOOLS: bool = True
+
+    # Max threads for blocking tool calls (Google APIs, HTTP, SQLite) run by the agent
+    TOOL_THREAD_POOL_SIZE: int = 16
+    # Per-tool-call timeout in seconds for read-only tools (tools can override via
+    # metadata["timeout"]); mutating tools are waited for unless they set their own
+    TOOL_TIMEOUT_SECONDS: float = 30.0
     TAMIL_MODE: bool = False
 
     # MCP Server Configuration
     MCP_SERVER_NAME: str = "VyanaMCP"
     MCP_SERVER_PATH: str = "/mcp-server"
+
+    # Shared outbound HTTP client (search, weather, currency, Whisper, MCP)
+    HTTP_TIMEOUT: float = 15.0
+    HTTP_MAX_CONNECTIONS: int = 100  # Pooled connections across all hosts
+    HTTP_MAX_CONCURRENCY: int = 100  # In-flight requests across all hosts
+    HTTP_MAX_CONCURRENCY_PER_HOST: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0  # Seconds an idle pooled connection is kept open
+    HTTP2_ENABLED: bool = True  # Used when the h2 package is installed
+    HTTP_RETRIES: int = 2  # Retries for idempotent requests
+    HTTP_RETRY_BACKOFF: float = 0.25  # Base backoff in seconds (jittered, doubled per retry)
+
+    # MCP client sessions (outbound connections to MCP servers)
+    MCP_MAX_CONNECTIONS_PER_SERVER: int = 10
+    MCP_REQUEST_TIMEOUT: float = 30.0
+    # Seconds between background re-checks of MCP tool catalogues (0 disables)
+    MCP_TOOLS_REFRESH_INTERVAL: float = 300.0
+    # Seconds between pings on each MCP session; a session that stops answering is re-opened (0 disables)
+    MCP_PING_INTERVAL: float = 60.0
     
     # Environment indicator
     DEBUG: bool = True
@@ -4,6 +4,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.routes import chat, tasks, google_auth, health, calendar, gmail, voice, mcp, tools, tts, monitoring
 from app.services.cache_service import cache_service
+from app.services.mcp_service import mcp_service
+from app.services.http_client import http_client
+from app.services import tool_executor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,11 +25,16 @@ async def lifespan(app: FastAPI):
     else:
         logger.warning("Redis cache not available - running without cache")
     
+    mcp_service.start_background_refresh()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Vyana Backend...")
     await cache_service.disconnect()
+    await mcp_service.close_all()
+    await http_client.aclose()
+    tool_executor.shutdown()
 
 
 app = FastAPI(title="Vyana Backend", version="0.1.0", lifespan=lifespan)
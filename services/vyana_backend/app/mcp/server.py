@@ -10,9 +10,9 @@ from typing import Optional
 from fastmcp import FastMCP
 
 # Import existing services
-from app.services.calendar_service import calendar_service
+from app.services.calendar_service import CalendarNotConnected, calendar_service
 from app.services.gmail_service import gmail_service
-from app.services.tasks_repo import tasks_repo
+from app.services.tasks_repo import async_tasks_repo
 from app.services.notes_service import notes_service
 from app.services.weather_service import weather_service
 from app.services.search_service import search_service
@@ -49,42 +49,17 @@ async def check_calendar(days: int = 7) -> str:
         Summary of calendar events
     """
     try:
-        events = calendar_service.get_events()
+        events = calendar_service.get_upcoming_events(days=days, max_results=10)
         if not events:
-            return "No upcoming events found."
-        
-        # Filter to requested days
-        from datetime import datetime, timedelta
-        try:
-            from zoneinfo import ZoneInfo
-            ist = ZoneInfo("Asia/Kolkata")
-        except ImportError:
-            import pytz
-            ist = pytz.timezone("Asia/Kolkata")
-        
-        now = datetime.now(ist)
-        cutoff = now + timedelta(days=days)
-        
-        filtered = []
-        for e in events:
-            if isinstance(e, dict) and "error" not in e:
-                start = e.get("start", "")
-                if start:
-                    try:
-                        event_dt = datetime.fromisoformat(start.replace("Z", "+00:00"))
-                        if event_dt <= cutoff:
-                            filtered.append(e)
-                    except ValueError:
-                        filtered.append(e)  # Include if can't parse date
-        
-        if not filtered:
             return f"No events in the next {days} days."
         
-        result = f"Found {len(filtered)} events in the next {days} days:\n"
-        for e in filtered[:10]:  # Limit to 10
-            result += f"- {e.get('summary', 'Untitled')} at {e.get('start', 'Unknown time')}\n"
+        result = f"Next {len(events)} events in the next {days} days:\n"
+        for e in events:
+            result += f"- {e.summary or 'Untitled'} at {e.start or 'Unknown time'}\n"
         
         return result
+    except CalendarNotConnected:
+        return "Google Calendar not connected."
     except Exception as e:
         logger.error(f"check_calendar error: {e}")
         return f"Error checking calendar: {str(e)}"
@@ -182,7 +157,7 @@ async def list_tasks(limit: int = 20) -> str:
         JSON list of tasks
     """
     try:
-        tasks = tasks_repo.list_tasks(include_completed=False)
+        tasks = await async_tasks_repo.list_tasks(include_completed=False)
         task_list = [
             {"id": t.id, "title": t.title, "due": t.due_date}
             for t in tasks[:limit]
@@ -208,7 +183,7 @@ async def create_task(title: str, due_date: Optional[str] = None) -> str:
         Confirmation with task ID
     """
     try:
-        task = tasks_repo.add_task(title, due_date)
+        task = await async_tasks_repo.add_task(title, due_date)
         return json.dumps({"id": task.id, "status": "Task created", "title": title})
     except Exception as e:
         logger.error(f"create_task error: {e}")
@@ -227,7 +202,7 @@ async def complete_task(task_id: int) -> str:
         Confirmation message
     """
     try:
-        success = tasks_repo.complete_task(task_id)
+        success = await async_tasks_repo.complete_task(task_id)
         return json.dumps({
             "success": success,
             "message": "Task completed" if success else "Task not found"
@@ -296,7 +271,7 @@ async def get_weather(city: str = "Mumbai") -> str:
         Weather information
     """
     try:
-        result = weather_service.get_weather(city)
+        result = await weather_service.get_weather(city)
         return str(result)
     except Exception as e:
         logger.error(f"get_weather error: {e}")
@@ -315,7 +290,7 @@ async def get_forecast(city: str = "Mumbai") -> str:
         Weather forecast
     """
     try:
-        result = weather_service.get_forecast(city)
+        result = await weather_service.get_forecast(city)
         return str(result)
     except Exception as e:
         logger.error(f"get_forecast error: {e}")
@@ -338,7 +313,7 @@ async def web_search(query: str) -> str:
         Search results
     """
     try:
-        result = search_service.web_search(query)
+        result = await search_service.web_search(query)
         return json.dumps({"result": result})
     except Exception as e:
         logger.error(f"web_search error: {e}")
@@ -357,7 +332,7 @@ async def get_news(topic: str = "technology") -> str:
         News articles
     """
     try:
-        result = search_service.get_news(topic)
+        result = await search_service.get_news(topic)
         return json.dumps({"result": result})
     except Exception as e:
         logger.error(f"get_news error: {e}")
@@ -405,7 +380,7 @@ async def convert_currency(
         Converted amount
     """
     try:
-        result = utils_service.convert_currency(amount, from_currency, to_currency)
+        result = await utils_service.convert_currency(amount, from_currency, to_currency)
         return json.dumps({"result": result})
     except Exception as e:
         logger.error(f"convert_currency error: {e}")
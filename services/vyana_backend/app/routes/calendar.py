@@ -1,7 +1,13 @@
-from fastapi import APIRouter
+import datetime
+import json
+from typing import Iterator, Optional, List
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
-from app.services.calendar_service import calendar_service
+
+from app.services.availability_service import MAX_SLOT_COUNT, MAX_SLOT_DAYS, MAX_SLOT_MINUTES, availability_service
+from app.services.calendar_service import CalendarEvent, CalendarNotConnected, calendar_service
 
 router = APIRouter()
 
@@ -18,15 +24,45 @@ def list_calendars():
 # Event Endpoints
 # =============================================================================
 
+def _calendar_ids(calendars: Optional[str]) -> Optional[List[str]]:
+    """calendars=all (or unset) means every selected calendar"""
+    if not calendars or calendars == "all":
+        return None
+    return [c for c in calendars.split(",") if c]
+
+
+def _stream_events(first: CalendarEvent, rest: Iterator[CalendarEvent]) -> Iterator[str]:
+    """{"events": [...]} written out one event at a time"""
+    yield '{"events": [' + json.dumps(first.to_dict())
+    for event in rest:
+        yield "," + json.dumps(event.to_dict())
+    yield "]}"
+
+
 @router.get("/events")
 def get_events(
     date: Optional[str] = None, 
     start: Optional[str] = None, 
     end: Optional[str] = None, 
     user_id: Optional[str] = None, 
-    calendar_id: Optional[str] = None
+    calendar_id: Optional[str] = None,
+    calendars: Optional[str] = None,
 ):
-    """Get events for a date range"""
+    """
+    Get events for a date range. calendars=all (or a comma-separated list of
+    calendar ids) merges several calendars into one start-ordered, streamed list.
+    """
+    if calendars:
+        time_min, time_max = calendar_service.day_range(start or date, end)
+        events = calendar_service.iter_merged_events(time_min, time_max, _calendar_ids(calendars))
+        try:
+            first = next(events, None)
+        except CalendarNotConnected as e:
+            return {"events": [{"error": str(e)}]}
+        if first is None:
+            return {"events": []}
+        return StreamingResponse(_stream_events(first, events), media_type="application/json")
+
     return {"events": calendar_service.get_events(
         start_date_str=start or date, 
         end_date_str=end, 
@@ -168,6 +204,49 @@ def quick_add_event(req: QuickAddRequest):
     return result
 
 
+# =============================================================================
+# Availability Endpoints
+# =============================================================================
+
+@router.get("/free-busy")
+def get_free_busy(
+    date: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    calendars: Optional[str] = None,
+    working_hours: bool = False,
+):
+    """Merged busy periods and the free gaps between them for a date range"""
+    try:
+        time_min, time_max = calendar_service.day_range(start or date, end)
+        return availability_service.free_busy(time_min, time_max, _calendar_ids(calendars), working_hours)
+    except ValueError as e:
+        return {"error": f"Invalid date: {e}"}
+    except CalendarNotConnected as e:
+        return {"error": str(e)}
+
+
+@router.get("/free-slots")
+def get_free_slots(
+    duration: int = Query(30, gt=0, le=MAX_SLOT_MINUTES),
+    count: int = Query(3, gt=0, le=MAX_SLOT_COUNT),
+    days: int = Query(7, gt=0, le=MAX_SLOT_DAYS),
+    start: Optional[str] = None,
+    calendars: Optional[str] = None,
+    working_hours: bool = True,
+):
+    """Earliest free slots of `duration` minutes across calendars"""
+    try:
+        start_dt = datetime.datetime.fromisoformat(start) if start else None
+    except ValueError:
+        return {"error": f"Invalid start: {start!r} (expected ISO format, e.g. 2024-05-06T09:00)"}
+    try:
+        slots = availability_service.find_slots(duration, count, days, _calendar_ids(calendars), start_dt, working_hours)
+    except CalendarNotConnected as e:
+        return {"error": str(e)}
+    return {"slots": slots}
+
+
 # =============================================================================
 # Calendar Colors
 # =============================================================================
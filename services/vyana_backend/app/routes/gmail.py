@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from app.services.gmail_service import gmail_service
+from googleapiclient.errors import HttpError
 
 from typing import Optional
 
@@ -21,10 +23,35 @@ def summarize_emails(req: SummarizeRequest):
 def list_emails(limit: int = 20, category: Optional[str] = None):
     return gmail_service.get_recent_messages(limit, category)
 
+@router.get("/search")
+def search_emails(q: str, limit: int = 10):
+    return gmail_service.search_messages(q, limit)
+
 @router.get("/message/{message_id}")
 def get_message(message_id: str):
     return gmail_service.get_message_details(message_id)
 
+@router.get("/message/{message_id}/attachments/{part_id}")
+def get_attachment(message_id: str, part_id: str, request: Request):
+    """Decoded attachment bytes, streamed from the on-disk cache"""
+    try:
+        attachment = gmail_service.get_attachment(message_id, part_id)
+    except HttpError as e:
+        raise HTTPException(status_code=502, detail=f"Gmail error: {e.resp.status}")
+    if attachment is None:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    # Message parts never change, so the content hash is a permanent validator
+    headers = {"ETag": f'"{attachment.sha256}"', "Cache-Control": "private, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(
+        attachment.path,
+        media_type=attachment.mime_type,
+        headers=headers,
+        filename=attachment.filename or None,
+        content_disposition_type="inline",
+    )
+
 class SendEmailRequest(BaseModel):
     to_email: str
     subject: str
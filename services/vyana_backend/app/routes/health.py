@@ -10,7 +10,7 @@ def health_check():
 
 @router.get("/cache/stats")
 async def cache_stats():
-    """Get Redis cache statistics"""
+    """Cache statistics: Redis keyspace numbers, the in-process L1 and per-namespace hits/misses"""
     return await cache_service.get_stats()
 
 
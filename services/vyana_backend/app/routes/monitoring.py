@@ -3,6 +3,9 @@ import psutil
 import time
 from datetime import timedelta
 
+from app.services.tool_executor import tool_metrics
+from app.services.http_client import http_client
+
 router = APIRouter()
 
 start_time = time.time()
@@ -62,3 +65,15 @@ async def get_system_stats():
         "uptime": uptime_str,
         "platform": "Windows" if psutil.WINDOWS else "Linux"
     }
+
+
+@router.get("/tools")
+async def get_tool_stats():
+    """Per-tool call counts, errors, timeouts and latency (ms) since startup"""
+    return {"tools": tool_metrics.snapshot()}
+
+
+@router.get("/http")
+async def get_http_stats():
+    """Outbound HTTP request counts, errors, retries and latency (ms) per host"""
+    return {"hosts": http_client.stats()}
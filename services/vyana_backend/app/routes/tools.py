@@ -14,6 +14,8 @@ _FALLBACK_TOOLS = [
     {"name": "get_calendar_today", "description": "Gets calendar events for today."},
     {"name": "get_calendar_events", "description": "Gets calendar events for a specific date."},
     {"name": "get_calendar_range", "description": "Gets upcoming calendar events for the next N days."},
+    {"name": "find_free_slots", "description": "Finds free time slots across calendars within working hours."},
+    {"name": "check_availability", "description": "Checks whether the user is free between two times."},
     {"name": "create_calendar_event", "description": "Creates a calendar event."},
     {"name": "get_unread_emails_summary", "description": "Gets a summary of recent unread emails."},
     {"name": "summarize_emails", "description": "Summarizes recent emails."},
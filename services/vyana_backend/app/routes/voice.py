@@ -13,7 +13,7 @@ async def transcribe_audio(file: UploadFile = File(...)):
     try:
         content = await file.read()
         logger.info(f"Transcribing audio file: {file.filename} size: {len(content)}")
-        transcription = deepseek_client.transcribe_audio(content, file.filename)
+        transcription = await deepseek_client.transcribe_audio(content, file.filename)
         return {"text": transcription}
     except Exception as e:
         logger.error(f"Transcription error: {e}")
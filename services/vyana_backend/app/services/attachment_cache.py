@@ -0,0 +1,149 @@
+"""
+Attachment Cache for Vyana
+On-disk, content-addressed cache of decoded Gmail attachments. Files are
+stored once per SHA-256 of their bytes (identical images shared by many
+messages are kept once); a small SQLite index maps (message id, part id) to
+the content hash. Least recently used files are evicted past a size budget.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get("DATA_DIR", ".")
+CACHE_DIR = os.path.join(DATA_DIR, "attachment_cache")
+
+
+@dataclass
+class CachedAttachment:
+    path: str
+    mime_type: str
+    sha256: str
+    size: int
+    filename: str = ""
+
+
+class AttachmentCache:
+    """
+    Usage:
+        cached = attachment_cache.get(message_id, part_id)
+        if cached is None:
+            cached = attachment_cache.put(message_id, part_id, data, "image/png")
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes if max_bytes is not None else settings.GMAIL_ATTACHMENT_CACHE_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.db_path = os.path.join(self.cache_dir, "index.db")
+        with self._get_conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS attachments (
+                    message_id TEXT NOT NULL,
+                    part_id TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    mime_type TEXT,
+                    filename TEXT,
+                    PRIMARY KEY (message_id, part_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_attachments_sha ON attachments(sha256);
+                CREATE TABLE IF NOT EXISTS blobs (
+                    sha256 TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                );
+            """)
+
+    def _get_conn(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def _blob_path(self, sha256: str) -> str:
+        return os.path.join(self.cache_dir, sha256[:2], sha256)
+
+    def get(self, message_id: str, part_id: str) -> Optional[CachedAttachment]:
+        with self._get_conn() as conn:
+            row = conn.execute(
+                """SELECT a.sha256, a.mime_type, a.filename, b.size FROM attachments a
+                   JOIN blobs b ON b.sha256 = a.sha256
+                   WHERE a.message_id=? AND a.part_id=?""",
+                (message_id, part_id),
+            ).fetchone()
+            if row is None:
+                return None
+            sha256, mime_type, filename, size = row
+            path = self._blob_path(sha256)
+            if not os.path.exists(path):
+                # Evicted or removed behind our back
+                conn.execute("DELETE FROM blobs WHERE sha256=?", (sha256,))
+                return None
+            conn.execute("UPDATE blobs SET last_used=? WHERE sha256=?", (time.time(), sha256))
+        return CachedAttachment(path, mime_type, sha256, size, filename or "")
+
+    def put(self, message_id: str, part_id: str, data: bytes, mime_type: str, filename: str = "") -> CachedAttachment:
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        with self._lock, self._get_conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO blobs (sha256, size, last_used) VALUES (?, ?, ?)",
+                (sha256, len(data), time.time()),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO attachments (message_id, part_id, sha256, mime_type, filename) VALUES (?, ?, ?, ?, ?)",
+                (message_id, part_id, sha256, mime_type, filename),
+            )
+            self._evict(conn, keep=sha256)
+        return CachedAttachment(path, mime_type, sha256, len(data), filename)
+
+    def clear(self):
+        """Drop every cached attachment (e.g. on logout or account change)"""
+        with self._lock, self._get_conn() as conn:
+            for (sha256,) in conn.execute("SELECT sha256 FROM blobs").fetchall():
+                try:
+                    os.remove(self._blob_path(sha256))
+                except FileNotFoundError:
+                    pass
+            conn.execute("DELETE FROM attachments")
+            conn.execute("DELETE FROM blobs")
+
+    def total_bytes(self) -> int:
+        with self._get_conn() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection, keep: str):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for sha256, size in conn.execute("SELECT sha256, size FROM blobs ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            try:
+                os.remove(self._blob_path(sha256))
+            except FileNotFoundError:
+                pass
+            conn.execute("DELETE FROM blobs WHERE sha256=?", (sha256,))
+            conn.execute("DELETE FROM attachments WHERE sha256=?", (sha256,))
+            total -= size
+            logger.debug(f"Evicted cached attachment {sha256[:12]} ({size} bytes)")
+
+
+attachment_cache = AttachmentCache()
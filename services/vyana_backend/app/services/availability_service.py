@@ -0,0 +1,200 @@
+"""
+Availability Service for Vyana
+Free/busy and slot finding over one or more calendars. Busy intervals come
+from the local event store for calendars it covers and from a single Google
+freeBusy query for the rest; they are merged into disjoint intervals and
+intersected with working hours to answer "when am I free?" and "find N
+slots of M minutes" without handing raw event lists to the model.
+"""
+import datetime
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.services.calendar_service import IST, CalendarNotConnected, calendar_service
+from app.services.calendar_store import event_bounds
+
+logger = logging.getLogger(__name__)
+
+Interval = Tuple[float, float]
+
+# Slot start times are aligned to this many minutes
+SLOT_GRANULARITY_MINUTES = 15
+# Limits of a slot search: longest slot, most slots, furthest look-ahead
+MAX_SLOT_MINUTES = 24 * 60
+MAX_SLOT_COUNT = 20
+MAX_SLOT_DAYS = 60
+# freeBusy accepts at most 50 calendars per query
+FREEBUSY_MAX_ITEMS = 50
+
+_WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def merge_intervals(intervals: Sequence[Interval]) -> List[Interval]:
+    """Union of intervals as a sorted list of disjoint intervals (touching ones are joined)"""
+    merged: List[List[float]] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def subtract_intervals(window: Interval, busy: Sequence[Interval]) -> List[Interval]:
+    """Parts of window not covered by busy (busy must be merged)"""
+    free: List[Interval] = []
+    cursor, end = window
+    for busy_start, busy_end in busy:
+        if busy_end <= cursor:
+            continue
+        if busy_start >= end:
+            break
+        if busy_start > cursor:
+            free.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+    if cursor < end:
+        free.append((cursor, end))
+    return free
+
+
+def _parse_clock(value: str) -> datetime.time:
+    hours, _, minutes = value.partition(":")
+    return datetime.time(int(hours), int(minutes or 0))
+
+
+def working_windows(time_min: datetime.datetime, time_max: datetime.datetime,
+                    day_start: str = None, day_end: str = None, days: str = None) -> List[Interval]:
+    """Working-hours intervals (IST) between time_min and time_max"""
+    start_clock = _parse_clock(day_start or settings.WORKING_HOURS_START)
+    end_clock = _parse_clock(day_end or settings.WORKING_HOURS_END)
+    weekdays = {_WEEKDAYS.index(d.strip().lower()[:3]) for d in (days or settings.WORKING_DAYS).split(",") if d.strip()}
+
+    windows: List[Interval] = []
+    day = time_min.astimezone(IST).date()
+    while day <= time_max.astimezone(IST).date():
+        if day.weekday() in weekdays:
+            start = max(datetime.datetime.combine(day, start_clock, IST), time_min)
+            end = min(datetime.datetime.combine(day, end_clock, IST), time_max)
+            if start < end:
+                windows.append((start.timestamp(), end.timestamp()))
+        day += datetime.timedelta(days=1)
+    return windows
+
+
+def _iso(ts: float) -> str:
+    return datetime.datetime.fromtimestamp(ts, IST).isoformat()
+
+
+def _aware(value: datetime.datetime) -> datetime.datetime:
+    return value if value.tzinfo else value.replace(tzinfo=IST)
+
+
+def _blocks_time(event: dict) -> bool:
+    """Whether an event counts as busy, as Google's freeBusy decides it"""
+    if event.get('transparency') == 'transparent':
+        return False
+    me = next((a for a in event.get('attendees', []) if a.get('self')), None)
+    return not (me and me.get('responseStatus') == 'declined')
+
+
+class AvailabilityService:
+    def busy(self, time_min: datetime.datetime, time_max: datetime.datetime,
+             calendar_ids: Optional[List[str]] = None) -> List[Interval]:
+        """
+        Merged busy intervals (POSIX timestamps) across calendars (default:
+        all selected ones). Raises CalendarNotConnected without a Google account.
+        """
+        time_min, time_max = _aware(time_min), _aware(time_max)
+        google_service = calendar_service._get_google_service()
+        if not google_service:
+            raise CalendarNotConnected("Google Calendar not connected")
+        ids = list(dict.fromkeys(calendar_ids or calendar_service.selected_calendar_ids()))
+        lo, hi = time_min.timestamp(), time_max.timestamp()
+
+        intervals: List[Interval] = []
+        remote: List[str] = []
+        for calendar_id in ids:
+            events = calendar_service.local_events(calendar_id, lo, hi)
+            if events is None:
+                remote.append(calendar_id)
+            else:
+                intervals.extend(event_bounds(e, IST) for e in events if _blocks_time(e))
+
+        for start in range(0, len(remote), FREEBUSY_MAX_ITEMS):
+            intervals.extend(self._freebusy(google_service, remote[start:start + FREEBUSY_MAX_ITEMS], time_min, time_max))
+        return [(max(s, lo), min(e, hi)) for s, e in merge_intervals(intervals)]
+
+    @staticmethod
+    def _freebusy(google_service, calendar_ids: List[str], time_min: datetime.datetime,
+                  time_max: datetime.datetime) -> List[Interval]:
+        response = google_service.freebusy().query(body={
+            "timeMin": time_min.isoformat(),
+            "timeMax": time_max.isoformat(),
+            "items": [{"id": calendar_id} for calendar_id in calendar_ids],
+        }).execute()
+        intervals: List[Interval] = []
+        for calendar_id, result in response.get('calendars', {}).items():
+            if result.get('errors'):
+                logger.warning(f"freeBusy skipped {calendar_id}: {result['errors']}")
+            for period in result.get('busy', []):
+                intervals.append((
+                    datetime.datetime.fromisoformat(period['start'].replace('Z', '+00:00')).timestamp(),
+                    datetime.datetime.fromisoformat(period['end'].replace('Z', '+00:00')).timestamp(),
+                ))
+        return intervals
+
+    def free_busy(self, time_min: datetime.datetime, time_max: datetime.datetime,
+                  calendar_ids: Optional[List[str]] = None, working_hours_only: bool = False) -> Dict[str, object]:
+        """Busy and free periods (ISO strings, IST) between two times"""
+        time_min, time_max = _aware(time_min), _aware(time_max)
+        busy = self.busy(time_min, time_max, calendar_ids)
+        if working_hours_only:
+            windows = working_windows(time_min, time_max)
+        else:
+            windows = [(time_min.timestamp(), time_max.timestamp())]
+        free = [gap for window in windows for gap in subtract_intervals(window, busy)]
+        return {
+            "busy": [{"start": _iso(s), "end": _iso(e)} for s, e in busy],
+            "free": [{"start": _iso(s), "end": _iso(e)} for s, e in free],
+        }
+
+    def find_slots(self, duration_minutes: int = 30, count: int = 3, days: int = 7,
+                   calendar_ids: Optional[List[str]] = None, start: Optional[datetime.datetime] = None,
+                   working_hours_only: bool = True) -> List[Dict[str, str]]:
+        """
+        The earliest `count` non-overlapping free slots of `duration_minutes`
+        within the next `days` days (from `start`, default now), inside
+        working hours unless working_hours_only is False. Slot starts are
+        aligned to SLOT_GRANULARITY_MINUTES.
+        """
+        if not (0 < duration_minutes <= MAX_SLOT_MINUTES and 0 < count <= MAX_SLOT_COUNT and 0 < days <= MAX_SLOT_DAYS):
+            raise ValueError(f"duration must be 1-{MAX_SLOT_MINUTES} minutes, count 1-{MAX_SLOT_COUNT} "
+                             f"and days 1-{MAX_SLOT_DAYS}")
+        time_min = _aware(start) if start else datetime.datetime.now(IST)
+        time_max = time_min + datetime.timedelta(days=days)
+        busy = self.busy(time_min, time_max, calendar_ids)
+        if working_hours_only:
+            windows = working_windows(time_min, time_max)
+        else:
+            windows = [(time_min.timestamp(), time_max.timestamp())]
+
+        length = duration_minutes * 60
+        step = SLOT_GRANULARITY_MINUTES * 60
+        slots: List[Dict[str, str]] = []
+        for window in windows:
+            for gap_start, gap_end in subtract_intervals(window, busy):
+                # Align up to the granularity (in IST wall-clock terms)
+                offset = datetime.datetime.fromtimestamp(gap_start, IST).utcoffset().total_seconds()
+                slot_start = -((-(gap_start + offset)) // step) * step - offset
+                while slot_start + length <= gap_end and len(slots) < count:
+                    slots.append({"start": _iso(slot_start), "end": _iso(slot_start + length)})
+                    slot_start += length
+                if len(slots) >= count:
+                    return slots
+        return slots
+
+
+availability_service = AvailabilityService()
@@ -1,25 +1,47 @@
 """
 Redis Cache Service for Vyana
 Provides caching for API responses to reduce costs
+
+Two tiers: an in-process LRU (L1) in front of Redis (L2). Reads try L1
+first; Redis hits are copied into L1 for the rest of their Redis TTL, and
+Redis misses are remembered in L1 for CACHE_NEGATIVE_TTL. Every write and
+delete is published on a Redis channel so other workers drop their L1 copy.
+Without Redis (down at startup or lost later) L1 keeps caching on its own;
+once Redis is back L1 starts over empty, since other workers may have
+written meanwhile.
 """
+import asyncio
 import json
 import hashlib
 import logging
-from typing import Optional, Any
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, Optional, Any
 from datetime import datetime
 import redis.asyncio as redis
 
 from app.config import settings
+from app.services.local_cache import LocalCache
+from app.services.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
+# Keys (or key prefixes) other workers must drop from their L1
+INVALIDATION_CHANNEL = "vyana:cache:invalidate"
+# Per-namespace counters reported by get_stats
+NAMESPACE_COUNTERS = ("l1_hits", "l2_hits", "negative_hits", "misses", "sets")
+# Seconds between attempts to get Redis back, doubling up to the maximum
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
 
 class CacheService:
     """
     Redis-based caching service for reducing API costs.
     
     Caches:
-    - Simple chat responses (non-tool queries)
+    - Simple chat responses (non-tool queries), plus an in-process semantic
+      tier that also answers paraphrased repeats of a question
     - Weather data
     - Stock quotes
     - Search results
@@ -29,7 +51,21 @@ class CacheService:
         self.redis: Optional[redis.Redis] = None
         self.enabled = settings.CACHE_ENABLED
         self.default_ttl = settings.CACHE_TTL
+        self.negative_ttl = settings.CACHE_NEGATIVE_TTL
         self._connected = False
+        self.local = LocalCache(max_bytes=settings.CACHE_L1_MAX_MB * 1024 * 1024)
+        self._instance_id = uuid.uuid4().hex  # to skip our own invalidations
+        # Bumped by every invalidation from another worker: a Redis read that
+        # overlapped one may be stale and is not copied into L1
+        self._generation = 0
+        self._listener: Optional[asyncio.Task] = None
+        self._counters: Dict[str, Counter] = defaultdict(Counter)
+        self.semantic: Optional[SemanticCache] = None
+        if self.enabled and settings.CHAT_SEMANTIC_CACHE_ENABLED:
+            self.semantic = SemanticCache(
+                threshold=settings.CHAT_SEMANTIC_CACHE_THRESHOLD,
+                max_entries=settings.CHAT_SEMANTIC_CACHE_MAX_ENTRIES,
+            )
         
     async def connect(self):
         """Initialize Redis connection"""
@@ -43,17 +79,29 @@ class CacheService:
                 encoding="utf-8",
                 decode_responses=True
             )
+        except Exception as e:
+            logger.warning(f"Invalid Redis configuration (in-process cache only): {e}")
+            self.redis = None
+            return
+        
+        pubsub = None
+        try:
             # Test connection
             await self.redis.ping()
+            pubsub = await self._subscribe()
             self._connected = True
             logger.info(f"Redis cache connected: {settings.REDIS_URL}")
         except Exception as e:
-            logger.warning(f"Redis connection failed (cache disabled): {e}")
-            self.redis = None
+            # Keep the client: the listener retries with backoff until Redis is up
+            logger.warning(f"Redis connection failed (in-process cache only until it is reachable): {e}")
             self._connected = False
+        self._listener = asyncio.create_task(self._listen(pubsub))
     
     async def disconnect(self):
         """Close Redis connection"""
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
         if self.redis:
             await self.redis.close()
             self._connected = False
@@ -77,6 +125,117 @@ class CacheService:
         normalized = message.lower().strip()
         return self._make_key("chat", normalized, model, tools_enabled)
     
+    # ==================== Tiers ====================
+
+    async def _get(self, namespace: str, key: str) -> Optional[str]:
+        """L1, then Redis (the answer, hit or miss, is kept in L1)"""
+        if not self.enabled:
+            return None
+        counters = self._counters[namespace]
+        hit, value = self.local.get(key)
+        if hit:
+            counters["l1_hits" if value is not None else "negative_hits"] += 1
+            return value
+        if not self.is_connected:
+            counters["misses"] += 1
+            return None
+
+        generation = self._generation
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            value, ttl_ms = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Cache get error: {e}")
+            counters["misses"] += 1
+            return None
+        if value is None:
+            counters["misses"] += 1
+            ttl = self.negative_ttl
+        else:
+            counters["l2_hits"] += 1
+            ttl = ttl_ms / 1000 if ttl_ms > 0 else self.default_ttl  # -1: no expiry set
+        if generation == self._generation:
+            self.local.set(key, value, ttl)
+        return value
+
+    async def _set(self, namespace: str, key: str, value: str, ttl: int) -> bool:
+        """Write both tiers and tell other workers to drop their copy"""
+        if not self.enabled:
+            return False
+        self._counters[namespace]["sets"] += 1
+        # Lookups already waiting on Redis must not put the old value back in L1
+        self._generation += 1
+        self.local.set(key, value, ttl)
+        if not self.is_connected:
+            return True
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.setex(key, ttl, value)
+            pipe.publish(INVALIDATION_CHANNEL, self._invalidation(key=key))
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Cache set error: {e}")
+        return True
+
+    def _invalidation(self, key: str = None, prefix: str = None) -> str:
+        return json.dumps({"origin": self._instance_id, "key": key, "prefix": prefix})
+
+    def _apply_invalidation(self, data: str):
+        message = json.loads(data)
+        if message["origin"] == self._instance_id:
+            return
+        self._generation += 1
+        if message.get("prefix") is not None:
+            self.local.delete_prefix(message["prefix"])
+            self._clear_semantic(message["prefix"])
+        else:
+            self.local.delete(message["key"])
+
+    async def _subscribe(self):
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(INVALIDATION_CHANNEL)
+        return pubsub
+
+    async def _listen(self, pubsub):
+        """
+        Apply other workers' invalidations. While the channel is down the cache
+        runs on L1 alone; it reconnects with backoff and starts L1 over.
+        """
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                if pubsub is None:
+                    await self.redis.ping()
+                    pubsub = await self._subscribe()
+                    # Writes elsewhere during the outage never reached this L1
+                    self.local.clear()
+                    self._clear_semantic("vyana:")
+                    self._generation += 1
+                    self._connected = True
+                    delay = RECONNECT_DELAY
+                    logger.info("Redis cache reconnected")
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._apply_invalidation(message["data"])
+                raise ConnectionError("invalidation channel closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._connected:
+                    logger.warning(f"Redis cache unavailable, using in-process cache only: {e}")
+                self._connected = False
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+                    pubsub = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
     # ==================== Chat Caching ====================
     
     async def get_chat_response(
@@ -88,21 +247,25 @@ class CacheService:
         """
         Get cached chat response for simple queries.
         Only caches responses for queries WITHOUT tool calls.
+        An exact match wins; otherwise the semantic tier is asked for the
+        answer to a near-identical question.
         """
-        if not self.is_connected or tools_enabled:
+        if tools_enabled:
             return None
             
-        try:
-            key = self._make_chat_key(message, model, tools_enabled)
-            cached = await self.redis.get(key)
+        key = self._make_chat_key(message, model, tools_enabled)
+        cached = await self._get("chat", key)
+        if cached:
+            logger.info(f"Cache HIT for chat: {message[:50]}...")
+            return cached
+
+        if self.semantic:
+            cached = self.semantic.get(model, message)
             if cached:
-                logger.info(f"Cache HIT for chat: {message[:50]}...")
+                logger.info(f"Semantic cache HIT for chat: {message[:50]}...")
                 return cached
-            logger.debug(f"Cache MISS for chat: {message[:50]}...")
-            return None
-        except Exception as e:
-            logger.error(f"Cache get error: {e}")
-            return None
+        logger.debug(f"Cache MISS for chat: {message[:50]}...")
+        return None
     
     async def set_chat_response(
         self,
@@ -118,175 +281,154 @@ class CacheService:
         - Tools were NOT enabled (simple Q&A)
         - Response is not an error
         """
-        if not self.is_connected or tools_enabled:
+        if not self.enabled or tools_enabled:
             return False
             
         # Don't cache error responses or very short responses
         if not response or len(response) < 10 or response.startswith("Error"):
             return False
             
-        try:
-            key = self._make_chat_key(message, model, tools_enabled)
-            ttl = ttl or self.default_ttl
-            await self.redis.setex(key, ttl, response)
-            logger.info(f"Cache SET for chat: {message[:50]}... (TTL: {ttl}s)")
-            return True
-        except Exception as e:
-            logger.error(f"Cache set error: {e}")
-            return False
+        ttl = ttl or self.default_ttl
+        if self.semantic:
+            self.semantic.set(model, message, response, ttl)
+        key = self._make_chat_key(message, model, tools_enabled)
+        await self._set("chat", key, response, ttl)
+        logger.info(f"Cache SET for chat: {message[:50]}... (TTL: {ttl}s)")
+        return True
     
     # ==================== Weather Caching ====================
     
     async def get_weather(self, location: str) -> Optional[dict]:
         """Get cached weather data"""
-        if not self.is_connected:
-            return None
-            
-        try:
-            key = self._make_key("weather", location.lower())
-            cached = await self.redis.get(key)
-            if cached:
-                logger.info(f"Cache HIT for weather: {location}")
-                return json.loads(cached)
-            return None
-        except Exception as e:
-            logger.error(f"Weather cache get error: {e}")
-            return None
+        cached = await self._get("weather", self._make_key("weather", location.lower()))
+        if cached:
+            logger.info(f"Cache HIT for weather: {location}")
+            return json.loads(cached)
+        return None
     
     async def set_weather(self, location: str, data: dict, ttl: int = 1800) -> bool:
         """Cache weather data (30 min default TTL)"""
-        if not self.is_connected:
-            return False
-            
-        try:
-            key = self._make_key("weather", location.lower())
-            await self.redis.setex(key, ttl, json.dumps(data))
-            logger.info(f"Cache SET for weather: {location} (TTL: {ttl}s)")
-            return True
-        except Exception as e:
-            logger.error(f"Weather cache set error: {e}")
+        key = self._make_key("weather", location.lower())
+        if not await self._set("weather", key, json.dumps(data), ttl):
             return False
+        logger.info(f"Cache SET for weather: {location} (TTL: {ttl}s)")
+        return True
     
     # ==================== Stock Quote Caching ====================
     
     async def get_stock_quote(self, symbol: str) -> Optional[dict]:
         """Get cached stock quote"""
-        if not self.is_connected:
-            return None
-            
-        try:
-            key = self._make_key("stock", symbol.upper())
-            cached = await self.redis.get(key)
-            if cached:
-                logger.info(f"Cache HIT for stock: {symbol}")
-                return json.loads(cached)
-            return None
-        except Exception as e:
-            logger.error(f"Stock cache get error: {e}")
-            return None
+        cached = await self._get("stock", self._make_key("stock", symbol.upper()))
+        if cached:
+            logger.info(f"Cache HIT for stock: {symbol}")
+            return json.loads(cached)
+        return None
     
     async def set_stock_quote(self, symbol: str, data: dict, ttl: int = 60) -> bool:
         """Cache stock quote (1 min default TTL - stock data changes frequently)"""
-        if not self.is_connected:
-            return False
-            
-        try:
-            key = self._make_key("stock", symbol.upper())
-            await self.redis.setex(key, ttl, json.dumps(data))
-            logger.info(f"Cache SET for stock: {symbol} (TTL: {ttl}s)")
-            return True
-        except Exception as e:
-            logger.error(f"Stock cache set error: {e}")
+        key = self._make_key("stock", symbol.upper())
+        if not await self._set("stock", key, json.dumps(data), ttl):
             return False
+        logger.info(f"Cache SET for stock: {symbol} (TTL: {ttl}s)")
+        return True
     
     # ==================== Search Caching ====================
     
     async def get_search_results(self, query: str) -> Optional[dict]:
         """Get cached search results"""
-        if not self.is_connected:
-            return None
-            
-        try:
-            key = self._make_key("search", query.lower())
-            cached = await self.redis.get(key)
-            if cached:
-                logger.info(f"Cache HIT for search: {query[:50]}")
-                return json.loads(cached)
-            return None
-        except Exception as e:
-            logger.error(f"Search cache get error: {e}")
-            return None
+        cached = await self._get("search", self._make_key("search", query.lower()))
+        if cached:
+            logger.info(f"Cache HIT for search: {query[:50]}")
+            return json.loads(cached)
+        return None
     
     async def set_search_results(self, query: str, data: dict, ttl: int = 3600) -> bool:
         """Cache search results (1 hour default TTL)"""
-        if not self.is_connected:
-            return False
-            
-        try:
-            key = self._make_key("search", query.lower())
-            await self.redis.setex(key, ttl, json.dumps(data))
-            logger.info(f"Cache SET for search: {query[:50]} (TTL: {ttl}s)")
-            return True
-        except Exception as e:
-            logger.error(f"Search cache set error: {e}")
+        key = self._make_key("search", query.lower())
+        if not await self._set("search", key, json.dumps(data), ttl):
             return False
+        logger.info(f"Cache SET for search: {query[:50]} (TTL: {ttl}s)")
+        return True
     
     # ==================== Generic Caching ====================
     
     async def get(self, key: str) -> Optional[str]:
         """Get a value from cache"""
-        if not self.is_connected:
-            return None
-        try:
-            return await self.redis.get(f"vyana:{key}")
-        except Exception as e:
-            logger.error(f"Cache get error: {e}")
-            return None
+        return await self._get(key.partition(":")[0], f"vyana:{key}")
     
     async def set(self, key: str, value: str, ttl: int = None) -> bool:
         """Set a value in cache"""
-        if not self.is_connected:
-            return False
-        try:
-            ttl = ttl or self.default_ttl
-            await self.redis.setex(f"vyana:{key}", ttl, value)
-            return True
-        except Exception as e:
-            logger.error(f"Cache set error: {e}")
-            return False
+        return await self._set(key.partition(":")[0], f"vyana:{key}", value, ttl or self.default_ttl)
     
     async def delete(self, key: str) -> bool:
         """Delete a key from cache"""
-        if not self.is_connected:
+        if not self.enabled:
             return False
+        key = f"vyana:{key}"
+        self._generation += 1
+        self.local.delete(key)
+        if not self.is_connected:
+            return True
         try:
-            await self.redis.delete(f"vyana:{key}")
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.delete(key)
+            pipe.publish(INVALIDATION_CHANNEL, self._invalidation(key=key))
+            await pipe.execute()
             return True
         except Exception as e:
             logger.error(f"Cache delete error: {e}")
             return False
     
+    def _clear_semantic(self, prefix: str):
+        """Chat answers are also held in the semantic tier: clear it with any prefix covering them"""
+        if self.semantic and (prefix.startswith("vyana:chat") or "vyana:chat".startswith(prefix)):
+            self.semantic.clear()
+
     async def clear_pattern(self, pattern: str) -> int:
         """Clear all keys matching a pattern"""
+        self._clear_semantic(f"vyana:{pattern}")
+        self._generation += 1
+        cleared = self.local.delete_prefix(f"vyana:{pattern}")
         if not self.is_connected:
-            return 0
+            return cleared
         try:
             keys = []
             async for key in self.redis.scan_iter(f"vyana:{pattern}*"):
                 keys.append(key)
+            # Delete before other workers hear about it, or they may re-read the old values
+            pipe = self.redis.pipeline(transaction=False)
+            if keys:
+                pipe.delete(*keys)
+            pipe.publish(INVALIDATION_CHANNEL, self._invalidation(prefix=f"vyana:{pattern}"))
+            results = await pipe.execute()
             if keys:
-                deleted = await self.redis.delete(*keys)
-                logger.info(f"Cleared {deleted} cache keys matching: {pattern}")
-                return deleted
+                logger.info(f"Cleared {results[0]} cache keys matching: {pattern}")
+                return results[0]
             return 0
         except Exception as e:
             logger.error(f"Cache clear error: {e}")
-            return 0
+            return cleared
+
+    def _namespace_stats(self) -> Dict[str, dict]:
+        """Hit/miss counters per namespace (chat, weather, stock, search, ...)"""
+        stats = {}
+        for namespace, counters in sorted(self._counters.items()):
+            lookups = counters["l1_hits"] + counters["l2_hits"] + counters["negative_hits"] + counters["misses"]
+            stats[namespace] = {name: counters[name] for name in NAMESPACE_COUNTERS}
+            stats[namespace]["hit_rate"] = round(
+                (counters["l1_hits"] + counters["l2_hits"]) / max(lookups, 1) * 100, 2
+            )
+        return stats
     
     async def get_stats(self) -> dict:
         """Get cache statistics"""
+        local = {
+            "l1": self.local.stats(),
+            "namespaces": self._namespace_stats(),
+            "semantic_chat": self.semantic.stats() if self.semantic else None,
+        }
         if not self.is_connected:
-            return {"status": "disconnected", "enabled": self.enabled}
+            return {"status": "disconnected", "enabled": self.enabled, **local}
             
         try:
             info = await self.redis.info("stats")
@@ -304,11 +446,12 @@ class CacheService:
                     info.get("keyspace_hits", 0) / 
                     max(info.get("keyspace_hits", 0) + info.get("keyspace_misses", 0), 1) * 100,
                     2
-                )
+                ),
+                **local,
             }
         except Exception as e:
             logger.error(f"Cache stats error: {e}")
-            return {"status": "error", "error": str(e)}
+            return {"status": "error", "error": str(e), **local}
 
 
 # Singleton instance
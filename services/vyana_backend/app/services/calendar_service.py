@@ -1,7 +1,14 @@
 import datetime
+import heapq
 import logging
-from typing import Optional, List, Dict, Any
-from googleapiclient.discovery import build
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Optional, List, Dict, Any, Iterator
+from zoneinfo import ZoneInfo
+from app.services.calendar_store import calendar_store
+from app.services.google_client import google_clients
 from app.services.google_oauth import oauth_service
 from app.config import settings
 
@@ -22,12 +29,78 @@ CALENDAR_COLORS = {
     "11": "#d60000", # Tomato
 }
 
+IST = ZoneInfo("Asia/Kolkata")
+# Page size for range queries (events.list allows up to 2500)
+RANGE_PAGE_SIZE = 250
+# Projection for range queries: only what CalendarEvent needs
+RANGE_FIELDS = "nextPageToken,items(id,iCalUID,status,summary,location,start,end,recurringEventId,hangoutLink)"
+# Calendars read at once by merged views
+FANOUT_WORKERS = 8
+# Seconds the selected-calendar list is reused by merged views
+CALENDAR_LIST_TTL = 300
+
+_DONE = object()
+# Long-lived so each worker keeps its own Calendar client and connection (see google_client)
+_fanout_pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="calendar-fanout")
+
+
+class CalendarNotConnected(Exception):
+    """No Google account is connected"""
+
+
+@dataclass
+class CalendarEvent:
+    """Compact event returned by range queries"""
+    id: str
+    summary: str
+    start: str  # RFC 3339 date-time, or YYYY-MM-DD for all-day events
+    end: str
+    is_all_day: bool = False
+    location: str = ""
+    calendar_id: str = ""
+    recurring_event_id: Optional[str] = None
+    meet_link: str = ""
+    ical_uid: str = ""
+
+    @classmethod
+    def from_api(cls, e: dict, calendar_id: str = "") -> "CalendarEvent":
+        start = e.get('start', {})
+        end = e.get('end', {})
+        return cls(
+            id=e.get('id', ''),
+            summary=e.get('summary', ''),
+            start=start.get('dateTime') or start.get('date') or '',
+            end=end.get('dateTime') or end.get('date') or '',
+            is_all_day='dateTime' not in start,
+            location=e.get('location', ''),
+            calendar_id=calendar_id,
+            recurring_event_id=e.get('recurringEventId'),
+            meet_link=e.get('hangoutLink', ''),
+            ical_uid=e.get('iCalUID', ''),
+        )
+
+    def sort_key(self) -> tuple:
+        """(start, end) as timestamps; all-day dates are IST midnights"""
+        def ts(value: str) -> float:
+            if not value:
+                return 0.0
+            parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+            return (parsed if parsed.tzinfo else parsed.replace(tzinfo=IST)).timestamp()
+        return ts(self.start), ts(self.end)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
 class CalendarService:
+    # (expiry, ids) of the calendars selected in the user's calendar list
+    _selected_ids: Optional[tuple] = None
+
     def _get_google_service(self):
         creds = oauth_service.get_credentials()
         if not creds:
             return None
-        return build('calendar', 'v3', credentials=creds)
+        return google_clients.get('calendar', 'v3', creds)
 
     def _resolve_calendar_id(self, calendar_id: str | None) -> str:
         if calendar_id and calendar_id.strip():
@@ -96,87 +169,271 @@ class CalendarService:
                 time_min = self._to_iso(today)
                 time_max = self._to_iso(today, end=True)
 
-            events_result = google_service.events().list(
-                calendarId=target_calendar_id,
-                timeMin=time_min,
-                timeMax=time_max,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-
-            items = events_result.get('items', [])
-            structured = []
-            
-            for e in items:
-                start = e.get('start', {})
-                end = e.get('end', {})
-                start_val = start.get('dateTime') or start.get('date')
-                end_val = end.get('dateTime') or end.get('date')
-                
-                # Determine if all-day event
-                is_all_day = 'date' in start and 'dateTime' not in start
-                
-                # Get color
-                color_id = e.get('colorId', '7')
-                color = CALENDAR_COLORS.get(color_id, '#039be5')
-                
-                # Get recurrence info
-                recurring_event_id = e.get('recurringEventId')
-                
-                # Get meeting link
-                hangout_link = e.get('hangoutLink', '')
-                conference_data = e.get('conferenceData', {})
-                meet_link = ''
-                if conference_data:
-                    entry_points = conference_data.get('entryPoints', [])
-                    for ep in entry_points:
-                        if ep.get('entryPointType') == 'video':
-                            meet_link = ep.get('uri', '')
-                            break
-                
-                # Get reminders
-                reminders = e.get('reminders', {})
-                reminder_minutes = []
-                if reminders.get('useDefault'):
-                    reminder_minutes = [30]  # Default reminder
-                else:
-                    for override in reminders.get('overrides', []):
-                        reminder_minutes.append(override.get('minutes', 30))
-                
-                # Get attachments
-                attachments = []
-                for att in e.get('attachments', []):
-                    attachments.append({
-                        "fileUrl": att.get('fileUrl', ''),
-                        "title": att.get('title', ''),
-                        "mimeType": att.get('mimeType', ''),
-                    })
-                
-                structured.append({
-                    "id": e.get('id'),
-                    "summary": e.get('summary', ''),
-                    "start": start_val or '',
-                    "end": end_val or '',
-                    "description": e.get('description', ''),
-                    "location": e.get('location', ''),
-                    "isAllDay": is_all_day,
-                    "color": color,
-                    "colorId": color_id,
-                    "isRecurring": recurring_event_id is not None,
-                    "recurringEventId": recurring_event_id,
-                    "meetLink": meet_link or hangout_link,
-                    "reminders": reminder_minutes,
-                    "attachments": attachments,
-                    "status": e.get('status', 'confirmed'),
-                    "creator": e.get('creator', {}).get('email', ''),
-                })
-            
-            return structured
+            items = self._list_events(google_service, target_calendar_id, time_min, time_max)
+            return [self._structure_event(e) for e in items]
 
         except Exception as e:
             logger.error(f"Error fetching Google Calendar: {e}")
             return [{"error": f"Error fetching calendar: {e}"}]
 
+    def get_events_in_range(
+        self,
+        time_min: datetime.datetime,
+        time_max: datetime.datetime,
+        calendar_id: str = None,
+        max_results: Optional[int] = None,
+    ) -> List[CalendarEvent]:
+        """
+        Events overlapping [time_min, time_max) in start order, at most
+        max_results. Naive datetimes are taken as IST. Served from the local
+        store when it covers the range; otherwise the window, maxResults and
+        a fields projection are sent to Google and pages followed with
+        pageToken. Raises CalendarNotConnected without a Google account.
+        """
+        return list(self.iter_events_in_range(time_min, time_max, calendar_id, max_results))
+
+    def iter_events_in_range(
+        self,
+        time_min: datetime.datetime,
+        time_max: datetime.datetime,
+        calendar_id: str = None,
+        max_results: Optional[int] = None,
+    ) -> Iterator[CalendarEvent]:
+        """get_events_in_range, yielding each page as soon as it arrives"""
+        google_service = self._get_google_service()
+        if not google_service:
+            raise CalendarNotConnected("Google Calendar not connected")
+
+        target_calendar_id = self._resolve_calendar_id(calendar_id)
+        time_min = time_min if time_min.tzinfo else time_min.replace(tzinfo=IST)
+        time_max = time_max if time_max.tzinfo else time_max.replace(tzinfo=IST)
+
+        store = self._store(target_calendar_id)
+        if store and store.covers(target_calendar_id, time_min.timestamp(), time_max.timestamp()):
+            items = store.events_between(target_calendar_id, time_min.timestamp(), time_max.timestamp())
+            for e in items[:max_results]:
+                yield CalendarEvent.from_api(e, target_calendar_id)
+            return
+
+        count = 0
+        page_token = None
+        while max_results is None or count < max_results:
+            page_size = RANGE_PAGE_SIZE if max_results is None else min(RANGE_PAGE_SIZE, max_results - count)
+            page = google_service.events().list(
+                calendarId=target_calendar_id,
+                timeMin=time_min.isoformat(),
+                timeMax=time_max.isoformat(),
+                singleEvents=True,
+                orderBy='startTime',
+                maxResults=page_size,
+                pageToken=page_token,
+                fields=RANGE_FIELDS,
+            ).execute()
+            for e in page.get('items', [])[:page_size]:
+                count += 1
+                yield CalendarEvent.from_api(e, target_calendar_id)
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                break
+
+    def day_range(self, start_date_str: str = None, end_date_str: str = None) -> tuple:
+        """(start, end) datetimes spanning the given YYYY-MM-DD dates (default: today)"""
+        start_date_str = start_date_str or datetime.datetime.now(IST).date().isoformat()
+        end_date_str = end_date_str or start_date_str
+        return (
+            datetime.datetime.fromisoformat(self._to_iso(start_date_str)),
+            datetime.datetime.fromisoformat(self._to_iso(end_date_str, end=True)),
+        )
+
+    def selected_calendar_ids(self) -> List[str]:
+        """Calendars shown in the user's calendar list, primary first (cached for CALENDAR_LIST_TTL)"""
+        cached = self._selected_ids
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        calendars = self.list_calendars()
+        if calendars and calendars[0].get('error'):
+            return [self._resolve_calendar_id(None)]
+        selected = [c for c in calendars if c.get('selected') or c.get('primary')]
+        ids = [c['id'] for c in sorted(selected, key=lambda c: not c.get('primary'))]
+        self._selected_ids = (time.monotonic() + CALENDAR_LIST_TTL, ids)
+        return ids
+
+    def clear_cached_calendars(self):
+        """Forget the cached calendar list (e.g. on logout or account change)"""
+        self._selected_ids = None
+
+    def iter_merged_events(
+        self,
+        time_min: datetime.datetime,
+        time_max: datetime.datetime,
+        calendar_ids: Optional[List[str]] = None,
+        max_results: Optional[int] = None,
+    ) -> Iterator[CalendarEvent]:
+        """
+        Events of several calendars (default: all selected ones) as one
+        start-ordered stream. Calendars are read concurrently and merged with
+        a heap, so the first event is ready once every calendar's first page
+        is; an event shared by several calendars (same iCalUID and start) is
+        yielded once. A calendar that fails is logged and left out.
+        """
+        if not self._get_google_service():
+            raise CalendarNotConnected("Google Calendar not connected")
+        ids = list(dict.fromkeys(calendar_ids or self.selected_calendar_ids()))
+        if not ids:
+            return
+
+        streams = [self._prefetch(cid, time_min, time_max, max_results) for cid in ids]
+        seen = set()
+        for event in heapq.merge(*streams, key=CalendarEvent.sort_key):
+            key = (event.ical_uid or event.id, event.start)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield event
+            if max_results is not None and len(seen) >= max_results:
+                break
+
+    def _prefetch(self, calendar_id: str, time_min: datetime.datetime, time_max: datetime.datetime,
+                  max_results: Optional[int]) -> Iterator[CalendarEvent]:
+        """Read one calendar on a worker thread; the returned iterator yields its events as they arrive"""
+        results: queue.Queue = queue.Queue()
+
+        def run():
+            try:
+                for event in self.iter_events_in_range(time_min, time_max, calendar_id, max_results):
+                    results.put(event)
+            except Exception as e:
+                logger.warning(f"Skipping calendar {calendar_id} in merged view: {e}")
+            finally:
+                results.put(_DONE)
+
+        _fanout_pool.submit(run)
+
+        def drain():
+            while (event := results.get()) is not _DONE:
+                yield event
+
+        return drain()
+
+    def get_upcoming_events(self, days: int = 7, calendar_id: str = None,
+                            max_results: Optional[int] = None) -> List[CalendarEvent]:
+        """Events from now until `days` days from now (including ones in progress)"""
+        now = datetime.datetime.now(IST)
+        return self.get_events_in_range(now, now + datetime.timedelta(days=days), calendar_id, max_results)
+
+    def _store(self, calendar_id: str):
+        """
+        The local event store if the calendar has been synced, else None.
+        Starts a background sync whenever the calendar is stale.
+        """
+        if not settings.CALENDAR_STORE_ENABLED:
+            return None
+        calendar_store.sync_in_background(calendar_id, self._get_google_service)
+        return calendar_store if calendar_store.is_ready(calendar_id) else None
+
+    def local_events(self, calendar_id: str, start_ts: float, end_ts: float) -> Optional[List[dict]]:
+        """Raw events overlapping [start_ts, end_ts) from the local store, or None if it doesn't cover the range"""
+        store = self._store(calendar_id)
+        if store and store.covers(calendar_id, start_ts, end_ts):
+            return store.events_between(calendar_id, start_ts, end_ts)
+        return None
+
+    def _list_events(self, google_service, calendar_id: str, time_min: str, time_max: str) -> List[dict]:
+        """Raw event instances between two ISO timestamps, from the local store when it covers the range"""
+        store = self._store(calendar_id)
+        if store:
+            start_ts = datetime.datetime.fromisoformat(time_min).timestamp()
+            end_ts = datetime.datetime.fromisoformat(time_max).timestamp()
+            if store.covers(calendar_id, start_ts, end_ts):
+                return store.events_between(calendar_id, start_ts, end_ts)
+
+        events_result = google_service.events().list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            singleEvents=True,
+            orderBy='startTime'
+        ).execute()
+        return events_result.get('items', [])
+
+    def _write_through(self, google_service, calendar_id: str, event: dict):
+        """Reflect an event just created or updated in the local store"""
+        if not settings.CALENDAR_STORE_ENABLED or not calendar_store.is_ready(calendar_id):
+            return
+        try:
+            if event.get('recurrence'):
+                # Instances are expanded by Google: pull them with an incremental sync
+                calendar_store.sync(calendar_id, google_service)
+            else:
+                calendar_store.put(calendar_id, event)
+        except Exception as e:
+            logger.warning(f"Calendar store write-through failed: {e}")
+
+    def _structure_event(self, e: dict) -> Dict[str, Any]:
+        """API event resource -> the event shape returned by get_events"""
+        start = e.get('start', {})
+        end = e.get('end', {})
+        start_val = start.get('dateTime') or start.get('date')
+        end_val = end.get('dateTime') or end.get('date')
+        
+        # Determine if all-day event
+        is_all_day = 'date' in start and 'dateTime' not in start
+        
+        # Get color
+        color_id = e.get('colorId', '7')
+        color = CALENDAR_COLORS.get(color_id, '#039be5')
+        
+        # Get recurrence info
+        recurring_event_id = e.get('recurringEventId')
+        
+        # Get meeting link
+        hangout_link = e.get('hangoutLink', '')
+        conference_data = e.get('conferenceData', {})
+        meet_link = ''
+        if conference_data:
+            entry_points = conference_data.get('entryPoints', [])
+            for ep in entry_points:
+                if ep.get('entryPointType') == 'video':
+                    meet_link = ep.get('uri', '')
+                    break
+        
+        # Get reminders
+        reminders = e.get('reminders', {})
+        reminder_minutes = []
+        if reminders.get('useDefault'):
+            reminder_minutes = [30]  # Default reminder
+        else:
+            for override in reminders.get('overrides', []):
+                reminder_minutes.append(override.get('minutes', 30))
+        
+        # Get attachments
+        attachments = []
+        for att in e.get('attachments', []):
+            attachments.append({
+                "fileUrl": att.get('fileUrl', ''),
+                "title": att.get('title', ''),
+                "mimeType": att.get('mimeType', ''),
+            })
+        
+        return {
+            "id": e.get('id'),
+            "summary": e.get('summary', ''),
+            "start": start_val or '',
+            "end": end_val or '',
+            "description": e.get('description', ''),
+            "location": e.get('location', ''),
+            "isAllDay": is_all_day,
+            "color": color,
+            "colorId": color_id,
+            "isRecurring": recurring_event_id is not None,
+            "recurringEventId": recurring_event_id,
+            "meetLink": meet_link or hangout_link,
+            "reminders": reminder_minutes,
+            "attachments": attachments,
+            "status": e.get('status', 'confirmed'),
+            "creator": e.get('creator', {}).get('email', ''),
+        }
+
     def create_event(
         self, 
         summary: str, 
@@ -275,6 +532,7 @@ class CalendarService:
                 body=event,
                 conferenceDataVersion=conference_version
             ).execute()
+            self._write_through(google_service, target_calendar_id, created_event)
             
             # Extract meet link from response
             meet_link = created_event.get('hangoutLink', '')
@@ -373,6 +631,7 @@ class CalendarService:
                 body=event,
                 conferenceDataVersion=conference_version
             ).execute()
+            self._write_through(google_service, target_calendar_id, updated_event)
             
             return {
                 "success": True,
@@ -398,6 +657,8 @@ class CalendarService:
                 calendarId=target_calendar_id, 
                 eventId=event_id
             ).execute()
+            if settings.CALENDAR_STORE_ENABLED:
+                calendar_store.remove(target_calendar_id, event_id)
             
             return {
                 "success": True,
@@ -487,6 +748,7 @@ class CalendarService:
                 calendarId=target_calendar_id,
                 text=text
             ).execute()
+            self._write_through(google_service, target_calendar_id, created_event)
             
             return {
                 "success": True,
@@ -0,0 +1,291 @@
+"""
+Calendar Event Store for Vyana
+Local SQLite copy of each calendar's expanded event instances within a
+window around today (CALENDAR_SYNC_PAST_DAYS back, CALENDAR_SYNC_FUTURE_DAYS
+ahead). A calendar is fully synced once, then kept current with events.list
+syncToken requests; a 410 from Google (token expired) triggers a full
+resync. An R*Tree over each event's [start, end) interval answers range
+queries (today, the next N days, a given date) without scanning.
+"""
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from googleapiclient.errors import HttpError
+
+from app.config import settings
+from app.services.synced_mirror import SyncedMirror
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get("DATA_DIR", ".")
+os.makedirs(DATA_DIR, exist_ok=True)
+CALENDAR_DB_PATH = os.path.join(DATA_DIR, "calendar_store.db")
+
+# Largest page events.list allows
+PAGE_SIZE = 2500
+# Used for all-day events until Google reports the calendar's own time zone
+DEFAULT_TIME_ZONE = "Asia/Kolkata"
+
+
+def event_bounds(event: dict, tz: ZoneInfo) -> Tuple[float, float]:
+    """Start and end of an event as POSIX timestamps (all-day dates are midnights in tz)"""
+    def parse(value: dict) -> float:
+        if value.get('dateTime'):
+            return datetime.datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00')).timestamp()
+        return datetime.datetime.fromisoformat(value['date']).replace(tzinfo=tz).timestamp()
+
+    start = parse(event['start'])
+    end = parse(event['end']) if event.get('end') else start
+    return start, max(start, end)
+
+
+class CalendarStore(SyncedMirror):
+    """
+    Usage:
+        calendar_store.sync('primary', service)                  # full or incremental
+        calendar_store.events_between('primary', start, end)     # local read
+    """
+
+    sync_name = "Calendar store"
+    sync_thread_name = "calendar-store-sync"
+
+    def __init__(self, db_path: str = CALENDAR_DB_PATH):
+        super().__init__(db_path)
+        self._init_db()
+
+    @property
+    def sync_interval(self) -> float:
+        return settings.CALENDAR_SYNC_INTERVAL
+
+    def _get_conn(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self):
+        with self._get_conn() as conn:
+            # Background syncs write while requests read
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS calendar_events (
+                    id INTEGER PRIMARY KEY,
+                    calendar_id TEXT NOT NULL,
+                    event_id TEXT NOT NULL,
+                    recurring_event_id TEXT,
+                    start_ts REAL NOT NULL,
+                    end_ts REAL NOT NULL,
+                    data TEXT NOT NULL,
+                    UNIQUE (calendar_id, event_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_calendar_events_recurring
+                    ON calendar_events(calendar_id, recurring_event_id);
+                -- Interval index; id is calendar_events.id. Bounds are stored as
+                -- 32-bit floats rounded outwards, so matches are re-checked exactly.
+                CREATE VIRTUAL TABLE IF NOT EXISTS calendar_event_spans USING rtree(id, start_ts, end_ts);
+                CREATE TABLE IF NOT EXISTS calendar_sync_state (
+                    calendar_id TEXT PRIMARY KEY,
+                    sync_token TEXT,
+                    window_start REAL NOT NULL,
+                    window_end REAL NOT NULL,
+                    time_zone TEXT
+                );
+            """)
+
+    # --- state ---
+
+    def _state(self, conn: sqlite3.Connection, calendar_id: str) -> Optional[Tuple[str, float, float, str]]:
+        return conn.execute(
+            "SELECT sync_token, window_start, window_end, time_zone FROM calendar_sync_state WHERE calendar_id=?",
+            (calendar_id,),
+        ).fetchone()
+
+    def sync_token(self, calendar_id: str) -> Optional[str]:
+        state = self._state(self._read_conn(), calendar_id)
+        return state[0] if state else None
+
+    def is_ready(self, calendar_id: str) -> bool:
+        """True once a full sync of the calendar has completed"""
+        return self.sync_token(calendar_id) is not None
+
+    def covers(self, calendar_id: str, start_ts: float, end_ts: float) -> bool:
+        """True if [start_ts, end_ts) lies inside the synced window of a ready calendar"""
+        state = self._read_conn().execute(
+            "SELECT window_start, window_end FROM calendar_sync_state WHERE calendar_id=? AND sync_token IS NOT NULL",
+            (calendar_id,),
+        ).fetchone()
+        return state is not None and state[0] <= start_ts and end_ts <= state[1]
+
+    def _time_zone(self, conn: sqlite3.Connection, calendar_id: str) -> ZoneInfo:
+        state = self._state(conn, calendar_id)
+        try:
+            return ZoneInfo((state and state[3]) or DEFAULT_TIME_ZONE)
+        except Exception:
+            return ZoneInfo(DEFAULT_TIME_ZONE)
+
+    def clear(self):
+        """Forget every stored calendar (e.g. on logout or account change)"""
+        with self._get_conn() as conn:
+            for table in ("calendar_events", "calendar_event_spans", "calendar_sync_state"):
+                conn.execute(f"DELETE FROM {table}")
+        self._last_sync.clear()
+
+    # --- sync ---
+
+    def sync(self, calendar_id: str, service) -> Dict[str, object]:
+        """Bring one calendar up to date: incremental if possible, otherwise full"""
+        return self._sync(service, calendar_id)
+
+    def sync_in_background(self, calendar_id: str, get_service: Callable[[], object]) -> Optional[threading.Thread]:
+        return self._sync_in_background(get_service, calendar_id)
+
+    def _sync_locked(self, calendar_id: str, service) -> Dict[str, object]:
+        with self._get_conn() as conn:
+            state = self._state(conn, calendar_id)
+        # Slide the window forward once half of the future part has elapsed
+        horizon = time.time() + settings.CALENDAR_SYNC_FUTURE_DAYS * 86400 / 2
+        if state is None or state[0] is None or state[2] < horizon:
+            stats = self._full_sync(calendar_id, service)
+        else:
+            try:
+                stats = self._incremental_sync(calendar_id, service, state[0])
+            except HttpError as e:
+                if e.resp.status != 410:
+                    raise
+                logger.info(f"Calendar sync token for {calendar_id} expired, running a full resync")
+                stats = self._full_sync(calendar_id, service)
+        return stats
+
+    @staticmethod
+    def _list_all(service, **params) -> Tuple[List[dict], Optional[str], Optional[str]]:
+        """Every page of events.list: (items, nextSyncToken, calendar time zone)"""
+        items: List[dict] = []
+        page_token = None
+        while True:
+            page = service.events().list(
+                singleEvents=True, maxResults=PAGE_SIZE, pageToken=page_token, **params,
+            ).execute()
+            items.extend(page.get('items', []))
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                return items, page.get('nextSyncToken'), page.get('timeZone')
+
+    def _full_sync(self, calendar_id: str, service) -> Dict[str, object]:
+        start = time.perf_counter()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        window_start = now - datetime.timedelta(days=settings.CALENDAR_SYNC_PAST_DAYS)
+        window_end = now + datetime.timedelta(days=settings.CALENDAR_SYNC_FUTURE_DAYS)
+        items, sync_token, time_zone = self._list_all(
+            service, calendarId=calendar_id, timeMin=window_start.isoformat(), timeMax=window_end.isoformat(),
+        )
+
+        with self._get_conn() as conn:
+            self._delete_calendar(conn, calendar_id)
+            conn.execute(
+                """INSERT OR REPLACE INTO calendar_sync_state
+                   (calendar_id, sync_token, window_start, window_end, time_zone) VALUES (?, ?, ?, ?, ?)""",
+                (calendar_id, sync_token, window_start.timestamp(), window_end.timestamp(), time_zone),
+            )
+            self._upsert(conn, calendar_id, items)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"Calendar store full sync of {calendar_id}: {len(items)} events in {elapsed:.0f}ms")
+        return {"mode": "full", "events": len(items)}
+
+    def _incremental_sync(self, calendar_id: str, service, sync_token: str) -> Dict[str, object]:
+        items, next_token, _ = self._list_all(service, calendarId=calendar_id, syncToken=sync_token)
+        cancelled = [e['id'] for e in items if e.get('status') == 'cancelled']
+        changed = [e for e in items if e.get('status') != 'cancelled']
+        with self._get_conn() as conn:
+            self._upsert(conn, calendar_id, changed)
+            self._delete(conn, calendar_id, cancelled)
+            if next_token:
+                conn.execute(
+                    "UPDATE calendar_sync_state SET sync_token=? WHERE calendar_id=?", (next_token, calendar_id)
+                )
+        return {"mode": "incremental", "changed": len(changed), "deleted": len(cancelled)}
+
+    # --- writes ---
+
+    def put(self, calendar_id: str, event: dict):
+        """Write-through of an event just created or updated through the API"""
+        if not self.is_ready(calendar_id):
+            return
+        with self._get_conn() as conn:
+            self._upsert(conn, calendar_id, [event])
+
+    def remove(self, calendar_id: str, event_id: str):
+        """Write-through of a deletion (a recurring event takes its instances with it)"""
+        with self._get_conn() as conn:
+            self._delete(conn, calendar_id, [event_id])
+
+    def _upsert(self, conn: sqlite3.Connection, calendar_id: str, events: Iterable[dict]):
+        tz = self._time_zone(conn, calendar_id)
+        for event in events:
+            if event.get('recurrence') or not event.get('start'):
+                continue  # Recurring masters are stored as their expanded instances
+            start_ts, end_ts = event_bounds(event, tz)
+            row = conn.execute(
+                "SELECT id FROM calendar_events WHERE calendar_id=? AND event_id=?", (calendar_id, event['id'])
+            ).fetchone()
+            values = (event.get('recurringEventId'), start_ts, end_ts, json.dumps(event))
+            if row:
+                row_id = row[0]
+                conn.execute(
+                    "UPDATE calendar_events SET recurring_event_id=?, start_ts=?, end_ts=?, data=? WHERE id=?",
+                    (*values, row_id),
+                )
+                conn.execute("UPDATE calendar_event_spans SET start_ts=?, end_ts=? WHERE id=?", (start_ts, end_ts, row_id))
+            else:
+                row_id = conn.execute(
+                    """INSERT INTO calendar_events (calendar_id, event_id, recurring_event_id, start_ts, end_ts, data)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (calendar_id, event['id'], *values),
+                ).lastrowid
+                conn.execute(
+                    "INSERT INTO calendar_event_spans (id, start_ts, end_ts) VALUES (?, ?, ?)", (row_id, start_ts, end_ts)
+                )
+
+    def _delete(self, conn: sqlite3.Connection, calendar_id: str, event_ids: Iterable[str]):
+        for event_id in event_ids:
+            rows = conn.execute(
+                "SELECT id FROM calendar_events WHERE calendar_id=? AND (event_id=? OR recurring_event_id=?)",
+                (calendar_id, event_id, event_id),
+            ).fetchall()
+            conn.executemany("DELETE FROM calendar_event_spans WHERE id=?", rows)
+            conn.executemany("DELETE FROM calendar_events WHERE id=?", rows)
+
+    def _delete_calendar(self, conn: sqlite3.Connection, calendar_id: str):
+        conn.execute(
+            "DELETE FROM calendar_event_spans WHERE id IN (SELECT id FROM calendar_events WHERE calendar_id=?)",
+            (calendar_id,),
+        )
+        conn.execute("DELETE FROM calendar_events WHERE calendar_id=?", (calendar_id,))
+
+    # --- reads ---
+
+    def events_between(self, calendar_id: str, start_ts: float, end_ts: float) -> List[dict]:
+        """
+        Events overlapping [start_ts, end_ts) in start order, with the same
+        bounds semantics as events.list timeMin/timeMax.
+        """
+        rows = self._read_conn().execute(
+            """SELECT e.data FROM calendar_event_spans s
+               JOIN calendar_events e ON e.id = s.id
+               WHERE s.start_ts < ? AND s.end_ts > ?
+                 AND e.calendar_id = ? AND e.start_ts < ? AND e.end_ts > ?
+               ORDER BY e.start_ts, e.end_ts""",
+            (end_ts, start_ts, calendar_id, end_ts, start_ts),
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def event_count(self, calendar_id: str) -> int:
+        with self._get_conn() as conn:
+            return conn.execute("SELECT COUNT(*) FROM calendar_events WHERE calendar_id=?", (calendar_id,)).fetchone()[0]
+
+
+calendar_store = CalendarStore()
@@ -1,60 +1,152 @@
 import logging
 import json
 import os
+import re
+import sqlite3
 import uuid
 from typing import List, Dict, Optional
 from datetime import datetime
 from pathlib import Path
 
+from app.services.sqlite_db import ThreadLocalDB
+
 logger = logging.getLogger(__name__)
 
 # Storage path for contacts
 STORAGE_DIR = Path(__file__).parent.parent / "storage"
+CONTACTS_DB = STORAGE_DIR / "contacts.db"
+# Pre-SQLite storage, imported once and then renamed to contacts.json.migrated
 CONTACTS_FILE = STORAGE_DIR / "contacts.json"
 
+CONTACT_COLUMNS = "id, name, email, phone, company, notes, is_favorite, labels, created_at, updated_at"
+# Phone numbers are also indexed by their last digits, so +91 and local spellings match
+PHONE_SUFFIX_DIGITS = 10
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _search_terms(name: str = None, email: str = None, phone: str = None, company: str = None) -> List[str]:
+    """Lookup keys for a contact: name and company words, email and its local-part words, phone digits"""
+    terms = _WORD_RE.findall(f"{name or ''} {company or ''}".lower())
+    if email:
+        email = email.lower()
+        terms += [email] + _WORD_RE.findall(email.split('@')[0])
+    digits = re.sub(r"\D", "", phone or "")
+    if digits:
+        terms += [digits, digits[-PHONE_SUFFIX_DIGITS:]]
+    return list(dict.fromkeys(terms))
+
 
 class ContactService:
     """
-    Contact Service - Local JSON file storage (no Supabase required)
-    A self-hosted Google Contacts replacement
+    Contact Service - Local SQLite storage (no Supabase required)
+    A self-hosted Google Contacts replacement. Each operation touches only
+    the rows it needs through indexes (by id, name, email, phone, label and
+    search term), and every write is a single transaction, so concurrent
+    writers never lose each other's changes.
     """
-    
-    def __init__(self):
-        logger.info("ContactService (Local JSON) initialized")
+
+    def __init__(self, db_path: Path = CONTACTS_DB, legacy_file: Path = CONTACTS_FILE):
+        logger.info("ContactService (Local SQLite) initialized")
+        self.db_path = Path(db_path)
+        self.legacy_file = Path(legacy_file)
+        self._db = ThreadLocalDB(self.db_path, row_factory=sqlite3.Row)
         self._ensure_storage()
-    
+
     def _ensure_storage(self):
-        """Ensure storage directory and file exist"""
-        STORAGE_DIR.mkdir(parents=True, exist_ok=True)
-        if not CONTACTS_FILE.exists():
-            self._save_contacts([])
-    
-    def _load_contacts(self) -> List[Dict]:
-        """Load contacts from JSON file"""
-        try:
-            if CONTACTS_FILE.exists():
-                with open(CONTACTS_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
-        except Exception as e:
-            logger.error(f"Error loading contacts: {e}")
-            return []
-    
-    def _save_contacts(self, contacts: List[Dict]):
-        """Save contacts to JSON file"""
+        """Ensure storage directory and schema exist, importing legacy JSON once"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._db.conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS contacts (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                email TEXT,
+                phone TEXT,
+                company TEXT,
+                notes TEXT,
+                is_favorite INTEGER NOT NULL DEFAULT 0,
+                labels TEXT NOT NULL DEFAULT '[]',
+                created_at TEXT,
+                updated_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_contacts_name ON contacts(name COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS idx_contacts_email ON contacts(email COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS idx_contacts_phone ON contacts(phone);
+            CREATE INDEX IF NOT EXISTS idx_contacts_favorite ON contacts(is_favorite, name COLLATE NOCASE);
+            CREATE TABLE IF NOT EXISTS contact_terms (
+                term TEXT NOT NULL,
+                contact_id TEXT NOT NULL,
+                PRIMARY KEY (term, contact_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_contact_terms_contact ON contact_terms(contact_id);
+            CREATE TABLE IF NOT EXISTS contact_labels (
+                label TEXT NOT NULL,
+                contact_id TEXT NOT NULL,
+                PRIMARY KEY (label, contact_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_contact_labels_contact ON contact_labels(contact_id);
+        """)
+        if self.legacy_file.exists():
+            self._import_legacy()
+
+    def _import_legacy(self):
+        """Move contacts.json into the database, then rename it so it is never imported twice"""
         try:
-            with open(CONTACTS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(contacts, f, indent=2, ensure_ascii=False)
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                contacts = json.load(f)
+            with self._db.write() as conn:
+                for contact in contacts:
+                    self._insert(conn, contact)
+            os.replace(self.legacy_file, self.legacy_file.with_name(self.legacy_file.name + ".migrated"))
+            logger.info(f"Imported {len(contacts)} contacts from {self.legacy_file.name}")
         except Exception as e:
-            logger.error(f"Error saving contacts: {e}")
+            logger.error(f"Error importing legacy contacts: {e}")
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        contact = dict(row)
+        contact["is_favorite"] = bool(contact["is_favorite"])
+        contact["labels"] = json.loads(contact["labels"] or "[]")
+        return contact
+
+    def _fetch(self, conn: sqlite3.Connection, contact_id: str) -> Optional[Dict]:
+        row = conn.execute(f"SELECT {CONTACT_COLUMNS} FROM contacts WHERE id=?", (contact_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def _select(self, where: str = "1", params: tuple = ()) -> List[Dict]:
+        rows = self._db.conn().execute(
+            f"SELECT {CONTACT_COLUMNS} FROM contacts WHERE {where} ORDER BY name COLLATE NOCASE", params
+        ).fetchall()
+        return [self._to_dict(row) for row in rows]
 
-    def add_contact(self, name: str, email: str = None, phone: str = None, 
-                    company: str = None, notes: str = None, 
+    def _insert(self, conn: sqlite3.Connection, contact: Dict):
+        conn.execute(
+            f"INSERT OR REPLACE INTO contacts ({CONTACT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (contact["id"], contact.get("name") or "", contact.get("email"), contact.get("phone"),
+             contact.get("company"), contact.get("notes"), int(bool(contact.get("is_favorite"))),
+             json.dumps(contact.get("labels") or [], ensure_ascii=False),
+             contact.get("created_at"), contact.get("updated_at")),
+        )
+        self._index(conn, contact)
+
+    @staticmethod
+    def _index(conn: sqlite3.Connection, contact: Dict):
+        """Rewrite a contact's search terms and labels"""
+        conn.execute("DELETE FROM contact_terms WHERE contact_id=?", (contact["id"],))
+        conn.execute("DELETE FROM contact_labels WHERE contact_id=?", (contact["id"],))
+        terms = _search_terms(contact.get("name"), contact.get("email"), contact.get("phone"), contact.get("company"))
+        conn.executemany("INSERT OR IGNORE INTO contact_terms (term, contact_id) VALUES (?, ?)",
+                         [(term, contact["id"]) for term in terms])
+        conn.executemany("INSERT OR IGNORE INTO contact_labels (label, contact_id) VALUES (?, ?)",
+                         [(label, contact["id"]) for label in contact.get("labels") or []])
+
+    def add_contact(self, name: str, email: str = None, phone: str = None,
+                    company: str = None, notes: str = None,
                     is_favorite: bool = False, labels: List[str] = None) -> Dict:
         """Add a new contact"""
         try:
-            contacts = self._load_contacts()
-            
             new_contact = {
                 "id": str(uuid.uuid4()),
                 "name": name,
@@ -67,46 +159,32 @@ class ContactService:
                 "created_at": datetime.utcnow().isoformat(),
                 "updated_at": datetime.utcnow().isoformat()
             }
-            
-            contacts.append(new_contact)
-            self._save_contacts(contacts)
-            
+
+            with self._db.write() as conn:
+                self._insert(conn, new_contact)
+
             return {"success": True, "contact": new_contact, "message": f"Added contact {name}"}
-                
+
         except Exception as e:
             logger.error(f"Error adding contact: {e}")
             return {"success": False, "error": str(e)}
 
-    def update_contact(self, contact_id: str, name: str = None, email: str = None, 
+    def update_contact(self, contact_id: str, name: str = None, email: str = None,
                        phone: str = None, company: str = None, notes: str = None,
                        is_favorite: bool = None, labels: List[str] = None) -> Dict:
         """Update an existing contact"""
         try:
-            contacts = self._load_contacts()
-            
-            for i, contact in enumerate(contacts):
-                if contact.get("id") == contact_id:
-                    if name is not None:
-                        contacts[i]["name"] = name
-                    if email is not None:
-                        contacts[i]["email"] = email
-                    if phone is not None:
-                        contacts[i]["phone"] = phone
-                    if company is not None:
-                        contacts[i]["company"] = company
-                    if notes is not None:
-                        contacts[i]["notes"] = notes
-                    if is_favorite is not None:
-                        contacts[i]["is_favorite"] = is_favorite
-                    if labels is not None:
-                        contacts[i]["labels"] = labels
-                    contacts[i]["updated_at"] = datetime.utcnow().isoformat()
-                    
-                    self._save_contacts(contacts)
-                    return {"success": True, "contact": contacts[i], "message": "Contact updated"}
-            
-            return {"success": False, "error": "Contact not found"}
-                
+            changes = {"name": name, "email": email, "phone": phone, "company": company,
+                       "notes": notes, "is_favorite": is_favorite, "labels": labels}
+            with self._db.write() as conn:
+                contact = self._fetch(conn, contact_id)
+                if contact is None:
+                    return {"success": False, "error": "Contact not found"}
+                contact.update({field: value for field, value in changes.items() if value is not None})
+                contact["updated_at"] = datetime.utcnow().isoformat()
+                self._insert(conn, contact)
+            return {"success": True, "contact": contact, "message": "Contact updated"}
+
         except Exception as e:
             logger.error(f"Error updating contact: {e}")
             return {"success": False, "error": str(e)}
@@ -114,15 +192,15 @@ class ContactService:
     def delete_contact(self, contact_id: str) -> Dict:
         """Delete a contact"""
         try:
-            contacts = self._load_contacts()
-            original_len = len(contacts)
-            contacts = [c for c in contacts if c.get("id") != contact_id]
-            
-            if len(contacts) < original_len:
-                self._save_contacts(contacts)
+            with self._db.write() as conn:
+                deleted = conn.execute("DELETE FROM contacts WHERE id=?", (contact_id,)).rowcount
+                conn.execute("DELETE FROM contact_terms WHERE contact_id=?", (contact_id,))
+                conn.execute("DELETE FROM contact_labels WHERE contact_id=?", (contact_id,))
+
+            if deleted:
                 return {"success": True, "message": "Contact deleted"}
             return {"success": False, "error": "Contact not found"}
-                
+
         except Exception as e:
             logger.error(f"Error deleting contact: {e}")
             return {"success": False, "error": str(e)}
@@ -130,30 +208,42 @@ class ContactService:
     def get_contact(self, contact_id: str) -> Optional[Dict]:
         """Get a single contact by ID"""
         try:
-            contacts = self._load_contacts()
-            for contact in contacts:
-                if contact.get("id") == contact_id:
-                    return contact
-            return None
+            return self._fetch(self._db.conn(), contact_id)
         except Exception as e:
             logger.error(f"Error getting contact: {e}")
             return None
 
     def search_contacts(self, query: str) -> List[Dict]:
-        """Search contacts by name, email, phone, or company"""
+        """
+        Search contacts by name, email, phone, or company. Every query word must
+        start a word of the contact (an indexed range scan); if nothing matches,
+        falls back to a substring scan so partial words are still found.
+        """
         try:
-            contacts = self._load_contacts()
-            query_lower = query.lower()
-            
-            results = []
-            for contact in contacts:
-                if (query_lower in (contact.get("name") or "").lower() or
-                    query_lower in (contact.get("email") or "").lower() or
-                    query_lower in (contact.get("phone") or "").lower() or
-                    query_lower in (contact.get("company") or "").lower()):
-                    results.append(contact)
-            
-            return sorted(results, key=lambda x: x.get("name", "").lower())
+            digits = re.sub(r"[\s\-+().]", "", query)
+            if digits.isdigit() and len(digits) >= 3:
+                words = [digits]
+            elif '@' in query:
+                words = [query.strip().lower()]
+            else:
+                words = _WORD_RE.findall(query.lower())
+            if not words:
+                return []
+
+            # Prefix range per word: term >= word AND term < word + U+10FFFF
+            matches = " INTERSECT ".join(
+                "SELECT contact_id FROM contact_terms WHERE term >= ? AND term < ?" for _ in words
+            )
+            params = tuple(p for word in words for p in (word, word + "\U0010ffff"))
+            results = self._select(f"id IN ({matches})", params)
+            if results:
+                return results
+
+            pattern = f"%{query.lower()}%"
+            return self._select(
+                "lower(name) LIKE ? OR lower(email) LIKE ? OR lower(phone) LIKE ? OR lower(company) LIKE ?",
+                (pattern,) * 4,
+            )
         except Exception as e:
             logger.error(f"Error searching contacts: {e}")
             return []
@@ -161,17 +251,12 @@ class ContactService:
     def get_email_address(self, name: str) -> str:
         """Find email address for a name (fuzzy match) - for AI tool use"""
         try:
-            contacts = self._load_contacts()
-            name_lower = name.lower()
-            
-            for contact in contacts:
-                if name_lower in (contact.get("name") or "").lower():
-                    email = contact.get("email")
-                    if email:
-                        return f"{email} (found: {contact['name']})"
-            
+            contact = next((c for c in self.search_contacts(name) if c.get("email")), None)
+            if contact:
+                return f"{contact['email']} (found: {contact['name']})"
+
             return f"Contact '{name}' not found."
-            
+
         except Exception as e:
             logger.error(f"Error getting contact: {e}")
             return f"Error finding contact: {str(e)}"
@@ -179,17 +264,12 @@ class ContactService:
     def get_phone_number(self, name: str) -> str:
         """Find phone number for a name (fuzzy match) - for AI tool use"""
         try:
-            contacts = self._load_contacts()
-            name_lower = name.lower()
-            
-            for contact in contacts:
-                if name_lower in (contact.get("name") or "").lower():
-                    phone = contact.get("phone")
-                    if phone:
-                        return f"{phone} (found: {contact['name']})"
-            
+            contact = next((c for c in self.search_contacts(name) if c.get("phone")), None)
+            if contact:
+                return f"{contact['phone']} (found: {contact['name']})"
+
             return f"Phone number for '{name}' not found."
-            
+
         except Exception as e:
             logger.error(f"Error getting phone: {e}")
             return f"Error finding phone: {str(e)}"
@@ -197,33 +277,32 @@ class ContactService:
     def list_contacts(self) -> str:
         """List all contacts - for AI tool use"""
         try:
-            contacts = self._load_contacts()
-            
+            contacts = self._select()
+
             if not contacts:
                 return "No contacts found."
-            
+
             lines = []
-            for c in sorted(contacts, key=lambda x: x.get("name", "").lower()):
+            for c in contacts:
                 parts = [f"- {c['name']}"]
                 if c.get('email'):
                     parts.append(f"email: {c['email']}")
                 if c.get('phone'):
                     parts.append(f"phone: {c['phone']}")
                 lines.append(", ".join(parts))
-            
+
             return "\n".join(lines)
-            
+
         except Exception as e:
             logger.error(f"Error listing contacts: {e}")
             return f"Error listing contacts: {str(e)}"
-            
+
     def get_all_contacts_json(self, favorites_only: bool = False) -> List[Dict]:
         """Return raw list for UI"""
         try:
-            contacts = self._load_contacts()
             if favorites_only:
-                contacts = [c for c in contacts if c.get("is_favorite")]
-            return sorted(contacts, key=lambda x: x.get("name", "").lower())
+                return self._select("is_favorite=1")
+            return self._select()
         except Exception as e:
             logger.error(f"Error listing contacts json: {e}")
             return []
@@ -231,9 +310,7 @@ class ContactService:
     def get_contacts_by_label(self, label: str) -> List[Dict]:
         """Get contacts with a specific label"""
         try:
-            contacts = self._load_contacts()
-            results = [c for c in contacts if label in (c.get("labels") or [])]
-            return sorted(results, key=lambda x: x.get("name", "").lower())
+            return self._select("id IN (SELECT contact_id FROM contact_labels WHERE label=?)", (label,))
         except Exception as e:
             logger.error(f"Error getting contacts by label: {e}")
             return []
@@ -241,18 +318,16 @@ class ContactService:
     def toggle_favorite(self, contact_id: str) -> Dict:
         """Toggle favorite status for a contact"""
         try:
-            contacts = self._load_contacts()
-            
-            for i, contact in enumerate(contacts):
-                if contact.get("id") == contact_id:
-                    new_status = not contact.get("is_favorite", False)
-                    contacts[i]["is_favorite"] = new_status
-                    contacts[i]["updated_at"] = datetime.utcnow().isoformat()
-                    self._save_contacts(contacts)
-                    return {"success": True, "is_favorite": new_status}
-            
+            with self._db.write() as conn:
+                rows = conn.execute(
+                    "UPDATE contacts SET is_favorite = NOT is_favorite, updated_at=? WHERE id=? RETURNING is_favorite",
+                    (datetime.utcnow().isoformat(), contact_id),
+                ).fetchall()
+
+            if rows:
+                return {"success": True, "is_favorite": bool(rows[0][0])}
             return {"success": False, "error": "Contact not found"}
-                
+
         except Exception as e:
             logger.error(f"Error toggling favorite: {e}")
             return {"success": False, "error": str(e)}
@@ -0,0 +1,525 @@
+"""
+Google Contacts Mirror for Vyana
+Local SQLite copy of the user's connections (people.connections.list), kept
+current with sync tokens: one full sync with requestSyncToken, then
+incremental syncs that only return changed and deleted people. An expired
+token triggers a full resync. Lookups are served from an in-memory index
+(sorted-key prefix lookups over name words, emails and phone digits,
+Soundex codes, and a bounded edit-distance walk of a name-word trie for
+typos), so name-to-email resolution never leaves the process.
+"""
+import bisect
+import heapq
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from googleapiclient.errors import HttpError
+
+from app.config import settings
+from app.services.synced_mirror import SyncedMirror
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get("DATA_DIR", ".")
+os.makedirs(DATA_DIR, exist_ok=True)
+CONTACTS_DB_PATH = os.path.join(DATA_DIR, "contacts_mirror.db")
+
+PERSON_FIELDS = 'names,emailAddresses,phoneNumbers,organizations,biographies,memberships'
+STARRED_GROUP = 'contactGroups/starred'
+# Largest page connections.list allows
+PAGE_SIZE = 1000
+# Phone numbers are also indexed by their last digits, so local and
+# international spellings of the same number match
+PHONE_SUFFIX_DIGITS = 10
+# Upper bound on candidates gathered from one prefix before ranking
+MAX_PREFIX_CANDIDATES = 500
+
+# Match tiers, best first; a contact's score is the sum over query terms
+EXACT, PREFIX, PHONETIC, FUZZY = 4, 3, 2, 1
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def parse_person(person: dict) -> Dict:
+    """Flatten a People API person into the contact dict used across the app"""
+    resource_name = person.get('resourceName', '')
+
+    def first(field: str, key: str):
+        values = person.get(field) or []
+        return values[0].get(key, '') if values else None
+
+    return {
+        'id': resource_name.replace('people/', '') if resource_name else '',
+        'name': first('names', 'displayName') or '',
+        'email': first('emailAddresses', 'value'),
+        'phone': first('phoneNumbers', 'value'),
+        'company': first('organizations', 'name'),
+        'notes': first('biographies', 'value'),
+        'is_favorite': is_starred(person),
+        'resource_name': resource_name,
+    }
+
+
+def is_starred(person: dict) -> bool:
+    return any(
+        m.get('contactGroupMembership', {}).get('contactGroupResourceName') == STARRED_GROUP
+        for m in person.get('memberships', [])
+    )
+
+
+def with_starred(person: dict, starred: bool) -> dict:
+    """Copy of a person with its starred membership set"""
+    memberships = [
+        m for m in person.get('memberships', [])
+        if m.get('contactGroupMembership', {}).get('contactGroupResourceName') != STARRED_GROUP
+    ]
+    if starred:
+        memberships.append({'contactGroupMembership': {'contactGroupResourceName': STARRED_GROUP}})
+    return dict(person, memberships=memberships)
+
+
+def normalize(text: str) -> str:
+    """Lowercase with accents removed"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def soundex(word: str) -> str:
+    """American Soundex code of a word ('' if it has no letters)"""
+    letters = [c for c in normalize(word) if 'a' <= c <= 'z']
+    if not letters:
+        return ''
+    codes = {c: str(d) for d, group in enumerate(
+        ["aeiouy", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"]) for c in group}
+    result = letters[0].upper()
+    previous = codes.get(letters[0], '')
+    for c in letters[1:]:
+        code = codes.get(c, '')  # h and w keep the previous code
+        if code and code != previous and code != '0':
+            result += code
+        if c not in 'hw':
+            previous = code
+    return (result + '000')[:4]
+
+
+class _PrefixIndex:
+    """
+    Keys mapped to the ids of the contacts they belong to. Prefix lookups
+    bisect a sorted key list, so they cost O(log n + matches) however long
+    the keys (emails, phone numbers) are.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, Set[str]] = {}
+        self._sorted: Optional[List[str]] = None  # built on the first prefix lookup
+
+    def add(self, key: str, contact_id: str):
+        ids = self.ids.get(key)
+        if ids is None:
+            ids = self.ids[key] = set()
+            if self._sorted is not None:
+                bisect.insort(self._sorted, key)
+        ids.add(contact_id)
+
+    def discard(self, key: str, contact_id: str):
+        ids = self.ids.get(key)
+        if ids is None:
+            return
+        ids.discard(contact_id)
+        if not ids:
+            del self.ids[key]
+            if self._sorted is not None:
+                del self._sorted[bisect.bisect_left(self._sorted, key)]
+
+    def exact(self, key: str) -> Set[str]:
+        return self.ids.get(key, set())
+
+    def with_prefix(self, prefix: str, limit: int = MAX_PREFIX_CANDIDATES) -> Set[str]:
+        if self._sorted is None:
+            self._sorted = sorted(self.ids)
+        found: Set[str] = set()
+        for i in range(bisect.bisect_left(self._sorted, prefix), len(self._sorted)):
+            key = self._sorted[i]
+            if not key.startswith(prefix) or len(found) >= limit:
+                break
+            found |= self.ids[key]
+        return found
+
+
+class _Node:
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.ids: Set[str] = set()
+
+
+class _WordTrie:
+    """Character trie over name words, walked with a bounded edit distance for typo matches"""
+
+    def __init__(self):
+        self.root = _Node()
+
+    def add(self, word: str, contact_id: str):
+        node = self.root
+        for c in word:
+            node = node.children.setdefault(c, _Node())
+        node.ids.add(contact_id)
+
+    def discard(self, word: str, contact_id: str):
+        path = [self.root]
+        for c in word:
+            node = path[-1].children.get(c)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].ids.discard(contact_id)
+        # Prune branches left empty
+        for depth in range(len(word), 0, -1):
+            node = path[depth]
+            if node.ids or node.children:
+                break
+            del path[depth - 1].children[word[depth - 1]]
+
+    def within_distance(self, word: str, max_distance: int) -> Set[str]:
+        """Ids of words within max_distance edits of word (Levenshtein rows shared along trie paths)"""
+        found: Set[str] = set()
+        first_row = list(range(len(word) + 1))
+        stack = [(child, c, first_row) for c, child in self.root.children.items()]
+        while stack:
+            node, c, previous = stack.pop()
+            row = [previous[0] + 1]
+            for i in range(1, len(word) + 1):
+                row.append(min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + (word[i - 1] != c)))
+            if row[-1] <= max_distance:
+                found.update(node.ids)
+            if min(row) <= max_distance:
+                stack.extend((child, next_c, row) for next_c, child in node.children.items())
+        return found
+
+
+class ContactIndex:
+    """
+    In-memory lookup structure over mirrored contacts. Not thread-safe on
+    its own; ContactsMirror guards it with a lock.
+    """
+
+    def __init__(self):
+        self.contacts: Dict[str, Dict] = {}  # resource name -> parsed contact
+        self._names = _PrefixIndex()     # name words and whole names
+        self._handles = _PrefixIndex()   # emails, email local-part words and phone digits
+        self._words = _WordTrie()        # alphabetic name words, for typos
+        self._phonetic: Dict[str, Set[str]] = {}
+        self._keys: Dict[str, Tuple[List[str], List[str], List[str], List[str]]] = {}
+        self._order: Dict[str, Tuple[bool, str]] = {}  # tie-break: favorites, then name
+
+    @staticmethod
+    def _keys_for(contact: Dict) -> Tuple[List[str], List[str], List[str], List[str]]:
+        words = _WORD_RE.findall(normalize(contact.get('name') or ''))
+        names = words + ([' '.join(words)] if len(words) > 1 else [])
+        handles = []
+        email = normalize(contact.get('email') or '')
+        if email:
+            handles += [email] + _WORD_RE.findall(email.split('@')[0])
+        digits = re.sub(r"\D", "", contact.get('phone') or '')
+        if digits:
+            handles += [digits, digits[-PHONE_SUFFIX_DIGITS:]]
+        alpha = [w for w in words if w.isalpha()]
+        codes = [soundex(w) for w in alpha]
+        return tuple(list(dict.fromkeys(keys)) for keys in (names, handles, alpha, codes))
+
+    def put(self, contact: Dict):
+        contact_id = contact['resource_name']
+        self.remove(contact_id)
+        if not contact.get('name'):
+            return  # Unnamed entries are not listed or searchable, as before
+        keys = self._keys_for(contact)
+        names, handles, words, codes = keys
+        for key in names:
+            self._names.add(key, contact_id)
+        for key in handles:
+            self._handles.add(key, contact_id)
+        for word in words:
+            self._words.add(word, contact_id)
+        for code in codes:
+            self._phonetic.setdefault(code, set()).add(contact_id)
+        self.contacts[contact_id] = contact
+        self._keys[contact_id] = keys
+        self._order[contact_id] = (not contact.get('is_favorite'), contact['name'].lower())
+
+    def remove(self, contact_id: str):
+        keys = self._keys.pop(contact_id, None)
+        self.contacts.pop(contact_id, None)
+        self._order.pop(contact_id, None)
+        if not keys:
+            return
+        names, handles, words, codes = keys
+        for key in names:
+            self._names.discard(key, contact_id)
+        for key in handles:
+            self._handles.discard(key, contact_id)
+        for word in words:
+            self._words.discard(word, contact_id)
+        for code in codes:
+            ids = self._phonetic.get(code)
+            if ids is not None:
+                ids.discard(contact_id)
+                if not ids:
+                    del self._phonetic[code]
+
+    def _term_scores(self, term: str) -> Dict[str, int]:
+        """Best match tier per contact for one query term"""
+        scores: Dict[str, int] = {}
+
+        def offer(ids: Iterable[str], tier: int):
+            for contact_id in ids:
+                if scores.get(contact_id, 0) < tier:
+                    scores[contact_id] = tier
+
+        indexes = (self._handles,) if term.isdigit() else (self._names, self._handles)
+        for index in indexes:
+            offer(index.exact(term), EXACT)
+            offer(index.with_prefix(term), PREFIX)
+        if term.isalpha() and len(term) >= 2:
+            offer(self._phonetic.get(soundex(term), ()), PHONETIC)
+            # Typos are only looked for when nothing else matched
+            if len(term) >= 4 and not scores:
+                offer(self._words.within_distance(term, 1 if len(term) < 7 else 2), FUZZY)
+        return scores
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Contacts matching every term of the query (name words, email or
+        phone), best matches first: exact, prefix, sound-alike, then typo
+        matches; favorites break ties.
+        """
+        text = normalize(query).strip()
+        digits = re.sub(r"[\s\-+().]", "", text)
+        if digits.isdigit() and len(digits) >= 3:
+            terms = [digits]
+        elif '@' in text:
+            terms = [text]
+        else:
+            terms = _WORD_RE.findall(text)
+        if not terms:
+            return []
+
+        totals: Optional[Dict[str, int]] = None
+        for term in terms:
+            scores = self._term_scores(term)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {cid: totals[cid] + s for cid, s in scores.items() if cid in totals}
+            if not totals:
+                return []
+        order = self._order
+        ranked = heapq.nsmallest(limit, totals, key=lambda cid: (-totals[cid], order[cid]))
+        return [self.contacts[cid] for cid in ranked]
+
+
+class ContactsMirror(SyncedMirror):
+    """
+    Usage:
+        contacts_mirror.sync(service)            # full or incremental
+        contacts_mirror.search('ravi', 5)        # local lookup
+    """
+
+    sync_name = "Contacts mirror"
+    sync_thread_name = "contacts-mirror-sync"
+
+    def __init__(self, db_path: str = CONTACTS_DB_PATH):
+        super().__init__(db_path)
+        self._index: Optional[ContactIndex] = None
+        self._index_lock = threading.RLock()
+        self._init_db()
+
+    @property
+    def sync_interval(self) -> float:
+        return settings.CONTACTS_SYNC_INTERVAL
+
+    def _get_conn(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self):
+        with self._get_conn() as conn:
+            # Background syncs write while requests read
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS contacts (
+                    resource_name TEXT PRIMARY KEY,
+                    data TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS contacts_sync_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+
+    # --- state ---
+
+    def sync_token(self) -> Optional[str]:
+        row = self._read_conn().execute("SELECT value FROM contacts_sync_state WHERE key='sync_token'").fetchone()
+        return row[0] if row else None
+
+    def is_ready(self) -> bool:
+        """True once a full sync has completed"""
+        return self.sync_token() is not None
+
+    def clear(self):
+        """Forget the mirrored contacts (e.g. on logout or account change)"""
+        with self._sync_lock(), self._get_conn() as conn:
+            conn.execute("DELETE FROM contacts")
+            conn.execute("DELETE FROM contacts_sync_state")
+            with self._index_lock:
+                self._index = None
+            self._last_sync.clear()
+
+    # --- sync ---
+
+    def sync(self, service) -> Dict[str, object]:
+        """Bring the mirror up to date: incremental if possible, otherwise full"""
+        return self._sync(service)
+
+    def sync_in_background(self, get_service: Callable[[], object]) -> Optional[threading.Thread]:
+        return self._sync_in_background(get_service)
+
+    def _sync_locked(self, service) -> Dict[str, object]:
+        sync_token = self.sync_token()
+        if sync_token is None:
+            stats = self._full_sync(service)
+        else:
+            try:
+                stats = self._incremental_sync(service, sync_token)
+            except HttpError as e:
+                # Tokens expire after 7 days; Google answers 400 EXPIRED_SYNC_TOKEN (410 on older paths)
+                expired = e.resp.status == 410 or (e.resp.status == 400 and b"EXPIRED_SYNC_TOKEN" in (e.content or b""))
+                if not expired:
+                    raise
+                logger.info("Contacts sync token expired, running a full resync")
+                stats = self._full_sync(service)
+        return stats
+
+    @staticmethod
+    def _list_all(service, **params) -> Tuple[List[dict], Optional[str]]:
+        """Every page of connections.list: (people, nextSyncToken)"""
+        people: List[dict] = []
+        page_token = None
+        while True:
+            page = service.people().connections().list(
+                resourceName='people/me', pageSize=PAGE_SIZE, personFields=PERSON_FIELDS,
+                requestSyncToken=True, pageToken=page_token, **params,
+            ).execute()
+            people.extend(page.get('connections', []))
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                return people, page.get('nextSyncToken')
+
+    def _full_sync(self, service) -> Dict[str, object]:
+        start = time.perf_counter()
+        people, sync_token = self._list_all(service)
+        with self._get_conn() as conn:
+            conn.execute("DELETE FROM contacts")
+            self._upsert(conn, people)
+            self._set_token(conn, sync_token)
+        with self._index_lock:
+            self._index = None  # rebuilt from the table on the next read
+
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"Contacts mirror full sync: {len(people)} contacts in {elapsed:.0f}ms")
+        return {"mode": "full", "contacts": len(people)}
+
+    def _incremental_sync(self, service, sync_token: str) -> Dict[str, object]:
+        people, next_token = self._list_all(service, syncToken=sync_token)
+        deleted = [p['resourceName'] for p in people if p.get('metadata', {}).get('deleted')]
+        changed = [p for p in people if not p.get('metadata', {}).get('deleted')]
+        with self._get_conn() as conn:
+            self._upsert(conn, changed)
+            self._delete(conn, deleted)
+            if next_token:
+                self._set_token(conn, next_token)
+        return {"mode": "incremental", "changed": len(changed), "deleted": len(deleted)}
+
+    @staticmethod
+    def _set_token(conn: sqlite3.Connection, sync_token: Optional[str]):
+        conn.execute(
+            "INSERT OR REPLACE INTO contacts_sync_state (key, value) VALUES ('sync_token', ?)", (sync_token,)
+        )
+
+    # --- writes ---
+
+    def put(self, person: dict):
+        """Write-through of a person just created or updated through the API"""
+        if not self.is_ready():
+            return
+        with self._get_conn() as conn:
+            self._upsert(conn, [person])
+
+    def set_starred(self, resource_name: str, starred: bool):
+        """Write-through of a favorite toggle"""
+        row = self._read_conn().execute("SELECT data FROM contacts WHERE resource_name=?", (resource_name,)).fetchone()
+        if row:
+            self.put(with_starred(json.loads(row[0]), starred))
+
+    def remove(self, resource_name: str):
+        """Write-through of a deletion"""
+        with self._get_conn() as conn:
+            self._delete(conn, [resource_name])
+
+    def _upsert(self, conn: sqlite3.Connection, people: Iterable[dict]):
+        people = list(people)
+        conn.executemany(
+            "INSERT OR REPLACE INTO contacts (resource_name, data) VALUES (?, ?)",
+            [(p['resourceName'], json.dumps(p)) for p in people],
+        )
+        with self._index_lock:
+            if self._index is not None:
+                for person in people:
+                    self._index.put(parse_person(person))
+
+    def _delete(self, conn: sqlite3.Connection, resource_names: List[str]):
+        conn.executemany("DELETE FROM contacts WHERE resource_name=?", [(r,) for r in resource_names])
+        with self._index_lock:
+            if self._index is not None:
+                for resource_name in resource_names:
+                    self._index.remove(resource_name)
+
+    # --- reads ---
+
+    def _loaded_index(self) -> ContactIndex:
+        """The in-memory index, built from the table on first use"""
+        if self._index is None:
+            index = ContactIndex()
+            for (data,) in self._read_conn().execute("SELECT data FROM contacts"):
+                index.put(parse_person(json.loads(data)))
+            self._index = index
+        return self._index
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        with self._index_lock:
+            return self._loaded_index().search(query, limit)
+
+    def get(self, resource_name: str) -> Optional[Dict]:
+        with self._index_lock:
+            return self._loaded_index().contacts.get(resource_name)
+
+    def all(self, favorites_only: bool = False) -> List[Dict]:
+        """Every named contact, sorted by name"""
+        with self._index_lock:
+            contacts = list(self._loaded_index().contacts.values())
+        if favorites_only:
+            contacts = [c for c in contacts if c['is_favorite']]
+        return sorted(contacts, key=lambda c: c['name'].lower())
+
+    def contact_count(self) -> int:
+        return self._read_conn().execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+
+contacts_mirror = ContactsMirror()
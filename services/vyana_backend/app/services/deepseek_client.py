@@ -5,21 +5,24 @@ LangGraph-based AI Agent using DeepSeek's API directly
 import os
 import json
 import logging
-import re
+import threading
 import httpx
-from typing import TypedDict, Annotated, Sequence, Literal
+from typing import TypedDict, Annotated, Sequence, Literal, Dict, Any, Callable, Tuple
 from datetime import datetime
 
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, AIMessageChunk, SystemMessage, ToolMessage
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
 from langgraph.graph.message import add_messages
 
 from app.config import settings
 from app.services.langgraph_tools import get_all_tools, get_mcp_tools_as_langchain
 from app.services.mcp_service import mcp_service
 from app.services.cache_service import cache_service
+from app.services.response_formatter import StreamingFormatter, format_response
+from app.services.tool_executor import offload_tools, execute_tool_calls
+from app.services.http_client import http_client
 
 # Setup logging
 logging.basicConfig(level=logging.DEBUG)
@@ -55,6 +58,58 @@ class AgentState(TypedDict):
     custom_instructions: str
 
 
+class AgentGraphRegistry:
+    """
+    Cache of compiled LangGraph agent graphs.
+
+    Building a graph loads every tool, converts MCP tools, binds them to the
+    LLM and compiles a StateGraph, so graphs are compiled once per
+    (model, tools_enabled, mcp_enabled, MCP tools version) and reused across
+    requests. Graphs built against an older MCP tool set are dropped as soon
+    as a graph for the new version is compiled.
+    """
+
+    def __init__(self):
+        self._graphs: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: Tuple, builder: Callable[[], Any]):
+        """Return the cached graph for key, compiling it with builder on a miss"""
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is not None:
+                self.hits += 1
+                return graph
+
+        # Compile outside the lock; a concurrent duplicate build is harmless
+        graph = builder()
+
+        with self._lock:
+            mcp_version = key[-1]
+            stale = [k for k in self._graphs if k[-1] != mcp_version]
+            for k in stale:
+                del self._graphs[k]
+            if stale:
+                logger.info(f"Dropped {len(stale)} agent graphs compiled for an older MCP tool set")
+            self.misses += 1
+            return self._graphs.setdefault(key, graph)
+
+    def clear(self):
+        """Drop all cached graphs"""
+        with self._lock:
+            self._graphs.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "graphs": len(self._graphs),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
 class DeepSeekClient:
     """
     LangGraph-based AI Agent Client using DeepSeek API
@@ -75,6 +130,10 @@ class DeepSeekClient:
         self.max_output_tokens = int(os.getenv("DEEPSEEK_MAX_OUTPUT_TOKENS", "4096"))
         self.temperature = float(os.getenv("DEEPSEEK_TEMPERATURE", "0.3"))
         
+        # Compiled agent graphs and per-model LLMs, reused across requests
+        self._graph_registry = AgentGraphRegistry()
+        self._llms: Dict[str, ChatOpenAI] = {}
+        
         # Initialize DeepSeek LLM via LangChain OpenAI (DeepSeek is OpenAI-compatible)
         if api_key:
             self.llm = ChatOpenAI(
@@ -84,12 +143,13 @@ class DeepSeekClient:
                 temperature=self.temperature,
                 max_tokens=self.max_output_tokens,
             )
+            self._llms[self.model_name] = self.llm
             logger.info(f"DeepSeekClient initialized with model: {self.model_name}")
         else:
             self.llm = None
             logger.error("DeepSeekClient could not be initialized - no API key")
     
-    def transcribe_audio(self, file_content: bytes, filename: str) -> str:
+    async def transcribe_audio(self, file_content: bytes, filename: str) -> str:
         """
         Transcribe audio using OpenAI Whisper API or compatible service.
         Falls back to basic speech recognition if no API key available.
@@ -99,18 +159,17 @@ class DeepSeekClient:
         
         if openai_key:
             try:
-                import httpx
-                with httpx.Client(timeout=60.0) as client:
-                    response = client.post(
-                        f"{WHISPER_BASE_URL}/audio/transcriptions",
-                        headers={"Authorization": f"Bearer {openai_key}"},
-                        files={"file": (filename, file_content)},
-                        data={"model": "whisper-1"}
-                    )
-                    if response.status_code == 200:
-                        return response.json().get("text", "")
-                    else:
-                        logger.error(f"Whisper API error: {response.status_code} - {response.text}")
+                response = await http_client.post(
+                    f"{WHISPER_BASE_URL}/audio/transcriptions",
+                    headers={"Authorization": f"Bearer {openai_key}"},
+                    files={"file": (filename, file_content)},
+                    data={"model": "whisper-1"},
+                    timeout=60.0,
+                )
+                if response.status_code == 200:
+                    return response.json().get("text", "")
+                else:
+                    logger.error(f"Whisper API error: {response.status_code} - {response.text}")
             except Exception as e:
                 logger.error(f"Transcription error with OpenAI: {e}")
         
@@ -118,24 +177,25 @@ class DeepSeekClient:
         logger.warning("No OPENAI_API_KEY set for audio transcription")
         raise ValueError("Audio transcription requires OPENAI_API_KEY to be set for Whisper API")
     
-    def _get_system_prompt(self, current_date: str, day_of_week: str, current_datetime: str, custom_instructions: str = None, include_mcp: bool = True) -> str:
-        """Build the system prompt with context"""
-        
-        # Build MCP tools section dynamically
+    def _get_mcp_prompt_section(self) -> str:
+        """Build the MCP tools section of the system prompt"""
         mcp_tools_section = ""
-        if include_mcp:
-            try:
-                mcp_tool_defs = mcp_service.get_all_tools_for_llm()
-                if mcp_tool_defs:
-                    mcp_tools_section = "\n\n**ZERODHA/STOCK MARKET ACCESS (IMPORTANT)**:\nYou have DIRECT access to the user's Zerodha trading account via MCP tools. When the user asks about:\n"
-                    mcp_tools_section += "- Portfolio, holdings, stocks, investments → Use `mcp_zerodha_get_holdings`\n"
-                    mcp_tools_section += "- Positions, intraday trades → Use `mcp_zerodha_get_positions`\n"
-                    mcp_tools_section += "- Margins, funds, balance → Use `mcp_zerodha_get_margins`\n"
-                    mcp_tools_section += "- Orders placed today → Use `mcp_zerodha_get_orders`\n"
-                    mcp_tools_section += "- Stock prices, quotes → Use `mcp_zerodha_get_quote`\n"
-                    mcp_tools_section += "\n**YOU MUST USE THESE TOOLS** - do NOT say you don't have access. The user has connected their Zerodha account.\n"
-            except Exception as e:
-                logger.warning(f"Could not get MCP tools for prompt: {e}")
+        try:
+            mcp_tool_defs = mcp_service.get_all_tools_for_llm()
+            if mcp_tool_defs:
+                mcp_tools_section = "\n\n**ZERODHA/STOCK MARKET ACCESS (IMPORTANT)**:\nYou have DIRECT access to the user's Zerodha trading account via MCP tools. When the user asks about:\n"
+                mcp_tools_section += "- Portfolio, holdings, stocks, investments → Use `mcp_zerodha_get_holdings`\n"
+                mcp_tools_section += "- Positions, intraday trades → Use `mcp_zerodha_get_positions`\n"
+                mcp_tools_section += "- Margins, funds, balance → Use `mcp_zerodha_get_margins`\n"
+                mcp_tools_section += "- Orders placed today → Use `mcp_zerodha_get_orders`\n"
+                mcp_tools_section += "- Stock prices, quotes → Use `mcp_zerodha_get_quote`\n"
+                mcp_tools_section += "\n**YOU MUST USE THESE TOOLS** - do NOT say you don't have access. The user has connected their Zerodha account.\n"
+        except Exception as e:
+            logger.warning(f"Could not get MCP tools for prompt: {e}")
+        return mcp_tools_section
+    
+    def _get_system_prompt(self, current_date: str, day_of_week: str, current_datetime: str, custom_instructions: str = None, mcp_tools_section: str = "") -> str:
+        """Build the system prompt with context"""
         
         system_content = f"""You are Vyana, a cheerful, intelligent, and highly capable personal assistant with a friendly, feminine persona. You are here to help the user with their daily life, work, and productivity in a warm and engaging way.
 
@@ -178,7 +238,8 @@ If the user's request requires a tool, you MUST call the appropriate tool. If no
             except Exception as e:
                 logger.warning(f"Could not load MCP tools: {e}")
         
-        return tools
+        # Blocking tools run on the bounded tool pool, not the event loop
+        return offload_tools(tools)
     
     def _trim_messages(self, messages):
         """Trim conversation history to reduce token usage."""
@@ -190,26 +251,42 @@ If the user's request requires a tool, you MUST call the appropriate tool. If no
     
     def _sanitize_output(self, text: str) -> str:
         """Sanitize output to avoid code formatting in chat responses."""
-        if not text:
-            return text
-        text = text.replace("`", "")
-        return self._format_numbered_list(text)
-
-    def _format_numbered_list(self, text: str) -> str:
-        """Ensure numbered list items appear one per line with spacing."""
-        if not text or not re.search(r"\b\d+\.", text):
-            return text
-        # Normalize list markers like "1.Item" -> "1. Item"
-        text = re.sub(r"\b(\d+)\.(\S)", r"\1. \2", text)
-        # Ensure each numbered item starts on its own line
-        text = re.sub(r"(?<!\n)(\b\d+\.\s)", r"\n\1", text)
-        # Add a blank line between numbered items
-        text = re.sub(r"\n(\d+\.\s)", r"\n\n\1", text)
-        # Align common fields on new lines within each item
-        text = re.sub(r"\s*(\*+\s*)?(Time|Due|Description|Notes|Type):", r"\n\1\2:", text, flags=re.IGNORECASE)
-        # Normalize extra blank lines (max one blank line between items)
-        text = re.sub(r"\n{3,}", "\n\n", text)
-        return text.strip()
+        return format_response(text)
+    
+    def _get_llm(self, model_name: str = None) -> ChatOpenAI:
+        """Get the (cached) LLM instance for a model"""
+        model = model_name or self.model_name
+        llm = self._llms.get(model)
+        if llm is None:
+            llm = ChatOpenAI(
+                api_key=self.api_key,
+                base_url=DEEPSEEK_BASE_URL,
+                model=model,
+                temperature=self.temperature,
+                max_tokens=self.max_output_tokens,
+            )
+            self._llms[model] = llm
+        return llm
+    
+    def get_agent_graph(self, tools_enabled: bool = True, mcp_enabled: bool = True, model_name: str = None):
+        """
+        Get a compiled agent graph from the registry.
+        Graphs are rebuilt only when the model, tool toggles or the set of
+        connected MCP servers change.
+        """
+        if not self.api_key:
+            raise ValueError("DEEPSEEK_API_KEY not configured")
+        
+        model = model_name or self.model_name
+        key = (model, bool(tools_enabled), bool(mcp_enabled), mcp_service.tools_version)
+        return self._graph_registry.get_or_build(
+            key,
+            lambda: self._create_agent_graph(
+                tools_enabled=tools_enabled,
+                mcp_enabled=mcp_enabled,
+                model_name=model
+            )
+        )
     
     def _create_agent_graph(self, tools_enabled: bool = True, mcp_enabled: bool = True, model_name: str = None):
         """Create the LangGraph agent workflow"""
@@ -218,16 +295,7 @@ If the user's request requires a tool, you MUST call the appropriate tool. If no
             raise ValueError("DEEPSEEK_API_KEY not configured")
         
         # Select appropriate LLM
-        if model_name and model_name != self.model_name:
-            llm = ChatOpenAI(
-                api_key=self.api_key,
-                base_url=DEEPSEEK_BASE_URL,
-                model=model_name,
-                temperature=self.temperature,
-                max_tokens=self.max_output_tokens,
-            )
-        else:
-            llm = self.llm
+        llm = self._get_llm(model_name)
         
         # Get tools if enabled
         tools = self._get_tools(include_mcp=mcp_enabled) if tools_enabled else []
@@ -242,11 +310,12 @@ If the user's request requires a tool, you MUST call the appropriate tool. If no
         else:
             llm_with_tools = llm
         
-        # Capture mcp_enabled for closure
-        include_mcp_in_prompt = mcp_enabled
+        # The MCP prompt section only changes when MCP servers (dis)connect,
+        # which also invalidates this graph, so build it once here
+        mcp_tools_section = self._get_mcp_prompt_section() if mcp_enabled else ""
         
         # Define the agent node
-        def agent_node(state: AgentState):
+        async def agent_node(state: AgentState):
             """The main agent node that calls the LLM"""
             messages = state["messages"]
             
@@ -256,14 +325,14 @@ If the user's request requires a tool, you MUST call the appropriate tool. If no
                 day_of_week=state.get("day_of_week", ""),
                 current_datetime=state.get("current_time", ""),
                 custom_instructions=state.get("custom_instructions", ""),
-                include_mcp=include_mcp_in_prompt
+                mcp_tools_section=mcp_tools_section
             )
             
             # Prepend system message
             full_messages = [SystemMessage(content=system_prompt)] + list(messages)
             
             # Call LLM
-            response = llm_with_tools.invoke(full_messages)
+            response = await llm_with_tools.ainvoke(full_messages)
             
             # Log if tool calls were made
             if hasattr(response, "tool_calls") and response.tool_calls:
@@ -291,8 +360,14 @@ If the user's request requires a tool, you MUST call the appropriate tool. If no
         workflow.add_node("agent", agent_node)
         
         if tools:
-            tool_node = ToolNode(tools)
-            workflow.add_node("tools", tool_node)
+            tools_by_name = {t.name: t for t in tools}
+            
+            async def tools_node(state: AgentState, config: RunnableConfig):
+                """Run the requested tool calls (read-only ones in parallel)"""
+                tool_calls = state["messages"][-1].tool_calls
+                return {"messages": await execute_tool_calls(tool_calls, tools_by_name, config)}
+            
+            workflow.add_node("tools", tools_node)
             
             # Add edges
             workflow.add_conditional_edges(
@@ -343,8 +418,8 @@ If the user's request requires a tool, you MUST call the appropriate tool. If no
         current_date = now.strftime("%Y-%m-%d")
         day_of_week = now.strftime("%A")
         
-        # Create agent graph
-        graph = self._create_agent_graph(
+        # Get compiled agent graph
+        graph = self.get_agent_graph(
             tools_enabled=tools_enabled,
             mcp_enabled=mcp_enabled,
             model_name=model
@@ -374,32 +449,63 @@ If the user's request requires a tool, you MUST call the appropriate tool. If no
         )
         
         try:
-            # Stream the graph execution
+            # Stream the graph execution: "messages" yields LLM token chunks,
+            # "updates" yields completed node outputs (tool calls/results),
+            # "custom" yields progress reported by long-running MCP tools
             final_response = ""
+            formatter = StreamingFormatter()
+            turn_streamed = False
             
-            async for event in graph.astream(initial_state):
-                # Process events from the graph
-                for node_name, node_output in event.items():
+            async for mode, chunk in graph.astream(initial_state, stream_mode=["messages", "updates", "custom"]):
+                if mode == "custom":
+                    if isinstance(chunk, dict) and chunk.get("type") == "tool_progress":
+                        yield f"data: {json.dumps(chunk)}\n\n"
+                    continue
+                if mode == "messages":
+                    msg, metadata = chunk
+                    if metadata.get("langgraph_node") != "agent" or not isinstance(msg, AIMessageChunk):
+                        continue
+                    if isinstance(msg.content, str) and msg.content:
+                        turn_streamed = True
+                        delta = formatter.feed(msg.content)
+                        if delta:
+                            final_response += delta
+                            yield f"data: {json.dumps({'type': 'text', 'content': delta})}\n\n"
+                    continue
+                
+                for node_name, node_output in chunk.items():
+                    messages_output = (node_output or {}).get("messages", [])
                     if node_name == "agent":
-                        messages_output = node_output.get("messages", [])
                         for msg in messages_output:
-                            if isinstance(msg, AIMessage):
-                                # Check for tool calls
-                                if hasattr(msg, "tool_calls") and msg.tool_calls:
-                                    # Tool calls are being made, wait for results
-                                    logger.info(f"Tool calls: {[tc['name'] for tc in msg.tool_calls]}")
-                                elif msg.content:
-                                    # Regular content - stream it
-                                    content = self._sanitize_output(msg.content)
-                                    final_response = content
-                                    yield f"data: {json.dumps({'type': 'text', 'content': content})}\n\n"
+                            if not isinstance(msg, AIMessage):
+                                continue
+                            # The agent turn is complete, emit any held-back text
+                            # (or the whole message if the model didn't stream tokens)
+                            delta = ""
+                            if not turn_streamed and isinstance(msg.content, str) and msg.content:
+                                delta = formatter.feed(msg.content)
+                            delta += formatter.flush()
+                            if delta:
+                                final_response += delta
+                                yield f"data: {json.dumps({'type': 'text', 'content': delta})}\n\n"
+                            if msg.tool_calls:
+                                logger.info(f"Tool calls: {[tc['name'] for tc in msg.tool_calls]}")
+                                for tc in msg.tool_calls:
+                                    yield f"data: {json.dumps({'type': 'tool_start', 'id': tc.get('id'), 'name': tc['name']})}\n\n"
+                        # Next agent turn starts as a new paragraph
+                        formatter = StreamingFormatter(continuation=bool(final_response))
+                        turn_streamed = False
                     
                     elif node_name == "tools":
-                        # Tool results - log them
-                        messages_output = node_output.get("messages", [])
                         for msg in messages_output:
                             if isinstance(msg, ToolMessage):
-                                logger.info(f"Tool result: {msg.name} -> {msg.content[:100]}...")
+                                logger.info(f"Tool result: {msg.name} -> {str(msg.content)[:100]}...")
+                                yield f"data: {json.dumps({'type': 'tool_end', 'id': msg.tool_call_id, 'name': msg.name, 'status': msg.status, 'latency_ms': msg.additional_kwargs.get('latency_ms')})}\n\n"
+            
+            delta = formatter.flush()
+            if delta:
+                final_response += delta
+                yield f"data: {json.dumps({'type': 'text', 'content': delta})}\n\n"
             
             # If no content was yielded, send a fallback
             if not final_response:
@@ -448,8 +554,8 @@ If the user's request requires a tool, you MUST call the appropriate tool. If no
         current_date = now.strftime("%Y-%m-%d")
         day_of_week = now.strftime("%A")
         
-        # Create agent graph
-        graph = self._create_agent_graph(
+        # Get compiled agent graph
+        graph = self.get_agent_graph(
             tools_enabled=tools_enabled,
             mcp_enabled=mcp_enabled,
             model_name=model
@@ -0,0 +1,528 @@
+"""
+Gmail Mailbox Mirror for Vyana
+Local SQLite copy of recent mailbox metadata (ids, headers, snippet, labels,
+internalDate) so listings, summaries and unread counts are answered locally.
+Kept current incrementally with users.history.list from a stored historyId;
+falls back to a full resync when Gmail reports the history id as expired.
+An FTS5 index over subject, sender, snippet and plain-text body serves
+ranked, prefix-matching search.
+"""
+import base64
+import html
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from app.config import settings
+from app.services.synced_mirror import SyncedMirror
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get("DATA_DIR", ".")
+os.makedirs(DATA_DIR, exist_ok=True)
+MIRROR_DB_PATH = os.path.join(DATA_DIR, "gmail_mirror.db")
+
+# Headers kept in the mirror
+MIRROR_HEADERS = ['Subject', 'From', 'To', 'Date']
+# Gmail accepts up to 100 calls per batch request but recommends at most 50
+BATCH_SIZE = 50
+# Per-message errors in a batch worth asking again for (rate limits, server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Follow-up batches for those messages, each half the size of the last
+BATCH_RETRIES = 3
+BATCH_RETRY_DELAY = 1.0  # seconds before the first follow-up, doubled per retry
+HISTORY_TYPES = ['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved']
+# Bumped when the schema changes; an older mirror is rebuilt by a full resync
+SCHEMA_VERSION = "2"
+# Longest body text put in the search index
+MAX_INDEXED_BODY = 20_000
+# bm25 column weights: subject, sender, snippet, body, labels
+RANK_WEIGHTS = (10.0, 5.0, 2.0, 1.0, 0.0)
+# Only the newest N matches of a query are ranked, which bounds the cost of
+# very common terms (docids increase with message date)
+SEARCH_CANDIDATES = 1000
+
+# Gmail's category: search terms and the labels behind them
+CATEGORY_LABELS = {
+    'primary': 'CATEGORY_PERSONAL',
+    'social': 'CATEGORY_SOCIAL',
+    'updates': 'CATEGORY_UPDATES',
+    'promotions': 'CATEGORY_PROMOTIONS',
+    'forums': 'CATEGORY_FORUMS',
+}
+# Labels whose id is their upper-cased name. User labels are stored by id
+# (Label_123), which a label: search can't be matched against locally.
+SYSTEM_LABELS = {'INBOX', 'SENT', 'DRAFT', 'TRASH', 'SPAM', 'STARRED', 'IMPORTANT', 'UNREAD', 'CHAT'}
+
+
+def batch_get_messages(service, message_ids: List[str], **get_params) -> List[dict]:
+    """
+    messages.get for many ids using batch HTTP requests (one round-trip per
+    BATCH_SIZE messages). Order is preserved; messages deleted meanwhile are
+    skipped, as are any still failing after the retries in _batch_get.
+    """
+    results, _ = _batch_get(service, message_ids, **get_params)
+    return [results[msg_id] for msg_id in message_ids if msg_id in results]
+
+
+def _batch_get(service, message_ids: List[str], **get_params) -> Tuple[Dict[str, dict], List[str]]:
+    """
+    Fetch messages in batches; rate-limited or server-failed ones are asked
+    for again in smaller follow-up batches with backoff. Returns the
+    messages by id and the ids that could not be fetched (404s excluded).
+    """
+    results: Dict[str, dict] = {}
+    errors: Dict[str, int] = {}  # id -> HTTP status of its last failure
+
+    def on_response(request_id, response, exception):
+        if exception is None:
+            results[request_id] = response
+            errors.pop(request_id, None)
+        else:
+            errors[request_id] = exception.resp.status if isinstance(exception, HttpError) else None
+            if errors[request_id] not in RETRY_STATUSES:
+                logger.warning(f"Failed to fetch message {request_id}: {exception}")
+
+    pending, size = list(message_ids), BATCH_SIZE
+    for attempt in range(BATCH_RETRIES + 1):
+        if attempt:
+            time.sleep(BATCH_RETRY_DELAY * 2 ** (attempt - 1))
+            size = max(1, size // 2)
+        for start in range(0, len(pending), size):
+            batch = service.new_batch_http_request(callback=on_response)
+            for msg_id in pending[start:start + size]:
+                batch.add(service.users().messages().get(userId='me', id=msg_id, **get_params), request_id=msg_id)
+            batch.execute()
+        pending = [msg_id for msg_id in pending if errors.get(msg_id, 0) in RETRY_STATUSES]
+        if not pending:
+            break
+    if pending:
+        logger.warning(f"Gave up fetching {len(pending)} messages after {BATCH_RETRIES} retries")
+    return results, [msg_id for msg_id, status in errors.items() if status != 404]
+
+
+def plain_text_body(payload: dict) -> str:
+    """Decoded text/plain body of a message payload (tag-stripped text/html as a fallback)"""
+    found: Dict[str, str] = {}
+
+    def walk(part: dict):
+        mime = part.get('mimeType', '')
+        data = part.get('body', {}).get('data')
+        if data and mime in ('text/plain', 'text/html') and mime not in found:
+            try:
+                found[mime] = base64.urlsafe_b64decode(data).decode(errors="ignore")
+            except Exception:
+                pass
+        for sub in part.get('parts', []) or []:
+            walk(sub)
+
+    walk(payload)
+    if 'text/plain' in found:
+        text = found['text/plain']
+    elif 'text/html' in found:
+        text = html.unescape(re.sub(r"(?is)<(script|style).*?</\1>|<[^>]+>", " ", found['text/html']))
+    else:
+        return ""
+    return " ".join(text.split())[:MAX_INDEXED_BODY]
+
+
+_TERM = re.compile(r'(-?)(?:(\w+):)?("[^"]*"|\S+)')
+_FIELD_COLUMNS = {'from': 'sender', 'subject': 'subject'}
+
+
+def _label_token(label: str) -> str:
+    """Index token for a label; the prefix keeps labels from matching text searches"""
+    return "label_" + "_".join(re.findall(r"[^\W_]+", label.lower()))
+
+
+def to_fts_query(query: str) -> Optional[Tuple[str, List[str]]]:
+    """
+    Translate a Gmail-style query into an FTS5 expression plus required labels.
+    Bare words match as prefixes; "quoted text" as a phrase; from: and
+    subject: restrict the column; is:unread, in:inbox, label: (system labels
+    only) and category: become label filters. Returns None for anything the
+    index can't answer (other operators, OR, negation, user labels).
+    """
+    clauses: List[str] = []
+    labels: List[str] = []
+    for negated, field, value in _TERM.findall(query):
+        field = field.lower()
+        if negated or value == "OR":
+            return None
+        if field == 'is' and value.lower() in ('unread', 'starred', 'important'):
+            labels.append(value.upper())
+        elif field == 'in' and value.lower() in ('inbox', 'sent', 'trash', 'spam'):
+            labels.append(value.upper())
+        elif field == 'label':
+            if value.upper() not in SYSTEM_LABELS:
+                return None
+            labels.append(value.upper())
+        elif field == 'category':
+            if value.lower() not in CATEGORY_LABELS:
+                return None
+            labels.append(CATEGORY_LABELS[value.lower()])
+        elif field and field not in _FIELD_COLUMNS:
+            return None
+        else:
+            if value.startswith('"'):
+                words = re.findall(r"\w+", value)
+                expression = f'"{" ".join(words)}"' if words else ""
+            else:
+                expression = " AND ".join(f'"{w}"*' for w in re.findall(r"\w+", value))
+            if not expression:
+                continue
+            column = _FIELD_COLUMNS.get(field)
+            clauses.append(f"{column}:({expression})" if column else f"({expression})")
+    return " AND ".join(clauses), labels
+
+
+class GmailMirror(SyncedMirror):
+    """
+    Usage:
+        gmail_mirror.sync(service)            # full or incremental
+        gmail_mirror.recent(10, ['INBOX'])    # local read
+    """
+
+    sync_name = "Gmail mirror"
+    sync_thread_name = "gmail-mirror-sync"
+
+    def __init__(self, db_path: str = MIRROR_DB_PATH):
+        super().__init__(db_path)
+        self._init_db()
+
+    @property
+    def sync_interval(self) -> float:
+        return settings.GMAIL_SYNC_INTERVAL
+
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        with self._get_conn() as conn:
+            # Background syncs write while requests read
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS gmail_messages (
+                    id TEXT PRIMARY KEY,
+                    thread_id TEXT,
+                    subject TEXT,
+                    sender TEXT,
+                    recipients TEXT,
+                    date TEXT,
+                    snippet TEXT,
+                    internal_date INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_gmail_messages_date ON gmail_messages(internal_date DESC);
+                CREATE TABLE IF NOT EXISTS gmail_labels (
+                    message_id TEXT NOT NULL,
+                    label TEXT NOT NULL,
+                    PRIMARY KEY (message_id, label)
+                );
+                CREATE INDEX IF NOT EXISTS idx_gmail_labels_label ON gmail_labels(label);
+                CREATE TABLE IF NOT EXISTS gmail_sync_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                -- Search index; rowid is gmail_search_docs.docid (assigned oldest first)
+                CREATE TABLE IF NOT EXISTS gmail_search_docs (
+                    docid INTEGER PRIMARY KEY,
+                    message_id TEXT NOT NULL UNIQUE
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS gmail_fts USING fts5(
+                    subject, sender, snippet, body, labels,
+                    tokenize="unicode61 remove_diacritics 2 tokenchars '_'", prefix='2 3'
+                );
+            """)
+            if self._get_state(conn, "schema") != SCHEMA_VERSION:
+                # Mirrored rows predate the current schema: rebuild on the next sync
+                conn.execute("DELETE FROM gmail_sync_state WHERE key='history_id'")
+                self._set_state(conn, "schema", SCHEMA_VERSION)
+
+    # --- state ---
+
+    def _get_state(self, conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM gmail_sync_state WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, conn: sqlite3.Connection, key: str, value) -> None:
+        conn.execute("INSERT OR REPLACE INTO gmail_sync_state (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def history_id(self) -> Optional[str]:
+        with self._get_conn() as conn:
+            return self._get_state(conn, "history_id")
+
+    def is_ready(self) -> bool:
+        """True once a full sync has completed"""
+        return self.history_id() is not None
+
+    def clear(self):
+        """Forget the mirrored mailbox (e.g. on logout or account change)"""
+        with self._sync_lock(), self._get_conn() as conn:
+            self._delete_all(conn)
+            conn.execute("DELETE FROM gmail_sync_state WHERE key != 'schema'")
+            self._last_sync.clear()
+
+    # --- sync ---
+
+    def sync(self, service) -> Dict[str, object]:
+        """Bring the mirror up to date: incremental if possible, otherwise full"""
+        return self._sync(service)
+
+    def sync_in_background(self, get_service: Callable[[], object]) -> Optional[threading.Thread]:
+        return self._sync_in_background(get_service)
+
+    def _sync_locked(self, service) -> Dict[str, object]:
+        history_id = self.history_id()
+        if history_id is None:
+            stats = self._full_sync(service)
+        else:
+            try:
+                stats = self._incremental_sync(service, history_id)
+            except HttpError as e:
+                if e.resp.status != 404:
+                    raise
+                logger.info(f"Gmail history id {history_id} expired, running a full resync")
+                stats = self._full_sync(service)
+        return stats
+
+    def _full_sync(self, service) -> Dict[str, object]:
+        start = time.perf_counter()
+        # Read the history id first so changes made during the sync are replayed next time
+        history_id = service.users().getProfile(userId='me').execute()['historyId']
+
+        ids: List[str] = []
+        page_token = None
+        while len(ids) < settings.GMAIL_MIRROR_MAX_MESSAGES:
+            page = service.users().messages().list(
+                userId='me',
+                maxResults=min(500, settings.GMAIL_MIRROR_MAX_MESSAGES - len(ids)),
+                pageToken=page_token,
+            ).execute()
+            ids.extend(m['id'] for m in page.get('messages', []))
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                break
+
+        messages, failed = self._fetch(service, ids)
+        unread = self._fetch_unread(service)
+        with self._get_conn() as conn:
+            self._delete_all(conn)
+            # Oldest first so search docids follow message date
+            self._upsert(conn, reversed(messages))
+            if failed:
+                # Not a usable mirror: reads stay live and the next sync starts over
+                conn.execute("DELETE FROM gmail_sync_state WHERE key='history_id'")
+            else:
+                self._set_state(conn, "history_id", history_id)
+            self._set_state(conn, "inbox_unread", unread)
+            # Whether the whole mailbox fit in the mirror window
+            self._set_state(conn, "complete", int(page_token is None))
+            self._set_state(conn, "missing", len(failed))
+
+        elapsed = (time.perf_counter() - start) * 1000
+        if failed:
+            logger.warning(f"Gmail mirror full sync could not fetch {len(failed)} messages, will retry")
+        logger.info(f"Gmail mirror full sync: {len(messages)} messages in {elapsed:.0f}ms")
+        return {"mode": "full", "messages": len(messages)}
+
+    def _incremental_sync(self, service, history_id: str) -> Dict[str, object]:
+        added: Dict[str, None] = {}  # ordered set
+        deleted = set()
+        relabeled: Dict[str, List[str]] = {}
+
+        page_token = None
+        latest = history_id
+        while True:
+            page = service.users().history().list(
+                userId='me', startHistoryId=history_id, historyTypes=HISTORY_TYPES, pageToken=page_token,
+            ).execute()
+            for record in page.get('history', []):
+                for item in record.get('messagesAdded', []):
+                    added[item['message']['id']] = None
+                    deleted.discard(item['message']['id'])
+                for item in record.get('messagesDeleted', []):
+                    deleted.add(item['message']['id'])
+                    added.pop(item['message']['id'], None)
+                    relabeled.pop(item['message']['id'], None)
+                for key in ('labelsAdded', 'labelsRemoved'):
+                    for item in record.get(key, []):
+                        # message.labelIds is the full label set after the change
+                        relabeled[item['message']['id']] = item['message'].get('labelIds', [])
+            latest = page.get('historyId', latest)
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                break
+
+        if latest == history_id:
+            return {"mode": "incremental", "added": 0, "deleted": 0, "relabeled": 0}
+
+        messages, failed = self._fetch(service, list(added))
+        unread = self._fetch_unread(service)
+        with self._get_conn() as conn:
+            self._upsert(conn, reversed(messages))
+            for msg_id, labels in relabeled.items():
+                if msg_id not in added:
+                    self._set_labels(conn, msg_id, labels)
+            self._delete(conn, deleted)
+            self._trim(conn)
+            # With messages missing, keep the old history id so the next sync
+            # replays these changes (replaying is idempotent)
+            if not failed:
+                self._set_state(conn, "history_id", latest)
+            self._set_state(conn, "inbox_unread", unread)
+            self._set_state(conn, "missing", len(failed))
+        if failed:
+            logger.warning(f"Gmail mirror could not fetch {len(failed)} new messages, will retry")
+
+        return {"mode": "incremental", "added": len(messages), "deleted": len(deleted), "relabeled": len(relabeled)}
+
+    @staticmethod
+    def _fetch(service, message_ids: List[str]) -> Tuple[List[dict], List[str]]:
+        """Messages in the given order, and the ids that could not be fetched"""
+        if settings.GMAIL_INDEX_BODIES:
+            results, failed = _batch_get(service, message_ids, format='full')
+        else:
+            results, failed = _batch_get(service, message_ids, format='metadata', metadataHeaders=MIRROR_HEADERS)
+        return [results[msg_id] for msg_id in message_ids if msg_id in results], failed
+
+    @staticmethod
+    def _fetch_unread(service) -> int:
+        return service.users().labels().get(userId='me', id='INBOX').execute().get('messagesUnread', 0)
+
+    # --- writes ---
+
+    def _upsert(self, conn: sqlite3.Connection, messages: Iterable[dict]):
+        for m in messages:
+            payload = m.get('payload', {})
+            headers = {h['name']: h['value'] for h in payload.get('headers', [])}
+            subject = headers.get('Subject', '(No Subject)')
+            sender = headers.get('From', '(Unknown)')
+            snippet = m.get('snippet', '')
+            conn.execute(
+                """INSERT OR REPLACE INTO gmail_messages
+                   (id, thread_id, subject, sender, recipients, date, snippet, internal_date)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    m['id'], m.get('threadId'), subject, sender, headers.get('To', ''),
+                    headers.get('Date', ''), snippet, int(m.get('internalDate', 0)),
+                ),
+            )
+            labels = m.get('labelIds', [])
+            self._set_labels(conn, m['id'], labels)
+
+            row = conn.execute("SELECT docid FROM gmail_search_docs WHERE message_id=?", (m['id'],)).fetchone()
+            if row:
+                docid = row[0]
+                conn.execute("DELETE FROM gmail_fts WHERE rowid=?", (docid,))
+            else:
+                docid = conn.execute("INSERT INTO gmail_search_docs (message_id) VALUES (?)", (m['id'],)).lastrowid
+            conn.execute(
+                "INSERT INTO gmail_fts (rowid, subject, sender, snippet, body, labels) VALUES (?, ?, ?, ?, ?, ?)",
+                (docid, subject, sender, html.unescape(snippet), plain_text_body(payload), " ".join(map(_label_token, labels))),
+            )
+
+    def _set_labels(self, conn: sqlite3.Connection, message_id: str, labels: List[str]):
+        if not conn.execute("SELECT 1 FROM gmail_messages WHERE id=?", (message_id,)).fetchone():
+            return  # Not mirrored (older than the mirror window)
+        conn.execute("DELETE FROM gmail_labels WHERE message_id=?", (message_id,))
+        conn.executemany(
+            "INSERT INTO gmail_labels (message_id, label) VALUES (?, ?)",
+            [(message_id, label) for label in labels],
+        )
+        conn.execute(
+            "UPDATE gmail_fts SET labels=? WHERE rowid = (SELECT docid FROM gmail_search_docs WHERE message_id=?)",
+            (" ".join(map(_label_token, labels)), message_id),
+        )
+
+    def _delete(self, conn: sqlite3.Connection, message_ids: Iterable[str]):
+        params = [(msg_id,) for msg_id in message_ids]
+        conn.executemany(
+            "DELETE FROM gmail_fts WHERE rowid = (SELECT docid FROM gmail_search_docs WHERE message_id=?)", params
+        )
+        conn.executemany("DELETE FROM gmail_search_docs WHERE message_id=?", params)
+        conn.executemany("DELETE FROM gmail_messages WHERE id=?", params)
+        conn.executemany("DELETE FROM gmail_labels WHERE message_id=?", params)
+
+    def _delete_all(self, conn: sqlite3.Connection):
+        for table in ("gmail_messages", "gmail_labels", "gmail_search_docs", "gmail_fts"):
+            conn.execute(f"DELETE FROM {table}")
+
+    def _trim(self, conn: sqlite3.Connection):
+        """Keep only the newest GMAIL_MIRROR_MAX_MESSAGES messages"""
+        old = [row[0] for row in conn.execute(
+            "SELECT id FROM gmail_messages ORDER BY internal_date DESC LIMIT -1 OFFSET ?",
+            (settings.GMAIL_MIRROR_MAX_MESSAGES,),
+        )]
+        self._delete(conn, old)
+        if old:
+            self._set_state(conn, "complete", 0)
+
+    # --- reads ---
+
+    def recent(self, limit: int, labels: Optional[List[str]] = None) -> List[dict]:
+        """Newest messages carrying all of the given labels"""
+        labels = labels or []
+        conditions = " AND ".join(
+            "EXISTS (SELECT 1 FROM gmail_labels l WHERE l.message_id = m.id AND l.label = ?)" for _ in labels
+        )
+        query = "SELECT * FROM gmail_messages m"
+        if conditions:
+            query += f" WHERE {conditions}"
+        query += " ORDER BY m.internal_date DESC LIMIT ?"
+        with self._get_conn() as conn:
+            return [dict(row) for row in conn.execute(query, (*labels, limit))]
+
+    def search(self, query: str, limit: int = 10) -> Optional[List[dict]]:
+        """
+        Ranked full-text search over the mirrored messages (best match first,
+        among the newest SEARCH_CANDIDATES matches). Returns None if the query
+        uses operators the local index can't answer.
+        """
+        parsed = to_fts_query(query)
+        if parsed is None:
+            return None
+        expression, labels = parsed
+        if not expression:
+            return self.recent(limit, labels)
+
+        # Label filters are matched inside the index (labels column)
+        for label in labels:
+            expression += f" AND labels:{_label_token(label)}"
+        weights = ", ".join(str(w) for w in RANK_WEIGHTS)
+        sql = f"""
+            SELECT m.* FROM (
+                SELECT rowid, bm25(gmail_fts, {weights}) AS score FROM gmail_fts
+                WHERE gmail_fts MATCH ? ORDER BY rowid DESC LIMIT ?
+            ) AS hits
+            JOIN gmail_search_docs d ON d.docid = hits.rowid
+            JOIN gmail_messages m ON m.id = d.message_id
+            ORDER BY hits.score
+            LIMIT ?
+        """
+        rows = self._read_conn().execute(sql, (expression, SEARCH_CANDIDATES, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def is_complete(self) -> bool:
+        """True if every message in the mailbox is mirrored (not just the newest window)"""
+        with self._get_conn() as conn:
+            return self._get_state(conn, "complete") == "1" and self._get_state(conn, "missing") in (None, "0")
+
+    def unread_count(self) -> int:
+        """INBOX unread count as of the last sync"""
+        with self._get_conn() as conn:
+            return int(self._get_state(conn, "inbox_unread") or 0)
+
+    def message_count(self) -> int:
+        with self._get_conn() as conn:
+            return conn.execute("SELECT COUNT(*) FROM gmail_messages").fetchone()[0]
+
+
+gmail_mirror = GmailMirror()
@@ -1,41 +1,76 @@
-from googleapiclient.discovery import build
+from app.config import settings
+from app.services.attachment_cache import CachedAttachment, attachment_cache
+from app.services.gmail_mirror import CATEGORY_LABELS, batch_get_messages, gmail_mirror
+from app.services.google_client import google_clients
 from app.services.google_oauth import oauth_service
 import base64
+import logging
 from email.mime.text import MIMEText
-from typing import Tuple, Dict
+from typing import Optional, Tuple, Dict, List
+from urllib.parse import quote
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+# Only these headers are requested for listings (format='metadata')
+METADATA_HEADERS = ['Subject', 'From', 'Date']
+
+
+def _header(headers: List[dict], name: str, default: str = '') -> str:
+    return next((h['value'] for h in headers if h['name'] == name), default)
+
 
 class GmailService:
     def get_service(self):
         creds = oauth_service.get_credentials()
         if not creds:
             return None
-        return build('gmail', 'v1', credentials=creds)
+        return google_clients.get('gmail', 'v1', creds)
 
     def get_unread_count(self):
         service = self.get_service()
         if not service:
             return "Gmail not connected"
+        mirror = self._mirror()
+        if mirror:
+            return mirror.unread_count()
         try:
             results = service.users().labels().get(userId='me', id='INBOX').execute()
             return results.get('messagesUnread', 0)
         except Exception as e:
             return f"Error: {e}"
 
+    def _mirror(self):
+        """
+        The local mailbox mirror, or None while it has not been synced yet.
+        Starts a background sync whenever the mirror is stale.
+        """
+        if not settings.GMAIL_MIRROR_ENABLED:
+            return None
+        gmail_mirror.sync_in_background(self.get_service)
+        return gmail_mirror if gmail_mirror.is_ready() else None
+
+    def _list_metadata(self, service, **list_params) -> List[dict]:
+        results = service.users().messages().list(userId='me', **list_params).execute()
+        ids = [m['id'] for m in results.get('messages', [])]
+        return batch_get_messages(service, ids, format='metadata', metadataHeaders=METADATA_HEADERS)
+
     def summarize_emails(self, max_results=5):
         service = self.get_service()
         if not service:
             return "Gmail not connected"
         
+        mirror = self._mirror()
+        if mirror:
+            summary = [f"- From: {m['sender']} | Subject: {m['subject']}" for m in mirror.recent(max_results, ['INBOX', 'UNREAD'])]
+            return "\n".join(summary) if summary else "No unread emails."
+
         try:
-            results = service.users().messages().list(userId='me', labelIds=['INBOX'], q='is:unread', maxResults=max_results).execute()
-            messages = results.get('messages', [])
-            
             summary = []
-            for msg in messages:
-                m_data = service.users().messages().get(userId='me', id=msg['id'], format='metadata').execute()
+            for m_data in self._list_metadata(service, labelIds=['INBOX'], q='is:unread', maxResults=max_results):
                 headers = m_data.get('payload', {}).get('headers', [])
-                subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '(No Subject)')
-                sender = next((h['value'] for h in headers if h['name'] == 'From'), '(Unknown)')
+                subject = _header(headers, 'Subject', '(No Subject)')
+                sender = _header(headers, 'From', '(Unknown)')
                 summary.append(f"- From: {sender} | Subject: {subject}")
                 
             return "\n".join(summary) if summary else "No unread emails."
@@ -47,26 +82,36 @@ class GmailService:
         if not service:
              return {"error": "Gmail not connected"}
         
+        mirror = self._mirror()
+        if mirror and (not category or category in CATEGORY_LABELS):
+             labels = ['INBOX'] + ([CATEGORY_LABELS[category]] if category else [])
+             return {"messages": [
+                 {
+                     "id": m['id'],
+                     "subject": m['subject'],
+                     "sender": m['sender'],
+                     "timestamp": m['internal_date'],
+                     "snippet": m['snippet'],
+                 }
+                 for m in mirror.recent(limit, labels)
+             ]}
+
         try:
              query = 'label:INBOX'
              if category:
                  # category should be 'primary', 'social', 'updates', 'promotions', 'forums'
                  query += f' category:{category}'
              
-             results = service.users().messages().list(userId='me', q=query, maxResults=limit).execute()
-             messages = results.get('messages', [])
-             
              msg_list = []
-             for msg in messages:
-                  m_data = service.users().messages().get(userId='me', id=msg['id'], format='metadata').execute()
+             for m_data in self._list_metadata(service, q=query, maxResults=limit):
                   headers = m_data.get('payload', {}).get('headers', [])
-                  subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '(No Subject)')
-                  sender = next((h['value'] for h in headers if h['name'] == 'From'), '(Unknown)')
+                  subject = _header(headers, 'Subject', '(No Subject)')
+                  sender = _header(headers, 'From', '(Unknown)')
                   # Get internal date (ms)
                   internal_date = int(m_data.get('internalDate', 0))
                   
                   msg_list.append({
-                      "id": msg['id'],
+                      "id": m_data['id'],
                       "subject": subject,
                       "sender": sender,
                       "timestamp": internal_date,
@@ -78,29 +123,37 @@ class GmailService:
 
     def search_messages(self, query: str, limit: int = 10):
         """
-        Search emails using Gmail query format (e.g., 'from:sender subject:topic')
+        Search emails using Gmail query format (e.g., 'from:sender subject:topic').
+        Answered from the local full-text index when possible; goes to Gmail for
+        operators the index doesn't support, or when a partial mirror finds too few.
         """
         service = self.get_service()
         if not service:
              return {"error": "Gmail not connected"}
         
+        mirror = self._mirror()
+        local = mirror.search(query, limit) if mirror else None
+        if local is not None and (len(local) >= limit or mirror.is_complete()):
+             return {"messages": [
+                 {
+                     "id": m['id'],
+                     "subject": m['subject'],
+                     "sender": m['sender'],
+                     "date": m['date'],
+                     "snippet": m['snippet'],
+                 }
+                 for m in local
+             ]}
+
         try:
-             results = service.users().messages().list(userId='me', q=query, maxResults=limit).execute()
-             messages = results.get('messages', [])
-             
              msg_list = []
-             for msg in messages:
-                  m_data = service.users().messages().get(userId='me', id=msg['id'], format='metadata').execute()
+             for m_data in self._list_metadata(service, q=query, maxResults=limit):
                   headers = m_data.get('payload', {}).get('headers', [])
-                  subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '(No Subject)')
-                  sender = next((h['value'] for h in headers if h['name'] == 'From'), '(Unknown)')
-                  date = next((h['value'] for h in headers if h['name'] == 'Date'), '')
-                  
                   msg_list.append({
-                      "id": msg['id'],
-                      "subject": subject,
-                      "sender": sender,
-                      "date": date,
+                      "id": m_data['id'],
+                      "subject": _header(headers, 'Subject', '(No Subject)'),
+                      "sender": _header(headers, 'From', '(Unknown)'),
+                      "date": _header(headers, 'Date'),
                       "snippet": m_data.get('snippet', '')
                   })
              return {"messages": msg_list}
@@ -108,6 +161,11 @@ class GmailService:
              return {"error": str(e)}
 
     def get_message_details(self, message_id):
+        """
+        Full message with text and HTML bodies. Inline images (cid: references)
+        are not downloaded here: the HTML points at the attachment endpoint,
+        which fetches and caches each image when it is first requested.
+        """
         service = self.get_service()
         if not service:
             return {"error": "Gmail not connected"}
@@ -120,11 +178,11 @@ class GmailService:
             sender = next((h['value'] for h in headers if h['name'] == 'From'), '(Unknown)')
             date = next((h['value'] for h in headers if h['name'] == 'Date'), '')
             
-            text_body, html_body, inline_images = self._extract_bodies_and_inline_images(service, message_id, payload)
+            text_body, html_body, inline_parts = self._extract_bodies_and_inline_parts(payload)
 
-            if inline_images and html_body:
-                for cid, data_uri in inline_images.items():
-                    html_body = html_body.replace(f"cid:{cid}", data_uri)
+            if inline_parts and html_body:
+                for cid, part_id in inline_parts.items():
+                    html_body = html_body.replace(f"cid:{cid}", self.attachment_url(message_id, part_id))
             
             return {
                 "id": message_id,
@@ -137,10 +195,64 @@ class GmailService:
         except Exception as e:
             return {"error": str(e)}
 
-    def _extract_bodies_and_inline_images(self, service, message_id, payload) -> Tuple[str, str, Dict[str, str]]:
+    @staticmethod
+    def attachment_url(message_id: str, part_id: str) -> str:
+        """Link to the attachment endpoint: root-relative unless GMAIL_ATTACHMENT_BASE_URL is set"""
+        base_url = settings.GMAIL_ATTACHMENT_BASE_URL.rstrip('/')
+        return f"{base_url}/gmail/message/{quote(message_id)}/attachments/{quote(part_id)}"
+
+    def get_attachment(self, message_id: str, part_id: str) -> Optional[CachedAttachment]:
+        """
+        Decoded attachment bytes for one message part, from the on-disk cache
+        or fetched from Gmail once and cached. None if the message or part
+        doesn't exist; other Gmail errors are logged and raised (HttpError).
+        """
+        cached = attachment_cache.get(message_id, part_id)
+        if cached:
+            return cached
+
+        service = self.get_service()
+        if not service:
+            return None
+        try:
+            msg = service.users().messages().get(userId='me', id=message_id, format='full').execute()
+            part = self._find_part(msg.get('payload', {}), part_id)
+            if part is None:
+                return None
+
+            body = part.get('body', {})
+            data = body.get('data')
+            if not data and body.get('attachmentId'):
+                attachment = service.users().messages().attachments().get(
+                    userId='me', messageId=message_id, id=body['attachmentId']
+                ).execute()
+                data = attachment.get('data')
+        except HttpError as e:
+            if e.resp.status in (400, 404):
+                return None  # Unknown or malformed id, or deleted meanwhile
+            logger.error(f"Error fetching attachment {part_id} of {message_id}: {e}")
+            raise
+        if not data:
+            return None
+        return attachment_cache.put(
+            message_id, part_id, base64.urlsafe_b64decode(data),
+            part.get('mimeType') or 'application/octet-stream', part.get('filename', ''),
+        )
+
+    def _find_part(self, part: dict, part_id: str) -> Optional[dict]:
+        if part.get('partId') == part_id:
+            return part
+        for sub in part.get('parts', []) or []:
+            found = self._find_part(sub, part_id)
+            if found is not None:
+                return found
+        return None
+
+    def _extract_bodies_and_inline_parts(self, payload) -> Tuple[str, str, Dict[str, str]]:
+        """Text body, HTML body and a Content-ID -> partId map of inline images"""
         text_body = ""
         html_body = ""
-        inline_images: Dict[str, str] = {}
+        inline_parts: Dict[str, str] = {}
 
         def decode_body(data: str) -> str:
             try:
@@ -155,12 +267,11 @@ class GmailService:
             return None
 
         def walk_part(part):
-            nonlocal text_body, html_body, inline_images
+            nonlocal text_body, html_body
             mime = part.get('mimeType', '')
             headers = part.get('headers', [])
             body = part.get('body', {})
             data = body.get('data')
-            attachment_id = body.get('attachmentId')
 
             if mime == 'text/plain' and data and not text_body:
                 text_body = decode_body(data)
@@ -170,15 +281,8 @@ class GmailService:
                 content_id = get_header(headers, 'Content-ID')
                 if content_id:
                     content_id = content_id.strip('<>')
-                if attachment_id and content_id:
-                    attachment = service.users().messages().attachments().get(
-                        userId='me', messageId=message_id, id=attachment_id
-                    ).execute()
-                    attach_data = attachment.get('data')
-                    if attach_data:
-                        raw = base64.urlsafe_b64decode(attach_data)
-                        data_uri = f"data:{mime};base64,{base64.b64encode(raw).decode()}"
-                        inline_images[content_id] = data_uri
+                if content_id and part.get('partId') and (data or body.get('attachmentId')):
+                    inline_parts[content_id] = part['partId']
 
             for sub in part.get('parts', []) or []:
                 walk_part(sub)
@@ -195,7 +299,7 @@ class GmailService:
                 else:
                     text_body = decode_body(data)
 
-        return text_body, html_body, inline_images
+        return text_body, html_body, inline_parts
 
     def send_email(self, to_email, subject, body):
         service = self.get_service()
@@ -0,0 +1,99 @@
+"""
+Google API Client Factory for Vyana
+Caches built googleapiclient service objects per (API, version, credential
+identity) instead of calling build() on every operation. Discovery documents
+are parsed once per process; service objects and their httplib2 transports
+are kept per thread (httplib2.Http is not thread-safe) so each worker thread
+reuses its own keep-alive connection. A client is rebuilt only when the
+credentials' access token changes (i.e. after a refresh).
+"""
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import google_auth_httplib2
+import httplib2
+from google.oauth2.credentials import Credentials
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build, build_from_document
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def credential_identity(creds: Credentials) -> str:
+    """Stable identity of an authorized user (survives access-token refreshes)"""
+    raw = f"{creds.client_id}:{creds.refresh_token or creds.token}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+class GoogleClientFactory:
+    """
+    Usage:
+        service = google_clients.get('calendar', 'v3', creds)
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._documents: Dict[Tuple[str, str], Optional[dict]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._stats = {"builds": 0, "hits": 0}
+
+    def get(self, api: str, version: str, creds: Optional[Credentials]) -> Any:
+        """Return a service for the current thread, building it only if needed"""
+        if creds is None:
+            return None
+        key = (api, version, credential_identity(creds))
+        clients = self._clients()
+        cached = clients.get(key)
+        if cached is not None and cached[0] == creds.token:
+            with self._lock:
+                self._stats["hits"] += 1
+            return cached[1]
+
+        service = self._build(api, version, creds)
+        clients[key] = (creds.token, service)
+        with self._lock:
+            self._stats["builds"] += 1
+        if cached is not None:
+            logger.debug(f"Rebuilt {api} {version} client after credential refresh")
+        return service
+
+    def invalidate(self):
+        """Drop every cached client in all threads (e.g. on logout)"""
+        with self._lock:
+            self._generation += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _clients(self) -> Dict[Tuple[str, str, str], Tuple[Optional[str], Any]]:
+        local = self._local
+        if getattr(local, "generation", None) != self._generation:
+            local.clients = {}
+            local.generation = self._generation
+        return local.clients
+
+    def _document(self, api: str, version: str) -> Optional[dict]:
+        key = (api, version)
+        with self._lock:
+            if key not in self._documents:
+                raw = discovery_cache.get_static_doc(api, version)
+                self._documents[key] = json.loads(raw) if raw else None
+            return self._documents[key]
+
+    def _build(self, api: str, version: str, creds: Credentials) -> Any:
+        http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=settings.HTTP_TIMEOUT))
+        document = self._document(api, version)
+        if document is None:
+            # Not bundled with the client library: fetch it the usual way
+            return build(api, version, http=http, cache_discovery=False)
+        return build_from_document(document, http=http)
+
+
+google_clients = GoogleClientFactory()
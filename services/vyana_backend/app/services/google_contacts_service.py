@@ -4,9 +4,11 @@ Replaces local JSON storage with Google Contacts sync
 """
 import logging
 from typing import List, Dict, Optional
-from googleapiclient.discovery import build
+from app.config import settings
+from app.services.google_client import google_clients
 from googleapiclient.errors import HttpError
 from app.services.google_oauth import oauth_service
+from app.services.contacts_mirror import contacts_mirror, parse_person, with_starred
 
 logger = logging.getLogger(__name__)
 
@@ -25,54 +27,29 @@ class GoogleContactsService:
         creds = oauth_service.get_credentials()
         if not creds:
             return None
-        return build('people', 'v1', credentials=creds)
+        return google_clients.get('people', 'v1', creds)
     
+    def _mirror(self):
+        """
+        The local contacts mirror if it has completed a sync, else None.
+        Starts a background sync whenever the mirror is stale.
+        """
+        if not settings.CONTACTS_MIRROR_ENABLED:
+            return None
+        contacts_mirror.sync_in_background(self._get_service)
+        return contacts_mirror if contacts_mirror.is_ready() else None
+
     def _parse_contact(self, person: dict) -> Dict:
         """Parse Google People API person to contact dict"""
-        resource_name = person.get('resourceName', '')
-        contact_id = resource_name.replace('people/', '') if resource_name else ''
-        
-        # Get name
-        names = person.get('names', [])
-        name = names[0].get('displayName', '') if names else ''
-        
-        # Get email
-        emails = person.get('emailAddresses', [])
-        email = emails[0].get('value', '') if emails else None
-        
-        # Get phone
-        phones = person.get('phoneNumbers', [])
-        phone = phones[0].get('value', '') if phones else None
-        
-        # Get organization/company
-        orgs = person.get('organizations', [])
-        company = orgs[0].get('name', '') if orgs else None
-        
-        # Get notes/biography
-        bios = person.get('biographies', [])
-        notes = bios[0].get('value', '') if bios else None
-        
-        # Check if starred (favorite)
-        memberships = person.get('memberships', [])
-        is_favorite = any(
-            m.get('contactGroupMembership', {}).get('contactGroupResourceName') == 'contactGroups/starred'
-            for m in memberships
-        )
-        
-        return {
-            'id': contact_id,
-            'name': name,
-            'email': email,
-            'phone': phone,
-            'company': company,
-            'notes': notes,
-            'is_favorite': is_favorite,
-            'resource_name': resource_name,
-        }
+        return parse_person(person)
 
     def get_all_contacts(self, favorites_only: bool = False) -> List[Dict]:
         """Get all contacts from Google"""
         try:
+            mirror = self._mirror()
+            if mirror:
+                return mirror.all(favorites_only)
+
             service = self._get_service()
             if not service:
                 logger.warning("Google not connected")
@@ -115,6 +92,10 @@ class GoogleContactsService:
     def search_contacts(self, query: str) -> List[Dict]:
         """Search contacts by name, email, or phone"""
         try:
+            mirror = self._mirror()
+            if mirror:
+                return mirror.search(query)
+
             service = self._get_service()
             if not service:
                 return []
@@ -151,6 +132,11 @@ class GoogleContactsService:
     def get_contact(self, contact_id: str) -> Optional[Dict]:
         """Get a single contact by ID"""
         try:
+            mirror = self._mirror()
+            contact = mirror.get(f'people/{contact_id}') if mirror else None
+            if contact:
+                return contact
+
             service = self._get_service()
             if not service:
                 return None
@@ -204,9 +190,11 @@ class GoogleContactsService:
                         resourceName='contactGroups/starred',
                         body={'resourceNamesToAdd': [resource_name]}
                     ).execute()
+                    person = with_starred(person, True)
                 except Exception as e:
                     logger.warning(f"Could not add to starred: {e}")
             
+            contacts_mirror.put(person)
             contact = self._parse_contact(person)
             return {"success": True, "contact": contact, "message": f"Added contact {name}"}
             
@@ -283,9 +271,11 @@ class GoogleContactsService:
                             resourceName='contactGroups/starred',
                             body={'resourceNamesToRemove': [resource_name]}
                         ).execute()
+                    person = with_starred(person, is_favorite)
                 except Exception as e:
                     logger.warning(f"Could not update starred status: {e}")
             
+            contacts_mirror.put(person)
             contact = self._parse_contact(person)
             return {"success": True, "contact": contact, "message": "Contact updated"}
             
@@ -305,6 +295,7 @@ class GoogleContactsService:
             
             resource_name = f'people/{contact_id}'
             service.people().deleteContact(resourceName=resource_name).execute()
+            contacts_mirror.remove(resource_name)
             
             return {"success": True, "message": "Contact deleted"}
             
@@ -342,12 +333,14 @@ class GoogleContactsService:
                     resourceName='contactGroups/starred',
                     body={'resourceNamesToRemove': [resource_name]}
                 ).execute()
+                contacts_mirror.set_starred(resource_name, False)
                 return {"success": True, "is_favorite": False}
             else:
                 service.contactGroups().members().modify(
                     resourceName='contactGroups/starred',
                     body={'resourceNamesToAdd': [resource_name]}
                 ).execute()
+                contacts_mirror.set_starred(resource_name, True)
                 return {"success": True, "is_favorite": True}
             
         except HttpError as e:
@@ -361,11 +354,10 @@ class GoogleContactsService:
     def get_email_address(self, name: str) -> str:
         """Find email address for a name - for AI tool use"""
         try:
-            contacts = self.search_contacts(name)
-            if contacts:
-                contact = contacts[0]
-                if contact.get('email'):
-                    return f"{contact['email']} (found: {contact['name']})"
+            # Best match that actually has an email
+            contact = next((c for c in self.search_contacts(name) if c.get('email')), None)
+            if contact:
+                return f"{contact['email']} (found: {contact['name']})"
             return f"Contact '{name}' not found."
         except Exception as e:
             return f"Error finding contact: {str(e)}"
@@ -373,11 +365,10 @@ class GoogleContactsService:
     def get_phone_number(self, name: str) -> str:
         """Find phone number for a name - for AI tool use"""
         try:
-            contacts = self.search_contacts(name)
-            if contacts:
-                contact = contacts[0]
-                if contact.get('phone'):
-                    return f"{contact['phone']} (found: {contact['name']})"
+            # Best match that actually has a phone
+            contact = next((c for c in self.search_contacts(name) if c.get('phone')), None)
+            if contact:
+                return f"{contact['phone']} (found: {contact['name']})"
             return f"Phone number for '{name}' not found."
         except Exception as e:
             return f"Error finding phone: {str(e)}"
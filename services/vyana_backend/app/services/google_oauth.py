@@ -1,10 +1,22 @@
 import os
 import json
+import logging
 import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from google_auth_oauthlib.flow import Flow
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from app.config import settings
+from app.services.attachment_cache import attachment_cache
+from app.services.calendar_store import calendar_store
+from app.services.contacts_mirror import contacts_mirror
+from app.services.gmail_mirror import gmail_mirror
+from app.services.google_client import google_clients
+from app.services.tasks_mirror import tasks_mirror
+
+logger = logging.getLogger(__name__)
 
 # Database for tokens - use DATA_DIR for Docker compatibility
 DATA_DIR = os.environ.get("DATA_DIR", ".")
@@ -15,6 +27,14 @@ class OAuthService:
     def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
         self._init_db()
+
+        # In-process credential cache: SQLite is read once, then written through
+        self._creds: Credentials | None = None
+        self._loaded = False
+        # Single-flight: only one token refresh runs at a time
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread: threading.Thread | None = None
+        self._background_retry_at = 0.0
         
         # Scopes required for Gmail, Calendar, Tasks, and Contacts
         self.SCOPES = [
@@ -48,16 +68,73 @@ class OAuthService:
         return None
 
     def get_credentials(self) -> Credentials | None:
-        creds = self._load_creds()
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-                self._save_creds(creds)
-            except Exception as e:
-                print(f"Error refreshing token: {e}")
-                return None
+        """
+        Cached credentials; no database access once loaded.
+        Tokens close to expiry are refreshed in the background; an already
+        expired token is refreshed inline (concurrent callers share one refresh).
+        """
+        if not self._loaded:
+            with self._refresh_lock:
+                if not self._loaded:
+                    self._creds = self._load_creds()
+                    self._loaded = True
+
+        creds = self._creds
+        if creds is None:
+            return None
+        if creds.expired and creds.refresh_token:
+            with self._refresh_lock:
+                return self._refresh_locked(creds)
+        if self._expiring_soon(creds) and creds.refresh_token:
+            self._refresh_in_background(creds)
         return creds
 
+    def _expiring_soon(self, creds: Credentials) -> bool:
+        if creds.expiry is None:
+            return False
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return creds.expiry - now <= timedelta(seconds=settings.GOOGLE_TOKEN_REFRESH_MARGIN)
+
+    def _refresh_in_background(self, creds: Credentials):
+        if time.monotonic() < self._background_retry_at:
+            return  # Last attempt failed recently
+        if not self._refresh_lock.acquire(blocking=False):
+            return  # A refresh is already running
+
+        def run():
+            try:
+                self._refresh_locked(creds, background=True)
+            finally:
+                self._refresh_lock.release()
+
+        self._refresh_thread = threading.Thread(target=run, name="google-token-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def _refresh_locked(self, creds: Credentials, background: bool = False) -> Credentials | None:
+        """Refresh and write through; caller holds _refresh_lock"""
+        current = self._creds
+        if current is not creds:
+            # Refreshed (or logged out / re-authenticated) while we waited
+            return current
+        if not self._expiring_soon(current) and not current.expired:
+            return current
+
+        # Refresh a copy so readers never see a half-updated object
+        refreshed = Credentials.from_authorized_user_info(json.loads(current.to_json()))
+        try:
+            refreshed.refresh(Request())
+        except Exception as e:
+            logger.error(f"Error refreshing token: {e}")
+            if background:
+                # Keep using the still-valid token; try again a little later
+                self._background_retry_at = time.monotonic() + 30
+                return current
+            return None
+        self._save_creds(refreshed)
+        self._creds = refreshed
+        logger.info("Refreshed Google access token")
+        return refreshed
+
     def get_auth_url(self):
         flow = Flow.from_client_config(
             {
@@ -92,6 +169,11 @@ class OAuthService:
             flow.fetch_token(code=code)
             creds = flow.credentials
             self._save_creds(creds)
+            with self._refresh_lock:
+                self._creds = creds
+                self._loaded = True
+            # Possibly a different account: resync the mailbox, calendars, contacts and tasks from scratch
+            self._clear_account_caches()
             print("Successfully saved new credentials.")
             return "Authentication successful! You can close this window and return to the app."
         except Exception as e:
@@ -105,6 +187,24 @@ class OAuthService:
     def logout(self):
         with sqlite3.connect(self.db_path) as conn:
             conn.execute("DELETE FROM auth WHERE key='google_creds'")
-            return True
+        with self._refresh_lock:
+            self._creds = None
+            self._loaded = True
+        google_clients.invalidate()
+        self._clear_account_caches()
+        return True
+
+    @staticmethod
+    def _clear_account_caches():
+        """Drop everything cached for the signed-in account"""
+        # Imported here: calendar_service depends on this module
+        from app.services.calendar_service import calendar_service
+
+        gmail_mirror.clear()
+        attachment_cache.clear()
+        calendar_store.clear()
+        calendar_service.clear_cached_calendars()
+        contacts_mirror.clear()
+        tasks_mirror.clear()
 
 oauth_service = OAuthService()
@@ -1,25 +1,56 @@
 """
 Google Tasks API Service
-Provides integration with Google Tasks for task management
+Provides integration with Google Tasks for task management.
+Once a task list has synced into the local mirror, views are read from it
+and changes are applied locally and queued for Google (see tasks_mirror).
 """
-from googleapiclient.discovery import build
+from app.config import settings
+from app.services.google_client import google_clients
 from googleapiclient.errors import HttpError
-from app.services.google_oauth import OAuthService
+from app.services.google_oauth import oauth_service
+from app.services.tasks_mirror import parse_task, tasks_mirror
 from typing import Optional, List
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
-oauth_service = OAuthService()
-
 
 def get_tasks_service():
     """Get authenticated Google Tasks service"""
     creds = oauth_service.get_credentials()
     if not creds:
         raise Exception("Not authenticated with Google. Please authenticate first.")
-    return build('tasks', 'v1', credentials=creds)
+    return google_clients.get('tasks', 'v1', creds)
+
+
+def _connected_service():
+    """Tasks service for background syncs and replays; None when not signed in"""
+    creds = oauth_service.get_credentials()
+    return google_clients.get('tasks', 'v1', creds) if creds else None
+
+
+def _mirror(task_list_id: str):
+    """
+    The local tasks mirror if the task list has completed a sync, else None.
+    Starts a background sync whenever the list is stale.
+    """
+    if not settings.TASKS_MIRROR_ENABLED:
+        return None
+    tasks_mirror.sync_in_background(task_list_id, _connected_service)
+    return tasks_mirror if tasks_mirror.is_ready(task_list_id) else None
+
+
+def _queued(result):
+    """Send the change just queued in the mirror to Google shortly"""
+    tasks_mirror.flush_in_background(_connected_service)
+    return result
+
+
+def _flush_queue():
+    """Changes still queued reach Google before a direct call that may depend on them"""
+    if settings.TASKS_MIRROR_ENABLED and tasks_mirror.pending_count():
+        tasks_mirror.flush(get_tasks_service())
 
 
 def list_task_lists() -> List[dict]:
@@ -51,6 +82,10 @@ def list_tasks(task_list_id: str = '@default', show_completed: bool = False, max
         max_results: Maximum number of tasks to return
     """
     try:
+        mirror = _mirror(task_list_id)
+        if mirror:
+            return mirror.list_tasks(task_list_id, show_completed, max_results)
+
         service = get_tasks_service()
         results = service.tasks().list(
             tasklist=task_list_id,
@@ -60,45 +95,35 @@ def list_tasks(task_list_id: str = '@default', show_completed: bool = False, max
         ).execute()
         
         tasks = results.get('items', [])
-        return [
-            {
-                'id': task.get('id'),
-                'title': task.get('title', ''),
-                'notes': task.get('notes', ''),
-                'due': task.get('due'),  # RFC 3339 date string
-                'status': task.get('status'),  # 'needsAction' or 'completed'
-                'is_completed': task.get('status') == 'completed',
-                'completed': task.get('completed'),  # Completion date
-                'parent': task.get('parent'),  # Parent task ID for subtasks
-                'position': task.get('position'),
-                'updated': task.get('updated'),
-                'links': task.get('links', []),
-            }
-            for task in tasks
-        ]
+        return [parse_task(task) for task in tasks]
     except HttpError as e:
         logger.error(f"Error listing tasks: {e}")
         raise Exception(f"Failed to list tasks: {e}")
 
 
+def search_tasks(query: str, task_list_id: str = '@default') -> List[dict]:
+    """Open tasks whose title contains query (case-insensitive)"""
+    mirror = _mirror(task_list_id)
+    if mirror:
+        return mirror.search(task_list_id, query)
+    query_lower = query.lower()
+    tasks = list_tasks(task_list_id=task_list_id, show_completed=False, max_results=200)
+    return [t for t in tasks if query_lower in (t.get("title") or "").lower()]
+
+
 def get_task(task_list_id: str, task_id: str) -> dict:
     """Get a specific task"""
     try:
+        mirror = _mirror(task_list_id)
+        task = mirror.get(task_list_id, task_id) if mirror else None
+        if task:
+            return task
+
         service = get_tasks_service()
+        if settings.TASKS_MIRROR_ENABLED:
+            task_id = tasks_mirror.resolve(task_id)
         task = service.tasks().get(tasklist=task_list_id, task=task_id).execute()
-        return {
-            'id': task.get('id'),
-            'title': task.get('title', ''),
-            'notes': task.get('notes', ''),
-            'due': task.get('due'),
-            'status': task.get('status'),
-            'is_completed': task.get('status') == 'completed',
-            'completed': task.get('completed'),
-            'parent': task.get('parent'),
-            'position': task.get('position'),
-            'updated': task.get('updated'),
-            'links': task.get('links', []),
-        }
+        return parse_task(task)
     except HttpError as e:
         logger.error(f"Error getting task: {e}")
         raise Exception(f"Failed to get task: {e}")
@@ -122,8 +147,6 @@ def create_task(
         parent: Parent task ID for creating subtasks
     """
     try:
-        service = get_tasks_service()
-        
         task_body = {
             'title': title,
             'status': 'needsAction',
@@ -135,22 +158,20 @@ def create_task(
         if due:
             # Google Tasks API expects RFC 3339 date format
             task_body['due'] = f"{due}T00:00:00.000Z"
-        
+
+        mirror = _mirror(task_list_id)
+        if mirror:
+            # Shown at once with a local id; the insert is sent in the next batch
+            return _queued(mirror.create(task_list_id, task_body, parent))
+
+        service = get_tasks_service()
         task = service.tasks().insert(
             tasklist=task_list_id,
             body=task_body,
             parent=parent
         ).execute()
         
-        return {
-            'id': task.get('id'),
-            'title': task.get('title', ''),
-            'notes': task.get('notes', ''),
-            'due': task.get('due'),
-            'status': task.get('status'),
-            'is_completed': False,
-            'updated': task.get('updated'),
-        }
+        return parse_task(task)
     except HttpError as e:
         logger.error(f"Error creating task: {e}")
         raise Exception(f"Failed to create task: {e}")
@@ -176,20 +197,30 @@ def update_task(
         status: New status - 'needsAction' or 'completed' (optional)
     """
     try:
+        changes = {}
+        if title is not None:
+            changes['title'] = title
+        if notes is not None:
+            changes['notes'] = notes
+        if due is not None:
+            changes['due'] = f"{due}T00:00:00.000Z"
+        if status is not None:
+            changes['status'] = status
+
+        mirror = _mirror(task_list_id)
+        if mirror:
+            task = mirror.update(task_list_id, task_id, changes)
+            if task is None:
+                raise Exception(f"Task {task_id} not found")
+            return _queued(task)
+
         service = get_tasks_service()
         
         # Get current task
         task = service.tasks().get(tasklist=task_list_id, task=task_id).execute()
         
         # Update fields
-        if title is not None:
-            task['title'] = title
-        if notes is not None:
-            task['notes'] = notes
-        if due is not None:
-            task['due'] = f"{due}T00:00:00.000Z"
-        if status is not None:
-            task['status'] = status
+        task.update(changes)
         
         updated = service.tasks().update(
             tasklist=task_list_id,
@@ -197,15 +228,7 @@ def update_task(
             body=task
         ).execute()
         
-        return {
-            'id': updated.get('id'),
-            'title': updated.get('title', ''),
-            'notes': updated.get('notes', ''),
-            'due': updated.get('due'),
-            'status': updated.get('status'),
-            'is_completed': updated.get('status') == 'completed',
-            'updated': updated.get('updated'),
-        }
+        return parse_task(updated)
     except HttpError as e:
         logger.error(f"Error updating task: {e}")
         raise Exception(f"Failed to update task: {e}")
@@ -224,6 +247,12 @@ def uncomplete_task(task_id: str, task_list_id: str = '@default') -> dict:
 def delete_task(task_id: str, task_list_id: str = '@default') -> bool:
     """Delete a task"""
     try:
+        mirror = _mirror(task_list_id)
+        if mirror:
+            if not mirror.delete(task_list_id, task_id):
+                raise Exception(f"Task {task_id} not found")
+            return _queued(True)
+
         service = get_tasks_service()
         service.tasks().delete(tasklist=task_list_id, task=task_id).execute()
         return True
@@ -249,6 +278,10 @@ def move_task(
     """
     try:
         service = get_tasks_service()
+        _flush_queue()
+        if settings.TASKS_MIRROR_ENABLED:
+            # Tasks created locally are moved by their Google ids
+            task_id, parent, previous = (tasks_mirror.resolve(i) for i in (task_id, parent, previous))
         
         task = service.tasks().move(
             tasklist=task_list_id,
@@ -256,6 +289,8 @@ def move_task(
             parent=parent,
             previous=previous
         ).execute()
+        if settings.TASKS_MIRROR_ENABLED:
+            tasks_mirror.put(task_list_id, task)
         
         return {
             'id': task.get('id'),
@@ -272,6 +307,7 @@ def clear_completed(task_list_id: str = '@default') -> bool:
     """Clear all completed tasks from a task list"""
     try:
         service = get_tasks_service()
+        _flush_queue()
         service.tasks().clear(tasklist=task_list_id).execute()
         return True
     except HttpError as e:
@@ -0,0 +1,248 @@
+"""
+Shared HTTP Client for Vyana
+One pooled async HTTP transport for all outbound integrations (search,
+weather, currency rates, Whisper, MCP servers, Kite API): per-host
+keep-alive pools, HTTP/2 when the h2 package is installed, global and
+per-host concurrency limits, retry with jittered backoff and timing hooks.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Statuses worth retrying (rate limited / upstream temporarily unavailable)
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+@dataclass
+class RequestTiming:
+    """Passed to timing hooks after every attempt"""
+    method: str
+    host: str
+    path: str
+    status: Optional[int]  # None if the request failed before a response
+    elapsed_ms: float
+    attempt: int
+    http_version: Optional[str] = None
+    error: Optional[str] = None
+
+
+class _LoopState:
+    """Client and limiters for one event loop (httpx/asyncio objects are loop-bound)"""
+
+    def __init__(self, client: httpx.AsyncClient, max_concurrency: int):
+        self.client = client
+        self.global_limit = asyncio.Semaphore(max_concurrency)
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+class HTTPClient:
+    """
+    Shared async HTTP client.
+
+    Usage:
+        response = await http_client.get("https://wttr.in/Mumbai", params={...})
+        async with http_client.stream("POST", url, json=body) as response:
+            ...
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            transport: Optional custom transport (tests route requests to
+                in-process stub apps with httpx.ASGITransport)
+        """
+        self._transport = transport
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self._host_limit_overrides: Dict[str, int] = {}
+        self._hooks: List[Callable[[RequestTiming], None]] = []
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self.add_hook(self._record)
+
+    # --- configuration ---
+
+    def add_hook(self, hook: Callable[[RequestTiming], None]):
+        """Register a callable that receives a RequestTiming after every attempt"""
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[RequestTiming], None]):
+        if hook in self._hooks:
+            self._hooks.remove(hook)
+
+    def set_host_limit(self, host: str, limit: int):
+        """Override the concurrent request limit for one host"""
+        self._host_limit_overrides[host] = limit
+        for state in self._states.values():
+            state.host_limits.pop(host, None)
+
+    # --- requests ---
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Send a request and return the (fully read) response.
+
+        Transport errors and RETRY_STATUSES are retried with jittered
+        exponential backoff. Non-idempotent methods (POST, PATCH) are only
+        retried when `retries` is given explicitly.
+        """
+        method = method.upper()
+        if retries is None:
+            retries = settings.HTTP_RETRIES if method in IDEMPOTENT_METHODS else 0
+        state = self._state()
+        host = httpx.URL(url).host
+
+        for attempt in range(retries + 1):
+            start = time.perf_counter()
+            response = None
+            error = None
+            async with self._limits(state, host):
+                try:
+                    response = await state.client.request(method, url, timeout=timeout or settings.HTTP_TIMEOUT, **kwargs)
+                except httpx.TransportError as e:
+                    error = e
+            self._emit(method, url, response, start, attempt, error)
+
+            retryable = error is not None or response.status_code in RETRY_STATUSES
+            if not retryable or attempt == retries:
+                if error is not None:
+                    raise error
+                return response
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, *, timeout: Optional[float] = None, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Stream a response body (no retries; the concurrency slot is held until the block exits)"""
+        state = self._state()
+        host = httpx.URL(url).host
+        start = time.perf_counter()
+        async with self._limits(state, host):
+            try:
+                async with state.client.stream(method.upper(), url, timeout=timeout or settings.HTTP_TIMEOUT, **kwargs) as response:
+                    self._emit(method.upper(), url, response, start, 0, None)
+                    yield response
+            except httpx.TransportError as e:
+                self._emit(method.upper(), url, None, start, 0, e)
+                raise
+
+    async def aclose(self):
+        """Close the pool of the current event loop (called on app shutdown)"""
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        if state:
+            await state.client.aclose()
+
+    # --- metrics ---
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-host request counts, errors, retries and latency"""
+        with self._lock:
+            return {
+                host: {**s, "avg_ms": round(s["total_ms"] / s["requests"], 2) if s["requests"] else 0.0}
+                for host, s in self._stats.items()
+            }
+
+    def _record(self, timing: RequestTiming):
+        with self._lock:
+            s = self._stats.setdefault(timing.host, {
+                "requests": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0,
+            })
+            s["requests"] += 1
+            s["total_ms"] += timing.elapsed_ms
+            s["max_ms"] = max(s["max_ms"], timing.elapsed_ms)
+            if timing.attempt:
+                s["retries"] += 1
+            if timing.error or (timing.status and timing.status >= 500):
+                s["errors"] += 1
+
+    # --- internals ---
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = _LoopState(self._build_client(), settings.HTTP_MAX_CONCURRENCY)
+            self._states[loop] = state
+        return state
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = settings.HTTP2_ENABLED and HTTP2_AVAILABLE and self._transport is None
+        return httpx.AsyncClient(
+            http2=http2,
+            transport=self._transport,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    @asynccontextmanager
+    async def _limits(self, state: _LoopState, host: str):
+        host_limit = state.host_limits.get(host)
+        if host_limit is None:
+            limit = self._host_limit_overrides.get(host, settings.HTTP_MAX_CONCURRENCY_PER_HOST)
+            host_limit = state.host_limits[host] = asyncio.Semaphore(limit)
+        async with state.global_limit, host_limit:
+            yield
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        # "Full jitter": uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(settings.HTTP_RETRY_BACKOFF * (2 ** attempt), 5.0))
+
+    def _emit(self, method: str, url: str, response: Optional[httpx.Response], start: float, attempt: int, error: Optional[Exception]):
+        parsed = httpx.URL(url)
+        timing = RequestTiming(
+            method=method,
+            host=parsed.host,
+            path=parsed.path,
+            status=response.status_code if response is not None else None,
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+            attempt=attempt,
+            http_version=response.http_version if response is not None else None,
+            error=f"{type(error).__name__}: {error}" if error else None,
+        )
+        for hook in self._hooks:
+            try:
+                hook(timing)
+            except Exception as e:
+                logger.warning(f"HTTP timing hook failed: {e}")
+
+
+http_client = HTTPClient()
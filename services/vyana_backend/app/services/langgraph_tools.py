@@ -5,11 +5,12 @@ Converted from manual tool definitions to LangChain tool format
 import json
 import logging
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 from langchain_core.tools import tool
 
 from app.services import google_tasks_service
-from app.services.calendar_service import calendar_service
+from app.services.availability_service import availability_service
+from app.services.calendar_service import CalendarNotConnected, calendar_service
 from app.services.gmail_service import gmail_service
 from app.services.notes_service import notes_service
 from app.services.mcp_service import mcp_service
@@ -17,6 +18,7 @@ from app.services.weather_service import weather_service
 from app.services.search_service import search_service
 from app.services.utils_service import utils_service
 from app.services.google_contacts_service import google_contacts_service
+from app.services.tool_executor import current_tool_call, mutating
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +35,7 @@ def _get_ist_timezone():
 
 # ============== TASK MANAGEMENT TOOLS ==============
 
+@mutating
 @tool
 def create_task(title: str, due_date: Optional[str] = None, notes: Optional[str] = None, task_list_id: str = "@default") -> str:
     """Creates a new task in the user's Google Tasks to-do list. Use when user wants to add, create, or make a new task.
@@ -76,6 +79,7 @@ def list_tasks(limit: int = 100, task_list_id: str = "@default") -> str:
         return json.dumps({"error": "Google Tasks not connected. Please go to Settings > Connect Google Account to enable task features."})
 
 
+@mutating
 @tool
 def complete_task(task_id: str, task_list_id: str = "@default") -> str:
     """Marks a task as completed.
@@ -95,6 +99,7 @@ def complete_task(task_id: str, task_list_id: str = "@default") -> str:
         return json.dumps({"error": "Google Tasks not connected. Please go to Settings > Connect Google Account to enable task features."})
 
 
+@mutating
 @tool
 def update_task(task_id: str, title: Optional[str] = None, due_date: Optional[str] = None, notes: Optional[str] = None, task_list_id: str = "@default") -> str:
     """Updates an existing task's title or due date.
@@ -120,6 +125,7 @@ def update_task(task_id: str, title: Optional[str] = None, due_date: Optional[st
         return json.dumps({"error": "Google Tasks not connected. Please go to Settings > Connect Google Account to enable task features."})
 
 
+@mutating
 @tool
 def delete_task(task_id: str, task_list_id: str = "@default") -> str:
     """Deletes a task permanently.
@@ -148,14 +154,8 @@ def search_tasks(query: str, task_list_id: str = "@default") -> str:
         task_list_id: Optional task list id (default @default)
     """
     try:
-        query_lower = query.lower()
-        tasks = google_tasks_service.list_tasks(
-            task_list_id=task_list_id,
-            show_completed=False,
-            max_results=200
-        )
-        filtered = [t for t in tasks if query_lower in (t.get("title") or "").lower()]
-        return json.dumps([{"id": t.get("id"), "title": t.get("title"), "due": t.get("due")} for t in filtered])
+        tasks = google_tasks_service.search_tasks(query, task_list_id=task_list_id)
+        return json.dumps([{"id": t.get("id"), "title": t.get("title"), "due": t.get("due")} for t in tasks])
     except Exception as e:
         logger.error(f"Error searching tasks: {e}")
         return json.dumps({"error": "Google Tasks not connected. Please go to Settings > Connect Google Account to enable task features."})
@@ -189,33 +189,63 @@ def get_calendar_events(date: str) -> str:
 
 
 @tool
-def get_calendar_range(days: int = 7) -> str:
+def get_calendar_range(days: int = 7, limit: int = 50) -> str:
     """Gets upcoming calendar events for the next N days starting from today.
     
     Args:
         days: Number of days to look ahead (default 7)
+        limit: Maximum number of events to return (default 50)
     """
-    events = calendar_service.get_events()
     try:
-        ist = _get_ist_timezone()
-        now = datetime.now(ist)
-        cutoff = now + timedelta(days=days)
-        filtered = []
-        for e in events:
-            if isinstance(e, dict) and "error" not in e:
-                start = e.get("start", "")
-                if start:
-                    try:
-                        event_dt = datetime.fromisoformat(start.replace("Z", "+00:00"))
-                        if event_dt <= cutoff:
-                            filtered.append(e)
-                    except ValueError:
-                        filtered.append(e)
-        return json.dumps(filtered)
-    except Exception:
-        return json.dumps(events)
+        events = calendar_service.get_upcoming_events(days=days, max_results=limit)
+    except CalendarNotConnected:
+        return json.dumps({"error": "Google Calendar not connected. Please go to Settings > Connect Google Account."})
+    except Exception as e:
+        logger.error(f"Error fetching calendar range: {e}")
+        return json.dumps({"error": f"Error fetching calendar: {e}"})
+    return json.dumps([e.to_dict() for e in events])
+
+
+@tool
+def find_free_slots(duration_minutes: int = 30, count: int = 3, days: int = 7, start_date: str = "") -> str:
+    """Finds free time slots across the user's calendars within working hours. Use this for scheduling questions like 'when am I free for an hour this week?' instead of fetching and comparing events.
+    
+    Args:
+        duration_minutes: Length of each slot in minutes (default 30)
+        count: Number of slots to return (default 3)
+        days: Number of days to search (default 7)
+        start_date: Optional date to search from in YYYY-MM-DD format (default: now)
+    """
+    try:
+        start = datetime.fromisoformat(start_date) if start_date else None
+        slots = availability_service.find_slots(duration_minutes, count, days, start=start)
+    except CalendarNotConnected:
+        return json.dumps({"error": "Google Calendar not connected. Please go to Settings > Connect Google Account."})
+    except Exception as e:
+        logger.error(f"Error finding free slots: {e}")
+        return json.dumps({"error": f"Error finding free slots: {e}"})
+    return json.dumps({"slots": slots})
 
 
+@tool
+def check_availability(start_time: str, end_time: str) -> str:
+    """Checks whether the user is free between two times across all their calendars. Use this for questions like 'am I free tomorrow at 3pm?'. Times MUST be in ISO 8601 format like '2026-01-05T15:00:00'.
+    
+    Args:
+        start_time: Start of the period in ISO 8601 format
+        end_time: End of the period in ISO 8601 format
+    """
+    try:
+        result = availability_service.free_busy(datetime.fromisoformat(start_time), datetime.fromisoformat(end_time))
+    except CalendarNotConnected:
+        return json.dumps({"error": "Google Calendar not connected. Please go to Settings > Connect Google Account."})
+    except Exception as e:
+        logger.error(f"Error checking availability: {e}")
+        return json.dumps({"error": f"Error checking availability: {e}"})
+    return json.dumps({"free": not result["busy"], **result})
+
+
+@mutating
 @tool
 def create_calendar_event(summary: str, start_time: str, duration_minutes: int = 60) -> str:
     """Creates a calendar event. Use this when the user wants to schedule something. The start_time MUST be in ISO 8601 format like '2026-01-05T16:00:00'. Convert natural language times to ISO format using the current date provided in the system context.
@@ -259,6 +289,7 @@ def summarize_emails(limit: int = 5) -> str:
     return str(result)
 
 
+@mutating
 @tool
 def send_email(to_email: str, subject: str, body: str) -> str:
     """Sends an email. If you only have a name (e.g., 'Alice'), USE 'get_email_address' FIRST to find their email.
@@ -274,6 +305,7 @@ def send_email(to_email: str, subject: str, body: str) -> str:
 @tool
 def search_emails(query: str, limit: int = 5) -> str:
     """Searches for emails using specified criteria. Useful for finding emails from a person or about a topic.
+    Words match by prefix (e.g. 'invo' finds 'invoice'); best matches come first.
     
     Args:
         query: Search query used for filtering (e.g., 'from:zerodha', 'subject:invoice', 'is:unread')
@@ -284,6 +316,7 @@ def search_emails(query: str, limit: int = 5) -> str:
 
 # ============== CONTACT TOOLS ==============
 
+@mutating
 @tool
 def add_contact(name: str, email: Optional[str] = None, phone: Optional[str] = None, company: Optional[str] = None, notes: Optional[str] = None) -> str:
     """Saves a new contact. Use this when the user asks to save someone's contact info (name, email, phone, company).
@@ -333,6 +366,7 @@ def list_contacts() -> str:
 
 # ============== NOTES TOOLS ==============
 
+@mutating
 @tool
 def take_notes(content: str, title: Optional[str] = None) -> str:
     """Saves a note for the user. Use this when the user asks to remember something or take a note.
@@ -358,46 +392,46 @@ def get_notes(limit: int = 10) -> str:
 # ============== WEATHER TOOLS ==============
 
 @tool
-def get_weather(city: str = "Mumbai") -> str:
+async def get_weather(city: str = "Mumbai") -> str:
     """Gets current weather for a city.
     
     Args:
         city: City name, default Mumbai
     """
-    return weather_service.get_weather(city)
+    return await weather_service.get_weather(city)
 
 
 @tool
-def get_forecast(city: str = "Mumbai") -> str:
+async def get_forecast(city: str = "Mumbai") -> str:
     """Gets 3-day weather forecast for a city.
     
     Args:
         city: City name, default Mumbai
     """
-    return weather_service.get_forecast(city)
+    return await weather_service.get_forecast(city)
 
 
 # ============== SEARCH TOOLS ==============
 
 @tool
-def web_search(query: str) -> str:
+async def web_search(query: str) -> str:
     """Searches the web for information.
     
     Args:
         query: Search query
     """
-    result = search_service.web_search(query)
+    result = await search_service.web_search(query)
     return json.dumps({"result": result})
 
 
 @tool
-def get_news(topic: str = "technology") -> str:
+async def get_news(topic: str = "technology") -> str:
     """Gets latest news on a topic.
     
     Args:
         topic: News topic, default 'technology'
     """
-    result = search_service.get_news(topic)
+    result = await search_service.get_news(topic)
     return json.dumps({"result": result})
 
 
@@ -423,7 +457,7 @@ def get_time_now() -> str:
 
 
 @tool
-def convert_currency(amount: float, from_currency: str, to_currency: str) -> str:
+async def convert_currency(amount: float, from_currency: str, to_currency: str) -> str:
     """Converts currency from one type to another.
     
     Args:
@@ -431,7 +465,7 @@ def convert_currency(amount: float, from_currency: str, to_currency: str) -> str
         from_currency: Source currency code (USD, EUR, INR, etc.)
         to_currency: Target currency code
     """
-    result = utils_service.convert_currency(amount, from_currency, to_currency)
+    result = await utils_service.convert_currency(amount, from_currency, to_currency)
     return json.dumps({"result": result})
 
 
@@ -496,6 +530,8 @@ def get_all_tools():
         get_calendar_today,
         get_calendar_events,
         get_calendar_range,
+        find_free_slots,
+        check_availability,
         create_calendar_event,
         # Email tools
         get_unread_emails_summary,
@@ -525,89 +561,147 @@ def get_all_tools():
     ]
 
 
+# Converted LangChain tools per MCP server: mcp_name -> (tools_hash, tools)
+_mcp_langchain_cache = {}
+
+
 def get_mcp_tools_as_langchain():
-    """Dynamically convert MCP tools to LangChain tools"""
+    """
+    MCP tools as LangChain tools. Each server's catalogue is converted once
+    and reused until its content hash changes.
+    """
+    mcp_tools = []
+    catalogues = mcp_service.get_tool_catalogues()
+    
+    for mcp_name, tools_hash, tool_defs in catalogues:
+        cached = _mcp_langchain_cache.get(mcp_name)
+        if cached is None or cached[0] != tools_hash:
+            logger.info(f"Converting {len(tool_defs)} {mcp_name} MCP tools to LangChain format")
+            cached = (tools_hash, [_convert_mcp_tool(tool_def) for tool_def in tool_defs])
+            _mcp_langchain_cache[mcp_name] = cached
+        mcp_tools.extend(cached[1])
+    
+    # Forget servers that are no longer connected
+    connected = {catalogue[0] for catalogue in catalogues}
+    for mcp_name in list(_mcp_langchain_cache):
+        if mcp_name not in connected:
+            del _mcp_langchain_cache[mcp_name]
+    
+    return mcp_tools
+
+
+def _progress_writer(tool_name: str):
+    """
+    Callback forwarding MCP progress notifications to the graph's custom
+    stream as tool_progress events, or None when not running in a graph.
+    """
+    from langgraph.config import get_stream_writer
+    
+    try:
+        write = get_stream_writer()
+    except (RuntimeError, KeyError):  # not called from a graph run
+        return None
+    call = current_tool_call.get() or {}
+    
+    def on_progress(params: dict):
+        write({
+            "type": "tool_progress",
+            "id": call.get("id"),
+            "name": tool_name,
+            "progress": params.get("progress"),
+            "total": params.get("total"),
+            "message": params.get("message"),
+        })
+    return on_progress
+
+
+def _convert_mcp_tool(tool_def: dict):
+    """Convert one OpenAI-format MCP tool definition to a StructuredTool"""
     from langchain_core.tools import StructuredTool
     from pydantic import create_model
-    from typing import Any, Optional
     
-    mcp_tools = []
-    mcp_tool_defs = mcp_service.get_all_tools_for_llm()
+    func_def = tool_def.get("function", {})
+    tool_name = func_def.get("name", "")
+    description = func_def.get("description", "")
+    parameters = func_def.get("parameters", {})
+    # Without an explicit read-only hint, assume the tool changes state
+    read_only = tool_def.get("annotations", {}).get("readOnlyHint", False)
+    metadata = {"mutates": not read_only}
     
-    logger.info(f"Converting {len(mcp_tool_defs)} MCP tools to LangChain format")
+    logger.debug(f"Converting MCP tool: {tool_name}")
     
-    for tool_def in mcp_tool_defs:
-        func_def = tool_def.get("function", {})
-        tool_name = func_def.get("name", "")
-        description = func_def.get("description", "")
-        parameters = func_def.get("parameters", {})
-        
-        logger.debug(f"Converting MCP tool: {tool_name}")
-        
-        # Create a closure to capture the tool name
-        def make_mcp_executor(name):
-            def execute_mcp(**kwargs):
-                logger.info(f"Executing MCP tool: {name} with args: {kwargs}")
-                result = mcp_service.execute_tool_sync(name, kwargs)
-                logger.info(f"MCP tool {name} result: {result[:200] if result else 'None'}...")
-                return result
-            return execute_mcp
+    # Create closures to capture the tool name; the agent awaits the
+    # coroutine on the main loop, the sync func is only for .invoke()
+    def make_mcp_executor(name):
+        def execute_mcp(**kwargs):
+            logger.info(f"Executing MCP tool (sync): {name} with args: {kwargs}")
+            return mcp_service.execute_tool_sync(name, kwargs)
+        return execute_mcp
+    
+    def make_mcp_coroutine(name):
+        async def execute_mcp_async(**kwargs):
+            logger.info(f"Executing MCP tool: {name} with args: {kwargs}")
+            return await mcp_service.execute_tool_by_name(name, kwargs, on_progress=_progress_writer(name))
+        return execute_mcp_async
+    
+    try:
+        # Build dynamic Pydantic model from parameters schema
+        properties = parameters.get("properties", {})
+        required_fields = parameters.get("required", [])
         
-        try:
-            # Build dynamic Pydantic model from parameters schema
-            properties = parameters.get("properties", {})
-            required_fields = parameters.get("required", [])
+        field_definitions = {}
+        for prop_name, prop_schema in properties.items():
+            prop_type = prop_schema.get("type", "string")
+            prop_desc = prop_schema.get("description", "")
             
-            field_definitions = {}
-            for prop_name, prop_schema in properties.items():
-                prop_type = prop_schema.get("type", "string")
-                prop_desc = prop_schema.get("description", "")
-                
-                # Map JSON schema types to Python types
-                type_mapping = {
-                    "string": str,
-                    "integer": int,
-                    "number": float,
-                    "boolean": bool,
-                    "array": list,
-                    "object": dict,
-                }
-                python_type = type_mapping.get(prop_type, str)
-                
-                if prop_name in required_fields:
-                    field_definitions[prop_name] = (python_type, ...)
-                else:
-                    field_definitions[prop_name] = (Optional[python_type], None)
+            # Map JSON schema types to Python types
+            type_mapping = {
+                "string": str,
+                "integer": int,
+                "number": float,
+                "boolean": bool,
+                "array": list,
+                "object": dict,
+            }
+            python_type = type_mapping.get(prop_type, str)
             
-            # Create Pydantic model if there are fields
-            if field_definitions:
-                ArgsModel = create_model(f"{tool_name}_args", **field_definitions)
-                mcp_tool = StructuredTool.from_function(
-                    func=make_mcp_executor(tool_name),
-                    name=tool_name,
-                    description=description,
-                    args_schema=ArgsModel,
-                )
+            if prop_name in required_fields:
+                field_definitions[prop_name] = (python_type, ...)
             else:
-                # No parameters - simple tool
-                mcp_tool = StructuredTool.from_function(
-                    func=make_mcp_executor(tool_name),
-                    name=tool_name,
-                    description=description,
-                )
-            
-            mcp_tools.append(mcp_tool)
-            logger.debug(f"Successfully converted MCP tool: {tool_name}")
-            
-        except Exception as e:
-            logger.error(f"Failed to convert MCP tool {tool_name}: {e}")
-            # Fallback: create tool without schema
+                field_definitions[prop_name] = (Optional[python_type], None)
+        
+        # Create Pydantic model if there are fields
+        if field_definitions:
+            ArgsModel = create_model(f"{tool_name}_args", **field_definitions)
+            mcp_tool = StructuredTool.from_function(
+                func=make_mcp_executor(tool_name),
+                coroutine=make_mcp_coroutine(tool_name),
+                name=tool_name,
+                description=description,
+                args_schema=ArgsModel,
+                metadata=metadata,
+            )
+        else:
+            # No parameters - simple tool
             mcp_tool = StructuredTool.from_function(
                 func=make_mcp_executor(tool_name),
+                coroutine=make_mcp_coroutine(tool_name),
                 name=tool_name,
                 description=description,
+                metadata=metadata,
             )
-            mcp_tools.append(mcp_tool)
+        
+        logger.debug(f"Successfully converted MCP tool: {tool_name}")
+        
+    except Exception as e:
+        logger.error(f"Failed to convert MCP tool {tool_name}: {e}")
+        # Fallback: create tool without schema
+        mcp_tool = StructuredTool.from_function(
+            func=make_mcp_executor(tool_name),
+            coroutine=make_mcp_coroutine(tool_name),
+            name=tool_name,
+            description=description,
+            metadata=metadata,
+        )
     
-    logger.info(f"Converted {len(mcp_tools)} MCP tools successfully")
-    return mcp_tools
+    return mcp_tool
@@ -0,0 +1,83 @@
+"""
+In-process LRU cache for Vyana
+First tier in front of Redis: string values with their own expiry, bounded
+by an estimate of the memory they take. A key can also be cached as known
+missing (value None), so repeated misses don't go to Redis either.
+"""
+import sys
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Bookkeeping per entry on top of the key and value strings (dict slot, tuple, floats)
+ENTRY_OVERHEAD = 120
+
+
+class LocalCache:
+    """
+    Usage:
+        cache.set('vyana:weather:ab12', '{"temp": 31}', ttl=1800)
+        cache.set('vyana:stock:cd34', None, ttl=30)    # known missing
+        hit, value = cache.get('vyana:weather:ab12')   # (True, '{"temp": 31}')
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Optional[str], float, int]]" = OrderedDict()  # key -> (value, expires at, size)
+        self.evictions = 0
+
+    def get(self, key: str) -> Tuple[bool, Optional[str]]:
+        """(True, value) if cached; value is None for a key cached as missing"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Optional[str], ttl: float):
+        self.delete(key)
+        size = sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        while self.bytes + size > self.max_bytes:
+            self._pop_oldest()
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self.bytes += size
+
+    def delete(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.bytes -= entry[2]
+        return True
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def _pop_oldest(self):
+        _, (_, _, size) = self._entries.popitem(last=False)
+        self.bytes -= size
+        self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,261 @@
+"""
+MCP Client Session for Vyana
+One persistent MCP session per connected server over Streamable HTTP:
+initialize handshake, Mcp-Session-Id reuse, increasing JSON-RPC ids,
+concurrent in-flight requests over the shared keep-alive HTTP pool, and
+SSE responses with progress notifications for streamed partial results.
+"""
+import asyncio
+import itertools
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import httpx
+
+from app.config import settings
+from app.services.http_client import HTTPClient, http_client
+
+logger = logging.getLogger(__name__)
+
+MCP_PROTOCOL_VERSION = "2025-03-26"
+SESSION_HEADER = "Mcp-Session-Id"
+METHOD_NOT_FOUND = -32601
+
+Callback = Callable[[dict], Union[None, Awaitable[None]]]
+
+
+class MCPError(Exception):
+    """JSON-RPC error returned by an MCP server"""
+
+    def __init__(self, message: str, code: Optional[int] = None, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+async def _maybe_await(result):
+    if result is not None and hasattr(result, "__await__"):
+        await result
+
+
+class MCPSession:
+    """
+    Persistent client session for one MCP server.
+
+    Requests are independent HTTP POSTs on the shared pooled client, so many
+    calls can be in flight at once (bounded per server by max_connections);
+    responses are matched by their JSON-RPC id.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        auth_token: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        timeout: Optional[float] = None,
+        on_notification: Optional[Callback] = None,
+        http: Optional[HTTPClient] = None,
+    ):
+        self.url = url
+        self.auth_token = auth_token
+        self.on_notification = on_notification
+        self.session_id: Optional[str] = None
+        self.protocol_version: Optional[str] = None
+        self.server_info: Dict[str, Any] = {}
+        self.server_capabilities: Dict[str, Any] = {}
+        self.initialized = False
+        self._ids = itertools.count(1)
+        # One handshake at a time; concurrent callers wait for it and reuse its session
+        self._init_lock = asyncio.Lock()
+
+        self.timeout = timeout or settings.MCP_REQUEST_TIMEOUT
+        self.http = http or http_client
+        self.http.set_host_limit(
+            httpx.URL(url).host,
+            max_connections or settings.MCP_MAX_CONNECTIONS_PER_SERVER,
+        )
+
+    def _next_id(self) -> int:
+        return next(self._ids)
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream",
+        }
+        if self.auth_token:
+            headers["Authorization"] = f"Bearer {self.auth_token}"
+        if self.session_id:
+            headers[SESSION_HEADER] = self.session_id
+        if self.protocol_version:
+            headers["MCP-Protocol-Version"] = self.protocol_version
+        return headers
+
+    async def initialize(self) -> dict:
+        """
+        Run the initialize handshake and remember the session id.
+        Servers that predate the handshake (method not found) are used sessionless.
+        """
+        async with self._init_lock:
+            return await self._handshake()
+
+    async def _renew(self, expired_session: Optional[str]):
+        """Re-initialize after a 404, unless a concurrent caller already replaced the expired session"""
+        async with self._init_lock:
+            if self.session_id == expired_session:
+                logger.info(f"MCP session {expired_session} expired, re-initializing")
+                await self._handshake()
+
+    async def _handshake(self) -> dict:
+        try:
+            result = await self._send("initialize", {
+                "protocolVersion": MCP_PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "vyana", "version": "0.1.0"},
+            }, retry_expired=False)
+        except MCPError as e:
+            if e.code != METHOD_NOT_FOUND:
+                raise
+            logger.info(f"MCP server at {self.url} has no initialize; using it without a session")
+            self.initialized = True
+            return {}
+
+        self.protocol_version = result.get("protocolVersion", MCP_PROTOCOL_VERSION)
+        self.server_info = result.get("serverInfo", {})
+        self.server_capabilities = result.get("capabilities", {})
+        self.initialized = True
+        await self.notify("notifications/initialized")
+        logger.info(f"MCP session initialized with {self.server_info.get('name', self.url)} (session={self.session_id})")
+        return result
+
+    async def request(self, method: str, params: Optional[dict] = None, on_progress: Optional[Callback] = None) -> Any:
+        """Send a request and return its result; raises MCPError on JSON-RPC errors"""
+        if not self.initialized:
+            async with self._init_lock:
+                if not self.initialized:
+                    await self._handshake()
+        return await self._send(method, params or {}, on_progress=on_progress)
+
+    async def notify(self, method: str, params: Optional[dict] = None):
+        """Send a notification (no response expected)"""
+        message = {"jsonrpc": "2.0", "method": method}
+        if params:
+            message["params"] = params
+        response = await self.http.post(self.url, json=message, headers=self._headers(), timeout=self.timeout)
+        if response.status_code >= 400:
+            logger.warning(f"MCP notification {method} rejected: HTTP {response.status_code}")
+
+    async def ping(self) -> bool:
+        """Check the session is alive"""
+        try:
+            await self.request("ping")
+            return True
+        except Exception:
+            return False
+
+    async def list_tools(self) -> List[dict]:
+        """Fetch the full tool catalogue, following pagination cursors"""
+        tools: List[dict] = []
+        cursor = None
+        while True:
+            result = await self.request("tools/list", {"cursor": cursor} if cursor else {})
+            tools.extend(result.get("tools", []))
+            cursor = result.get("nextCursor")
+            if not cursor:
+                return tools
+
+    async def call_tool(self, name: str, arguments: dict, on_progress: Optional[Callback] = None) -> dict:
+        """
+        Call a tool. If on_progress is given the server is asked for progress
+        notifications, which are passed to it as they stream in.
+        """
+        return await self.request("tools/call", {"name": name, "arguments": arguments}, on_progress=on_progress)
+
+    async def close(self):
+        """Terminate the server-side session (best effort)"""
+        try:
+            if self.session_id:
+                await self.http.delete(self.url, headers=self._headers(), timeout=self.timeout, retries=0)
+        except httpx.HTTPError:
+            pass
+        self.session_id = None
+        self.initialized = False
+
+    async def _send(self, method: str, params: dict, on_progress: Optional[Callback] = None, retry_expired: bool = True) -> Any:
+        request_id = self._next_id()
+        if on_progress:
+            params = {**params, "_meta": {"progressToken": request_id}}
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        headers = self._headers()
+        # The session this request was sent on; a new handshake never carries the old one
+        sent_session = None if method == "initialize" else headers.get(SESSION_HEADER)
+        if method == "initialize":
+            headers.pop(SESSION_HEADER, None)
+
+        expired = False
+        async with self.http.stream("POST", self.url, json=message, headers=headers, timeout=self.timeout) as response:
+            if response.status_code == 404 and sent_session and retry_expired:
+                await response.aread()
+                expired = True
+            elif response.status_code >= 400:
+                await response.aread()
+                raise MCPError(f"HTTP {response.status_code}: {response.text[:200]}")
+            else:
+                if method == "initialize" and SESSION_HEADER in response.headers:
+                    self.session_id = response.headers[SESSION_HEADER]
+
+                content_type = response.headers.get("content-type", "")
+                if content_type.startswith("text/event-stream"):
+                    reply = await self._read_event_stream(response, request_id, on_progress)
+                else:
+                    await response.aread()
+                    reply = self._match_response(response.json(), request_id)
+
+        if expired:
+            # Session expired on the server: start a new one (once) and retry
+            await self._renew(sent_session)
+            params = {k: v for k, v in params.items() if k != "_meta"}
+            return await self._send(method, params, on_progress, retry_expired=False)
+
+        if reply is None:
+            raise MCPError(f"No response to {method} (id={request_id})")
+        if "error" in reply:
+            error = reply["error"]
+            raise MCPError(error.get("message", "Unknown error"), error.get("code"), error.get("data"))
+        return reply.get("result", {})
+
+    async def _read_event_stream(self, response: httpx.Response, request_id: int, on_progress: Optional[Callback]) -> Optional[dict]:
+        """Read SSE messages until the response for request_id arrives"""
+        data_lines: List[str] = []
+        async for line in response.aiter_lines():
+            if line.startswith("data:"):
+                data_lines.append(line[5:].lstrip())
+                continue
+            if line or not data_lines:
+                continue
+            # Blank line: end of one event
+            payload = "\n".join(data_lines)
+            data_lines = []
+            for message in self._as_list(json.loads(payload)):
+                if message.get("id") == request_id and ("result" in message or "error" in message):
+                    return message
+                await self._dispatch(message, on_progress)
+        return None
+
+    async def _dispatch(self, message: dict, on_progress: Optional[Callback]):
+        method = message.get("method")
+        if method == "notifications/progress" and on_progress:
+            await _maybe_await(on_progress(message.get("params", {})))
+        elif method and self.on_notification:
+            await _maybe_await(self.on_notification(message))
+
+    def _match_response(self, body: Any, request_id: int) -> Optional[dict]:
+        for message in self._as_list(body):
+            if message.get("id") == request_id:
+                return message
+        return None
+
+    @staticmethod
+    def _as_list(body: Any) -> List[dict]:
+        return body if isinstance(body, list) else [body]
@@ -5,14 +5,18 @@ Manages multiple MCP server connections and provides tool integration for the AI
 
 import os
 import json
+import hashlib
 import logging
 import asyncio
+import concurrent.futures
 import httpx
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, field
 from enum import Enum
 
 from app.config import settings
+from app.services.mcp_client import MCPSession, MCPError
+from app.services.http_client import http_client
 
 # Setup logging
 logging.basicConfig(level=logging.DEBUG)
@@ -38,6 +42,9 @@ class MCPConnection:
     error_message: Optional[str] = None
     icon: str = "🔌"  # Emoji icon for UI
     mode: str = "mcp"  # "mcp" for MCP protocol, "api" for direct API
+    session: Optional[MCPSession] = field(default=None, repr=False)  # Persistent MCP session (mcp mode)
+    tools_hash: str = ""  # Content hash of `tools`, changes only when the catalogue does
+    llm_tools: List[dict] = field(default_factory=list, repr=False)  # `tools` in OpenAI format
 
 
 @dataclass
@@ -83,22 +90,26 @@ ZERODHA_KITE_TOOLS = [
     {
         "name": "get_holdings",
         "description": "Get your stock holdings (long-term investments)",
-        "inputSchema": {"type": "object", "properties": {}}
+        "inputSchema": {"type": "object", "properties": {}},
+        "annotations": {"readOnlyHint": True}
     },
     {
         "name": "get_positions", 
         "description": "Get your current trading positions (intraday and overnight)",
-        "inputSchema": {"type": "object", "properties": {}}
+        "inputSchema": {"type": "object", "properties": {}},
+        "annotations": {"readOnlyHint": True}
     },
     {
         "name": "get_margins",
         "description": "Get your account margins and available funds",
-        "inputSchema": {"type": "object", "properties": {}}
+        "inputSchema": {"type": "object", "properties": {}},
+        "annotations": {"readOnlyHint": True}
     },
     {
         "name": "get_orders",
         "description": "Get list of orders placed today",
-        "inputSchema": {"type": "object", "properties": {}}
+        "inputSchema": {"type": "object", "properties": {}},
+        "annotations": {"readOnlyHint": True}
     },
     {
         "name": "get_quote",
@@ -113,7 +124,8 @@ ZERODHA_KITE_TOOLS = [
                 }
             },
             "required": ["instruments"]
-        }
+        },
+        "annotations": {"readOnlyHint": True}
     }
 ]
 
@@ -131,9 +143,21 @@ class MCPService:
     
     def __init__(self):
         self.connections: Dict[str, MCPConnection] = {}
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        # Bumped whenever the set of connected servers/tools changes so that
+        # consumers (e.g. cached agent graphs) know to rebuild
+        self.tools_version = 0
+        # Event loop the MCP sessions run on; sync callers hand work to it
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._ping_task: Optional[asyncio.Task] = None
+        self._background_tasks = set()
         logger.info("MCPService initialized")
     
+    def _bump_tools_version(self):
+        """Mark the MCP tool set as changed"""
+        self.tools_version += 1
+        logger.debug(f"MCP tools version is now {self.tools_version}")
+    
     def get_known_servers(self) -> List[dict]:
         """Get list of all known MCP servers with their connection status"""
         servers = []
@@ -185,6 +209,11 @@ class MCPService:
         
         config = KNOWN_MCP_SERVERS[name]
         
+        # Replacing an existing connection: release its session first
+        previous = self.connections.get(name)
+        if previous and previous.session:
+            await previous.session.close()
+        
         # Create or update connection
         connection = MCPConnection(
             name=config.name,
@@ -201,7 +230,7 @@ class MCPService:
             # For Zerodha with Kite Connect API mode, use built-in tools
             if name == "zerodha" and mode == "api":
                 # Kite Connect API mode - use predefined tools
-                connection.tools = ZERODHA_KITE_TOOLS
+                self._set_tools(connection, ZERODHA_KITE_TOOLS)
                 connection.status = MCPConnectionStatus.CONNECTED
                 connection.mode = "api"
                 
@@ -216,7 +245,7 @@ class MCPService:
             else:
                 # Standard MCP mode - discover tools from server
                 tools = await self._discover_tools(connection)
-                connection.tools = tools
+                self._set_tools(connection, tools)
                 connection.status = MCPConnectionStatus.CONNECTED
                 connection.mode = "mcp"
                 
@@ -232,13 +261,33 @@ class MCPService:
         except Exception as e:
             connection.status = MCPConnectionStatus.ERROR
             connection.error_message = str(e)
+            if connection.session:
+                await connection.session.close()
+                connection.session = None
             logger.error(f"Failed to connect to {name} MCP: {e}")
             return {"success": False, "error": str(e)}
+        finally:
+            # The previous connection (if any) was replaced either way
+            self._bump_tools_version()
+    
+    async def close_all(self):
+        """Close every MCP session (called on app shutdown)"""
+        for task in (self._refresh_task, self._ping_task):
+            if task:
+                task.cancel()
+        self._refresh_task = self._ping_task = None
+        for connection in self.connections.values():
+            if connection.session:
+                await connection.session.close()
+                connection.session = None
     
     async def disconnect(self, name: str) -> dict:
         """Disconnect from an MCP server"""
         if name in self.connections:
-            del self.connections[name]
+            connection = self.connections.pop(name)
+            if connection.session:
+                await connection.session.close()
+            self._bump_tools_version()
             logger.info(f"Disconnected from {name} MCP")
             return {"success": True, "name": name}
         return {"success": False, "error": f"Not connected to {name}"}
@@ -247,41 +296,135 @@ class MCPService:
         """
         Discover available tools from an MCP server.
         
-        MCP uses JSON-RPC 2.0, so we send a tools/list request.
+        Opens the connection's persistent session (initialize handshake)
+        and sends tools/list over it.
         """
+        connection.session = MCPSession(
+            connection.url,
+            auth_token=connection.auth_token,
+            on_notification=lambda message: self._handle_notification(connection.name, message),
+        )
         try:
-            # MCP protocol: JSON-RPC 2.0 over HTTP
-            request_body = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "tools/list",
-                "params": {}
-            }
-            
-            headers = {"Content-Type": "application/json"}
-            if connection.auth_token:
-                headers["Authorization"] = f"Bearer {connection.auth_token}"
-            
-            response = await self.http_client.post(
-                connection.url,
-                json=request_body,
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if "result" in result and "tools" in result["result"]:
-                    return result["result"]["tools"]
-                elif "error" in result:
-                    raise Exception(result["error"].get("message", "Unknown error"))
-            else:
-                raise Exception(f"HTTP {response.status_code}: {response.text}")
-                
+            await connection.session.initialize()
+            return await connection.session.list_tools()
         except httpx.RequestError as e:
             logger.error(f"Network error discovering tools: {e}")
             raise Exception(f"Network error: {str(e)}")
     
-    async def execute_tool(self, mcp_name: str, tool_name: str, arguments: dict) -> str:
+    def _set_tools(self, connection: MCPConnection, tools: List[dict]) -> bool:
+        """
+        Store a tool catalogue and its converted OpenAI-format schemas.
+        Returns False (and keeps the cached conversion) if nothing changed.
+        """
+        tools_hash = hashlib.sha256(json.dumps(tools, sort_keys=True).encode()).hexdigest()
+        if tools_hash == connection.tools_hash:
+            return False
+        
+        connection.tools = tools
+        connection.tools_hash = tools_hash
+        connection.llm_tools = [self._to_llm_tool(connection, tool) for tool in tools]
+        return True
+    
+    @staticmethod
+    def _to_llm_tool(connection: MCPConnection, tool: dict) -> dict:
+        """
+        Convert an MCP tool to OpenAI format.
+        MCP format: {name, description, inputSchema}
+        OpenAI format: {type: "function", function: {name, description, parameters}}
+        Tool names are prefixed with mcp_{mcp_name}_ to avoid conflicts.
+        """
+        return {
+            "type": "function",
+            "function": {
+                "name": f"mcp_{connection.name}_{tool.get('name', 'unknown')}",
+                "description": f"[{connection.display_name}] {tool.get('description', 'No description')}",
+                "parameters": tool.get("inputSchema", {"type": "object", "properties": {}})
+            },
+            # MCP tool annotations (e.g. readOnlyHint), used to decide
+            # whether the tool may run in parallel with others
+            "annotations": tool.get("annotations") or {}
+        }
+    
+    async def refresh_tools(self, name: str) -> bool:
+        """
+        Re-fetch the tool catalogue of a connected MCP server.
+        Returns True if it changed (consumers then rebuild via tools_version).
+        """
+        connection = self.connections.get(name)
+        if not connection or not connection.session or connection.status != MCPConnectionStatus.CONNECTED:
+            return False
+        
+        try:
+            tools = await connection.session.list_tools()
+        except Exception as e:
+            logger.warning(f"Failed to refresh tools for {name}: {e}")
+            return False
+        
+        # The connection may have been replaced while we were waiting
+        if self.connections.get(name) is not connection or not self._set_tools(connection, tools):
+            return False
+        
+        self._bump_tools_version()
+        logger.info(f"MCP {name} tool catalogue changed, now {len(tools)} tools")
+        return True
+    
+    def _handle_notification(self, name: str, message: dict):
+        """Server-initiated notifications received on a session"""
+        if message.get("method") == "notifications/tools/list_changed":
+            task = asyncio.create_task(self.refresh_tools(name))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+    
+    async def _refresh_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            for name in list(self.connections):
+                await self.refresh_tools(name)
+    
+    async def _ping_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            for name in list(self.connections):
+                await self.keep_alive(name)
+    
+    async def keep_alive(self, name: str) -> bool:
+        """
+        Ping a connected MCP server's session. Idle sessions can be dropped by
+        the server without notice; one that no longer answers is re-opened.
+        Returns False if the server could not be reached at all.
+        """
+        connection = self.connections.get(name)
+        if not connection or not connection.session or connection.status != MCPConnectionStatus.CONNECTED:
+            return True
+        session = connection.session
+        if await session.ping():
+            return True
+        
+        logger.info(f"MCP {name} session stopped answering pings, re-opening it")
+        try:
+            await session.initialize()
+            return True
+        except Exception as e:
+            if self.connections.get(name) is connection:
+                connection.status = MCPConnectionStatus.ERROR
+                connection.error_message = f"Server stopped responding: {e}"
+                self._bump_tools_version()
+            logger.warning(f"MCP {name} is unreachable: {e}")
+            return False
+    
+    def start_background_refresh(self):
+        """
+        Periodically re-check tool catalogues (MCP_TOOLS_REFRESH_INTERVAL) and
+        ping sessions (MCP_PING_INTERVAL); 0 disables either.
+        """
+        interval = settings.MCP_TOOLS_REFRESH_INTERVAL
+        if interval > 0 and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(interval))
+        ping_interval = settings.MCP_PING_INTERVAL
+        if ping_interval > 0 and self._ping_task is None:
+            self._ping_task = asyncio.create_task(self._ping_loop(ping_interval))
+    
+    async def execute_tool(self, mcp_name: str, tool_name: str, arguments: dict, on_progress=None) -> str:
         """
         Execute a tool on an MCP server or direct API.
         
@@ -289,6 +432,7 @@ class MCPService:
             mcp_name: Name of the MCP server
             tool_name: Name of the tool to execute
             arguments: Tool arguments
+            on_progress: Optional callback for streamed progress notifications
             
         Returns:
             Tool execution result as string
@@ -303,42 +447,20 @@ class MCPService:
             return await self._execute_kite_api(connection, tool_name, arguments)
         
         # Standard MCP mode
+        if not connection.session:
+            return json.dumps({"error": f"{mcp_name} has no active MCP session. Please reconnect."})
+        
         try:
-            request_body = {
-                "jsonrpc": "2.0",
-                "id": 2,
-                "method": "tools/call",
-                "params": {
-                    "name": tool_name,
-                    "arguments": arguments
-                }
-            }
-            
-            headers = {"Content-Type": "application/json"}
-            if connection.auth_token:
-                headers["Authorization"] = f"Bearer {connection.auth_token}"
-            
-            response = await self.http_client.post(
-                connection.url,
-                json=request_body,
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if "result" in result:
-                    # MCP returns content array
-                    content = result["result"].get("content", [])
-                    if content:
-                        # Extract text from content items
-                        texts = [item.get("text", str(item)) for item in content if "text" in item]
-                        return "\n".join(texts) if texts else json.dumps(content)
-                    return json.dumps(result["result"])
-                elif "error" in result:
-                    return json.dumps({"error": result["error"].get("message", "Unknown error")})
-            
-            return json.dumps({"error": f"HTTP {response.status_code}"})
-            
+            result = await connection.session.call_tool(tool_name, arguments, on_progress=on_progress)
+            # MCP returns content array
+            content = result.get("content", [])
+            if content:
+                # Extract text from content items
+                texts = [item.get("text", str(item)) for item in content if "text" in item]
+                return "\n".join(texts) if texts else json.dumps(content)
+            return json.dumps(result)
+        except MCPError as e:
+            return json.dumps({"error": str(e)})
         except Exception as e:
             logger.error(f"Error executing MCP tool {tool_name}: {e}")
             return json.dumps({"error": str(e)})
@@ -364,19 +486,19 @@ class MCPService:
             logger.info(f"Kite API request: {tool_name} with API key {settings.ZERODHA_API_KEY[:8]}...")
             
             if tool_name == "get_holdings":
-                response = await self.http_client.get(f"{base_url}/portfolio/holdings", headers=headers)
+                response = await http_client.get(f"{base_url}/portfolio/holdings", headers=headers)
             elif tool_name == "get_positions":
-                response = await self.http_client.get(f"{base_url}/portfolio/positions", headers=headers)
+                response = await http_client.get(f"{base_url}/portfolio/positions", headers=headers)
             elif tool_name == "get_margins":
-                response = await self.http_client.get(f"{base_url}/user/margins", headers=headers)
+                response = await http_client.get(f"{base_url}/user/margins", headers=headers)
             elif tool_name == "get_orders":
-                response = await self.http_client.get(f"{base_url}/orders", headers=headers)
+                response = await http_client.get(f"{base_url}/orders", headers=headers)
             elif tool_name == "get_quote":
                 instruments = arguments.get("instruments", [])
                 if not instruments:
                     return json.dumps({"error": "No instruments provided"})
                 params = "&".join([f"i={i}" for i in instruments])
-                response = await self.http_client.get(f"{base_url}/quote?{params}", headers=headers)
+                response = await http_client.get(f"{base_url}/quote?{params}", headers=headers)
             else:
                 return json.dumps({"error": f"Unknown Kite tool: {tool_name}"})
             
@@ -403,17 +525,17 @@ class MCPService:
             return json.dumps({"error": f"Kite API error: {str(e)}"})
 
     
-    def execute_tool_sync(self, full_tool_name: str, arguments: dict) -> str:
+    def _resolve_tool_name(self, full_tool_name: str):
         """
-        Synchronous wrapper for execute_tool.
-        Tool name format: mcp_{mcp_name}_{tool_name}
+        Split mcp_{mcp_name}_{tool_name} and check the connection is usable.
+
+        Returns:
+            (mcp_name, tool_name, None) on success, (None, None, error_json) otherwise
         """
-        logger.info(f"execute_tool_sync called: {full_tool_name}")
-        
         # Parse tool name: mcp_zerodha_get_holdings -> zerodha, get_holdings
         parts = full_tool_name.split("_", 2)
         if len(parts) < 3 or parts[0] != "mcp":
-            return json.dumps({"error": f"Invalid MCP tool name format: {full_tool_name}"})
+            return None, None, json.dumps({"error": f"Invalid MCP tool name format: {full_tool_name}"})
         
         mcp_name = parts[1]
         tool_name = parts[2]
@@ -421,7 +543,7 @@ class MCPService:
         # Check if connected
         if mcp_name not in self.connections:
             logger.warning(f"MCP {mcp_name} not connected. Available connections: {list(self.connections.keys())}")
-            return json.dumps({
+            return None, None, json.dumps({
                 "error": f"Not connected to {mcp_name}. Please connect via Settings → MCP Connections first.",
                 "hint": "Go to Settings → MCP Connections and connect to Zerodha"
             })
@@ -430,50 +552,26 @@ class MCPService:
         logger.info(f"Found connection: {mcp_name}, status={connection.status.value}, mode={connection.mode}")
         
         if connection.status != MCPConnectionStatus.CONNECTED:
-            return json.dumps({
+            return None, None, json.dumps({
                 "error": f"{mcp_name} connection status is {connection.status.value}. Please reconnect.",
                 "hint": "Go to Settings → MCP Connections and reconnect to Zerodha"
             })
         
-        # Run async in event loop - handle both sync and async contexts
+        return mcp_name, tool_name, None
+    
+    async def execute_tool_by_name(self, full_tool_name: str, arguments: dict, on_progress=None) -> str:
+        """
+        Execute an MCP tool by its LLM-facing name on the current event loop.
+        Tool name format: mcp_{mcp_name}_{tool_name}
+        on_progress receives the server's progress notifications, if any.
+        """
+        self._loop = asyncio.get_running_loop()
+        mcp_name, tool_name, error = self._resolve_tool_name(full_tool_name)
+        if error:
+            return error
+        
         try:
-            try:
-                asyncio.get_running_loop()
-                # We're already in an event loop; run in a dedicated thread with its own loop
-                import threading
-
-                result_container = {"result": None, "error": None}
-                done_event = threading.Event()
-
-                def run_in_thread():
-                    new_loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(new_loop)
-                    try:
-                        result_container["result"] = new_loop.run_until_complete(
-                            self.execute_tool(mcp_name, tool_name, arguments)
-                        )
-                    except Exception as e:
-                        result_container["error"] = e
-                    finally:
-                        new_loop.close()
-                        done_event.set()
-
-                thread = threading.Thread(target=run_in_thread)
-                thread.start()
-                done_event.wait(timeout=30)
-
-                if result_container["error"]:
-                    raise result_container["error"]
-
-                result = result_container["result"]
-            except RuntimeError:
-                # No running loop, create a new one
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    result = loop.run_until_complete(self.execute_tool(mcp_name, tool_name, arguments))
-                finally:
-                    loop.close()
+            result = await self.execute_tool(mcp_name, tool_name, arguments, on_progress=on_progress)
         except Exception as e:
             logger.error(f"Error executing MCP tool: {e}")
             return json.dumps({"error": str(e)})
@@ -481,38 +579,55 @@ class MCPService:
         logger.info(f"Tool {full_tool_name} result: {result[:200]}..." if result and len(result) > 200 else f"Tool {full_tool_name} result: {result}")
         return result
     
+    def execute_tool_sync(self, full_tool_name: str, arguments: dict) -> str:
+        """
+        Blocking wrapper for execute_tool_by_name, for callers outside the event loop.
+
+        The call is handed to the app's event loop so it shares the pooled
+        HTTP client; only when no loop has been seen yet (scripts) does it
+        run on a temporary one.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            return json.dumps({"error": "execute_tool_sync called from the event loop; await execute_tool_by_name instead"})
+        
+        coro = self.execute_tool_by_name(full_tool_name, arguments)
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(coro, loop)
+            try:
+                return future.result(timeout=settings.TOOL_TIMEOUT_SECONDS)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                return json.dumps({"error": f"{full_tool_name} timed out"})
+        return asyncio.run(coro)
+    
     def get_all_tools_for_llm(self) -> List[dict]:
         """
         Get all MCP tools in OpenAI/Groq function calling format.
         
-        Converts MCP tool schemas to OpenAI function format and prefixes
-        tool names with mcp_{mcp_name}_ to avoid conflicts.
+        Schemas are converted once per catalogue change (see _set_tools),
+        so this only concatenates the cached lists.
         """
         all_tools = []
-        
-        for mcp_name, connection in self.connections.items():
+        for _, _, llm_tools in self.get_tool_catalogues():
+            all_tools.extend(llm_tools)
+        return all_tools
+    
+    def get_tool_catalogues(self) -> List[tuple]:
+        """(mcp_name, tools_hash, llm_tools) for each connected server"""
+        catalogues = []
+        for name, connection in self.connections.items():
             if connection.status != MCPConnectionStatus.CONNECTED:
                 continue
-                
-            for tool in connection.tools:
-                # Convert MCP tool to OpenAI format
-                # MCP format: {name, description, inputSchema}
-                # OpenAI format: {type: "function", function: {name, description, parameters}}
-                
-                mcp_tool_name = tool.get("name", "unknown")
-                prefixed_name = f"mcp_{mcp_name}_{mcp_tool_name}"
-                
-                openai_tool = {
-                    "type": "function",
-                    "function": {
-                        "name": prefixed_name,
-                        "description": f"[{connection.display_name}] {tool.get('description', 'No description')}",
-                        "parameters": tool.get("inputSchema", {"type": "object", "properties": {}})
-                    }
-                }
-                all_tools.append(openai_tool)
-        
-        return all_tools
+            if not connection.tools_hash:
+                # Connection created with tools directly; convert once now
+                self._set_tools(connection, connection.tools)
+            catalogues.append((name, connection.tools_hash, connection.llm_tools))
+        return catalogues
     
     def is_mcp_tool(self, tool_name: str) -> bool:
         """Check if a tool name is an MCP tool"""
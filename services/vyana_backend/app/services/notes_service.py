@@ -1,57 +1,128 @@
+import heapq
 import json
 import os
+import re
+import sqlite3
 import uuid
 import logging
 from datetime import datetime
 from pathlib import Path
+
+from app.services.sqlite_db import ThreadLocalDB
 from typing import List, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
 # Storage path for notes
 STORAGE_DIR = Path(__file__).parent.parent / "storage"
+NOTES_DB = STORAGE_DIR / "notes.db"
+# Pre-SQLite storage, imported once and then renamed to notes.json.migrated
 NOTES_FILE = STORAGE_DIR / "notes.json"
 
+NOTE_COLUMNS = "n.id, n.title, n.content, n.created_at, n.updated_at"
+# bm25 column weights: title, content
+RANK_WEIGHTS = (5.0, 1.0)
+# Most search results returned
+MAX_SEARCH_RESULTS = 50
+# Search ranks at most this many of the newest matches, so a query matching
+# most of a large notebook costs the same as a narrow one
+RANK_WINDOW = 1000
+
+
+def to_fts_query(query: str) -> Optional[str]:
+    """Every word of the query as a prefix term ("q"* AND ...); None if it has no words"""
+    words = re.findall(r"\w+", query.lower())
+    return " AND ".join(f'"{w}"*' for w in words) if words else None
+
 
 class NotesService:
     """
-    Notes Service - Local JSON file storage (no Supabase required)
+    Notes Service - Local SQLite storage (no Supabase required)
+    Notes are listed newest first with keyset pagination over an index on
+    created_at, and searched through an FTS5 index over title and content
+    that triggers keep in step with every write.
     """
-    
-    def __init__(self):
-        logger.info("NotesService (Local JSON) initialized")
+
+    def __init__(self, db_path: Path = NOTES_DB, legacy_file: Path = NOTES_FILE):
+        logger.info("NotesService (Local SQLite) initialized")
+        self.db_path = Path(db_path)
+        self.legacy_file = Path(legacy_file)
+        self._db = ThreadLocalDB(self.db_path, row_factory=sqlite3.Row)
         self._ensure_storage()
-    
+
     def _ensure_storage(self):
-        """Ensure storage directory and file exist"""
-        STORAGE_DIR.mkdir(parents=True, exist_ok=True)
-        if not NOTES_FILE.exists():
-            self._save_notes([])
-    
-    def _load_notes(self) -> List[Dict]:
-        """Load notes from JSON file"""
-        try:
-            if NOTES_FILE.exists():
-                with open(NOTES_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
-        except Exception as e:
-            logger.error(f"Error loading notes: {e}")
-            return []
-    
-    def _save_notes(self, notes: List[Dict]):
-        """Save notes to JSON file"""
+        """Ensure storage directory and schema exist, importing legacy JSON once"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._db.conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS notes (
+                seq INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            -- Newest-first listing; the index also carries seq, the tie-breaker
+            CREATE INDEX IF NOT EXISTS idx_notes_created ON notes(created_at);
+            CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+                title, content, content='notes', content_rowid='seq',
+                tokenize="unicode61 remove_diacritics 2", prefix='2 3'
+            );
+            CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+                INSERT INTO notes_fts(rowid, title, content) VALUES (new.seq, new.title, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+                INSERT INTO notes_fts(notes_fts, rowid, title, content) VALUES ('delete', old.seq, old.title, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF title, content ON notes BEGIN
+                INSERT INTO notes_fts(notes_fts, rowid, title, content) VALUES ('delete', old.seq, old.title, old.content);
+                INSERT INTO notes_fts(rowid, title, content) VALUES (new.seq, new.title, new.content);
+            END;
+        """)
+        if self.legacy_file.exists():
+            self._import_legacy()
+
+    def _import_legacy(self):
+        """Move notes.json into the database, then rename it so it is never imported twice"""
         try:
-            with open(NOTES_FILE, 'w', encoding='utf-8') as f:
-                json.dump(notes, f, indent=2, ensure_ascii=False)
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                notes = json.load(f)
+            count = self.import_notes(notes)
+            os.replace(self.legacy_file, self.legacy_file.with_name(self.legacy_file.name + ".migrated"))
+            logger.info(f"Imported {count} notes from {self.legacy_file.name}")
         except Exception as e:
-            logger.error(f"Error saving notes: {e}")
+            logger.error(f"Error importing legacy notes: {e}")
+
+    def import_notes(self, notes: List[Dict]) -> int:
+        """Upsert existing note dicts (id, title, content, created_at, updated_at) in one transaction"""
+        now = datetime.utcnow().isoformat()
+        # Oldest first, so seq (the search recency order) follows created_at
+        notes = sorted(notes, key=lambda n: n.get("created_at") or now)
+        with self._db.write() as conn:
+            # An upsert, not INSERT OR REPLACE: REPLACE's implicit delete skips
+            # notes_fts_delete and would leave a stale row in the index
+            conn.executemany(
+                """INSERT INTO notes (id, title, content, created_at, updated_at) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET title=excluded.title, content=excluded.content,
+                       created_at=excluded.created_at, updated_at=excluded.updated_at""",
+                [(n.get("id") or str(uuid.uuid4()), n.get("title") or "Quick Note", n.get("content") or "",
+                  n.get("created_at") or now, n.get("updated_at") or n.get("created_at") or now) for n in notes],
+            )
+        return len(notes)
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        return {key: row[key] for key in ("id", "title", "content", "created_at", "updated_at")}
+
+    def _fetch(self, conn: sqlite3.Connection, note_id: str) -> Optional[Dict]:
+        row = conn.execute(f"SELECT {NOTE_COLUMNS} FROM notes n WHERE n.id=?", (note_id,)).fetchone()
+        return self._to_dict(row) if row else None
 
     def save_note(self, content: str, title: str = None) -> str:
         """Save a new note"""
         try:
-            notes = self._load_notes()
-            
             new_note = {
                 "id": str(uuid.uuid4()),
                 "title": title or "Quick Note",
@@ -59,88 +130,111 @@ class NotesService:
                 "created_at": datetime.utcnow().isoformat(),
                 "updated_at": datetime.utcnow().isoformat()
             }
-            
-            notes.insert(0, new_note)  # Add to beginning (newest first)
-            self._save_notes(notes)
-            
+
+            with self._db.write() as conn:
+                conn.execute(
+                    "INSERT INTO notes (id, title, content, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (new_note["id"], new_note["title"], new_note["content"],
+                     new_note["created_at"], new_note["updated_at"]),
+                )
+
             logger.info(f"Note saved: {new_note['title']}")
             return f"Note saved: {title or 'Quick Note'}"
-            
+
         except Exception as e:
             logger.error(f"Error saving note: {e}")
             return f"Error saving note: {e}"
 
-    def get_notes(self, limit: int = 10) -> List[Dict]:
-        """Get recent notes"""
+    def list_notes(self, limit: int = 10, cursor: str = None) -> Dict:
+        """
+        One page of notes, newest first. Pass the returned next_cursor to get
+        the following page; it is None on the last page. Each page is an index
+        range scan starting after the cursor, however deep it is.
+        """
         try:
-            notes = self._load_notes()
-            # Already sorted by newest first (inserted at beginning)
-            return notes[:limit]
+            params: tuple = ()
+            where = ""
+            if cursor:
+                created_at, _, seq = cursor.rpartition("|")
+                where = "WHERE (n.created_at, n.seq) < (?, ?)"
+                params = (created_at, int(seq))
+            rows = self._db.conn().execute(
+                f"""SELECT {NOTE_COLUMNS}, n.seq FROM notes n {where}
+                    ORDER BY n.created_at DESC, n.seq DESC LIMIT ?""",
+                (*params, limit + 1),
+            ).fetchall()
+            next_cursor = f"{rows[limit - 1]['created_at']}|{rows[limit - 1]['seq']}" if len(rows) > limit else None
+            return {"notes": [self._to_dict(row) for row in rows[:limit]], "next_cursor": next_cursor}
         except Exception as e:
-            logger.error(f"Error getting notes: {e}")
-            return []
-    
+            logger.error(f"Error listing notes: {e}")
+            return {"notes": [], "next_cursor": None}
+
+    def get_notes(self, limit: int = 10) -> List[Dict]:
+        """Get recent notes"""
+        return self.list_notes(limit)["notes"]
+
     def get_note(self, note_id: str) -> Optional[Dict]:
         """Get a single note by ID"""
         try:
-            notes = self._load_notes()
-            for note in notes:
-                if note.get("id") == note_id:
-                    return note
-            return None
+            return self._fetch(self._db.conn(), note_id)
         except Exception as e:
             logger.error(f"Error getting note: {e}")
             return None
-    
+
     def update_note(self, note_id: str, title: str = None, content: str = None) -> Dict:
         """Update an existing note"""
         try:
-            notes = self._load_notes()
-            
-            for i, note in enumerate(notes):
-                if note.get("id") == note_id:
-                    if title is not None:
-                        notes[i]["title"] = title
-                    if content is not None:
-                        notes[i]["content"] = content
-                    notes[i]["updated_at"] = datetime.utcnow().isoformat()
-                    
-                    self._save_notes(notes)
-                    return {"success": True, "note": notes[i]}
-            
+            with self._db.write() as conn:
+                updated = conn.execute(
+                    "UPDATE notes SET title=COALESCE(?, title), content=COALESCE(?, content), updated_at=? WHERE id=?",
+                    (title, content, datetime.utcnow().isoformat(), note_id),
+                ).rowcount
+                note = self._fetch(conn, note_id) if updated else None
+
+            if note:
+                return {"success": True, "note": note}
             return {"success": False, "error": "Note not found"}
         except Exception as e:
             logger.error(f"Error updating note: {e}")
             return {"success": False, "error": str(e)}
-    
+
     def delete_note(self, note_id: str) -> Dict:
         """Delete a note"""
         try:
-            notes = self._load_notes()
-            original_len = len(notes)
-            notes = [n for n in notes if n.get("id") != note_id]
-            
-            if len(notes) < original_len:
-                self._save_notes(notes)
+            with self._db.write() as conn:
+                deleted = conn.execute("DELETE FROM notes WHERE id=?", (note_id,)).rowcount
+
+            if deleted:
                 return {"success": True, "message": "Note deleted"}
             return {"success": False, "error": "Note not found"}
         except Exception as e:
             logger.error(f"Error deleting note: {e}")
             return {"success": False, "error": str(e)}
-    
-    def search_notes(self, query: str) -> List[Dict]:
-        """Search notes by title or content"""
+
+    def search_notes(self, query: str, limit: int = MAX_SEARCH_RESULTS) -> List[Dict]:
+        """
+        Search notes by title or content: every word must start a word of the
+        note. Best matches (bm25, title weighted) first, newer first among equals.
+        """
         try:
-            notes = self._load_notes()
-            query_lower = query.lower()
-            
-            results = []
-            for note in notes:
-                if (query_lower in (note.get("title") or "").lower() or
-                    query_lower in (note.get("content") or "").lower()):
-                    results.append(note)
-            
-            return results
+            expression = to_fts_query(query)
+            if not expression:
+                return []
+            conn = self._db.conn()
+            # Newest matches stream straight out of the index; only these are scored
+            scored = conn.execute(
+                """SELECT rowid, bm25(notes_fts, ?, ?) FROM notes_fts
+                   WHERE notes_fts MATCH ? ORDER BY rowid DESC LIMIT ?""",
+                (*RANK_WEIGHTS, expression, RANK_WINDOW),
+            ).fetchall()
+            best = [seq for seq, _ in heapq.nsmallest(limit, scored, key=lambda r: (r[1], -r[0]))]
+            if not best:
+                return []
+            rows = conn.execute(
+                f"SELECT {NOTE_COLUMNS}, n.seq FROM notes n WHERE n.seq IN ({','.join('?' * len(best))})", best
+            ).fetchall()
+            by_seq = {row["seq"]: row for row in rows}
+            return [self._to_dict(by_seq[seq]) for seq in best if seq in by_seq]
         except Exception as e:
             logger.error(f"Error searching notes: {e}")
             return []
@@ -0,0 +1,93 @@
+"""
+Response Formatter for Vyana
+Incrementally cleans up LLM output for chat display (no code formatting,
+numbered list items one per line with a blank line between them).
+
+Works on partial text so it can be applied to streamed token deltas: only
+whitespace-terminated words are formatted and emitted, the trailing partial
+word is held back until more text (or flush) arrives.
+"""
+import re
+
+# A complete token, together with the whitespace in front of it
+_TOKEN_RE = re.compile(r"(\s*)(\S+)(?=\s)")
+# "1." on its own, or "1.Item" glued to the item text (but not "3.14")
+_LIST_MARKER_RE = re.compile(r"^(\d{1,3})\.(?:([^\d\s].*))?$")
+# Per-item fields that get their own line inside a list
+_FIELD_RE = re.compile(r"^\**(Time|Due|Description|Notes|Type):", re.IGNORECASE)
+_EXTRA_NEWLINES_RE = re.compile(r"\n{3,}")
+
+
+class StreamingFormatter:
+    """
+    Stateful formatter for streamed chat output.
+
+    Usage:
+        formatter = StreamingFormatter()
+        for delta in chunks:
+            yield formatter.feed(delta)
+        yield formatter.flush()
+    """
+
+    def __init__(self, continuation: bool = False):
+        """
+        Args:
+            continuation: True if the output continues previously emitted text,
+                in which case it starts as a new paragraph instead of being
+                left-stripped
+        """
+        self._buffer = "\n\n" if continuation else ""
+        self._started = continuation
+        self._in_list = False
+
+    def feed(self, text: str) -> str:
+        """Add raw text, return the formatted text that is now safe to emit"""
+        if not text:
+            return ""
+        self._buffer += text.replace("`", "")
+
+        output = []
+        consumed = 0
+        for match in _TOKEN_RE.finditer(self._buffer):
+            output.append(self._format_token(match.group(1), match.group(2)))
+            consumed = match.end()
+        self._buffer = self._buffer[consumed:]
+        return "".join(output)
+
+    def flush(self) -> str:
+        """Emit whatever is still buffered (end of the response)"""
+        remaining = self._buffer
+        self._buffer = ""
+        stripped = remaining.rstrip()
+        if not stripped:
+            return ""
+        whitespace_len = len(stripped) - len(stripped.lstrip())
+        return self._format_token(stripped[:whitespace_len], stripped[whitespace_len:])
+
+    def _format_token(self, whitespace: str, token: str) -> str:
+        separator = whitespace
+        marker = _LIST_MARKER_RE.match(token)
+        if marker:
+            # Each numbered item on its own line with a blank line before it
+            self._in_list = True
+            separator = "\n\n"
+            if marker.group(2):
+                token = f"{marker.group(1)}. {marker.group(2)}"
+        elif self._in_list and _FIELD_RE.match(token):
+            separator = "\n"
+        else:
+            separator = _EXTRA_NEWLINES_RE.sub("\n\n", separator)
+
+        if not self._started:
+            # Strip leading whitespace from the response
+            separator = ""
+            self._started = True
+        return separator + token
+
+
+def format_response(text: str) -> str:
+    """Format a complete response in one go"""
+    if not text:
+        return text
+    formatter = StreamingFormatter()
+    return formatter.feed(text) + formatter.flush()
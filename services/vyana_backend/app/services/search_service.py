@@ -1,8 +1,8 @@
 import logging
-import requests
 from typing import List, Dict, Optional
 from datetime import datetime
 from app.config import settings
+from app.services.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -16,22 +16,22 @@ class SearchService:
         # Fallback to DuckDuckGo
         self.ddg_url = "https://api.duckduckgo.com/"
     
-    def web_search(self, query: str) -> str:
+    async def web_search(self, query: str) -> str:
         """Search the web using SerpAPI (with DDG fallback)"""
         
         # Try SerpAPI first if API key is available
         if self.serp_api_key:
             try:
-                result = self._search_with_serpapi(query)
+                result = await self._search_with_serpapi(query)
                 if result and not result.startswith("No"):
                     return result
             except Exception as e:
                 logger.warning(f"SerpAPI failed: {e}, falling back to DuckDuckGo")
         
         # Fallback to DuckDuckGo
-        return self._search_with_duckduckgo(query)
+        return await self._search_with_duckduckgo(query)
     
-    def _search_with_serpapi(self, query: str) -> Optional[str]:
+    async def _search_with_serpapi(self, query: str) -> Optional[str]:
         """Search using SerpAPI (Google Search)"""
         try:
             params = {
@@ -41,7 +41,7 @@ class SearchService:
                 'num': 3  # Get top 3 results
             }
             
-            response = requests.get(self.serp_url, params=params, timeout=10)
+            response = await http_client.get(self.serp_url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -93,7 +93,7 @@ class SearchService:
             logger.error(f"SerpAPI search error: {e}")
             return None
     
-    def _search_with_duckduckgo(self, query: str) -> str:
+    async def _search_with_duckduckgo(self, query: str) -> str:
         """Fallback search using DuckDuckGo Instant Answer API"""
         try:
             params = {
@@ -103,7 +103,7 @@ class SearchService:
                 'skip_disambig': 1
             }
             
-            response = requests.get(self.ddg_url, params=params, timeout=5)
+            response = await http_client.get(self.ddg_url, params=params, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -140,7 +140,7 @@ class SearchService:
             logger.error(f"DuckDuckGo search error: {e}")
             return f"Search failed: {str(e)}"
     
-    def get_news(self, topic: str = "technology") -> str:
+    async def get_news(self, topic: str = "technology") -> str:
         """Get latest news headlines"""
         
         # If SerpAPI available, use Google News
@@ -154,7 +154,7 @@ class SearchService:
                     'hl': 'en'   # English
                 }
                 
-                response = requests.get(self.serp_url, params=params, timeout=10)
+                response = await http_client.get(self.serp_url, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -179,7 +179,7 @@ class SearchService:
         # Fallback
         try:
             search_query = f"{topic} latest news"
-            result = self.web_search(search_query)
+            result = await self.web_search(search_query)
             return f"Latest on {topic}:\n{result}"
         except Exception as e:
             logger.error(f"News error: {e}")
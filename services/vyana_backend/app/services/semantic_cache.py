@@ -0,0 +1,211 @@
+"""
+Semantic Chat Cache for Vyana
+In-process cache of chat responses that also answers paraphrased repeats of
+a question ("What's the capital of France?" / "what is the capital of
+france"), which the exact Redis key never matches.
+
+Each message becomes a hashed n-gram vector (whole words, bigrams of the
+meaningful words so order counts, and character trigrams; common filler
+words down-weighted; L2-normalised). Lookups score only the entries for the
+same model that share at least half of the message's words, found through
+an inverted index, and return the most similar one when its cosine
+similarity reaches the threshold and both messages have the same numbers
+("2+2" vs "2+3"), the same number of negations ("is it safe" vs "is it not
+safe") and the same direction words followed by the same words ("celsius
+to fahrenheit" vs "fahrenheit to celsius").
+Entries expire after their own TTL; the least recently used entry is
+evicted when the cache is full.
+"""
+import math
+import re
+import time
+import zlib
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+# Hash buckets per vector
+DIMENSIONS = 1 << 18
+_WORD = re.compile(r"[a-z0-9]+")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+# Words that say little about what is being asked
+FILLER_WORDS = frozenset({
+    "a", "an", "the", "is", "are", "was", "were", "be", "to", "of", "in", "on", "for", "and", "or", "with",
+    "me", "my", "i", "you", "your", "it", "this", "that", "what", "whats", "s", "do", "does", "how",
+    "can", "could", "would", "please", "tell", "give", "some", "any", "about", "hey", "hi",
+})
+FILLER_WEIGHT = 0.15
+TRIGRAM_WEIGHT = 0.5
+BIGRAM_WEIGHT = 1.5
+# Words that flip the meaning of a question; both messages must have as many
+NEGATION_WORDS = frozenset({
+    "not", "no", "never", "without", "nor", "none", "cannot", "cant", "dont", "doesnt", "didnt", "isnt",
+    "arent", "wasnt", "werent", "wont", "wouldnt", "shouldnt", "couldnt", "havent", "hasnt", "neither",
+})
+# Words whose object sets which way a question goes; the word after each must match
+DIRECTION_WORDS = frozenset({
+    "to", "from", "into", "than", "vs", "versus", "before", "after", "above", "below", "over", "under",
+})
+
+Vector = Dict[int, float]
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower().replace("'", ""))
+
+
+def _word_bucket(word: str) -> int:
+    return zlib.crc32(b"w:" + word.encode()) % DIMENSIONS
+
+
+def embed(text: str) -> Vector:
+    """Sparse unit vector of the message's hashed word, word-bigram and character-trigram features"""
+    features: Counter = Counter()
+    words = _words(text)
+    for word in words:
+        weight = FILLER_WEIGHT if word in FILLER_WORDS else 1.0
+        features[_word_bucket(word)] += weight
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            features[zlib.crc32(padded[i:i + 3].encode()) % DIMENSIONS] += weight * TRIGRAM_WEIGHT
+    meaningful = [word for word in words if word not in FILLER_WORDS]
+    for first, second in zip(meaningful, meaningful[1:]):
+        features[zlib.crc32(f"b:{first} {second}".encode()) % DIMENSIONS] += BIGRAM_WEIGHT
+    norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+    return {bucket: v / norm for bucket, v in features.items()}
+
+
+def _signature(text: str) -> Tuple:
+    """
+    What two messages must share exactly to be the same question: their
+    numbers, how many negations they have, and each direction word with the
+    next meaningful word after it.
+    """
+    words = _words(text)
+    negations = sum(word in NEGATION_WORDS for word in words)
+    directions = []
+    for i, word in enumerate(words):
+        if word in DIRECTION_WORDS:
+            following = next((w for w in words[i + 1:] if w not in FILLER_WORDS), "")
+            directions.append((word, following))
+    return tuple(_NUMBER.findall(text)), negations, tuple(directions)
+
+
+def _index_buckets(text: str) -> Set[int]:
+    """Buckets of the words that carry the meaning (all words if none do)"""
+    words = set(_words(text))
+    return {_word_bucket(word) for word in (words - FILLER_WORDS or words)}
+
+
+def _similarity(a: Vector, b: Vector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(bucket, 0.0) for bucket, weight in a.items())
+
+
+class _Entry:
+    __slots__ = ("key", "vector", "buckets", "signature", "response", "expires_at")
+
+    def __init__(self, key: Tuple[str, str], vector: Vector, buckets: Set[int], signature: Tuple,
+                 response: str, expires_at: float):
+        self.key = key  # (scope, normalised message)
+        self.vector = vector
+        self.buckets = buckets
+        self.signature = signature
+        self.response = response
+        self.expires_at = expires_at
+
+
+class SemanticCache:
+    """
+    Usage:
+        cache.set('deepseek-chat', message, response, ttl=3600)
+        cache.get('deepseek-chat', 'paraphrase of message')   # response or None
+        cache.stats()
+    """
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 2000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()  # least recently used first
+        self._postings: Dict[Tuple[str, int], Set[int]] = {}  # (scope, word bucket) -> entry ids
+        self._ids: Dict[Tuple[str, str], int] = {}  # (scope, normalised message) -> id
+        self._next_id = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    @staticmethod
+    def _normalise(message: str) -> str:
+        return " ".join(message.lower().split())
+
+    def get(self, scope: str, message: str) -> Optional[str]:
+        """Response cached for the most similar message in scope, if similar enough"""
+        vector = embed(message)
+        signature = _signature(message)
+        buckets = _index_buckets(message)
+        shared: Counter = Counter()
+        for bucket in buckets:
+            shared.update(self._postings.get((scope, bucket), ()))
+        # A close enough match shares most of the message's words; don't score the rest
+        needed = (len(buckets) + 1) // 2
+        candidates = [entry_id for entry_id, count in shared.items() if count >= needed]
+
+        now = time.monotonic()
+        best, best_score = None, self.threshold
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if entry.expires_at <= now:
+                self._remove(entry_id)
+                self.expirations += 1
+                continue
+            score = _similarity(vector, entry.vector)
+            if score >= best_score and entry.signature == signature:
+                best, best_score = entry_id, score
+        if best is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(best)
+        self.hits += 1
+        return self._entries[best].response
+
+    def set(self, scope: str, message: str, response: str, ttl: float):
+        key = (scope, self._normalise(message))
+        if key in self._ids:
+            self._remove(self._ids[key])
+        while len(self._entries) >= self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+        entry_id = self._next_id
+        self._next_id += 1
+        buckets = _index_buckets(message)
+        self._entries[entry_id] = _Entry(key, embed(message), buckets, _signature(message), response,
+                                         time.monotonic() + ttl)
+        self._ids[key] = entry_id
+        for bucket in buckets:
+            self._postings.setdefault((scope, bucket), set()).add(entry_id)
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        scope = entry.key[0]
+        for bucket in entry.buckets:
+            ids = self._postings[(scope, bucket)]
+            ids.discard(entry_id)
+            if not ids:
+                del self._postings[(scope, bucket)]
+        del self._ids[entry.key]
+
+    def clear(self):
+        self._entries.clear()
+        self._postings.clear()
+        self._ids.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / max(lookups, 1) * 100, 2),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "threshold": self.threshold,
+        }
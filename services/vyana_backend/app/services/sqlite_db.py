@@ -0,0 +1,51 @@
+"""
+SQLite Connections for Vyana
+Per-thread autocommit connections to one database file, and write
+transactions that take the write lock up front. Used by the stores whose
+writes are read-modify-write sequences (contacts, notes, the tasks mirror).
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+
+class ThreadLocalDB:
+    """
+    Usage:
+        db = ThreadLocalDB(path, row_factory=sqlite3.Row)
+        db.conn().execute("SELECT ...")          # read, autocommit
+        with db.write() as conn:                 # one transaction
+            conn.execute("UPDATE ...")
+    """
+
+    def __init__(self, db_path, row_factory: Optional[Callable] = None, timeout: float = 10):
+        self.db_path = db_path
+        self.row_factory = row_factory
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def conn(self) -> sqlite3.Connection:
+        """Per-thread connection in autocommit mode; writes open their own transactions"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=self.timeout)
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """
+        A write transaction. BEGIN IMMEDIATE takes the write lock up front, so
+        a read-modify-write can't interleave with another writer.
+        """
+        conn = self.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
@@ -0,0 +1,95 @@
+"""
+Synced Mirror Base for Vyana
+Scaffolding shared by the local SQLite copies of Google data (Gmail,
+Contacts, Calendar, Tasks): one sync lock per synced unit, single-flight
+background syncs, staleness tracking and per-thread read connections.
+
+A mirror synced as a whole uses the empty key; mirrors synced per calendar
+or task list pass its id as the key, e.g. is_stale('primary').
+"""
+import logging
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SyncedMirror:
+    """
+    Subclasses set sync_name / sync_thread_name and implement _get_conn,
+    sync_interval and _sync_locked(*key, service).
+    """
+
+    sync_name = "Mirror"  # in log messages
+    sync_thread_name = "mirror-sync"
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._sync_locks: Dict[Tuple, threading.Lock] = {}
+        self._sync_locks_guard = threading.Lock()
+        self._last_sync: Dict[Tuple, float] = {}  # key -> monotonic time of the last successful sync
+        self._sync_thread: Optional[threading.Thread] = None  # latest background sync
+        # Per-thread read connections keep prepared statements warm
+        self._local = threading.local()
+
+    @property
+    def sync_interval(self) -> float:
+        """Seconds after a sync before the mirror counts as stale"""
+        raise NotImplementedError
+
+    def _get_conn(self) -> sqlite3.Connection:
+        raise NotImplementedError
+
+    def _read_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._get_conn()
+        return conn
+
+    def _sync_lock(self, *key) -> threading.Lock:
+        with self._sync_locks_guard:
+            return self._sync_locks.setdefault(key, threading.Lock())
+
+    def is_stale(self, *key) -> bool:
+        return time.monotonic() - self._last_sync.get(key, 0.0) > self.sync_interval
+
+    # --- sync ---
+
+    def _sync_locked(self, *key_and_service) -> Dict[str, object]:
+        raise NotImplementedError
+
+    def _sync(self, service, *key) -> Dict[str, object]:
+        with self._sync_lock(*key):
+            return self._sync_and_mark(service, *key)
+
+    def _sync_and_mark(self, service, *key) -> Dict[str, object]:
+        stats = self._sync_locked(*key, service)
+        self._last_sync[key] = time.monotonic()
+        return stats
+
+    def _background_sync(self, service, *key):
+        """What a background sync runs, with the sync lock held"""
+        self._sync_and_mark(service, *key)
+
+    def _sync_in_background(self, get_service: Callable[[], object], *key) -> Optional[threading.Thread]:
+        """Start a sync on a background thread if the key is stale and none is running"""
+        lock = self._sync_lock(*key)
+        if not self.is_stale(*key) or not lock.acquire(blocking=False):
+            return None
+
+        def run():
+            try:
+                service = get_service()
+                if service:
+                    self._background_sync(service, *key)
+            except Exception as e:
+                target = f" of {key[0]}" if key else ""
+                logger.error(f"{self.sync_name} sync{target} failed: {e}")
+            finally:
+                lock.release()
+
+        self._sync_thread = threading.Thread(target=run, name=self.sync_thread_name, daemon=True)
+        self._sync_thread.start()
+        return self._sync_thread
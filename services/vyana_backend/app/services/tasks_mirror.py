@@ -0,0 +1,638 @@
+"""
+Google Tasks Mirror for Vyana
+Local SQLite copy of each task list, keyed by the task list id callers use
+('@default' included). A list is fully synced once, then polled with
+tasks.list updatedMin (deleted and hidden tasks included) for whatever
+changed since the previous poll.
+
+Creates, updates, completions and deletions are applied to the local copy
+at once and recorded in a durable outbox in the same database, which is
+replayed to Google in batch HTTP requests. Polls never overwrite a task
+that still has changes waiting in the outbox. New tasks get a local- id
+until Google's insert lands; the local id keeps resolving afterwards.
+"""
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from googleapiclient.errors import HttpError
+
+from app.config import settings
+from app.services.sqlite_db import ThreadLocalDB
+from app.services.synced_mirror import SyncedMirror
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.environ.get("DATA_DIR", ".")
+os.makedirs(DATA_DIR, exist_ok=True)
+TASKS_DB_PATH = os.path.join(DATA_DIR, "tasks_mirror.db")
+
+# Largest page tasks.list allows
+PAGE_SIZE = 100
+# Changes sent per batch request (Google accepts up to 100 calls per batch)
+BATCH_SIZE = 50
+# Polls ask for changes since the previous poll started minus this margin,
+# so clock skew between us and Google never loses an update (changes seen
+# twice are applied twice, harmlessly)
+UPDATED_MIN_OVERLAP = datetime.timedelta(minutes=5)
+# Google only reports deleted tasks for a while; older mirrors resync fully
+MAX_POLL_AGE = datetime.timedelta(days=7)
+LOCAL_ID_PREFIX = "local-"
+# Responses worth retrying; anything else from Google drops the change
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+# Replays of a change that keeps failing with a retryable error before it is dropped
+MAX_ATTEMPTS = 5
+
+# Fields of the app's task dict kept in their own columns, so views never decode `data`
+VIEW_FIELDS = ("id", "title", "notes", "due", "status", "completed", "parent", "position", "updated", "links")
+VIEW_COLUMNS = ", ".join(VIEW_FIELDS)
+# Display order: subtasks follow their parent, siblings are in Google's position
+# order (positions are fixed-width digit strings). Top-level tasks sort by their
+# own position, subtasks by "<parent position>/<position>".
+SUBTASK_SORT_KEY = """COALESCE((SELECT p.position FROM google_tasks p
+                                 WHERE p.task_list = google_tasks.task_list AND p.id = google_tasks.parent), '')
+                       || '/' || COALESCE(position, '')"""
+
+
+def parse_task(task: dict) -> Dict:
+    """Flatten a Tasks API task into the task dict used across the app"""
+    return {
+        'id': task.get('id'),
+        'title': task.get('title', ''),
+        'notes': task.get('notes', ''),
+        'due': task.get('due'),  # RFC 3339 date string
+        'status': task.get('status'),  # 'needsAction' or 'completed'
+        'is_completed': task.get('status') == 'completed',
+        'completed': task.get('completed'),  # Completion date
+        'parent': task.get('parent'),  # Parent task ID for subtasks
+        'position': task.get('position'),
+        'updated': task.get('updated'),
+        'links': task.get('links', []),
+    }
+
+
+def is_local_id(task_id: Optional[str]) -> bool:
+    return bool(task_id) and task_id.startswith(LOCAL_ID_PREFIX)
+
+
+def _timestamp(moment: datetime.datetime) -> str:
+    """RFC 3339 in the form Google uses for `updated`"""
+    return moment.astimezone(datetime.timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _now() -> str:
+    return _timestamp(datetime.datetime.now(datetime.timezone.utc))
+
+
+class _Change:
+    """One outbox row"""
+
+    __slots__ = ("seq", "task_list", "task_id", "op", "body", "parent", "attempts")
+
+    def __init__(self, seq, task_list, task_id, op, body, parent, attempts):
+        self.seq = seq
+        self.task_list = task_list
+        self.task_id = task_id
+        self.op = op  # insert | patch | delete
+        self.body = json.loads(body) if body else None
+        self.parent = parent
+        self.attempts = attempts
+
+
+class TasksMirror(SyncedMirror):
+    """
+    Usage:
+        tasks_mirror.sync('@default', service)                 # full or incremental
+        tasks_mirror.list_tasks('@default')                    # local read
+        tasks_mirror.update('@default', task_id, {...})        # local write, queued
+        tasks_mirror.flush(service)                            # replay queued writes
+    """
+
+    sync_name = "Tasks mirror"
+    sync_thread_name = "tasks-mirror-sync"
+
+    def __init__(self, db_path: str = TASKS_DB_PATH):
+        super().__init__(db_path)
+        self._db = ThreadLocalDB(db_path)
+        self._flush_lock = threading.Lock()
+        self._flush_wanted = threading.Event()
+        self._init_db()
+
+    @property
+    def sync_interval(self) -> float:
+        return settings.TASKS_SYNC_INTERVAL
+
+    def _get_conn(self) -> sqlite3.Connection:
+        return self._db.conn()
+
+    def _init_db(self):
+        conn = self._db.conn()
+        # Background syncs and replays write while requests read
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS google_tasks (
+                task_list TEXT NOT NULL,
+                id TEXT NOT NULL,
+                parent TEXT,
+                position TEXT,
+                sort_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                title TEXT,
+                title_key TEXT NOT NULL,
+                notes TEXT,
+                due TEXT,
+                completed TEXT,
+                updated TEXT,
+                links TEXT,
+                data TEXT NOT NULL,
+                PRIMARY KEY (task_list, id)
+            );
+            -- Views walk this index in display order instead of sorting
+            CREATE INDEX IF NOT EXISTS idx_google_tasks_order ON google_tasks(task_list, sort_key);
+            CREATE INDEX IF NOT EXISTS idx_google_tasks_parent ON google_tasks(task_list, parent);
+            CREATE TABLE IF NOT EXISTS google_tasks_sync_state (
+                task_list TEXT PRIMARY KEY,
+                updated_min TEXT
+            );
+            CREATE TABLE IF NOT EXISTS google_tasks_outbox (
+                seq INTEGER PRIMARY KEY,
+                task_list TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                op TEXT NOT NULL,
+                body TEXT,
+                parent TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                sending INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_google_tasks_outbox_task ON google_tasks_outbox(task_list, task_id);
+            -- Google ids of tasks created locally
+            CREATE TABLE IF NOT EXISTS google_tasks_ids (
+                local_id TEXT PRIMARY KEY,
+                remote_id TEXT NOT NULL
+            );
+        """)
+        # A replay interrupted by a restart is sent again
+        conn.execute("UPDATE google_tasks_outbox SET sending = 0 WHERE sending = 1")
+
+    # --- state ---
+
+    def is_ready(self, task_list: str) -> bool:
+        """True once a full sync of the task list has completed"""
+        return self._db.conn().execute(
+            "SELECT 1 FROM google_tasks_sync_state WHERE task_list=?", (task_list,)
+        ).fetchone() is not None
+
+    def pending_count(self) -> int:
+        """Changes not yet accepted by Google"""
+        return self._db.conn().execute("SELECT COUNT(*) FROM google_tasks_outbox").fetchone()[0]
+
+    def clear(self):
+        """Forget every task list and queued change (e.g. on logout or account change)"""
+        with self._db.write() as conn:
+            for table in ("google_tasks", "google_tasks_sync_state", "google_tasks_outbox", "google_tasks_ids"):
+                conn.execute(f"DELETE FROM {table}")
+        self._last_sync.clear()
+
+    def _resync_later(self, conn: sqlite3.Connection, task_list: str):
+        """The local copy may have drifted from Google: make the next sync a full one, soon"""
+        conn.execute("UPDATE google_tasks_sync_state SET updated_min = NULL WHERE task_list=?", (task_list,))
+        self._last_sync.pop((task_list,), None)
+
+    # --- sync ---
+
+    def sync(self, task_list: str, service) -> Dict[str, object]:
+        """Bring one task list up to date: incremental if possible, otherwise full"""
+        return self._sync(service, task_list)
+
+    def sync_in_background(self, task_list: str, get_service: Callable[[], object]) -> Optional[threading.Thread]:
+        """Queued changes are replayed before the background sync"""
+        return self._sync_in_background(get_service, task_list)
+
+    def _background_sync(self, service, task_list: str):
+        if self.pending_count() and self._flush_lock.acquire(blocking=False):
+            try:
+                self._flush_locked(service)
+            finally:
+                self._flush_lock.release()
+        super()._background_sync(service, task_list)
+
+    def _sync_locked(self, task_list: str, service) -> Dict[str, object]:
+        row = self._db.conn().execute(
+            "SELECT updated_min FROM google_tasks_sync_state WHERE task_list=?", (task_list,)
+        ).fetchone()
+        oldest = _timestamp(datetime.datetime.now(datetime.timezone.utc) - MAX_POLL_AGE)
+        if row is None or row[0] is None or row[0] < oldest:
+            stats = self._full_sync(task_list, service)
+        else:
+            stats = self._incremental_sync(task_list, service, row[0])
+        return stats
+
+    @staticmethod
+    def _list_all(service, task_list: str, **params) -> List[dict]:
+        """Every page of tasks.list, completed and hidden tasks included"""
+        items: List[dict] = []
+        page_token = None
+        while True:
+            page = service.tasks().list(
+                tasklist=task_list, maxResults=PAGE_SIZE, showCompleted=True, showHidden=True,
+                pageToken=page_token, **params,
+            ).execute()
+            items.extend(page.get('items', []))
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                return items
+
+    @staticmethod
+    def _next_updated_min(started: datetime.datetime) -> str:
+        return _timestamp(started - UPDATED_MIN_OVERLAP)
+
+    def _full_sync(self, task_list: str, service) -> Dict[str, object]:
+        start = time.perf_counter()
+        started = datetime.datetime.now(datetime.timezone.utc)
+        items = self._list_all(service, task_list)
+
+        with self._db.write() as conn:
+            pending = self._pending_ids(conn, task_list)
+            # Tasks with queued changes (local creations included) keep their local version
+            conn.execute(
+                """DELETE FROM google_tasks WHERE task_list=?
+                   AND id NOT IN (SELECT task_id FROM google_tasks_outbox WHERE task_list=?)""",
+                (task_list, task_list),
+            )
+            self._upsert(conn, task_list, [t for t in items if t['id'] not in pending])
+            conn.execute(
+                "INSERT OR REPLACE INTO google_tasks_sync_state (task_list, updated_min) VALUES (?, ?)",
+                (task_list, self._next_updated_min(started)),
+            )
+
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"Tasks mirror full sync of {task_list}: {len(items)} tasks in {elapsed:.0f}ms")
+        return {"mode": "full", "tasks": len(items)}
+
+    def _incremental_sync(self, task_list: str, service, updated_min: str) -> Dict[str, object]:
+        started = datetime.datetime.now(datetime.timezone.utc)
+        items = self._list_all(service, task_list, showDeleted=True, updatedMin=updated_min)
+
+        with self._db.write() as conn:
+            pending = self._pending_ids(conn, task_list)
+            items = [t for t in items if t['id'] not in pending]
+            deleted = [t['id'] for t in items if t.get('deleted')]
+            changed = [t for t in items if not t.get('deleted')]
+            self._upsert(conn, task_list, changed)
+            self._delete(conn, task_list, deleted)
+            conn.execute(
+                "UPDATE google_tasks_sync_state SET updated_min=? WHERE task_list=?",
+                (self._next_updated_min(started), task_list),
+            )
+        return {"mode": "incremental", "changed": len(changed), "deleted": len(deleted)}
+
+    @staticmethod
+    def _pending_ids(conn: sqlite3.Connection, task_list: str) -> Set[str]:
+        rows = conn.execute("SELECT task_id FROM google_tasks_outbox WHERE task_list=?", (task_list,))
+        return {row[0] for row in rows}
+
+    @classmethod
+    def _upsert(cls, conn: sqlite3.Connection, task_list: str, tasks: Iterable[dict]):
+        tasks = list(tasks)
+        conn.executemany(
+            """INSERT OR REPLACE INTO google_tasks
+               (task_list, id, parent, position, sort_key, status, title, title_key, notes, due, completed,
+                updated, links, data)
+               VALUES (?, ?, ?, ?, COALESCE(?, ''), ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [(task_list, t['id'], t.get('parent'), t.get('position'), t.get('position'),
+              t.get('status') or 'needsAction', t.get('title'), (t.get('title') or '').lower(), t.get('notes'),
+              t.get('due'), t.get('completed'), t.get('updated'),
+              json.dumps(t['links']) if t.get('links') else None, json.dumps(t)) for t in tasks],
+        )
+        cls._refresh_sort_keys(conn, task_list, [t['id'] for t in tasks])
+
+    @staticmethod
+    def _refresh_sort_keys(conn: sqlite3.Connection, task_list: str, task_ids: Iterable[str]):
+        """Sort keys of these tasks if they are subtasks, and of their subtasks"""
+        conn.executemany(
+            f"""UPDATE google_tasks SET sort_key = {SUBTASK_SORT_KEY}
+                WHERE task_list=? AND parent IS NOT NULL AND (id=? OR parent=?)""",
+            [(task_list, task_id, task_id) for task_id in task_ids],
+        )
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, task_list: str, task_ids: Iterable[str]):
+        # Subtasks go with their parent, as they do in Google Tasks
+        conn.executemany(
+            "DELETE FROM google_tasks WHERE task_list=? AND (id=? OR parent=?)",
+            [(task_list, task_id, task_id) for task_id in task_ids],
+        )
+
+    # --- local writes ---
+
+    def resolve(self, task_id: Optional[str]) -> Optional[str]:
+        """Google's id for a task created locally, once its insert has landed"""
+        return self._resolve(self._db.conn(), task_id)
+
+    @staticmethod
+    def _resolve(conn: sqlite3.Connection, task_id: Optional[str]) -> Optional[str]:
+        if not is_local_id(task_id):
+            return task_id
+        row = conn.execute("SELECT remote_id FROM google_tasks_ids WHERE local_id=?", (task_id,)).fetchone()
+        return row[0] if row else task_id
+
+    def create(self, task_list: str, body: dict, parent: Optional[str] = None) -> Dict:
+        """Add a task locally (body as for tasks.insert) and queue its insert"""
+        task_id = f"{LOCAL_ID_PREFIX}{uuid.uuid4().hex}"
+        with self._db.write() as conn:
+            parent = self._resolve(conn, parent)
+            task = dict(body, kind='tasks#task', id=task_id, updated=_now())
+            if parent:
+                task['parent'] = parent
+            self._upsert(conn, task_list, [task])
+            self._enqueue(conn, task_list, task_id, 'insert', body, parent)
+        return parse_task(task)
+
+    def update(self, task_list: str, task_id: str, changes: dict) -> Optional[Dict]:
+        """Apply changes (body as for tasks.patch) locally and queue them; None if the task is unknown"""
+        changes = dict(changes)
+        with self._db.write() as conn:
+            task_id = self._resolve(conn, task_id)
+            task = self._fetch(conn, task_list, task_id)
+            if task is None:
+                return None
+            if changes.get('status') == 'needsAction':
+                changes['completed'] = None  # Google keeps the completion time otherwise
+            task.update(changes, updated=_now())
+            if task.get('status') == 'completed':
+                task.setdefault('completed', task['updated'])
+            task = {k: v for k, v in task.items() if v is not None}
+            self._upsert(conn, task_list, [task])
+            self._enqueue(conn, task_list, task_id, 'patch', changes)
+        return parse_task(task)
+
+    def delete(self, task_list: str, task_id: str) -> bool:
+        """Remove a task locally and queue its deletion; False if the task is unknown"""
+        with self._db.write() as conn:
+            task_id = self._resolve(conn, task_id)
+            if self._fetch(conn, task_list, task_id) is None:
+                return False
+            self._delete(conn, task_list, [task_id])
+            self._enqueue(conn, task_list, task_id, 'delete')
+        return True
+
+    def put(self, task_list: str, task: dict):
+        """Write-through of a task changed directly through the API (e.g. moved)"""
+        with self._db.write() as conn:
+            if self.is_ready(task_list) and task['id'] not in self._pending_ids(conn, task_list):
+                self._upsert(conn, task_list, [task])
+
+    def _enqueue(self, conn: sqlite3.Connection, task_list: str, task_id: str, op: str,
+                 body: Optional[dict] = None, parent: Optional[str] = None):
+        """Queue a change, folding it into a change for the same task still waiting to be sent"""
+        row = conn.execute(
+            """SELECT seq, op, body FROM google_tasks_outbox
+               WHERE task_list=? AND task_id=? AND sending=0 ORDER BY seq DESC LIMIT 1""",
+            (task_list, task_id),
+        ).fetchone()
+        if row is not None:
+            seq, queued_op, queued_body = row
+            if op == 'patch' and queued_op in ('insert', 'patch'):
+                merged = dict(json.loads(queued_body), **body)
+                if queued_op == 'insert':
+                    merged = {k: v for k, v in merged.items() if v is not None}
+                conn.execute("UPDATE google_tasks_outbox SET body=? WHERE seq=?", (json.dumps(merged), seq))
+                return
+            if op == 'delete' and queued_op == 'insert':
+                # Never reached Google: nothing to send at all
+                conn.execute("DELETE FROM google_tasks_outbox WHERE seq=?", (seq,))
+                return
+            if op == 'delete':
+                conn.execute("UPDATE google_tasks_outbox SET op='delete', body=NULL WHERE seq=?", (seq,))
+                return
+        conn.execute(
+            "INSERT INTO google_tasks_outbox (task_list, task_id, op, body, parent) VALUES (?, ?, ?, ?, ?)",
+            (task_list, task_id, op, json.dumps(body) if body is not None else None, parent),
+        )
+
+    # --- replay ---
+
+    def flush(self, service) -> Dict[str, int]:
+        """Send every queued change Google can take now"""
+        with self._flush_lock:
+            return self._flush_locked(service)
+
+    def flush_in_background(self, get_service: Callable[[], object]) -> Optional[threading.Thread]:
+        """
+        Replay queued changes on a background thread after TASKS_OUTBOX_FLUSH_DELAY,
+        unless a replay is already running (it picks the new changes up).
+        """
+        self._flush_wanted.set()
+        if not self._flush_lock.acquire(blocking=False):
+            return None
+
+        def run():
+            retry = True
+            try:
+                while retry and self._flush_wanted.is_set():
+                    self._flush_wanted.clear()
+                    time.sleep(settings.TASKS_OUTBOX_FLUSH_DELAY)  # let a burst of changes collect
+                    service = get_service()
+                    retry = bool(service) and not self._flush_locked(service)["stalled"]
+            except Exception as e:
+                logger.error(f"Tasks outbox replay failed: {e}")
+                retry = False
+            finally:
+                self._flush_lock.release()
+            # A change queued just as the loop ended
+            if retry and self._flush_wanted.is_set():
+                self.flush_in_background(get_service)
+
+        thread = threading.Thread(target=run, name="tasks-outbox", daemon=True)
+        thread.start()
+        return thread
+
+    def _flush_locked(self, service) -> Dict[str, int]:
+        sent = dropped = 0
+        stalled = False
+        while not stalled:
+            changes = self._claim_round()
+            if not changes:
+                break
+            results: Dict[str, Tuple[Optional[dict], Optional[Exception]]] = {}
+
+            def on_response(request_id, response, exception):
+                results[request_id] = (response, exception)
+
+            batch = service.new_batch_http_request(callback=on_response)
+            for change in changes:
+                batch.add(self._request(service, change), request_id=str(change.seq))
+            try:
+                batch.execute()
+            except Exception as e:
+                # Google unreachable: everything stays queued for the next replay
+                logger.warning(f"Tasks outbox replay deferred: {e}")
+                with self._db.write() as conn:
+                    conn.executemany("UPDATE google_tasks_outbox SET sending=0 WHERE seq=?",
+                                     [(c.seq,) for c in changes])
+                stalled = True
+                break
+
+            with self._db.write() as conn:
+                for change in changes:
+                    response, exception = results.get(str(change.seq), (None, RuntimeError("no response")))
+                    outcome = self._settle(conn, change, response, exception)
+                    sent += outcome == "sent"
+                    dropped += outcome == "dropped"
+                    # Google is struggling: back off until the next replay
+                    stalled = stalled or outcome == "retry"
+        return {"sent": sent, "dropped": dropped, "pending": self.pending_count(), "stalled": stalled}
+
+    def _claim_round(self) -> List[_Change]:
+        """
+        The next changes to send together, in queue order: one per task, and
+        none that names a task whose own insert has not landed yet.
+        """
+        with self._db.write() as conn:
+            rows = conn.execute(
+                """SELECT seq, task_list, task_id, op, body, parent, attempts
+                   FROM google_tasks_outbox WHERE sending=0 ORDER BY seq"""
+            ).fetchall()
+            changes: List[_Change] = []
+            seen: Set[Tuple[str, str]] = set()
+            for row in rows:
+                change = _Change(*row)
+                key = (change.task_list, change.task_id)
+                waits = key in seen or is_local_id(change.parent) or (change.op != 'insert' and is_local_id(change.task_id))
+                seen.add(key)
+                if not waits:
+                    changes.append(change)
+                    if len(changes) == BATCH_SIZE:
+                        break
+            conn.executemany("UPDATE google_tasks_outbox SET sending=1 WHERE seq=?", [(c.seq,) for c in changes])
+        return changes
+
+    @staticmethod
+    def _request(service, change: _Change):
+        if change.op == 'insert':
+            return service.tasks().insert(tasklist=change.task_list, body=change.body, parent=change.parent)
+        if change.op == 'patch':
+            return service.tasks().patch(tasklist=change.task_list, task=change.task_id, body=change.body)
+        return service.tasks().delete(tasklist=change.task_list, task=change.task_id)
+
+    def _settle(self, conn: sqlite3.Connection, change: _Change, response: Optional[dict],
+                exception: Optional[Exception]) -> str:
+        """Record Google's answer to one change: 'sent', 'dropped' or 'retry'"""
+        if exception is None:
+            conn.execute("DELETE FROM google_tasks_outbox WHERE seq=?", (change.seq,))
+            if change.op == 'insert':
+                self._land_insert(conn, change, response)
+            elif change.op == 'patch' and change.task_id not in self._pending_ids(conn, change.task_list):
+                self._upsert(conn, change.task_list, [response])
+            return "sent"
+
+        status = exception.resp.status if isinstance(exception, HttpError) else None
+        if status == 404 and change.op != 'insert':
+            # Deleted on Google meanwhile
+            conn.execute("DELETE FROM google_tasks_outbox WHERE seq=?", (change.seq,))
+            self._delete(conn, change.task_list, [change.task_id])
+            return "dropped"
+        if status in RETRY_STATUSES and change.attempts + 1 < MAX_ATTEMPTS:
+            conn.execute(
+                "UPDATE google_tasks_outbox SET sending=0, attempts=attempts+1 WHERE seq=?", (change.seq,)
+            )
+            return "retry"
+
+        logger.error(f"Google rejected a queued task {change.op} for {change.task_id}: {exception}")
+        conn.execute("DELETE FROM google_tasks_outbox WHERE seq=?", (change.seq,))
+        if change.op == 'insert':
+            self._drop_local(conn, change.task_list, change.task_id)
+        self._resync_later(conn, change.task_list)
+        return "dropped"
+
+    def _land_insert(self, conn: sqlite3.Connection, change: _Change, task: dict):
+        """Swap a local id for Google's everywhere it is stored"""
+        local_id, remote_id, task_list = change.task_id, task['id'], change.task_list
+        # A poll may have brought the new task in already
+        conn.execute("DELETE FROM google_tasks WHERE task_list=? AND id=?", (task_list, remote_id))
+        if local_id in self._pending_ids(conn, task_list):
+            # Later local edits are still queued: keep them on screen
+            conn.execute("UPDATE google_tasks SET id=? WHERE task_list=? AND id=?", (remote_id, task_list, local_id))
+        elif self._fetch(conn, task_list, local_id) is not None:
+            conn.execute("DELETE FROM google_tasks WHERE task_list=? AND id=?", (task_list, local_id))
+            self._upsert(conn, task_list, [task])
+        conn.execute("UPDATE google_tasks SET parent=? WHERE task_list=? AND parent=?", (remote_id, task_list, local_id))
+        self._refresh_sort_keys(conn, task_list, [remote_id])
+        conn.execute(
+            "UPDATE google_tasks_outbox SET task_id=? WHERE task_list=? AND task_id=?", (remote_id, task_list, local_id)
+        )
+        conn.execute(
+            "UPDATE google_tasks_outbox SET parent=? WHERE task_list=? AND parent=?", (remote_id, task_list, local_id)
+        )
+        conn.execute("INSERT OR REPLACE INTO google_tasks_ids (local_id, remote_id) VALUES (?, ?)", (local_id, remote_id))
+
+    def _drop_local(self, conn: sqlite3.Connection, task_list: str, task_id: str):
+        """Forget a task Google never created, with queued changes to it and its subtasks"""
+        doomed = [task_id]
+        while doomed:
+            current = doomed.pop()
+            doomed += [row[0] for row in conn.execute(
+                "SELECT DISTINCT task_id FROM google_tasks_outbox WHERE task_list=? AND parent=?", (task_list, current)
+            )]
+            conn.execute("DELETE FROM google_tasks_outbox WHERE task_list=? AND task_id=?", (task_list, current))
+            self._delete(conn, task_list, [current])
+
+    # --- reads ---
+
+    @staticmethod
+    def _to_task(row: tuple) -> dict:
+        task = json.loads(row[3])
+        task.update(id=row[0], parent=row[1], position=row[2])
+        return {k: v for k, v in task.items() if v is not None}
+
+    def _fetch(self, conn: sqlite3.Connection, task_list: str, task_id: str) -> Optional[dict]:
+        row = conn.execute(
+            "SELECT id, parent, position, data FROM google_tasks WHERE task_list=? AND id=?", (task_list, task_id)
+        ).fetchone()
+        return self._to_task(row) if row else None
+
+    @staticmethod
+    def _to_view(row: tuple) -> Dict:
+        task = {field: value for field, value in zip(VIEW_FIELDS, row) if value is not None}
+        if 'links' in task:
+            task['links'] = json.loads(task['links'])
+        return parse_task(task)
+
+    def list_tasks(self, task_list: str, show_completed: bool = False, max_results: int = 100) -> List[Dict]:
+        """Tasks of one list in display order (subtasks under their parent)"""
+        status = "" if show_completed else "AND status != 'completed'"
+        rows = self._db.conn().execute(
+            f"""SELECT {VIEW_COLUMNS} FROM google_tasks
+                WHERE task_list = ? {status} ORDER BY sort_key LIMIT ?""",
+            (task_list, max_results),
+        ).fetchall()
+        return [self._to_view(row) for row in rows]
+
+    def search(self, task_list: str, query: str, limit: int = 100) -> List[Dict]:
+        """Open tasks whose title contains query (case-insensitive)"""
+        rows = self._db.conn().execute(
+            f"""SELECT {VIEW_COLUMNS} FROM google_tasks
+                WHERE task_list = ? AND status != 'completed' AND instr(title_key, ?) > 0
+                ORDER BY sort_key LIMIT ?""",
+            (task_list, query.lower(), limit),
+        ).fetchall()
+        return [self._to_view(row) for row in rows]
+
+    def get(self, task_list: str, task_id: str) -> Optional[Dict]:
+        conn = self._db.conn()
+        task = self._fetch(conn, task_list, self._resolve(conn, task_id))
+        return parse_task(task) if task else None
+
+    def task_count(self, task_list: str) -> int:
+        return self._db.conn().execute(
+            "SELECT COUNT(*) FROM google_tasks WHERE task_list=?", (task_list,)
+        ).fetchone()[0]
+
+
+tasks_mirror = TasksMirror()
@@ -1,14 +1,46 @@
+import asyncio
+import logging
 import sqlite3
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict
 import datetime
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+
 # Use /app/data for Docker, or current dir for local dev
 DATA_DIR = os.environ.get("DATA_DIR", ".")
 os.makedirs(DATA_DIR, exist_ok=True)
 DB_PATH = os.path.join(DATA_DIR, "vyana.db")
 
+# Applied to every connection. WAL lets readers run alongside a writer;
+# synchronous=NORMAL is durable across application crashes in WAL mode
+# and skips an fsync per commit.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",     # 8 MB page cache
+    "PRAGMA mmap_size=67108864",   # 64 MB
+)
+# Statements are fixed strings so each connection's statement cache
+# keeps them prepared
+TASK_COLUMNS = "id, title, is_completed, created_at, due_date"
+INSERT_TASK = "INSERT INTO tasks (title, is_completed, created_at, due_date) VALUES (?, 0, ?, ?)"
+SELECT_TASK = f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?"
+SELECT_OPEN = f"SELECT {TASK_COLUMNS} FROM tasks WHERE is_completed = 0 ORDER BY id"
+SELECT_ALL = f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY id"
+COMPLETE_TASK = "UPDATE tasks SET is_completed = 1 WHERE id = ?"
+UPDATE_TASK = "UPDATE tasks SET title = COALESCE(?, title), due_date = COALESCE(?, due_date) WHERE id = ?"
+DELETE_TASK = "DELETE FROM tasks WHERE id = ?"
+SEARCH_INDEXED = (f"SELECT {TASK_COLUMNS} FROM tasks WHERE is_completed = 0 "
+                  "AND id IN (SELECT rowid FROM tasks_title_trigrams WHERE title LIKE ?) ORDER BY id")
+SEARCH_SCAN = f"SELECT {TASK_COLUMNS} FROM tasks WHERE title LIKE ? AND is_completed = 0 ORDER BY id"
+# Trigram index lookups need at least this many characters
+MIN_INDEXED_SEARCH = 3
+
 class TaskItem(BaseModel):
     id: int
     title: str
@@ -16,6 +48,9 @@ class TaskItem(BaseModel):
     created_at: str
     due_date: Optional[str] = None
 
+def _to_item(row: tuple) -> TaskItem:
+    return TaskItem(id=row[0], title=row[1], is_completed=bool(row[2]), created_at=row[3], due_date=row[4])
+
 class AbstractTasksRepo:
     def create_table(self):
         pass
@@ -31,124 +66,130 @@ class AbstractTasksRepo:
 class SqliteTasksRepo(AbstractTasksRepo):
     def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
+        # One long-lived connection per thread, in autocommit mode
+        self._local = threading.local()
+        self._trigrams = False
         self.create_table()
 
-    def _get_conn(self):
-        return sqlite3.connect(self.db_path)
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+        return conn
 
     def create_table(self):
-        with self._get_conn() as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    is_completed BOOLEAN DEFAULT 0,
-                    created_at TEXT,
-                    due_date TEXT
-                )
+        conn = self._get_conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                is_completed BOOLEAN DEFAULT 0,
+                created_at TEXT,
+                due_date TEXT
+            );
+            -- list_tasks / search_tasks read open tasks in id order; completed ones are left out
+            CREATE INDEX IF NOT EXISTS idx_tasks_open ON tasks(id) WHERE is_completed = 0;
+        """)
+        existed = conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE name = 'tasks_title_trigrams')"
+        ).fetchone()[0]
+        try:
+            # Substring (LIKE '%q%') title search through a trigram index
+            conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS tasks_title_trigrams USING fts5(
+                    title, content='tasks', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS tasks_trigrams_insert AFTER INSERT ON tasks BEGIN
+                    INSERT INTO tasks_title_trigrams(rowid, title) VALUES (new.id, new.title);
+                END;
+                CREATE TRIGGER IF NOT EXISTS tasks_trigrams_delete AFTER DELETE ON tasks BEGIN
+                    INSERT INTO tasks_title_trigrams(tasks_title_trigrams, rowid, title) VALUES ('delete', old.id, old.title);
+                END;
+                CREATE TRIGGER IF NOT EXISTS tasks_trigrams_update AFTER UPDATE OF title ON tasks BEGIN
+                    INSERT INTO tasks_title_trigrams(tasks_title_trigrams, rowid, title) VALUES ('delete', old.id, old.title);
+                    INSERT INTO tasks_title_trigrams(rowid, title) VALUES (new.id, new.title);
+                END;
             """)
+            if not existed and conn.execute("SELECT EXISTS (SELECT 1 FROM tasks)").fetchone()[0]:
+                # Tasks created before the index existed
+                conn.execute("INSERT INTO tasks_title_trigrams(tasks_title_trigrams) VALUES ('rebuild')")
+            self._trigrams = True
+        except sqlite3.OperationalError as e:
+            # SQLite older than 3.34 has no trigram tokenizer: search scans open tasks instead
+            logger.warning(f"Task title index unavailable: {e}")
 
     def add_task(self, title: str, due_date: Optional[str] = None) -> TaskItem:
         now = datetime.datetime.now().isoformat()
-        with self._get_conn() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO tasks (title, is_completed, created_at, due_date) VALUES (?, ?, ?, ?)",
-                (title, False, now, due_date)
-            )
-            task_id = cursor.lastrowid
-            conn.commit()
-            return TaskItem(id=task_id, title=title, is_completed=False, created_at=now, due_date=due_date)
+        task_id = self._get_conn().execute(INSERT_TASK, (title, now, due_date)).lastrowid
+        return TaskItem(id=task_id, title=title, is_completed=False, created_at=now, due_date=due_date)
 
     def list_tasks(self, include_completed: bool = False) -> List[TaskItem]:
-        query = "SELECT id, title, is_completed, created_at, due_date FROM tasks"
-        if not include_completed:
-            query += " WHERE is_completed = 0"
-        
-        with self._get_conn() as conn:
-            cursor = conn.cursor()
-            rows = cursor.execute(query).fetchall()
-            return [
-                TaskItem(
-                    id=row[0],
-                    title=row[1],
-                    is_completed=bool(row[2]),
-                    created_at=row[3],
-                    due_date=row[4]
-                ) for row in rows
-            ]
+        rows = self._get_conn().execute(SELECT_ALL if include_completed else SELECT_OPEN).fetchall()
+        return [_to_item(row) for row in rows]
 
     def complete_task(self, task_id: int) -> bool:
-        with self._get_conn() as conn:
-            cursor = conn.cursor()
-            cursor.execute("UPDATE tasks SET is_completed = 1 WHERE id = ?", (task_id,))
-            conn.commit()
-            return cursor.rowcount > 0
-    
+        return self._get_conn().execute(COMPLETE_TASK, (task_id,)).rowcount > 0
+
     def get_task(self, task_id: int) -> Optional[TaskItem]:
-        with self._get_conn() as conn:
-            cursor = conn.cursor()
-            row = cursor.execute(
-                "SELECT id, title, is_completed, created_at, due_date FROM tasks WHERE id = ?",
-                (task_id,)
-            ).fetchone()
-            if not row:
-                return None
-            return TaskItem(
-                id=row[0],
-                title=row[1],
-                is_completed=bool(row[2]),
-                created_at=row[3],
-                due_date=row[4]
-            )
+        row = self._get_conn().execute(SELECT_TASK, (task_id,)).fetchone()
+        return _to_item(row) if row else None
 
     def update_task(self, task_id: int, title: str = None, due_date: str = None) -> bool:
         """Update task title and/or due date"""
         if not title and not due_date:
             return False
-        
-        updates = []
-        params = []
-        
-        if title:
-            updates.append("title = ?")
-            params.append(title)
-        if due_date:
-            updates.append("due_date = ?")
-            params.append(due_date)
-        
-        params.append(task_id)
-        query = f"UPDATE tasks SET {', '.join(updates)} WHERE id = ?"
-        
-        with self._get_conn() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            conn.commit()
-            return cursor.rowcount > 0
-    
+        return self._get_conn().execute(UPDATE_TASK, (title or None, due_date or None, task_id)).rowcount > 0
+
     def delete_task(self, task_id: int) -> bool:
         """Delete a task"""
-        with self._get_conn() as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-            conn.commit()
-            return cursor.rowcount > 0
-    
+        return self._get_conn().execute(DELETE_TASK, (task_id,)).rowcount > 0
+
     def search_tasks(self, query: str) -> List[TaskItem]:
-        """Search tasks by title"""
-        search_query = "SELECT id, title, is_completed, created_at, due_date FROM tasks WHERE title LIKE ? AND is_completed = 0"
-        
-        with self._get_conn() as conn:
-            cursor = conn.cursor()
-            rows = cursor.execute(search_query, (f"%{query}%",)).fetchall()
-            return [
-                TaskItem(
-                    id=row[0],
-                    title=row[1],
-                    is_completed=bool(row[2]),
-                    created_at=row[3],
-                    due_date=row[4]
-                ) for row in rows
-            ]
+        """Search open tasks whose title contains query (case-insensitive)"""
+        indexed = self._trigrams and len(query) >= MIN_INDEXED_SEARCH
+        rows = self._get_conn().execute(SEARCH_INDEXED if indexed else SEARCH_SCAN, (f"%{query}%",)).fetchall()
+        return [_to_item(row) for row in rows]
+
+
+class AsyncTasksRepo:
+    """
+    Async front for a tasks repo for use on the event loop. Every call runs
+    on one dedicated database thread, so the loop never blocks on SQLite
+    and that thread's connection and prepared statements are reused.
+    """
+
+    def __init__(self, repo: SqliteTasksRepo):
+        self.repo = repo
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tasks-db")
+
+    async def _run(self, method, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, method, *args)
+
+    async def add_task(self, title: str, due_date: Optional[str] = None) -> TaskItem:
+        return await self._run(self.repo.add_task, title, due_date)
+
+    async def list_tasks(self, include_completed: bool = False) -> List[TaskItem]:
+        return await self._run(self.repo.list_tasks, include_completed)
+
+    async def complete_task(self, task_id: int) -> bool:
+        return await self._run(self.repo.complete_task, task_id)
+
+    async def get_task(self, task_id: int) -> Optional[TaskItem]:
+        return await self._run(self.repo.get_task, task_id)
+
+    async def update_task(self, task_id: int, title: str = None, due_date: str = None) -> bool:
+        return await self._run(self.repo.update_task, task_id, title, due_date)
+
+    async def delete_task(self, task_id: int) -> bool:
+        return await self._run(self.repo.delete_task, task_id)
+
+    async def search_tasks(self, query: str) -> List[TaskItem]:
+        return await self._run(self.repo.search_tasks, query)
+
 
 tasks_repo = SqliteTasksRepo()
+async_tasks_repo = AsyncTasksRepo(tasks_repo)
@@ -0,0 +1,211 @@
+"""
+Tool Executor for Vyana
+Runs blocking tool code (Google APIs, requests, SQLite) on a bounded thread
+pool so it never blocks the FastAPI event loop, and executes the tool calls
+of one agent turn concurrently with per-tool timeouts and latency metrics.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool, StructuredTool
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# The tool call being executed, so tools can tag progress events with its id
+current_tool_call: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("current_tool_call", default=None)
+
+# Shared pool for all blocking tool calls; size via TOOL_THREAD_POOL_SIZE
+tool_executor = ThreadPoolExecutor(
+    max_workers=settings.TOOL_THREAD_POOL_SIZE,
+    thread_name_prefix="vyana-tool",
+)
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking callable on the tool pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(tool_executor, functools.partial(func, *args, **kwargs))
+
+
+def offload_tool(tool: BaseTool) -> BaseTool:
+    """
+    Return a copy of a sync StructuredTool whose async path runs on the tool pool.
+    Tools that already have a native coroutine are returned unchanged.
+    """
+    if not isinstance(tool, StructuredTool) or tool.coroutine is not None or tool.func is None:
+        return tool
+
+    func = tool.func
+
+    async def _arun(**kwargs):
+        return await run_blocking(func, **kwargs)
+
+    return tool.model_copy(update={"coroutine": _arun})
+
+
+def offload_tools(tools: List[BaseTool]) -> List[BaseTool]:
+    """Apply offload_tool to a list of tools"""
+    return [offload_tool(t) for t in tools]
+
+
+def mutating(tool: BaseTool) -> BaseTool:
+    """
+    Mark a tool as state-changing (creates/updates/deletes/sends something).
+    Mutating tools opt out of parallel execution and run one at a time in
+    the order the model requested them.
+    """
+    tool.metadata = {**(tool.metadata or {}), "mutates": True}
+    return tool
+
+
+def is_mutating(tool: BaseTool) -> bool:
+    return bool((tool.metadata or {}).get("mutates"))
+
+
+class ToolMetrics:
+    """In-process per-tool latency and outcome counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, name: str, seconds: float, status: str):
+        with self._lock:
+            stats = self._stats.setdefault(name, {
+                "calls": 0, "errors": 0, "timeouts": 0,
+                "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0,
+            })
+            ms = seconds * 1000
+            stats["calls"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            stats["last_ms"] = ms
+            if status == "timeout":
+                stats["timeouts"] += 1
+            elif status == "error":
+                stats["errors"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "avg_ms": round(stats["total_ms"] / stats["calls"], 2) if stats["calls"] else 0.0,
+                }
+                for name, stats in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+tool_metrics = ToolMetrics()
+
+
+async def _run_tool_call(call: dict, tools_by_name: Dict[str, BaseTool], config: Optional[RunnableConfig]) -> ToolMessage:
+    """
+    Run one tool call with a timeout, always returning a ToolMessage.
+    Mutating tools get no timeout unless they set metadata["timeout"]: a
+    write that is abandoned may still land, and a model told it failed
+    tends to repeat it (sending the same email twice).
+    """
+    name = call["name"]
+    tool = tools_by_name.get(name)
+    if tool is None:
+        return ToolMessage(
+            content=json.dumps({"error": f"Unknown tool: {name}"}),
+            name=name, tool_call_id=call["id"], status="error",
+        )
+
+    writes = is_mutating(tool)
+    timeout = (tool.metadata or {}).get("timeout", None if writes else settings.TOOL_TIMEOUT_SECONDS)
+    start = time.perf_counter()
+    outcome = "success"
+    token = current_tool_call.set(call)
+    try:
+        result = await asyncio.wait_for(
+            tool.ainvoke({**call, "type": "tool_call"}, config),
+            timeout=timeout,
+        )
+        message = result if isinstance(result, ToolMessage) else ToolMessage(
+            content=str(result), name=name, tool_call_id=call["id"]
+        )
+        if message.status == "error":
+            outcome = "error"
+    except asyncio.TimeoutError:
+        # A blocking tool keeps its pool thread until it returns; we just stop waiting
+        outcome = "timeout"
+        if writes:
+            error = (f"{name} did not finish within {timeout}s and may still have taken effect. "
+                     f"Outcome unknown: do not retry it; check the result or ask the user.")
+        else:
+            error = f"{name} timed out after {timeout}s"
+        message = ToolMessage(
+            content=json.dumps({"error": error, "outcome": "unknown"} if writes else {"error": error}),
+            name=name, tool_call_id=call["id"], status="error",
+        )
+    except Exception as e:
+        outcome = "error"
+        logger.error(f"Tool {name} failed: {e}")
+        message = ToolMessage(
+            content=json.dumps({"error": str(e)}),
+            name=name, tool_call_id=call["id"], status="error",
+        )
+    finally:
+        current_tool_call.reset(token)
+
+    elapsed = time.perf_counter() - start
+    tool_metrics.record(name, elapsed, outcome)
+    message.additional_kwargs["latency_ms"] = round(elapsed * 1000, 1)
+    logger.info(f"Tool {name} finished in {elapsed * 1000:.1f}ms ({outcome})")
+    return message
+
+
+async def execute_tool_calls(
+    tool_calls: List[dict],
+    tools_by_name: Dict[str, BaseTool],
+    config: Optional[RunnableConfig] = None,
+) -> List[ToolMessage]:
+    """
+    Execute the tool calls of one agent turn.
+
+    Consecutive read-only calls run concurrently; a mutating call waits for
+    everything before it and runs on its own. Results keep the call order.
+    """
+    results: List[ToolMessage] = []
+    batch: List[dict] = []
+
+    async def run_batch():
+        if batch:
+            results.extend(await asyncio.gather(
+                *(_run_tool_call(call, tools_by_name, config) for call in batch)
+            ))
+            batch.clear()
+
+    for call in tool_calls:
+        tool = tools_by_name.get(call["name"])
+        if tool is not None and is_mutating(tool):
+            await run_batch()
+            results.append(await _run_tool_call(call, tools_by_name, config))
+        else:
+            batch.append(call)
+    await run_batch()
+    return results
+
+
+def shutdown():
+    """Stop accepting new tool work (called on app shutdown)"""
+    tool_executor.shutdown(wait=False, cancel_futures=True)
+    logger.info("Tool executor shut down")
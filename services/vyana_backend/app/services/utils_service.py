@@ -1,7 +1,9 @@
 import logging
 import re
 from typing import Dict
-import requests
+import httpx
+
+from app.services.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +28,7 @@ class UtilsService:
             logger.error(f"Calculation error: {e}")
             return f"Error calculating expression: {str(e)}"
     
-    def convert_currency(self, amount: float, from_currency: str, to_currency: str) -> str:
+    async def convert_currency(self, amount: float, from_currency: str, to_currency: str) -> str:
         """Convert currency using live exchange rates"""
         try:
             from_currency = from_currency.upper()
@@ -36,7 +38,7 @@ class UtilsService:
             # API format: https://open.er-api.com/v6/latest/{base_currency}
             api_url = f"{self.currency_api_url}/{from_currency}"
             
-            response = requests.get(api_url, timeout=5)
+            response = await http_client.get(api_url, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -52,7 +54,7 @@ class UtilsService:
             else:
                 return "Currency conversion service temporarily unavailable"
                 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             return "Currency conversion request timed out"
         except Exception as e:
             logger.error(f"Currency conversion error: {e}")
@@ -1,8 +1,9 @@
 import logging
-import requests
 from typing import Optional, Dict
 from datetime import datetime, timedelta
 
+from app.services.http_client import http_client
+
 logger = logging.getLogger(__name__)
 
 class WeatherService:
@@ -14,7 +15,7 @@ class WeatherService:
         self._cache = {}
         self._cache_duration = 600  # 10 minutes cache
     
-    def get_weather(self, city: str = "Mumbai") -> str:
+    async def get_weather(self, city: str = "Mumbai") -> str:
         """Get current weather for a city"""
         try:
             # Check cache
@@ -26,7 +27,7 @@ class WeatherService:
             
             # Use wttr.in as fallback (no API key needed)
             url = f"https://wttr.in/{city}?format=%C+%t+%h+%w"
-            response = requests.get(url, timeout=5)
+            response = await http_client.get(url, timeout=5)
             
             if response.status_code == 200:
                 weather_text = response.text.strip()
@@ -40,12 +41,12 @@ class WeatherService:
             logger.error(f"Weather error: {e}")
             return f"Weather service unavailable: {str(e)}"
     
-    def get_forecast(self, city: str = "Mumbai") -> str:
+    async def get_forecast(self, city: str = "Mumbai") -> str:
         """Get 3-day forecast"""
         try:
             # Use wttr.in for simple forecast
             url = f"https://wttr.in/{city}?format=j1"
-            response = requests.get(url, timeout=5)
+            response = await http_client.get(url, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
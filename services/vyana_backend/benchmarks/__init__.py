@@ -0,0 +1,6 @@
+"""
+Benchmarks for the Vyana backend.
+
+Run from services/vyana_backend, e.g.:
+    python -m benchmarks.bench_agent_graph
+"""
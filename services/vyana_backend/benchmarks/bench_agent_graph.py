@@ -0,0 +1,73 @@
+"""
+Per-request agent setup cost: rebuilding the LangGraph graph vs. the registry.
+
+Simulates a connected MCP server with a configurable number of tools so the
+MCP conversion cost is included.
+
+    python -m benchmarks.bench_agent_graph [--iterations 50] [--mcp-tools 25]
+"""
+import argparse
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from app.services.deepseek_client import DeepSeekClient  # noqa: E402
+from app.services.mcp_service import mcp_service, MCPConnection, MCPConnectionStatus  # noqa: E402
+
+
+def _fake_mcp_connection(tool_count: int) -> MCPConnection:
+    tools = [
+        {
+            "name": f"tool_{i}",
+            "description": f"Benchmark tool {i}",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "symbol": {"type": "string", "description": "Instrument"},
+                    "limit": {"type": "integer"},
+                },
+                "required": ["symbol"],
+            },
+        }
+        for i in range(tool_count)
+    ]
+    return MCPConnection(
+        name="bench",
+        display_name="Bench",
+        url="http://localhost:0/mcp",
+        status=MCPConnectionStatus.CONNECTED,
+        tools=tools,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--mcp-tools", type=int, default=25)
+    args = parser.parse_args()
+
+    mcp_service.connections["bench"] = _fake_mcp_connection(args.mcp_tools)
+    mcp_service._bump_tools_version()
+
+    client = DeepSeekClient()
+
+    before = time_calls(
+        lambda: client._create_agent_graph(tools_enabled=True, mcp_enabled=True),
+        args.iterations,
+    )
+    # Prime the registry, then measure the steady state
+    client.get_agent_graph(tools_enabled=True, mcp_enabled=True)
+    after = time_calls(
+        lambda: client.get_agent_graph(tools_enabled=True, mcp_enabled=True),
+        args.iterations,
+    )
+
+    print(f"Agent graph setup per request ({args.mcp_tools} MCP tools)")
+    print_row("before: build per request", summarize(before))
+    print_row("after: registry lookup", summarize(after))
+    print(f"registry: {client._graph_registry.stats()}")
+
+
+if __name__ == "__main__":
+    main()
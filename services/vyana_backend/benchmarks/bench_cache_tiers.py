@@ -0,0 +1,80 @@
+"""
+Cache reads through CacheService against a simulated-latency Redis: every
+lookup a Redis round-trip (L1 disabled) vs the in-process L1 in front of
+Redis, on a skewed mix of cached and never-cached keys, and the hit rate
+left while Redis is down.
+
+    python -m benchmarks.bench_cache_tiers [--keys 500] [--latency-ms 0.5] [--iterations 5000]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import setup_env, summarize, print_row
+
+setup_env()
+
+from app.services import cache_service as cache_module  # noqa: E402
+from app.services.local_cache import LocalCache  # noqa: E402
+from benchmarks.stub_redis import FakeRedisServer  # noqa: E402
+
+
+async def connected(server: FakeRedisServer, l1: bool) -> cache_module.CacheService:
+    cache_module.redis.from_url = lambda *args, **kwargs: server.client()
+    service = cache_module.CacheService()
+    if not l1:
+        service.local = LocalCache(max_bytes=0)  # stores nothing
+    await service.connect()
+    return service
+
+
+async def timed_lookups(service, symbols, iterations: int):
+    samples, hits = [], 0
+    for symbol in symbols[:iterations]:
+        start = time.perf_counter()
+        hits += await service.get_stock_quote(symbol) is not None
+        samples.append(time.perf_counter() - start)
+    return samples, hits / iterations
+
+
+async def run(args):
+    cache_module.settings.CACHE_ENABLED = True
+    rng = random.Random(7)
+    cached = [f"SYM{i}" for i in range(args.keys)]
+    uncached = [f"NEW{i}" for i in range(args.keys // 5)]
+    universe = cached + uncached
+    weights = [1 / (rank + 1) for rank in range(len(universe))]
+    rng.shuffle(weights)
+    lookups = rng.choices(universe, weights=weights, k=args.iterations)
+
+    print(f"{args.keys} cached quotes + {len(uncached)} never cached, "
+          f"{args.latency_ms}ms simulated Redis round-trip")
+    for label, l1 in (("Redis only", False), ("L1 + Redis", True)):
+        server = FakeRedisServer(latency_ms=args.latency_ms)
+        service = await connected(server, l1)
+        for symbol in cached:
+            await service.set_stock_quote(symbol, {"symbol": symbol, "price": 100.0}, ttl=600)
+        server.round_trips = 0
+        samples, hit_rate = await timed_lookups(service, lookups, args.iterations)
+        print_row(f"  {label}: get", summarize(samples))
+        print(f"  {label}: {server.round_trips} Redis round-trips, hit rate {hit_rate:.0%}")
+
+        server.go_down()
+        await asyncio.sleep(0)
+        _, hit_rate = await timed_lookups(service, lookups, args.iterations)
+        print(f"  {label}: hit rate with Redis down {hit_rate:.0%}")
+        await service.disconnect()
+    print(f"  namespaces: {(await service.get_stats())['namespaces']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keys", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.5)
+    parser.add_argument("--iterations", type=int, default=5000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
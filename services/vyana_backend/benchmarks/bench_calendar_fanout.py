@@ -0,0 +1,56 @@
+"""
+Merged multi-calendar view: one events.list per calendar made one after
+another vs the concurrent fan-out + heap merge behind
+/calendar/events?calendars=all.
+
+    python -m benchmarks.bench_calendar_fanout [--calendars 6] [--latency-ms 80] [--iterations 20]
+"""
+import argparse
+import datetime
+from zoneinfo import ZoneInfo
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from app.services import calendar_service as calendar_module  # noqa: E402
+from app.services.calendar_service import calendar_service  # noqa: E402
+from benchmarks.stub_calendar import FakeCalendarHttp, build_service, synthetic_calendar  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calendars", type=int, default=6)
+    parser.add_argument("--events", type=int, default=400, help="events per calendar")
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    today = datetime.datetime.now(ZoneInfo("Asia/Kolkata"))
+    ids = ["primary"] + [f"cal{i}@example.com" for i in range(1, args.calendars)]
+    http = FakeCalendarHttp(
+        {cid: synthetic_calendar(args.events, today, days=30, seed=i, prefix=f"c{i}-") for i, cid in enumerate(ids)},
+        latency_ms=args.latency_ms,
+    )
+    service = build_service(http)
+    calendar_service._get_google_service = lambda: service
+    calendar_module.settings.CALENDAR_STORE_ENABLED = False
+    time_min, time_max = calendar_service.day_range(today.date().isoformat(),
+                                                    (today + datetime.timedelta(days=6)).date().isoformat())
+
+    def sequential():
+        events = []
+        for cid in ids:
+            events.extend(calendar_service.get_events_in_range(time_min, time_max, cid))
+        return sorted(events, key=lambda e: e.sort_key())
+
+    def merged():
+        return list(calendar_service.iter_merged_events(time_min, time_max, ids))
+
+    print(f"{args.calendars} calendars, {args.latency_ms:.0f}ms simulated round-trip, {len(merged())} events in range")
+    print_row("  sequential", summarize(time_calls(sequential, args.iterations)))
+    print_row("  fan-out + merge", summarize(time_calls(merged, args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Calendar range reads: events.list per call against a simulated-latency
+Calendar API vs the local event store (interval index over start/end).
+
+    python -m benchmarks.bench_calendar_store [--events 5000] [--latency-ms 30] [--iterations 50]
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import time
+from zoneinfo import ZoneInfo
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from app.services import calendar_service as calendar_module  # noqa: E402
+from app.services.calendar_service import calendar_service  # noqa: E402
+from app.services.calendar_store import CalendarStore  # noqa: E402
+from benchmarks.stub_calendar import FakeCalendarHttp, build_service, synthetic_calendar  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    today = datetime.datetime.now(ZoneInfo("Asia/Kolkata"))
+    http = FakeCalendarHttp({"primary": synthetic_calendar(args.events, today - datetime.timedelta(days=20), days=200)},
+                            latency_ms=args.latency_ms)
+    service = build_service(http)
+    calendar_service._get_google_service = lambda: service
+    week = [(today + datetime.timedelta(days=d)).date().isoformat() for d in (0, 6)]
+
+    calendar_module.settings.CALENDAR_STORE_ENABLED = False
+    print(f"{args.events} events, {args.latency_ms:.0f}ms simulated round-trip")
+    print_row("  remote: today", summarize(time_calls(lambda: calendar_service.get_events(), args.iterations)))
+    print_row("  remote: 7 days", summarize(time_calls(lambda: calendar_service.get_events(*week), args.iterations)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CalendarStore(db_path=os.path.join(tmp, "calendar.db"))
+        calendar_module.calendar_store = store
+        calendar_module.settings.CALENDAR_STORE_ENABLED = True
+        calendar_module.settings.CALENDAR_SYNC_INTERVAL = 3600.0
+        start = time.perf_counter()
+        store.sync("primary", service)
+        print(f"  full sync: {store.event_count('primary')} events in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+        print_row("  local: today", summarize(time_calls(lambda: calendar_service.get_events(), args.iterations)))
+        print_row("  local: 7 days", summarize(time_calls(lambda: calendar_service.get_events(*week), args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
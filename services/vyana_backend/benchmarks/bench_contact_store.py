@@ -0,0 +1,85 @@
+"""
+Local contact store: single-contact reads, updates and searches with the
+old whole-file JSON storage (reparse on every read, rewrite on every write,
+linear scans) vs the indexed SQLite ContactService.
+
+    python -m benchmarks.bench_contact_store [--contacts 10000] [--iterations 100]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from app.services.contact_service import ContactService  # noqa: E402
+from benchmarks.stub_people import FIRST_NAMES, LAST_NAMES  # noqa: E402
+
+
+def json_baseline(path: Path):
+    """The previous storage: every call loads the file, writes rewrite all of it"""
+    def load():
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(contacts):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(contacts, f, indent=2, ensure_ascii=False)
+
+    def get(contact_id):
+        return next((c for c in load() if c["id"] == contact_id), None)
+
+    def update(contact_id, notes):
+        contacts = load()
+        for contact in contacts:
+            if contact["id"] == contact_id:
+                contact["notes"] = notes
+        save(contacts)
+
+    def search(query):
+        return [c for c in load() if query in c["name"].lower() or query in (c["email"] or "")]
+
+    return get, update, search
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contacts", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        store = ContactService(db_path=tmp / "contacts.db", legacy_file=tmp / "none.json")
+        for i in range(args.contacts):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            store.add_contact(f"{first} {last} {i}", email=f"{first.lower()}.{last.lower()}{i}@example.com",
+                              phone=f"+91 9{rng.randrange(10**8, 10**9)}")
+        contacts = store.get_all_contacts_json()
+        with open(tmp / "contacts.json", "w", encoding="utf-8") as f:
+            json.dump(contacts, f, indent=2, ensure_ascii=False)
+        ids = [c["id"] for c in contacts]
+        pick = lambda: rng.choice(ids)  # noqa: E731
+        get, update, search = json_baseline(tmp / "contacts.json")
+
+        print(f"{args.contacts} contacts")
+        few = max(5, args.iterations // 10)
+        print_row("  json: get", summarize(time_calls(lambda: get(pick()), few)))
+        print_row("  json: update", summarize(time_calls(lambda: update(pick(), "x"), few)))
+        print_row("  json: search", summarize(time_calls(lambda: search("meera.rao"), few)))
+        print_row("  sqlite: get", summarize(time_calls(lambda: store.get_contact(pick()), args.iterations)))
+        print_row("  sqlite: update", summarize(time_calls(lambda: store.update_contact(pick(), notes="x"),
+                                                           args.iterations)))
+        print_row("  sqlite: search", summarize(time_calls(lambda: store.search_contacts("meera.rao"), args.iterations)))
+        print_row("  sqlite: email lookup", summarize(time_calls(lambda: store.get_email_address("meera rao"),
+                                                                 args.iterations)))
+        print(f"  database size: {os.path.getsize(tmp / 'contacts.db') / 1e6:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Contact lookups (get_email_address / search_contacts): searchContacts per
+call against a simulated-latency People API vs the local contacts mirror
+(in-memory prefix, phonetic and fuzzy index).
+
+    python -m benchmarks.bench_contacts_lookup [--contacts 5000] [--latency-ms 80] [--iterations 200]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from app.services import google_contacts_service as contacts_module  # noqa: E402
+from app.services.contacts_mirror import ContactsMirror  # noqa: E402
+from app.services.google_contacts_service import google_contacts_service  # noqa: E402
+from benchmarks.stub_people import FakePeopleHttp, build_service, synthetic_contacts  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contacts", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    http = FakePeopleHttp(synthetic_contacts(args.contacts), latency_ms=args.latency_ms)
+    service = build_service(http)
+    google_contacts_service._get_service = lambda: service
+    names = ["Meera", "ravi kumar", "Krishnen", "shetti", "9845", "priya.nair"]
+    cycle = iter(range(10**9))
+
+    def lookup():
+        google_contacts_service.get_email_address(names[next(cycle) % len(names)])
+
+    contacts_module.settings.CONTACTS_MIRROR_ENABLED = False
+    print(f"{args.contacts} contacts, {args.latency_ms:.0f}ms simulated round-trip")
+    print_row("  remote: email lookup", summarize(time_calls(lookup, max(10, args.iterations // 10))))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mirror = ContactsMirror(db_path=os.path.join(tmp, "contacts.db"))
+        contacts_module.contacts_mirror = mirror
+        contacts_module.settings.CONTACTS_MIRROR_ENABLED = True
+        contacts_module.settings.CONTACTS_SYNC_INTERVAL = 3600.0
+        start = time.perf_counter()
+        mirror.sync(service)
+        print(f"  full sync: {mirror.contact_count()} contacts in {(time.perf_counter() - start) * 1000:.0f}ms")
+        start = time.perf_counter()
+        mirror.search("warm")
+        print(f"  index build: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+        print_row("  local: email lookup", summarize(time_calls(lookup, args.iterations)))
+        print_row("  local: list all", summarize(time_calls(google_contacts_service.get_all_contacts, 20)))
+
+
+if __name__ == "__main__":
+    main()
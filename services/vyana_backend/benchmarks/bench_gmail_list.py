@@ -0,0 +1,41 @@
+"""
+/gmail/list latency vs. page size: one messages.get round-trip per message
+(old behaviour) vs. batched metadata requests, with a simulated network
+round-trip time.
+
+    python -m benchmarks.bench_gmail_list [--rtt-ms 30] [--limits 5,20,50] [--iterations 5]
+"""
+import argparse
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from app.services.gmail_service import gmail_service  # noqa: E402
+from benchmarks.stub_gmail import FakeGmailHttp, build_service, synthetic_mailbox  # noqa: E402
+
+
+def _sequential(service, limit: int):
+    results = service.users().messages().list(userId='me', q='label:INBOX', maxResults=limit).execute()
+    for msg in results.get('messages', []):
+        service.users().messages().get(userId='me', id=msg['id'], format='metadata').execute()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rtt-ms", type=float, default=30.0)
+    parser.add_argument("--limits", default="5,20,50")
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    service = build_service(FakeGmailHttp(synthetic_mailbox(200), latency_ms=args.rtt_ms))
+    gmail_service.get_service = lambda: service
+
+    for limit in (int(n) for n in args.limits.split(",")):
+        print(f"limit={limit} (rtt {args.rtt_ms:.0f} ms)")
+        print_row("  get() per message", summarize(time_calls(lambda: _sequential(service, limit), args.iterations)))
+        print_row("  batched metadata", summarize(time_calls(lambda: gmail_service.get_recent_messages(limit), args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
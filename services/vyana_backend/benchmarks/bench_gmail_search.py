@@ -0,0 +1,88 @@
+"""
+Local email search latency over a synthetic mailbox: the FTS5 index behind
+search_emails and /gmail/search, with ranking and prefix queries.
+
+    python -m benchmarks.bench_gmail_search [--messages 100000] [--iterations 200]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from app.services.gmail_mirror import GmailMirror  # noqa: E402
+from benchmarks.stub_gmail import SENDERS, TOPICS, make_message  # noqa: E402
+
+QUERIES = [
+    "invoice",
+    "inv",
+    "budget meeting",
+    "from:asha",
+    "from:ravi subject:travel",
+    "\"quarterly review\"",
+    "is:unread payment",
+    "zq",
+]
+
+
+def _vocabulary(rng: random.Random, size: int = 5000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        "".join(rng.choice(letters) for _ in range(rng.randint(4, 9)))
+        for _ in range(size)
+    ]
+
+
+def corpus(count: int, seed: int = 11):
+    """Messages with Zipf-distributed body words, topic words and a few phrases"""
+    rng = random.Random(seed)
+    vocab = _vocabulary(rng)
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    for i in range(count):
+        words = rng.choices(vocab, weights=weights, k=40) + rng.sample(TOPICS, 2)
+        rng.shuffle(words)
+        if rng.random() < 0.01:
+            words[5:5] = ["quarterly", "review"]
+        topic = rng.choice(TOPICS)
+        labels = ["INBOX"] + (["UNREAD"] if rng.random() < 0.2 else [])
+        yield make_message(
+            i,
+            subject=f"{topic.title()} {rng.choice(vocab)} {rng.choice(TOPICS)}",
+            sender=rng.choice(SENDERS),
+            body=" ".join(words),
+            labels=labels,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mirror = GmailMirror(db_path=os.path.join(tmp, "gmail.db"))
+        start = time.perf_counter()
+        batch = []
+        with mirror._get_conn() as conn:
+            for message in corpus(args.messages):
+                batch.append(message)
+                if len(batch) == 1000:
+                    mirror._upsert(conn, batch)
+                    batch = []
+            mirror._upsert(conn, batch)
+        print(f"Indexed {args.messages} messages in {time.perf_counter() - start:.1f}s")
+
+        for query in QUERIES:
+            hits = len(mirror.search(query, args.limit))
+            samples = time_calls(lambda: mirror.search(query, args.limit), args.iterations)
+            print_row(f"  {query!r} ({hits} hits)", summarize(samples))
+
+
+if __name__ == "__main__":
+    main()
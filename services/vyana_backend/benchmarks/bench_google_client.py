@@ -0,0 +1,50 @@
+"""
+Cost of obtaining a Google API service object per operation: build() on
+every call (old behaviour) vs. the cached per-thread client factory.
+Uses the discovery documents bundled with google-api-python-client, so no
+network access is needed.
+
+    python -m benchmarks.bench_google_client [--iterations 200]
+"""
+import argparse
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from google.oauth2.credentials import Credentials  # noqa: E402
+from googleapiclient.discovery import build  # noqa: E402
+
+from app.services.google_client import GoogleClientFactory  # noqa: E402
+
+APIS = [("calendar", "v3"), ("gmail", "v1"), ("people", "v1"), ("tasks", "v1")]
+
+
+def _creds() -> Credentials:
+    # A new object per call, as OAuthService.get_credentials() returns
+    return Credentials(
+        token="bench-token",
+        refresh_token="bench-refresh",
+        client_id="bench",
+        client_secret="bench",
+        token_uri="https://oauth2.googleapis.com/token",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    factory = GoogleClientFactory()
+    for api, version in APIS:
+        print(f"{api} {version}")
+        per_call = time_calls(lambda: build(api, version, credentials=_creds(), cache_discovery=False), args.iterations)
+        print_row("  build() per call", summarize(per_call))
+        factory.get(api, version, _creds())
+        cached = time_calls(lambda: factory.get(api, version, _creds()), args.iterations)
+        print_row("  cached factory", summarize(cached))
+
+
+if __name__ == "__main__":
+    main()
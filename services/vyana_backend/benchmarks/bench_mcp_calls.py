@@ -0,0 +1,115 @@
+"""
+MCP tool-call latency and throughput at N concurrent calls.
+
+Compares the old bridge (each call on a tool thread that spins up its own
+thread + event loop) with the native async tool path, against the local
+stub MCP server.
+
+    python -m benchmarks.bench_mcp_calls [--concurrency 50] [--rounds 5] [--latency-ms 20]
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import httpx
+
+from benchmarks.common import setup_env, summarize, print_row
+
+setup_env()
+
+from app.services.langgraph_tools import get_mcp_tools_as_langchain  # noqa: E402
+from app.services.mcp_service import mcp_service  # noqa: E402
+from app.services.tool_executor import run_blocking  # noqa: E402
+from benchmarks.stub_mcp_server import StubServer  # noqa: E402
+
+
+def legacy_execute_tool_sync(client: httpx.AsyncClient, url: str, tool_name: str, arguments: dict) -> str:
+    """The previous execute_tool_sync bridge: a new thread and event loop per call"""
+    result_container = {"result": None, "error": None}
+    done_event = threading.Event()
+
+    async def execute_tool():
+        request_body = {
+            "jsonrpc": "2.0",
+            "id": 2,
+            "method": "tools/call",
+            "params": {"name": tool_name, "arguments": arguments},
+        }
+        response = await client.post(url, json=request_body, headers={"Content-Type": "application/json"})
+        return response.text
+
+    def run_in_thread():
+        new_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(new_loop)
+        try:
+            result_container["result"] = new_loop.run_until_complete(execute_tool())
+        except Exception as e:
+            result_container["error"] = e
+        finally:
+            new_loop.close()
+            done_event.set()
+
+    thread = threading.Thread(target=run_in_thread)
+    thread.start()
+    done_event.wait(timeout=30)
+    if result_container["error"]:
+        raise result_container["error"]
+    return result_container["result"]
+
+
+async def _timed(coro_fn):
+    start = time.perf_counter()
+    try:
+        result = await coro_fn()
+        ok = '"error"' not in (result or "")
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+async def _run(label: str, make_call, concurrency: int, rounds: int):
+    samples, failures = [], 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results = await asyncio.gather(*[_timed(make_call) for _ in range(concurrency)])
+        samples.extend(r[0] for r in results)
+        failures += sum(1 for r in results if not r[1])
+    wall = time.perf_counter() - start
+    print_row(label, summarize(samples))
+    print(f"{'':<32} throughput={len(samples) / wall:8.1f} calls/s failures={failures}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with StubServer(port=args.port, latency_ms=args.latency_ms, tool_count=1, require_session=False) as server:
+        mcp_service.add_server("bench", server.url)
+        result = await mcp_service.connect("bench")
+        assert result["success"], result
+
+        tool = get_mcp_tools_as_langchain()[0]
+        arguments = {"text": "ping"}
+
+        print(f"{args.concurrency} concurrent MCP calls x {args.rounds} rounds (server latency {args.latency_ms}ms)")
+        await _run(
+            "after: native async tool",
+            lambda: tool.ainvoke(arguments),
+            args.concurrency, args.rounds,
+        )
+        # The old bridge drove one shared AsyncClient from short-lived loops
+        legacy_client = httpx.AsyncClient(timeout=30.0)
+        await _run(
+            "before: thread + loop per call",
+            lambda: run_blocking(legacy_execute_tool_sync, legacy_client, server.url, "echo_0", arguments),
+            args.concurrency, args.rounds,
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
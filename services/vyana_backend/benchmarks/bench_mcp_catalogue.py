@@ -0,0 +1,40 @@
+"""
+Per-request MCP tool setup cost vs. catalogue size: converting every schema
+on each request (old behaviour) vs. the hash-keyed conversion cache.
+
+    python -m benchmarks.bench_mcp_catalogue [--iterations 20] [--sizes 10,100,500]
+"""
+import argparse
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from app.services import langgraph_tools  # noqa: E402
+from app.services.mcp_service import mcp_service  # noqa: E402
+from benchmarks.bench_agent_graph import _fake_mcp_connection  # noqa: E402
+
+
+def _uncached():
+    connection = mcp_service.connections["bench"]
+    connection.tools_hash = ""
+    langgraph_tools._mcp_langchain_cache.clear()
+    langgraph_tools.get_mcp_tools_as_langchain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--sizes", default="10,100,500")
+    args = parser.parse_args()
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        mcp_service.connections["bench"] = _fake_mcp_connection(size)
+        print(f"{size} MCP tools")
+        print_row("  convert every request", summarize(time_calls(_uncached, args.iterations)))
+        langgraph_tools.get_mcp_tools_as_langchain()
+        print_row("  cached catalogue", summarize(time_calls(langgraph_tools.get_mcp_tools_as_langchain, args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+MCP session throughput against the local stub server: concurrent in-flight
+calls on one persistent session under different per-server connection
+limits.
+
+    python -m benchmarks.bench_mcp_session [--concurrency 50] [--rounds 5] [--latency-ms 20]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import setup_env, summarize, print_row
+
+setup_env()
+
+from app.services.mcp_client import MCPSession  # noqa: E402
+from benchmarks.stub_mcp_server import StubServer  # noqa: E402
+
+
+async def _bench(label: str, session: MCPSession, concurrency: int, rounds: int):
+    async def one():
+        start = time.perf_counter()
+        await session.call_tool("echo_0", {"text": "ping"})
+        return time.perf_counter() - start
+
+    await session.initialize()
+    samples = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        samples.extend(await asyncio.gather(*[one() for _ in range(concurrency)]))
+    wall = time.perf_counter() - start
+    await session.close()
+    print_row(label, summarize(samples))
+    print(f"{'':<32} throughput={len(samples) / wall:8.1f} calls/s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with StubServer(port=args.port, latency_ms=args.latency_ms, tool_count=1) as server:
+        print(f"{args.concurrency} concurrent calls x {args.rounds} rounds on one session (server latency {args.latency_ms}ms)")
+        for limit in (1, 10, args.concurrency):
+            await _bench(f"max_connections={limit}", MCPSession(server.url, max_connections=limit), args.concurrency, args.rounds)
+
+        print(f"server saw max {server.app.state.max_in_flight} calls in flight")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+Notes at scale: search and newest-first paging with the old whole-file
+JSON storage (reparse per call, substring scan) vs the SQLite notes store
+(FTS5 index, keyset pagination over created_at).
+
+    python -m benchmarks.bench_notes_search [--notes 100000] [--iterations 100]
+"""
+import argparse
+import datetime
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from app.services.notes_service import NotesService  # noqa: E402
+
+WORDS = ("meeting budget flight hotel invoice groceries doctor birthday gift recipe project deadline "
+         "review client design sprint launch dentist insurance passport visa renewal tax return plumber "
+         "electrician school fees concert tickets workout plan book podcast idea garden paint car service "
+         "laptop repair bank loan interest mortgage rent lease contract salary bonus appraisal vacation").split()
+SYLLABLES = "ka ri mo ta ne lu si pa do ve ro mi zu ha te bo na li".split()
+# Frequent everyday words, then a long tail of rarer ones; drawn with Zipf weights
+VOCABULARY = WORDS + [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+ZIPF_WEIGHTS = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+# Broad (matches most notes), mid-frequency, rare and missing terms
+QUERIES = ["meeting", "passport renewal", "dentist", "tax ret", "karimo", "romilu", "quarterly zebra"]
+
+
+def synthetic_notes(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    start = datetime.datetime(2020, 1, 1)
+    notes = []
+    for i in range(count):
+        created = (start + datetime.timedelta(minutes=17 * i)).isoformat()
+        notes.append({
+            "id": f"note-{i}",
+            "title": " ".join(rng.choices(VOCABULARY, ZIPF_WEIGHTS, k=3)).capitalize(),
+            "content": " ".join(rng.choices(VOCABULARY, ZIPF_WEIGHTS, k=rng.randint(20, 80))),
+            "created_at": created,
+            "updated_at": created,
+        })
+    return notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    notes = synthetic_notes(args.notes)
+    queries = iter(range(10**9))
+    next_query = lambda: QUERIES[next(queries) % len(QUERIES)]  # noqa: E731
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        legacy = tmp / "notes.json"
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump(notes[::-1], f, indent=2)
+
+        def json_search():
+            query = next_query()
+            with open(legacy, encoding="utf-8") as f:
+                return [n for n in json.load(f) if query in n["title"].lower() or query in n["content"].lower()]
+
+        print(f"{args.notes} notes")
+        print_row("  json: search", summarize(time_calls(json_search, 5)))
+
+        start = time.perf_counter()
+        store = NotesService(db_path=tmp / "notes.db", legacy_file=legacy)
+        print(f"  migration: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+        print_row("  sqlite: search (top 50)", summarize(time_calls(lambda: store.search_notes(next_query()),
+                                                                    args.iterations)))
+        print_row("  sqlite: newest 10", summarize(time_calls(lambda: store.get_notes(10), args.iterations)))
+        cursor = None
+        for _ in range(1000):  # 1000 pages deep
+            cursor = store.list_notes(20, cursor)["next_cursor"]
+        print_row("  sqlite: page 1001 (20/page)", summarize(time_calls(lambda: store.list_notes(20, cursor),
+                                                                        args.iterations)))
+        print_row("  sqlite: save", summarize(time_calls(lambda: store.save_note("call the plumber", "Todo"),
+                                                         args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Chat cache on repeated questions: the exact (lowercased, stripped) key vs
+the semantic tier. A full cache of questions is asked again in other words
+(should hit) and about other subjects in the same words (must miss).
+
+    python -m benchmarks.bench_semantic_cache [--entries 2000] [--iterations 2000]
+"""
+import argparse
+import random
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from app.services.semantic_cache import SemanticCache  # noqa: E402
+
+SYLLABLES = "ka ri mo ta ne lu si pa do ve ro mi zu ha te bo na li".split()
+# Cached wording, then paraphrases of it
+TEMPLATES = [
+    ("What is the capital of {x}?", ["what's the capital of {x}", "Can you tell me the capital of {x}?",
+                                     "capital of {x}?"]),
+    ("Explain {x} in simple terms", ["Can you explain {x} in simple terms?", "explain {x} in simple terms please",
+                                     "explain {x} simply"]),
+    ("How do I make {x} at home?", ["how do i make {x} at home", "How can I make {x} at home?",
+                                    "how to make {x} at home"]),
+    ("Who wrote {x}?", ["who wrote {x}", "Who was it that wrote {x}?", "who is the author of {x}"]),
+    ("Give me tips for {x}", ["give me some tips for {x}", "Tips for {x} please", "any tips for {x}?"]),
+]
+MODEL = "deepseek-chat"
+
+
+def subjects(count: int, rng: random.Random):
+    names = set()
+    while len(names) < count:
+        names.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) + " "
+                  + "".join(rng.choice(SYLLABLES) for _ in range(3)))
+    return sorted(names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    names = subjects(args.entries * 2, rng)
+    cached, unseen = names[:args.entries], names[args.entries:]
+    cache = SemanticCache(max_entries=args.entries)
+    exact = {}
+    for i, name in enumerate(cached):
+        question = TEMPLATES[i % len(TEMPLATES)][0].format(x=name)
+        cache.set(MODEL, question, f"answer {i}", ttl=3600)
+        exact[question.lower().strip()] = f"answer {i}"
+
+    paraphrases, wrong_subject = [], []
+    for i in range(args.iterations):
+        index = rng.randrange(args.entries)
+        template, variants = TEMPLATES[index % len(TEMPLATES)]
+        paraphrases.append((rng.choice(variants).format(x=cached[index]), f"answer {index}"))
+        wrong_subject.append(template.format(x=unseen[rng.randrange(len(unseen))]))
+
+    print(f"{args.entries} cached questions, {args.iterations} lookups each")
+    exact_hits = sum(question.lower().strip() in exact for question, _ in paraphrases)
+    hits = sum(cache.get(MODEL, question) == answer for question, answer in paraphrases)
+    false_hits = sum(cache.get(MODEL, question) is not None for question in wrong_subject)
+    print(f"  paraphrase hit rate: exact key {exact_hits / len(paraphrases):.0%}, "
+          f"semantic {hits / len(paraphrases):.0%}")
+    print(f"  other-subject questions answered from cache: {false_hits}")
+
+    queries = iter(q for q, _ in paraphrases * 2)
+    print_row("  semantic lookup (hit)", summarize(time_calls(lambda: cache.get(MODEL, next(queries)),
+                                                                args.iterations)))
+    queries = iter(wrong_subject * 2)
+    print_row("  semantic lookup (miss)", summarize(time_calls(lambda: cache.get(MODEL, next(queries)),
+                                                                 args.iterations)))
+    print(f"  {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Google Tasks views and writes: a simulated-latency Tasks API called per
+view (list, title search over up to 200 fetched tasks) and per change (get
++ update) vs the local tasks mirror (SQLite reads, optimistic writes
+replayed in batch requests).
+
+    python -m benchmarks.bench_tasks_mirror [--tasks 2000] [--latency-ms 80] [--iterations 200] [--burst 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from app.services import google_tasks_service as gts  # noqa: E402
+from app.services.tasks_mirror import TasksMirror  # noqa: E402
+from benchmarks.stub_tasks import FakeTasksHttp, build_service, synthetic_tasks  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=20, help="task completions made back to back")
+    args = parser.parse_args()
+
+    tasks = synthetic_tasks(args.tasks)
+    http = FakeTasksHttp(tasks, latency_ms=args.latency_ms)
+    service = build_service(http)
+    gts.get_tasks_service = lambda: service
+    gts._connected_service = lambda: service
+    queries = ["passport", "bill", "dentist", "zebra"]
+    cycle = iter(range(10**9))
+    open_ids = [t["id"] for t in tasks if t["status"] != "completed"]
+
+    def burst(ids):
+        for task_id in ids:
+            gts.complete_task(task_id)
+
+    gts.settings.TASKS_MIRROR_ENABLED = False
+    few = max(5, args.iterations // 20)
+    print(f"{args.tasks} tasks, {args.latency_ms:.0f}ms simulated round-trip")
+    print_row("  remote: list open", summarize(time_calls(gts.list_tasks, few)))
+    print_row("  remote: search", summarize(time_calls(lambda: gts.search_tasks(queries[next(cycle) % 4]), few)))
+    http.requests.clear()
+    start = time.perf_counter()
+    burst(open_ids[:args.burst])
+    print(f"  remote: {args.burst} completions in {(time.perf_counter() - start) * 1000:.0f}ms, "
+          f"{len(http.requests)} round-trips")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mirror = TasksMirror(db_path=os.path.join(tmp, "tasks.db"))
+        gts.tasks_mirror = mirror
+        gts.settings.TASKS_MIRROR_ENABLED = True
+        gts.settings.TASKS_SYNC_INTERVAL = 3600.0
+        mirror.flush_in_background = lambda get_service: None  # replayed explicitly below
+        start = time.perf_counter()
+        stats = mirror.sync("@default", service)
+        print(f"  full sync: {stats['tasks']} tasks in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+        print_row("  local: list open", summarize(time_calls(gts.list_tasks, args.iterations)))
+        print_row("  local: list 1000 with completed", summarize(time_calls(
+            lambda: gts.list_tasks(show_completed=True, max_results=1000), args.iterations)))
+        print_row("  local: search", summarize(time_calls(lambda: gts.search_tasks(queries[next(cycle) % 4]),
+                                                          args.iterations)))
+        http.requests.clear()
+        start = time.perf_counter()
+        burst(open_ids[args.burst:2 * args.burst])
+        local_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        sent = mirror.flush(service)["sent"]
+        print(f"  local: {args.burst} completions in {local_ms:.1f}ms, replayed ({sent} changes) in "
+              f"{(time.perf_counter() - start) * 1000:.0f}ms, {len(http.requests)} round-trips")
+        start = time.perf_counter()
+        stats = mirror.sync("@default", service)
+        print(f"  updatedMin poll: {stats['changed']} changed in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
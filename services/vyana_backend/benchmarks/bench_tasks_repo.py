@@ -0,0 +1,156 @@
+"""
+Tasks storage at 10k tasks: the previous repo (a new connection per call,
+rollback journal, no indexes, validated models) vs the per-thread WAL
+connections, indexes and trigram title search of SqliteTasksRepo, for
+single calls and for readers and writers running together.
+
+    python -m benchmarks.bench_tasks_repo [--tasks 10000] [--iterations 200] [--seconds 3]
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from benchmarks.common import setup_env, time_calls, summarize, print_row
+
+setup_env()
+
+from app.services.tasks_repo import SqliteTasksRepo, TaskItem  # noqa: E402
+
+VERBS = "call pay book renew email buy fix schedule review send clean plan".split()
+OBJECTS = ("plumber electricity-bill flight passport landlord groceries bike dentist report invoice "
+           "garage trip insurance laptop mortgage tickets").split()
+QUERIES = ["passport", "bill", "dentist", "renew flight", "zebra"]
+
+
+class LegacyTasksRepo:
+    """The previous SqliteTasksRepo: connect per call, pydantic-validated rows, LIKE scans"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            title TEXT NOT NULL, is_completed BOOLEAN DEFAULT 0, created_at TEXT, due_date TEXT)""")
+
+    def _rows(self, query, params=()):
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [TaskItem(id=r[0], title=r[1], is_completed=bool(r[2]), created_at=r[3], due_date=r[4]) for r in rows]
+
+    def _write(self, query, params):
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(query, params)
+            conn.commit()
+            return cursor
+
+    def add_task(self, title: str, due_date: Optional[str] = None):
+        now = datetime.datetime.now().isoformat()
+        task_id = self._write("INSERT INTO tasks (title, is_completed, created_at, due_date) VALUES (?, ?, ?, ?)",
+                              (title, False, now, due_date)).lastrowid
+        return TaskItem(id=task_id, title=title, is_completed=False, created_at=now, due_date=due_date)
+
+    def list_tasks(self, include_completed: bool = False):
+        where = "" if include_completed else " WHERE is_completed = 0"
+        return self._rows(f"SELECT id, title, is_completed, created_at, due_date FROM tasks{where}")
+
+    def get_task(self, task_id: int):
+        rows = self._rows("SELECT id, title, is_completed, created_at, due_date FROM tasks WHERE id = ?", (task_id,))
+        return rows[0] if rows else None
+
+    def complete_task(self, task_id: int):
+        return self._write("UPDATE tasks SET is_completed = 1 WHERE id = ?", (task_id,)).rowcount > 0
+
+    def search_tasks(self, query: str):
+        return self._rows("SELECT id, title, is_completed, created_at, due_date FROM tasks "
+                          "WHERE title LIKE ? AND is_completed = 0", (f"%{query}%",))
+
+
+def fill(repo, count: int, rng: random.Random):
+    for i in range(count):
+        repo.add_task(f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {i}", f"2026-{rng.randint(1, 12):02d}-01")
+    # A long-lived list is mostly done tasks
+    for task_id in rng.sample(range(1, count + 1), count * 9 // 10):
+        repo.complete_task(task_id)
+
+
+def mixed_load(repo, count: int, seconds: float, readers: int = 4, writers: int = 2):
+    """Readers get/search/list while writers add and complete; returns (read ops/s, write ops/s, errors)"""
+    stop = threading.Event()
+    reads, writes, errors = [0] * readers, [0] * writers, []
+
+    def read(slot):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            try:
+                roll = rng.random()
+                if roll < 0.6:
+                    repo.get_task(rng.randint(1, count))
+                elif roll < 0.95:
+                    repo.search_tasks(rng.choice(QUERIES))
+                else:
+                    repo.list_tasks()
+                reads[slot] += 1
+            except sqlite3.Error as e:
+                errors.append(e)
+
+    def write(slot):
+        rng = random.Random(100 + slot)
+        while not stop.is_set():
+            try:
+                if rng.random() < 0.5:
+                    repo.add_task(f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} new")
+                else:
+                    repo.complete_task(rng.randint(1, count))
+                writes[slot] += 1
+            except sqlite3.Error as e:
+                errors.append(e)
+
+    threads = ([threading.Thread(target=read, args=(i,)) for i in range(readers)]
+               + [threading.Thread(target=write, args=(i,)) for i in range(writers)])
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads) / seconds, sum(writes) / seconds, len(errors)
+
+
+def run(label: str, repo, args):
+    rng = random.Random(3)
+    queries = iter(range(10**9))
+    print_row(f"  {label}: get", summarize(time_calls(lambda: repo.get_task(rng.randint(1, args.tasks)),
+                                                       args.iterations)))
+    print_row(f"  {label}: search", summarize(time_calls(lambda: repo.search_tasks(QUERIES[next(queries) % 5]),
+                                                          args.iterations)))
+    print_row(f"  {label}: list open", summarize(time_calls(repo.list_tasks, max(5, args.iterations // 10))))
+    print_row(f"  {label}: add", summarize(time_calls(lambda: repo.add_task("call the plumber"), args.iterations)))
+    read_ops, write_ops, errors = mixed_load(repo, args.tasks, args.seconds)
+    print(f"  {label}: 4 readers + 2 writers  reads={read_ops:,.0f}/s writes={write_ops:,.0f}/s errors={errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.tasks} tasks")
+        legacy = LegacyTasksRepo(os.path.join(tmp, "legacy.db"))
+        fill(legacy, args.tasks, random.Random(1))
+        run("legacy", legacy, args)
+
+        repo = SqliteTasksRepo(db_path=os.path.join(tmp, "tasks.db"))
+        fill(repo, args.tasks, random.Random(1))
+        run("sqlite", repo, args)
+
+
+if __name__ == "__main__":
+    main()
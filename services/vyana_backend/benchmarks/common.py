@@ -0,0 +1,82 @@
+"""
+Shared helpers for benchmark scripts
+"""
+import os
+import statistics
+import threading
+import time
+from typing import Callable, Dict, List
+
+
+def setup_env():
+    """Provide placeholder settings so app modules import without a .env"""
+    defaults = {
+        "SECRET_KEY": "benchmark",
+        "GOOGLE_CLIENT_ID": "benchmark",
+        "GOOGLE_CLIENT_SECRET": "benchmark",
+        "GOOGLE_REDIRECT_URI": "http://localhost/callback",
+        "DEEPSEEK_API_KEY": "sk-benchmark",
+        "CACHE_ENABLED": "false",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    # Keep benchmark output readable
+    import logging
+    logging.disable(logging.INFO)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (seconds) in milliseconds"""
+    ordered = sorted(samples)
+    p99_index = max(0, int(len(ordered) * 0.99) - 1)
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.mean(ordered) * 1000,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p99_ms": ordered[p99_index] * 1000,
+    }
+
+
+def time_calls(fn: Callable[[], object], iterations: int) -> List[float]:
+    """Call fn repeatedly and return per-call durations in seconds"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def print_row(label: str, stats: Dict[str, float]):
+    print(
+        f"{label:<32} n={stats['n']:<6} mean={stats['mean_ms']:9.3f}ms "
+        f"p50={stats['p50_ms']:9.3f}ms p99={stats['p99_ms']:9.3f}ms"
+    )
+
+
+class LocalServer:
+    """Run an ASGI app with uvicorn on a background thread (port 0 picks a free port)"""
+
+    def __init__(self, app, port: int = 0):
+        import uvicorn
+
+        self.app = app
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self.port = port
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
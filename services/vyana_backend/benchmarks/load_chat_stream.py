@@ -0,0 +1,56 @@
+"""
+Load test for a running backend: N concurrent /chat/stream clients.
+
+Reports per-client time-to-first-event and total time, plus wall-clock time
+for the whole batch. If clients make progress in parallel the wall-clock
+time stays close to the slowest single client instead of the sum.
+
+    python -m benchmarks.load_chat_stream --url http://localhost:8080 --clients 10
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import summarize, print_row
+
+
+async def _one_client(client: httpx.AsyncClient, url: str, message: str, tools: bool):
+    payload = {
+        "messages": [{"role": "user", "content": message}],
+        "settings": {"tools_enabled": tools, "mcp_enabled": tools},
+    }
+    start = time.perf_counter()
+    first_event = None
+    async with client.stream("POST", f"{url}/chat/stream", json=payload) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data:") and first_event is None:
+                first_event = time.perf_counter() - start
+    return first_event or 0.0, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--message", default="What's on my calendar today and how many unread emails do I have?")
+    parser.add_argument("--no-tools", action="store_true")
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(timeout=120) as client:
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            _one_client(client, args.url, args.message, not args.no_tools)
+            for _ in range(args.clients)
+        ])
+        wall = time.perf_counter() - start
+
+    print(f"{args.clients} concurrent /chat/stream clients against {args.url}")
+    print_row("time to first event", summarize([r[0] for r in results]))
+    print_row("total per client", summarize([r[1] for r in results]))
+    print(f"wall clock: {wall * 1000:.1f}ms (sum of clients: {sum(r[1] for r in results) * 1000:.1f}ms)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
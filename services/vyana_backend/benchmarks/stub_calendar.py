@@ -0,0 +1,298 @@
+"""
+In-memory Google Calendar API stand-in for benchmarks and tests.
+
+FakeCalendarHttp replaces the httplib2 transport of a real googleapiclient
+Calendar service (built from the bundled discovery document), like
+stub_gmail does for Gmail. It serves calendarList.list, freeBusy.query,
+events.list (timeMin/timeMax/pageToken/syncToken aware, always expanded to
+single instances, items(...) fields projections),
+events.get/insert/update/delete and quickAdd, with an optional
+per-round-trip latency, and records every round-trip with its query
+parameters. Every change bumps a sequence number so syncToken lists return
+exactly what changed, including cancelled tombstones; expire_sync_tokens()
+makes old tokens fail with 410.
+"""
+import datetime
+import json
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+from zoneinfo import ZoneInfo
+
+import httplib2
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+API_PREFIX = "/calendar/v3/"
+TIME_ZONE = "Asia/Kolkata"
+
+TITLES = ["Standup", "1:1", "Design review", "Lunch", "Gym", "Dentist", "Sprint planning", "Call with Ravi",
+          "Flight", "Team dinner", "Budget sync", "Focus time"]
+
+
+def _parse(value: dict, tz: ZoneInfo) -> datetime.datetime:
+    if "dateTime" in value:
+        return datetime.datetime.fromisoformat(value["dateTime"])
+    return datetime.datetime.fromisoformat(value["date"]).replace(tzinfo=tz)
+
+
+def make_event(event_id: str, summary: str, start: datetime.datetime, minutes: int = 30,
+               all_day: bool = False, **extra) -> dict:
+    """A Calendar API event resource (timed unless all_day)"""
+    if all_day:
+        times = {"start": {"date": start.date().isoformat()},
+                 "end": {"date": (start.date() + datetime.timedelta(days=max(1, minutes // 1440))).isoformat()}}
+    else:
+        end = start + datetime.timedelta(minutes=minutes)
+        times = {"start": {"dateTime": start.isoformat(), "timeZone": TIME_ZONE},
+                 "end": {"dateTime": end.isoformat(), "timeZone": TIME_ZONE}}
+    return {
+        "kind": "calendar#event",
+        "id": event_id,
+        "iCalUID": f"{event_id}@calendar.example",
+        "status": "confirmed",
+        "summary": summary,
+        "htmlLink": f"https://calendar.example/event?eid={event_id}",
+        "creator": {"email": "me@example.com"},
+        "reminders": {"useDefault": True},
+        **times,
+        **extra,
+    }
+
+
+def synthetic_calendar(count: int, start: datetime.datetime, days: int = 60, seed: int = 5,
+                       prefix: str = "ev") -> List[dict]:
+    """A reproducible spread of `count` events over `days` days from `start`"""
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        day = start + datetime.timedelta(days=rng.randrange(days))
+        if rng.random() < 0.05:
+            events.append(make_event(f"{prefix}{i}", rng.choice(TITLES), day, minutes=1440, all_day=True))
+            continue
+        begin = day.replace(hour=rng.randint(7, 20), minute=rng.choice([0, 15, 30, 45]), second=0, microsecond=0)
+        events.append(make_event(f"{prefix}{i}", rng.choice(TITLES), begin, minutes=rng.choice([15, 30, 45, 60, 90])))
+    return events
+
+
+class FakeCalendarHttp:
+    """httplib2.Http stand-in serving in-memory calendars"""
+
+    def __init__(self, calendars: Optional[Dict[str, List[dict]]] = None, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.requests: List[Tuple[str, str]] = []  # (method, path) per round-trip
+        self.queries: List[Dict[str, List[str]]] = []  # query parameters per round-trip
+        self._lock = threading.Lock()
+        self.seq = 0
+        self.oldest_sync_seq = 0
+        # calendar id -> event id -> (seq of last change, event); cancelled events are kept as tombstones
+        self.events: Dict[str, Dict[str, Tuple[int, dict]]] = {}
+        self.time_zones: Dict[str, str] = {}
+        for calendar_id, events in (calendars or {"primary": []}).items():
+            self.add_calendar(calendar_id)
+            for event in events:
+                self._store(calendar_id, event)
+
+    # --- calendar changes ---
+
+    def add_calendar(self, calendar_id: str, time_zone: str = TIME_ZONE):
+        self.events.setdefault(calendar_id, {})
+        self.time_zones[calendar_id] = time_zone
+
+    def _store(self, calendar_id: str, event: dict):
+        self.seq += 1
+        event = dict(event, updated=f"2026-01-01T00:00:{self.seq % 60:02d}Z", etag=f'"{self.seq}"')
+        self.events[calendar_id][event["id"]] = (self.seq, event)
+
+    def put_event(self, calendar_id: str, event: dict):
+        """Create or replace an event (as if changed in another client)"""
+        with self._lock:
+            self._store(calendar_id, event)
+
+    def cancel_event(self, calendar_id: str, event_id: str):
+        with self._lock:
+            _, event = self.events[calendar_id][event_id]
+            self._store(calendar_id, {"id": event_id, "status": "cancelled",
+                                      **({"recurringEventId": event["recurringEventId"]} if "recurringEventId" in event else {})})
+
+    def expire_sync_tokens(self):
+        """Make every previously issued sync token invalid (forces a full resync)"""
+        self.oldest_sync_seq = self.seq + 1
+
+    def live_events(self, calendar_id: str) -> List[dict]:
+        return [e for _, e in self.events[calendar_id].values() if e.get("status") != "cancelled" and "recurrence" not in e]
+
+    # --- httplib2 interface ---
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        parsed = urlparse(uri)
+        with self._lock:
+            self.requests.append((method, parsed.path))
+            self.queries.append(parse_qs(parsed.query))
+        if self.latency:
+            time.sleep(self.latency)
+        payload_in = json.loads(body) if body else None
+        with self._lock:
+            status, payload = self._route(method, parsed.path, parse_qs(parsed.query), payload_in)
+        if status == 204:
+            return httplib2.Response({"status": 204}), b""
+        return httplib2.Response({"status": status, "content-type": "application/json"}), json.dumps(payload).encode()
+
+    # --- API ---
+
+    @staticmethod
+    def _error(status: int, message: str) -> Tuple[int, dict]:
+        return status, {"error": {"code": status, "message": message}}
+
+    def _route(self, method: str, path: str, query: Dict[str, List[str]], body: Optional[dict]) -> Tuple[int, dict]:
+        if not path.startswith(API_PREFIX):
+            return self._error(404, f"Unknown path {path}")
+        parts = [unquote(p) for p in path[len(API_PREFIX):].split("/")]
+        if method == "GET" and parts == ["users", "me", "calendarList"]:
+            return 200, self._calendar_list()
+        if method == "POST" and parts == ["freeBusy"]:
+            return 200, self._free_busy(body)
+        if len(parts) < 3 or parts[0] != "calendars" or parts[2] != "events":
+            return self._error(404, f"Unsupported {method} {path}")
+        calendar_id = parts[1]
+        if calendar_id not in self.events:
+            return self._error(404, "Not Found")
+        events = self.events[calendar_id]
+        if method == "GET" and len(parts) == 3:
+            return self._list(calendar_id, query)
+        if method == "POST" and len(parts) == 3:
+            return 200, self._insert(calendar_id, body)
+        if method == "POST" and parts[3:] == ["quickAdd"]:
+            start = datetime.datetime.now(ZoneInfo(self.time_zones[calendar_id])).replace(microsecond=0)
+            return 200, self._insert(calendar_id, make_event("", query["text"][0], start, minutes=60))
+        event_id = parts[3]
+        current = events.get(event_id)
+        if current is None or current[1].get("status") == "cancelled":
+            return self._error(404, "Not Found")
+        if method == "GET":
+            return 200, current[1]
+        if method == "PUT":
+            self._store(calendar_id, dict(body, id=event_id))
+            return 200, events[event_id][1]
+        if method == "DELETE":
+            for other_id, (_, other) in list(events.items()):
+                if other_id == event_id or other.get("recurringEventId") == event_id:
+                    self._store(calendar_id, {"id": other_id, "status": "cancelled"})
+            return 204, {}
+        return self._error(404, f"Unsupported {method} {path}")
+
+    def _calendar_list(self) -> dict:
+        items = []
+        for i, calendar_id in enumerate(self.events):
+            items.append({
+                "id": calendar_id,
+                "summary": "Me" if calendar_id == "primary" else calendar_id,
+                "primary": calendar_id == "primary",
+                "selected": True,
+                "accessRole": "owner" if i == 0 else "reader",
+                "timeZone": self.time_zones[calendar_id],
+                "backgroundColor": "#039be5",
+            })
+        return {"items": items}
+
+    def _free_busy(self, body: dict) -> dict:
+        lo = datetime.datetime.fromisoformat(body["timeMin"])
+        hi = datetime.datetime.fromisoformat(body["timeMax"])
+        calendars = {}
+        for item in body.get("items", []):
+            calendar_id = item["id"]
+            if calendar_id not in self.events:
+                calendars[calendar_id] = {"errors": [{"domain": "global", "reason": "notFound"}], "busy": []}
+                continue
+            tz = ZoneInfo(self.time_zones[calendar_id])
+            spans = sorted(
+                (max(_parse(e["start"], tz), lo), min(_parse(e["end"], tz), hi))
+                for e in self.live_events(calendar_id)
+                if e.get("transparency") != "transparent" and not self._declined(e)
+                and _parse(e["end"], tz) > lo and _parse(e["start"], tz) < hi
+            )
+            busy = []
+            for start, end in spans:
+                if busy and start <= busy[-1][1]:
+                    busy[-1][1] = max(busy[-1][1], end)
+                else:
+                    busy.append([start, end])
+            calendars[calendar_id] = {"busy": [{"start": s.isoformat(), "end": e.isoformat()} for s, e in busy]}
+        return {"kind": "calendar#freeBusy", "timeMin": body["timeMin"], "timeMax": body["timeMax"], "calendars": calendars}
+
+    @staticmethod
+    def _declined(event: dict) -> bool:
+        return any(a.get("self") and a.get("responseStatus") == "declined" for a in event.get("attendees", []))
+
+    def _insert(self, calendar_id: str, body: dict) -> dict:
+        self.seq += 1
+        event = dict(body, id=body.get("id") or f"new{self.seq}", status="confirmed")
+        event["iCalUID"] = f"{event['id']}@calendar.example"
+        event.setdefault("htmlLink", f"https://calendar.example/event?eid={event['id']}")
+        if body.get("conferenceData"):
+            event["hangoutLink"] = f"https://meet.example/{event['id']}"
+        self._store(calendar_id, event)
+        for instance in self._expand(calendar_id, event):
+            self._store(calendar_id, instance)
+        return self.events[calendar_id][event["id"]][1]
+
+    def _expand(self, calendar_id: str, event: dict) -> List[dict]:
+        """Instances of a simple FREQ=DAILY|WEEKLY;COUNT=n recurrence"""
+        if not event.get("recurrence"):
+            return []
+        rule = dict(p.split("=") for p in event["recurrence"][0][len("RRULE:"):].split(";"))
+        step = datetime.timedelta(days={"DAILY": 1, "WEEKLY": 7}[rule["FREQ"]])
+        tz = ZoneInfo(self.time_zones[calendar_id])
+        start, end = _parse(event["start"], tz), _parse(event["end"], tz)
+        instances = []
+        for n in range(int(rule.get("COUNT", 10))):
+            s, e = start + n * step, end + n * step
+            key = "dateTime" if "dateTime" in event["start"] else "date"
+            fmt = (lambda d: d.isoformat()) if key == "dateTime" else (lambda d: d.date().isoformat())
+            instance = {k: v for k, v in event.items() if k != "recurrence"}
+            instance.update(id=f"{event['id']}_{s.strftime('%Y%m%d')}", recurringEventId=event["id"],
+                            start={key: fmt(s)}, end={key: fmt(e)})
+            instances.append(instance)
+        return instances
+
+    def _list(self, calendar_id: str, query: Dict[str, List[str]]) -> Tuple[int, dict]:
+        tz = ZoneInfo(self.time_zones[calendar_id])
+        first = lambda name: (query.get(name) or [None])[0]  # noqa: E731
+        sync_token = first("syncToken")
+        if sync_token is not None:
+            since = int(sync_token)
+            if since < self.oldest_sync_seq:
+                return self._error(410, "Sync token is no longer valid, a full sync is required.")
+            matches = [e for seq, e in self.events[calendar_id].values() if seq > since and "recurrence" not in e]
+        else:
+            time_min = first("timeMin")
+            time_max = first("timeMax")
+            lo = datetime.datetime.fromisoformat(time_min) if time_min else None
+            hi = datetime.datetime.fromisoformat(time_max) if time_max else None
+            matches = [
+                e for e in self.live_events(calendar_id)
+                if (lo is None or _parse(e["end"], tz) > lo) and (hi is None or _parse(e["start"], tz) < hi)
+            ]
+            matches.sort(key=lambda e: _parse(e["start"], tz))
+        offset = int(first("pageToken") or 0)
+        size = int(first("maxResults") or 250)
+        page = matches[offset:offset + size]
+        fields = first("fields")
+        if fields:
+            # Only the item fields of an items(...) projection are honoured
+            wanted = set(fields[fields.index("items(") + 6:-1].split(","))
+            page = [{k: v for k, v in e.items() if k in wanted} for e in page]
+        result = {"kind": "calendar#events", "timeZone": self.time_zones[calendar_id], "items": page}
+        if offset + size < len(matches):
+            result["nextPageToken"] = str(offset + size)
+        else:
+            result["nextSyncToken"] = str(self.seq)
+        return 200, result
+
+
+def build_service(http: FakeCalendarHttp):
+    """A real Calendar API client bound to the fake transport"""
+    document = json.loads(discovery_cache.get_static_doc("calendar", "v3"))
+    return build_from_document(document, http=http)
@@ -0,0 +1,269 @@
+"""
+In-memory Gmail API stand-in for benchmarks and tests.
+
+FakeGmailHttp replaces the httplib2 transport of a real googleapiclient
+Gmail service (built from the bundled discovery document), so the service
+code under test runs unchanged. It serves messages.list, messages.get
+(format/metadataHeaders aware), attachments.get, labels.get, getProfile,
+history.list and multipart batch requests, with an optional per-round-trip latency, and
+records every round-trip. add_message/delete_message/set_labels mutate the
+mailbox and append history records like Gmail does.
+"""
+import base64
+import json
+import random
+import threading
+import time
+from email.parser import Parser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import httplib2
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+API_PREFIX = "/gmail/v1/users/me/"
+
+SENDERS = ["Asha Rao <asha@example.com>", "GitHub <noreply@github.com>", "Ravi Kumar <ravi@example.org>",
+           "Bank Alerts <alerts@bank.example>", "Priya Nair <priya@example.net>", "Newsletter <news@example.io>"]
+TOPICS = ["invoice", "meeting", "release", "travel", "payment", "project", "report", "dinner", "deploy", "budget"]
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+def make_message(index: int, subject: str = "", sender: str = "", body: str = "", labels: Optional[List[str]] = None,
+                 internal_date: Optional[int] = None, thread_id: Optional[str] = None) -> dict:
+    """Build a Gmail `Message` resource (format=full)"""
+    internal_date = internal_date or 1_700_000_000_000 + index * 60_000
+    subject = subject or f"Message {index}"
+    sender = sender or SENDERS[index % len(SENDERS)]
+    body = body or f"Body of message {index}"
+    return {
+        "id": f"m{index:06d}",
+        "threadId": thread_id or f"t{index:06d}",
+        "labelIds": labels if labels is not None else ["INBOX", "UNREAD", "CATEGORY_PERSONAL"],
+        "snippet": body[:100],
+        "internalDate": str(internal_date),
+        "historyId": str(1000 + index),
+        "sizeEstimate": len(body),
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": [
+                {"name": "Subject", "value": subject},
+                {"name": "From", "value": sender},
+                {"name": "To", "value": "me@example.com"},
+                {"name": "Date", "value": time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime(internal_date / 1000))},
+            ],
+            "body": {"size": len(body), "data": _b64(body)},
+        },
+    }
+
+
+def make_html_message(index: int, html: str, images: Dict[str, bytes], subject: str = "") -> Tuple[dict, Dict[str, str]]:
+    """
+    A multipart/related message whose HTML references inline images by cid.
+    Returns the message and its attachment data (attachmentId -> base64url)
+    for FakeGmailHttp.attachments.
+    """
+    message = make_message(index, subject=subject or f"Newsletter {index}")
+    attachments = {}
+    parts = [{"partId": "0", "mimeType": "text/html", "filename": "", "headers": [],
+              "body": {"size": len(html), "data": _b64(html)}}]
+    for n, (cid, data) in enumerate(images.items(), start=1):
+        attachment_id = f"att-{index}-{n}"
+        attachments[attachment_id] = base64.urlsafe_b64encode(data).decode()
+        parts.append({
+            "partId": str(n),
+            "mimeType": "image/png",
+            "filename": f"{cid}.png",
+            "headers": [{"name": "Content-ID", "value": f"<{cid}>"}],
+            "body": {"attachmentId": attachment_id, "size": len(data)},
+        })
+    message["payload"] = {
+        "partId": "",
+        "mimeType": "multipart/related",
+        "headers": message["payload"]["headers"],
+        "body": {"size": 0},
+        "parts": parts,
+    }
+    return message, attachments
+
+
+def synthetic_mailbox(count: int, seed: int = 7) -> List[dict]:
+    """A reproducible mailbox of `count` messages with varied subjects and bodies"""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(count):
+        words = rng.sample(TOPICS, 3)
+        subject = f"{words[0].title()} {words[1]} #{i}"
+        body = f"Hello, about the {words[0]} and {words[1]}: please review the {words[2]} notes. Ref {rng.randrange(10**6)}."
+        labels = ["INBOX", "CATEGORY_PERSONAL"] + (["UNREAD"] if rng.random() < 0.3 else [])
+        messages.append(make_message(i, subject=subject, sender=rng.choice(SENDERS), body=body, labels=labels))
+    return messages
+
+
+class FakeGmailHttp:
+    """httplib2.Http stand-in serving an in-memory mailbox"""
+
+    def __init__(self, messages: Optional[List[dict]] = None, latency_ms: float = 0.0):
+        self.messages: Dict[str, dict] = {m["id"]: m for m in (messages or [])}
+        self.latency = latency_ms / 1000
+        self.requests: List[Tuple[str, str]] = []  # (method, path) per round-trip
+        self._lock = threading.Lock()
+        self.history_id = max([int(m["historyId"]) for m in self.messages.values()] or [1000])
+        self.history: List[dict] = []
+        self.attachments: Dict[str, str] = {}  # attachmentId -> base64url data
+        # history.list rejects start ids older than this (Gmail keeps about a week)
+        self.oldest_history_id = self.history_id
+
+    # --- mailbox changes ---
+
+    def _record(self, **change) -> None:
+        self.history_id += 1
+        self.history.append({"id": str(self.history_id), **change})
+
+    def add_message(self, message: dict):
+        self.messages[message["id"]] = message
+        ref = {"id": message["id"], "threadId": message["threadId"], "labelIds": message["labelIds"]}
+        self._record(messagesAdded=[{"message": ref}])
+
+    def delete_message(self, message_id: str):
+        message = self.messages.pop(message_id)
+        self._record(messagesDeleted=[{"message": {"id": message_id, "threadId": message["threadId"]}}])
+
+    def set_labels(self, message_id: str, add: List[str] = (), remove: List[str] = ()):
+        message = self.messages[message_id]
+        message["labelIds"] = [l for l in message["labelIds"] if l not in remove] + [l for l in add if l not in message["labelIds"]]
+        ref = {"id": message_id, "threadId": message["threadId"], "labelIds": list(message["labelIds"])}
+        if add:
+            self._record(labelsAdded=[{"message": ref, "labelIds": list(add)}])
+        if remove:
+            self._record(labelsRemoved=[{"message": ref, "labelIds": list(remove)}])
+
+    def expire_history(self):
+        """Make every previously issued history id too old (forces a full resync)"""
+        self.oldest_history_id = self.history_id + 1
+        self.history_id += 1
+
+    # --- httplib2 interface ---
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        parsed = urlparse(uri)
+        with self._lock:
+            self.requests.append((method, parsed.path))
+        if self.latency:
+            time.sleep(self.latency)
+        if parsed.path.split("/")[1] == "batch":
+            return self._batch(body, headers or {})
+        status, payload = self._route(method, parsed.path, parse_qs(parsed.query))
+        return httplib2.Response({"status": status, "content-type": "application/json"}), json.dumps(payload).encode()
+
+    # --- API ---
+
+    def _route(self, method: str, path: str, query: Dict[str, List[str]]) -> Tuple[int, dict]:
+        if not path.startswith(API_PREFIX):
+            return 404, {"error": {"code": 404, "message": f"Unknown path {path}"}}
+        parts = path[len(API_PREFIX):].split("/")
+        if method == "GET" and parts == ["messages"]:
+            return 200, self._list(query)
+        if method == "GET" and len(parts) == 2 and parts[0] == "messages":
+            message = self.messages.get(parts[1])
+            if message is None:
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+            return 200, self._format(message, query)
+        if method == "GET" and len(parts) == 4 and parts[0] == "messages" and parts[2] == "attachments":
+            data = self.attachments.get(parts[3])
+            if parts[1] not in self.messages or data is None:
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+            return 200, {"size": len(base64.urlsafe_b64decode(data)), "data": data}
+        if method == "GET" and parts == ["profile"]:
+            return 200, {"emailAddress": "me@example.com", "messagesTotal": len(self.messages), "historyId": str(self.history_id)}
+        if method == "GET" and parts == ["history"]:
+            start = int(query["startHistoryId"][0])
+            if start < self.oldest_history_id:
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+            return 200, {"history": [h for h in self.history if int(h["id"]) > start], "historyId": str(self.history_id)}
+        if method == "GET" and len(parts) == 2 and parts[0] == "labels":
+            unread = sum(1 for m in self.messages.values() if parts[1] in m["labelIds"] and "UNREAD" in m["labelIds"])
+            return 200, {"id": parts[1], "messagesUnread": unread}
+        return 404, {"error": {"code": 404, "message": f"Unsupported {method} {path}"}}
+
+    def _list(self, query: Dict[str, List[str]]) -> dict:
+        labels = query.get("labelIds", [])
+        terms = (query.get("q") or [""])[0].split()
+        matches = [m for m in self._sorted() if all(l in m["labelIds"] for l in labels) and self._matches(m, terms)]
+        offset = int((query.get("pageToken") or ["0"])[0])
+        size = int((query.get("maxResults") or ["100"])[0])
+        page = matches[offset:offset + size]
+        result = {"messages": [{"id": m["id"], "threadId": m["threadId"]} for m in page], "resultSizeEstimate": len(matches)}
+        if offset + size < len(matches):
+            result["nextPageToken"] = str(offset + size)
+        return result
+
+    def _sorted(self) -> List[dict]:
+        return sorted(self.messages.values(), key=lambda m: int(m["internalDate"]), reverse=True)
+
+    @staticmethod
+    def _matches(message: dict, terms: List[str]) -> bool:
+        headers = {h["name"]: h["value"] for h in message["payload"]["headers"]}
+        text = " ".join([headers.get("Subject", ""), headers.get("From", ""), message["snippet"]]).lower()
+        for term in terms:
+            key, _, value = term.partition(":")
+            if key == "is" and value == "unread":
+                ok = "UNREAD" in message["labelIds"]
+            elif key == "label":
+                ok = value.upper() in message["labelIds"]
+            elif key == "category":
+                ok = f"CATEGORY_{value.upper()}" in message["labelIds"]
+            elif key == "from":
+                ok = value.lower() in headers.get("From", "").lower()
+            elif key == "subject":
+                ok = value.lower() in headers.get("Subject", "").lower()
+            else:
+                ok = term.lower() in text
+            if not ok:
+                return False
+        return True
+
+    @staticmethod
+    def _format(message: dict, query: Dict[str, List[str]]) -> dict:
+        fmt = (query.get("format") or ["full"])[0]
+        if fmt == "full":
+            return message
+        result = {k: v for k, v in message.items() if k != "payload"}
+        if fmt == "metadata":
+            wanted = {h.lower() for h in query.get("metadataHeaders", [])}
+            headers = [h for h in message["payload"]["headers"] if not wanted or h["name"].lower() in wanted]
+            result["payload"] = {"mimeType": message["payload"]["mimeType"], "headers": headers}
+        return result
+
+    # --- batch ---
+
+    def _batch(self, body: str, headers: dict) -> Tuple[httplib2.Response, bytes]:
+        envelope = Parser().parsestr(f"content-type: {headers['content-type']}\r\n\r\n{body}")
+        boundary = "batch_stub_boundary"
+        parts = []
+        for part in envelope.get_payload():
+            request_line = part.get_payload().split("\r\n", 1)[0].split("\n", 1)[0]
+            method, target = request_line.split(" ")[:2]
+            parsed = urlparse(target)
+            status, payload = self._route(method, parsed.path, parse_qs(parsed.query))
+            parts.append(
+                f"--{boundary}\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'][1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{json.dumps(payload)}\r\n"
+            )
+        content = "".join(parts) + f"--{boundary}--\r\n"
+        response = httplib2.Response({"status": 200, "content-type": f"multipart/mixed; boundary={boundary}"})
+        return response, content.encode()
+
+
+def build_service(http: FakeGmailHttp):
+    """A real Gmail API client bound to the fake transport"""
+    document = json.loads(discovery_cache.get_static_doc("gmail", "v1"))
+    return build_from_document(document, http=http)
@@ -0,0 +1,163 @@
+"""
+Minimal local MCP server for benchmarks and tests (Streamable HTTP).
+
+Supports the initialize handshake with Mcp-Session-Id sessions, `ping`,
+`tools/list` and `tools/call` with a configurable per-call latency (and an
+optional handshake latency, to overlap concurrent initializes). When the
+client asks for progress (params._meta.progressToken) the call is answered
+as an SSE stream of progress notifications carrying partial text, followed
+by the final result; queued server notifications (e.g.
+notifications/tools/list_changed) are sent on that stream first.
+
+    python -m benchmarks.stub_mcp_server [--port 8765] [--latency-ms 20] [--tools 10]
+"""
+import argparse
+import asyncio
+import json
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.common import LocalServer
+
+SESSION_HEADER = "Mcp-Session-Id"
+
+
+def create_app(latency_ms: float = 20.0, tool_count: int = 10, progress_steps: int = 3, require_session: bool = True,
+               handshake_ms: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    tools = [
+        {
+            "name": f"echo_{i}",
+            "description": f"Echo tool {i}",
+            "inputSchema": {
+                "type": "object",
+                "properties": {"text": {"type": "string"}},
+                "required": ["text"],
+            },
+            "annotations": {"readOnlyHint": True},
+        }
+        for i in range(tool_count)
+    ]
+    app.state.tools = tools
+    app.state.sessions = set()
+    app.state.calls = 0
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+    app.state.request_ids = []
+    # Server notifications delivered on the next SSE response
+    app.state.pending_notifications = []
+
+    def reply(request_id, result=None, error=None):
+        message = {"jsonrpc": "2.0", "id": request_id}
+        if error:
+            message["error"] = error
+        else:
+            message["result"] = result
+        return message
+
+    @app.post("/mcp")
+    async def rpc(request: Request):
+        body = await request.json()
+        method = body.get("method")
+        request_id = body.get("id")
+
+        if request_id is None:
+            # Notification
+            return Response(status_code=202)
+
+        app.state.request_ids.append(request_id)
+
+        if method == "initialize":
+            await asyncio.sleep(handshake_ms / 1000)
+            session_id = uuid.uuid4().hex
+            app.state.sessions.add(session_id)
+            result = {
+                "protocolVersion": body["params"].get("protocolVersion"),
+                "capabilities": {"tools": {"listChanged": True}},
+                "serverInfo": {"name": "stub-mcp", "version": "1.0"},
+            }
+            return JSONResponse(reply(request_id, result), headers={SESSION_HEADER: session_id})
+
+        session_id = request.headers.get(SESSION_HEADER)
+        if require_session and session_id not in app.state.sessions:
+            return Response(status_code=404 if session_id else 400)
+
+        if method == "ping":
+            return reply(request_id, {})
+        if method == "tools/list":
+            return reply(request_id, {"tools": app.state.tools})
+        if method != "tools/call":
+            return reply(request_id, error={"code": -32601, "message": f"Unknown method: {method}"})
+
+        params = body.get("params", {})
+        text = params.get("arguments", {}).get("text", "")
+        progress_token = params.get("_meta", {}).get("progressToken")
+        app.state.calls += 1
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+
+        if progress_token is None or "text/event-stream" not in request.headers.get("accept", ""):
+            try:
+                await asyncio.sleep(latency_ms / 1000)
+            finally:
+                app.state.in_flight -= 1
+            return reply(request_id, {"content": [{"type": "text", "text": text}]})
+
+        async def events():
+            try:
+                while app.state.pending_notifications:
+                    notification = {"jsonrpc": "2.0", "method": app.state.pending_notifications.pop(0)}
+                    yield f"data: {json.dumps(notification)}\n\n"
+                for step in range(1, progress_steps + 1):
+                    await asyncio.sleep(latency_ms / 1000 / progress_steps)
+                    notification = {
+                        "jsonrpc": "2.0",
+                        "method": "notifications/progress",
+                        "params": {
+                            "progressToken": progress_token,
+                            "progress": step,
+                            "total": progress_steps,
+                            "message": f"{text} ({step}/{progress_steps})",
+                        },
+                    }
+                    yield f"data: {json.dumps(notification)}\n\n"
+                final = reply(request_id, {"content": [{"type": "text", "text": text}]})
+                yield f"data: {json.dumps(final)}\n\n"
+            finally:
+                app.state.in_flight -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.delete("/mcp")
+    async def end_session(request: Request):
+        app.state.sessions.discard(request.headers.get(SESSION_HEADER))
+        return Response(status_code=204)
+
+    return app
+
+
+class StubServer(LocalServer):
+    """Run the stub MCP server on a background thread"""
+
+    def __init__(self, port: int = 8765, **app_kwargs):
+        super().__init__(create_app(**app_kwargs), port)
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/mcp"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--tools", type=int, default=10)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms, args.tools), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
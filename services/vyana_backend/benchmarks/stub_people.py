@@ -0,0 +1,193 @@
+"""
+In-memory Google People API stand-in for benchmarks and tests.
+
+FakePeopleHttp replaces the httplib2 transport of a real googleapiclient
+People service (built from the bundled discovery document), like
+stub_gmail does for Gmail. It serves people.connections.list
+(pageSize/pageToken, requestSyncToken/syncToken with deleted-person
+tombstones), searchContacts, people.get, createContact, updateContact,
+deleteContact and contactGroups.members.modify (starred), with an optional
+per-round-trip latency, and records every round-trip.
+expire_sync_tokens() makes old tokens fail like Google does.
+"""
+import json
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+import httplib2
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+STARRED = "contactGroups/starred"
+
+FIRST_NAMES = ["Asha", "Ravi", "Priya", "Arjun", "Meera", "Karthik", "Divya", "Suresh", "Anita", "Vikram",
+               "Lakshmi", "Rahul", "Sneha", "Aditya", "Kavya", "Rohan", "Pooja", "Naveen", "Deepa", "Sanjay"]
+LAST_NAMES = ["Rao", "Kumar", "Nair", "Sharma", "Iyer", "Reddy", "Menon", "Gupta", "Pillai", "Singh",
+              "Krishnan", "Patel", "Das", "Joshi", "Verma", "Bose", "Mehta", "Chopra", "Shetty", "Kapoor"]
+
+
+def make_person(index: int, name: str, email: Optional[str] = None, phone: Optional[str] = None,
+                company: Optional[str] = None, starred: bool = False) -> dict:
+    """A People API person resource"""
+    person = {
+        "resourceName": f"people/c{index}",
+        "etag": f"%e{index}",
+        "names": [{"displayName": name, "givenName": name.split(" ")[0]}],
+    }
+    if email:
+        person["emailAddresses"] = [{"value": email}]
+    if phone:
+        person["phoneNumbers"] = [{"value": phone}]
+    if company:
+        person["organizations"] = [{"name": company}]
+    if starred:
+        person["memberships"] = [{"contactGroupMembership": {"contactGroupResourceName": STARRED}}]
+    return person
+
+
+def synthetic_contacts(count: int, seed: int = 3) -> List[dict]:
+    """A reproducible address book of `count` people"""
+    rng = random.Random(seed)
+    people = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        name = f"{first} {last}" if i < len(FIRST_NAMES) * len(LAST_NAMES) else f"{first} {last} {i}"
+        people.append(make_person(
+            i, name, email=f"{first.lower()}.{last.lower()}{i}@example.com",
+            phone=f"+91 9{rng.randrange(10**8, 10**9)}", starred=rng.random() < 0.05,
+        ))
+    return people
+
+
+class FakePeopleHttp:
+    """httplib2.Http stand-in serving an in-memory address book"""
+
+    def __init__(self, people: Optional[List[dict]] = None, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.requests: List[Tuple[str, str]] = []  # (method, path) per round-trip
+        self._lock = threading.Lock()
+        self.seq = 0
+        self.oldest_sync_seq = 0
+        self.next_id = 10_000
+        # resource name -> (seq of last change, person); deleted people are kept as tombstones
+        self.people: Dict[str, Tuple[int, dict]] = {}
+        for person in people or []:
+            self._store(person)
+
+    # --- address book changes ---
+
+    def _store(self, person: dict):
+        self.seq += 1
+        self.people[person["resourceName"]] = (self.seq, person)
+
+    def put_person(self, person: dict):
+        """Create or replace a person (as if changed in another client)"""
+        with self._lock:
+            self._store(person)
+
+    def remove_person(self, resource_name: str):
+        with self._lock:
+            self._store({"resourceName": resource_name, "metadata": {"deleted": True}})
+
+    def expire_sync_tokens(self):
+        self.oldest_sync_seq = self.seq + 1
+
+    def live(self) -> List[dict]:
+        return [p for _, p in self.people.values() if not p.get("metadata", {}).get("deleted")]
+
+    # --- httplib2 interface ---
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        parsed = urlparse(uri)
+        with self._lock:
+            self.requests.append((method, parsed.path))
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            status, payload = self._route(method, unquote(parsed.path), parse_qs(parsed.query),
+                                          json.loads(body) if body else None)
+        return httplib2.Response({"status": status, "content-type": "application/json"}), json.dumps(payload).encode()
+
+    # --- API ---
+
+    @staticmethod
+    def _error(status: int, message: str, reason: str = "") -> Tuple[int, dict]:
+        error = {"code": status, "message": message}
+        if reason:
+            error["status"] = "FAILED_PRECONDITION"
+            error["details"] = [{"reason": reason}]
+        return status, {"error": error}
+
+    def _route(self, method: str, path: str, query: Dict[str, List[str]], body: Optional[dict]) -> Tuple[int, dict]:
+        if method == "GET" and path == "/v1/people/me/connections":
+            return self._connections(query)
+        if method == "GET" and path == "/v1/people:searchContacts":
+            text = query["query"][0].lower()
+            hits = [p for p in self.live() if any(
+                w.startswith(text) for w in p["names"][0]["displayName"].lower().split()
+            )]
+            size = int((query.get("pageSize") or ["10"])[0])
+            return 200, {"results": [{"person": p} for p in hits[:size]]}
+        if method == "POST" and path == "/v1/people:createContact":
+            self.next_id += 1
+            person = dict(body, resourceName=f"people/c{self.next_id}", etag=f"%e{self.next_id}")
+            person["names"] = [dict(n, displayName=n.get("displayName") or n.get("givenName", "")) for n in body["names"]]
+            self._store(person)
+            return 200, person
+        if method == "POST" and path == f"/v1/{STARRED}/members:modify":
+            for resource_name in body.get("resourceNamesToAdd", []) + body.get("resourceNamesToRemove", []):
+                person = dict(self.people[resource_name][1])
+                others = [m for m in person.get("memberships", [])
+                          if m["contactGroupMembership"]["contactGroupResourceName"] != STARRED]
+                if resource_name in body.get("resourceNamesToAdd", []):
+                    others.append({"contactGroupMembership": {"contactGroupResourceName": STARRED}})
+                person["memberships"] = others
+                self._store(person)
+            return 200, {}
+
+        resource_name, _, action = path[len("/v1/"):].partition(":")
+        current = self.people.get(resource_name)
+        if current is None or current[1].get("metadata", {}).get("deleted"):
+            return self._error(404, "Requested entity was not found.")
+        if method == "GET" and not action:
+            return 200, current[1]
+        if method == "PATCH" and action == "updateContact":
+            person = dict(current[1])
+            for field in query["updatePersonFields"][0].split(","):
+                person[field] = body.get(field, [])
+            if "names" in body:
+                person["names"] = [dict(n, displayName=n.get("displayName") or n.get("givenName", "")) for n in body["names"]]
+            self._store(person)
+            return 200, person
+        if method == "DELETE" and action == "deleteContact":
+            self._store({"resourceName": resource_name, "metadata": {"deleted": True}})
+            return 200, {}
+        return self._error(404, f"Unsupported {method} {path}")
+
+    def _connections(self, query: Dict[str, List[str]]) -> Tuple[int, dict]:
+        sync_token = (query.get("syncToken") or [None])[0]
+        if sync_token is not None:
+            if int(sync_token) < self.oldest_sync_seq:
+                return self._error(400, "Sync token is expired. Clear local cache and retry call without the sync token.",
+                                   reason="EXPIRED_SYNC_TOKEN")
+            matches = [p for seq, p in self.people.values() if seq > int(sync_token)]
+        else:
+            matches = sorted(self.live(), key=lambda p: p["names"][0]["displayName"].lower())
+        offset = int((query.get("pageToken") or ["0"])[0])
+        size = int((query.get("pageSize") or ["100"])[0])
+        page = matches[offset:offset + size]
+        result = {"connections": page, "totalPeople": len(matches), "totalItems": len(matches)}
+        if offset + size < len(matches):
+            result["nextPageToken"] = str(offset + size)
+        elif (query.get("requestSyncToken") or ["false"])[0] == "true" or sync_token is not None:
+            result["nextSyncToken"] = str(self.seq)
+        return 200, result
+
+
+def build_service(http: FakePeopleHttp):
+    """A real People API client bound to the fake transport"""
+    document = json.loads(discovery_cache.get_static_doc("people", "v1"))
+    return build_from_document(document, http=http)
@@ -0,0 +1,181 @@
+"""
+In-memory Redis stand-in for benchmarks and tests.
+
+FakeRedisServer holds the keyspace and pub/sub subscribers shared by every
+FakeRedis client made from it (one client per simulated worker). Clients
+implement the slice of the redis.asyncio API CacheService uses: ping, get,
+pttl, setex, delete, publish, scan_iter, info, dbsize, pipeline and pubsub,
+with an optional per-round-trip latency. go_down() makes every call fail
+and drops subscribers, like a Redis outage does; come_back() ends it.
+"""
+import asyncio
+import fnmatch
+import time
+from typing import Dict, List, Optional, Tuple
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+_DOWN = object()
+
+
+class FakeRedisServer:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.data: Dict[str, Tuple[str, Optional[float]]] = {}  # key -> (value, expires at)
+        self.subscribers: List["FakePubSub"] = []
+        self.round_trips = 0
+        self.hits = self.misses = 0
+        self.down = False
+
+    def client(self) -> "FakeRedis":
+        return FakeRedis(self)
+
+    def go_down(self):
+        self.down = True
+        for pubsub in self.subscribers:
+            pubsub.queue.put_nowait(_DOWN)
+        self.subscribers.clear()
+
+    def come_back(self):
+        self.down = False
+
+    # --- commands (no round-trip accounting) ---
+
+    def _live(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        entry = self.data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._live(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def pttl(self, key: str) -> int:
+        entry = self._live(key)
+        if entry is None:
+            return -2
+        return -1 if entry[1] is None else int((entry[1] - time.monotonic()) * 1000)
+
+    def setex(self, key: str, ttl: int, value: str) -> bool:
+        self.data[key] = (value, time.monotonic() + ttl)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def publish(self, channel: str, message: str) -> int:
+        receivers = [p for p in self.subscribers if channel in p.channels]
+        for pubsub in receivers:
+            pubsub.queue.put_nowait({"type": "message", "channel": channel, "data": message})
+        return len(receivers)
+
+
+class FakeRedis:
+    """redis.asyncio.Redis stand-in bound to a FakeRedisServer"""
+
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+
+    async def _round_trip(self):
+        self.server.round_trips += 1
+        if self.server.latency:
+            await asyncio.sleep(self.server.latency)
+        if self.server.down:
+            raise RedisConnectionError("Connection refused")
+
+    async def ping(self) -> bool:
+        await self._round_trip()
+        return True
+
+    async def get(self, key: str) -> Optional[str]:
+        await self._round_trip()
+        return self.server.get(key)
+
+    async def pttl(self, key: str) -> int:
+        await self._round_trip()
+        return self.server.pttl(key)
+
+    async def setex(self, key: str, ttl: int, value: str) -> bool:
+        await self._round_trip()
+        return self.server.setex(key, ttl, value)
+
+    async def delete(self, *keys: str) -> int:
+        await self._round_trip()
+        return self.server.delete(*keys)
+
+    async def publish(self, channel: str, message: str) -> int:
+        await self._round_trip()
+        return self.server.publish(channel, message)
+
+    async def scan_iter(self, pattern: str):
+        await self._round_trip()
+        for key in [k for k in self.server.data if fnmatch.fnmatchcase(k, pattern)]:
+            yield key
+
+    async def info(self, section: str) -> dict:
+        await self._round_trip()
+        if section == "memory":
+            return {"used_memory_human": f"{sum(len(v) for v, _ in self.server.data.values()) / 1024:.2f}K"}
+        return {"keyspace_hits": self.server.hits, "keyspace_misses": self.server.misses}
+
+    async def dbsize(self) -> int:
+        await self._round_trip()
+        return len(self.server.data)
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    def pubsub(self) -> "FakePubSub":
+        return FakePubSub(self)
+
+    async def close(self):
+        pass
+
+    aclose = close
+
+
+class FakePipeline:
+    """Queues commands and runs them in one round-trip"""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.commands: List[Tuple[str, tuple]] = []
+
+    def __getattr__(self, name: str):
+        def queue(*args):
+            self.commands.append((name, args))
+            return self
+        return queue
+
+    async def execute(self) -> list:
+        await self.client._round_trip()
+        return [getattr(self.client.server, name)(*args) for name, args in self.commands]
+
+
+class FakePubSub:
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.channels = set()
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, *channels: str):
+        await self.client._round_trip()
+        self.channels.update(channels)
+        self.client.server.subscribers.append(self)
+
+    async def listen(self):
+        while True:
+            message = await self.queue.get()
+            if message is _DOWN:
+                raise RedisConnectionError("Connection closed by server.")
+            yield message
+
+    async def aclose(self):
+        if self in self.client.server.subscribers:
+            self.client.server.subscribers.remove(self)
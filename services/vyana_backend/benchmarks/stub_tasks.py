@@ -0,0 +1,276 @@
+"""
+In-memory Google Tasks API stand-in for benchmarks and tests.
+
+FakeTasksHttp replaces the httplib2 transport of a real googleapiclient
+Tasks service (built from the bundled discovery document), like stub_gmail
+does for Gmail. It serves tasklists.list and tasks.list (maxResults/
+pageToken, showCompleted/showHidden/showDeleted, updatedMin), get, insert,
+patch, update, delete, move, clear and multipart batch requests, with an
+optional per-round-trip latency, and records every round-trip. Deleted
+tasks are kept as tombstones so updatedMin polling sees them. fail_next()
+makes the next round-trips fail like an outage does.
+"""
+import datetime
+import json
+import random
+import re
+import threading
+import time
+from email.parser import Parser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+import httplib2
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+DEFAULT_LIST = "MDAwMDAwMDAwMDAwMDAwMQ"
+LISTS_PREFIX = "/tasks/v1/users/@me/lists"
+TASKS_PREFIX = "/tasks/v1/lists/"
+
+VERBS = ["Call", "Pay", "Book", "Renew", "Email", "Buy", "Fix", "Schedule", "Review", "Send", "Clean", "Plan"]
+OBJECTS = ["plumber", "electricity bill", "flight", "passport", "landlord", "groceries", "bike service",
+           "dentist", "quarterly report", "invoice", "garage", "trip", "insurance", "laptop", "mortgage"]
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def make_task(index: int, title: str, status: str = "needsAction", due: Optional[str] = None,
+              notes: Optional[str] = None, parent: Optional[str] = None) -> dict:
+    """A Tasks API task resource"""
+    task = {
+        "kind": "tasks#task",
+        "id": f"t{index:06d}",
+        "etag": f'"e{index}"',
+        "title": title,
+        "status": status,
+        "position": f"{10**10 + index * 1000:020d}",
+        "updated": _now(),
+    }
+    if status == "completed":
+        task["completed"] = task["updated"]
+    if due:
+        task["due"] = f"{due}T00:00:00.000Z"
+    if notes:
+        task["notes"] = notes
+    if parent:
+        task["parent"] = parent
+    return task
+
+
+def synthetic_tasks(count: int, completed_share: float = 0.5, seed: int = 7) -> List[dict]:
+    """A reproducible task list of `count` tasks, last changed over the past month"""
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    tasks = []
+    for i in range(count):
+        task = make_task(i, f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {i}",
+                         status="completed" if rng.random() < completed_share else "needsAction",
+                         due=f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" if rng.random() < 0.5 else None)
+        updated = now - datetime.timedelta(days=1 + rng.random() * 29)
+        task["updated"] = updated.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        if "completed" in task:
+            task["completed"] = task["updated"]
+        tasks.append(task)
+    return tasks
+
+
+class FakeTasksHttp:
+    """httplib2.Http stand-in serving in-memory task lists"""
+
+    def __init__(self, tasks: Optional[List[dict]] = None, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.requests: List[Tuple[str, str]] = []  # (method, path) per round-trip
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.next_id = 100_000
+        # list id -> {"title": ..., "tasks": {task id -> task}}; deleted tasks stay as tombstones
+        self.lists: Dict[str, dict] = {DEFAULT_LIST: {"title": "My Tasks", "tasks": {}}}
+        for task in tasks or []:
+            self.lists[DEFAULT_LIST]["tasks"][task["id"]] = dict(task)
+
+    # --- task list changes ---
+
+    def put_task(self, task: dict, task_list: str = DEFAULT_LIST):
+        """Create or replace a task (as if changed in another client)"""
+        with self._lock:
+            self.lists[task_list]["tasks"][task["id"]] = dict(task, updated=_now())
+
+    def add_list(self, list_id: str, title: str):
+        with self._lock:
+            self.lists[list_id] = {"title": title, "tasks": {}}
+
+    def live(self, task_list: str = DEFAULT_LIST) -> List[dict]:
+        return [t for t in self.lists[task_list]["tasks"].values() if not t.get("deleted")]
+
+    def fail_next(self, count: int = 1):
+        """Answer the next `count` round-trips with 503"""
+        self.failures = count
+
+    # --- httplib2 interface ---
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        parsed = urlparse(uri)
+        with self._lock:
+            self.requests.append((method, unquote(parsed.path)))
+            failing = self.failures > 0
+            self.failures -= failing
+        if self.latency:
+            time.sleep(self.latency)
+        if failing:
+            payload = {"error": {"code": 503, "message": "Backend Error"}}
+            return httplib2.Response({"status": 503, "content-type": "application/json"}), json.dumps(payload).encode()
+        if parsed.path == "/batch":
+            return self._batch(body, headers or {})
+        with self._lock:
+            status, payload = self._route(method, unquote(parsed.path), parse_qs(parsed.query),
+                                          json.loads(body) if body else None)
+        content = json.dumps(payload).encode() if payload is not None else b""
+        return httplib2.Response({"status": status, "content-type": "application/json"}), content
+
+    # --- API ---
+
+    @staticmethod
+    def _error(status: int, message: str) -> Tuple[int, dict]:
+        return status, {"error": {"code": status, "message": message}}
+
+    def _resolve(self, list_id: str) -> Optional[dict]:
+        return self.lists.get(DEFAULT_LIST if list_id == "@default" else list_id)
+
+    def _route(self, method: str, path: str, query: Dict[str, List[str]],
+               body: Optional[dict]) -> Tuple[int, Optional[dict]]:
+        if method == "GET" and path == LISTS_PREFIX:
+            items = [{"kind": "tasks#taskList", "id": list_id, "title": tl["title"], "updated": _now()}
+                     for list_id, tl in self.lists.items()]
+            return 200, {"kind": "tasks#taskLists", "items": items}
+        if not path.startswith(TASKS_PREFIX):
+            return self._error(404, f"Unsupported {method} {path}")
+
+        list_id, _, rest = path[len(TASKS_PREFIX):].partition("/")
+        task_list = self._resolve(list_id)
+        if task_list is None:
+            return self._error(404, "Task list not found.")
+        tasks = task_list["tasks"]
+        if method == "POST" and rest == "clear":
+            for task in tasks.values():
+                if task.get("status") == "completed" and not task.get("deleted"):
+                    task.update(hidden=True, updated=_now())
+            return 204, None
+        if method == "GET" and rest == "tasks":
+            return 200, self._list(tasks, query)
+        if method == "POST" and rest == "tasks":
+            return 200, self._insert(tasks, body, query)
+
+        task_id, _, action = rest[len("tasks/"):].partition("/")
+        task = tasks.get(task_id)
+        if task is None or task.get("deleted"):
+            return self._error(404, "Task not found.")
+        if method == "GET":
+            return 200, task
+        if method in ("PATCH", "PUT"):
+            if method == "PUT":
+                task = {k: v for k, v in task.items() if k in ("kind", "id", "etag", "position", "parent")}
+            task = dict(task, **{k: v for k, v in body.items() if k not in ("id", "kind")})
+            self._apply_status(task, body)
+            tasks[task_id] = task
+            return 200, task
+        if method == "DELETE":
+            tasks[task_id] = {"kind": "tasks#task", "id": task_id, "deleted": True, "updated": _now()}
+            return 204, None
+        if method == "POST" and action == "move":
+            task.pop("parent", None)
+            if query.get("parent"):
+                task["parent"] = query["parent"][0]
+            task.update(position=self._position(tasks, task.get("parent"), (query.get("previous") or [None])[0]),
+                        updated=_now())
+            return 200, task
+        return self._error(404, f"Unsupported {method} {path}")
+
+    def _insert(self, tasks: Dict[str, dict], body: dict, query: Dict[str, List[str]]) -> dict:
+        self.next_id += 1
+        parent = (query.get("parent") or [None])[0]
+        task = dict(body, kind="tasks#task", id=f"t{self.next_id:06d}", etag=f'"e{self.next_id}"')
+        task.setdefault("status", "needsAction")
+        if parent:
+            task["parent"] = parent
+        task["position"] = self._position(tasks, parent, (query.get("previous") or [None])[0])
+        self._apply_status(task, body)
+        tasks[task["id"]] = task
+        return task
+
+    @staticmethod
+    def _apply_status(task: dict, body: dict):
+        """Google sets and clears the completion time along with the status"""
+        task["updated"] = _now()
+        if task.get("status") == "completed":
+            task.setdefault("completed", task["updated"])
+            if task["completed"] is None:
+                task["completed"] = task["updated"]
+        else:
+            task.pop("completed", None)
+        for key, value in list(body.items()):
+            if value is None:
+                task.pop(key, None)
+
+    @staticmethod
+    def _position(tasks: Dict[str, dict], parent: Optional[str], previous: Optional[str]) -> str:
+        """Right after `previous`, or first among the parent's children"""
+        siblings = [int(t["position"]) for t in tasks.values() if not t.get("deleted") and t.get("parent") == parent]
+        if previous and previous in tasks:
+            return f"{int(tasks[previous]['position']) + 1:020d}"
+        return f"{(min(siblings) if siblings else 10**10) - 1:020d}"
+
+    @staticmethod
+    def _list(tasks: Dict[str, dict], query: Dict[str, List[str]]) -> dict:
+        def flag(name: str, default: bool) -> bool:
+            return (query.get(name) or [str(default).lower()])[0] == "true"
+
+        show_completed, show_hidden, show_deleted = flag("showCompleted", True), flag("showHidden", False), flag("showDeleted", False)
+        updated_min = (query.get("updatedMin") or [None])[0]
+        matches = [
+            t for t in tasks.values()
+            if (show_deleted or not t.get("deleted"))
+            and (show_hidden or not t.get("hidden"))
+            and (show_completed or t.get("status") != "completed")
+            and (updated_min is None or t["updated"] >= updated_min)
+        ]
+        matches.sort(key=lambda t: t.get("position", ""))
+        offset = int((query.get("pageToken") or ["0"])[0])
+        size = min(int((query.get("maxResults") or ["20"])[0]), 100)
+        result = {"kind": "tasks#tasks", "items": matches[offset:offset + size]}
+        if offset + size < len(matches):
+            result["nextPageToken"] = str(offset + size)
+        return result
+
+    # --- batch ---
+
+    def _batch(self, body: str, headers: dict) -> Tuple[httplib2.Response, bytes]:
+        envelope = Parser().parsestr(f"content-type: {headers['content-type']}\r\n\r\n{body}")
+        boundary = "batch_stub_boundary"
+        parts = []
+        for part in envelope.get_payload():
+            head, _, part_body = re.split(r"(\r?\n\r?\n)", part.get_payload(), maxsplit=1)
+            method, target = head.splitlines()[0].split(" ")[:2]
+            parsed = urlparse(target)
+            with self._lock:
+                status, payload = self._route(method, unquote(parsed.path), parse_qs(parsed.query),
+                                              json.loads(part_body) if part_body.strip() else None)
+            content = f"Content-Type: application/json; charset=UTF-8\r\n\r\n{json.dumps(payload)}" if payload else "Content-Length: 0\r\n\r\n"
+            parts.append(
+                f"--{boundary}\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'][1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}\r\n"
+                f"{content}\r\n"
+            )
+        content = "".join(parts) + f"--{boundary}--\r\n"
+        response = httplib2.Response({"status": 200, "content-type": f"multipart/mixed; boundary={boundary}"})
+        return response, content.encode()
+
+
+def build_service(http: FakeTasksHttp):
+    """A real Tasks API client bound to the fake transport"""
+    document = json.loads(discovery_cache.get_static_doc("tasks", "v1"))
+    return build_from_document(document, http=http)
@@ -31,3 +31,75 @@ def test_client():
     from app.main import app
     
     return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.fixture
+def scripted_model():
+    """Factory for a fake chat model that calls tools once, then answers."""
+    import asyncio
+    import time
+    from typing import Any, List
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, ToolMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class ScriptedChatModel(BaseChatModel):
+        tool_calls: List[dict] = []
+        answer: str = "All done."
+        latency: float = 0.0
+
+        @property
+        def _llm_type(self) -> str:
+            return "scripted"
+
+        def bind_tools(self, tools: Any, **kwargs: Any):
+            return self
+
+        def _reply(self, messages) -> ChatResult:
+            if self.tool_calls and not isinstance(messages[-1], ToolMessage):
+                calls = [
+                    {"name": tc["name"], "args": tc.get("args", {}), "id": f"call_{i}"}
+                    for i, tc in enumerate(self.tool_calls)
+                ]
+                message = AIMessage(content="", tool_calls=calls)
+            else:
+                message = AIMessage(content=self.answer)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            time.sleep(self.latency)
+            return self._reply(messages)
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            await asyncio.sleep(self.latency)
+            return self._reply(messages)
+
+    return ScriptedChatModel
+
+
+@pytest.fixture
+def mirrored_google(monkeypatch, tmp_path):
+    """
+    Factory for a Google service running against a stub API transport, with
+    its local mirror enabled and backed by a temporary database.
+
+    `module` is the service module holding the mirror as `mirror_name`;
+    `getters` are (object, attribute) pairs patched to return the stub service
+    and `settings` are set on module.settings. When `sync` is given (the key
+    arguments of mirror.sync, () for a whole-mirror sync) the mirror is synced
+    and the stub's request log cleared. Returns (http, service, mirror).
+    """
+    def make(module, mirror_name, mirror_class, http, build_service, getters, settings=None, sync=None):
+        service = build_service(http)
+        mirror = mirror_class(db_path=str(tmp_path / f"{mirror_name}.db"))
+        for owner, attribute in getters:
+            monkeypatch.setattr(owner, attribute, lambda: service)
+        monkeypatch.setattr(module, mirror_name, mirror)
+        for name, value in (settings or {}).items():
+            monkeypatch.setattr(module.settings, name, value)
+        if sync is not None:
+            mirror.sync(*sync, service)
+            http.requests.clear()
+        return http, service, mirror
+
+    return make
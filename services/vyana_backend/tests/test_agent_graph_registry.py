@@ -0,0 +1,43 @@
+"""
+Tests for compiled agent graph caching in DeepSeekClient.
+"""
+import pytest
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "sk-test")
+    from app.services.deepseek_client import DeepSeekClient
+    return DeepSeekClient()
+
+
+class TestAgentGraphRegistry:
+    """Graphs are reused across requests and rebuilt only when needed."""
+
+    def test_graph_reused_for_same_settings(self, client):
+        first = client.get_agent_graph(tools_enabled=True, mcp_enabled=True)
+        second = client.get_agent_graph(tools_enabled=True, mcp_enabled=True)
+        assert first is second
+        assert client._graph_registry.stats()["misses"] == 1
+
+    def test_graph_per_model_and_toggles(self, client):
+        default = client.get_agent_graph(tools_enabled=True, mcp_enabled=True)
+        no_tools = client.get_agent_graph(tools_enabled=False, mcp_enabled=True)
+        reasoner = client.get_agent_graph(tools_enabled=True, mcp_enabled=True, model_name="deepseek-reasoner")
+        assert default is not no_tools
+        assert default is not reasoner
+        assert client._graph_registry.stats()["graphs"] == 3
+
+    @pytest.mark.asyncio
+    async def test_mcp_disconnect_invalidates_graph(self, client):
+        from app.services.mcp_service import mcp_service, MCPConnection, MCPConnectionStatus
+
+        before = client.get_agent_graph(tools_enabled=True, mcp_enabled=True)
+        mcp_service.connections["stub"] = MCPConnection(
+            name="stub", display_name="Stub", url="http://stub", status=MCPConnectionStatus.CONNECTED
+        )
+        await mcp_service.disconnect("stub")
+
+        after = client.get_agent_graph(tools_enabled=True, mcp_enabled=True)
+        assert after is not before
+        assert client._graph_registry.stats()["graphs"] == 1
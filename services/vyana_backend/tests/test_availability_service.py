@@ -0,0 +1,156 @@
+"""
+Tests for free/busy merging and slot finding
+"""
+import datetime
+import json
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.services import calendar_service as calendar_module
+from app.services.availability_service import availability_service, merge_intervals, subtract_intervals
+from app.services.calendar_service import calendar_service
+from app.services.calendar_store import CalendarStore
+from benchmarks.stub_calendar import FakeCalendarHttp, build_service, make_event
+
+IST = ZoneInfo("Asia/Kolkata")
+
+
+def _monday(hour: int = 0, minute: int = 0, weeks: int = 1) -> datetime.datetime:
+    """A Monday in the near future, at the given IST time"""
+    today = datetime.datetime.now(IST).replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return today + datetime.timedelta(days=7 * weeks - today.weekday())
+
+
+def _calendars():
+    return {
+        "primary": [
+            make_event("standup", "Standup", _monday(9, 30), minutes=15),
+            make_event("review", "Review", _monday(10, 30), minutes=60),
+            make_event("lunch", "Lunch", _monday(13), minutes=60),
+            make_event("holiday", "Holiday", _monday(0), all_day=True, minutes=1440, transparency="transparent"),
+            make_event("declined", "Optional sync", _monday(14), minutes=60,
+                       attendees=[{"email": "me@example.com", "self": True, "responseStatus": "declined"}]),
+        ],
+        "team@example.com": [
+            make_event("planning", "Planning", _monday(11), minutes=90),  # overlaps review
+            make_event("demo", "Demo", _monday(16), minutes=120),
+        ],
+    }
+
+
+@pytest.fixture
+def calendars(monkeypatch):
+    http = FakeCalendarHttp(_calendars())
+    service = build_service(http)
+    monkeypatch.setattr(calendar_service, "_get_google_service", lambda: service)
+    monkeypatch.setattr(calendar_service, "_selected_ids", None)
+    monkeypatch.setattr(calendar_module.settings, "CALENDAR_STORE_ENABLED", False)
+    return http, service
+
+
+def _hhmm(periods):
+    return [(datetime.datetime.fromisoformat(p["start"]).strftime("%H:%M"),
+             datetime.datetime.fromisoformat(p["end"]).strftime("%H:%M")) for p in periods]
+
+
+class TestIntervals:
+    def test_merge_joins_overlapping_and_touching(self):
+        assert merge_intervals([(5, 7), (1, 3), (2, 4), (4, 5), (9, 10), (8, 8)]) == [(1, 7), (9, 10)]
+
+    def test_subtract(self):
+        assert subtract_intervals((0, 10), [(-2, 1), (3, 4), (8, 12)]) == [(1, 3), (4, 8)]
+        assert subtract_intervals((0, 10), []) == [(0, 10)]
+
+
+class TestFreeBusy:
+    """Busy periods merged across calendars, from freeBusy or the local store"""
+
+    EXPECTED_BUSY = [("09:30", "09:45"), ("10:30", "12:30"), ("13:00", "14:00"), ("16:00", "18:00")]
+
+    def test_freebusy_across_calendars(self, calendars):
+        http, _ = calendars
+        day = _monday().date().isoformat()
+
+        result = availability_service.free_busy(*calendar_service.day_range(day))
+
+        assert _hhmm(result["busy"]) == self.EXPECTED_BUSY
+        assert _hhmm(result["free"])[:2] == [("00:00", "09:30"), ("09:45", "10:30")]
+        # One freeBusy query covers every calendar
+        assert http.requests.count(("POST", "/calendar/v3/freeBusy")) == 1
+
+    def test_local_store_matches_freebusy(self, calendars, mirrored_google):
+        http, service, store = mirrored_google(
+            calendar_module, "calendar_store", CalendarStore, calendars[0], build_service,
+            getters=[(calendar_service, "_get_google_service")],
+            settings={"CALENDAR_STORE_ENABLED": True, "CALENDAR_SYNC_INTERVAL": 3600.0},
+        )
+        for calendar_id in ("primary", "team@example.com"):
+            store.sync(calendar_id, service)
+        http.requests.clear()
+
+        result = availability_service.free_busy(*calendar_service.day_range(_monday().date().isoformat()))
+
+        # Transparent and declined events are free, as freeBusy reports them
+        assert _hhmm(result["busy"]) == self.EXPECTED_BUSY
+        assert ("POST", "/calendar/v3/freeBusy") not in http.requests
+
+    def test_working_hours_only(self, calendars):
+        day = _monday().date().isoformat()
+
+        result = availability_service.free_busy(*calendar_service.day_range(day), working_hours_only=True)
+
+        assert _hhmm(result["free"]) == [("09:00", "09:30"), ("09:45", "10:30"), ("12:30", "13:00"), ("14:00", "16:00")]
+
+
+class TestSlots:
+    def test_earliest_slots_inside_working_hours(self, calendars):
+        slots = availability_service.find_slots(60, count=3, days=1, start=_monday(0))
+
+        assert _hhmm(slots) == [("14:00", "15:00"), ("15:00", "16:00")]
+
+    def test_slots_aligned_and_spill_to_next_working_day(self, calendars):
+        slots = availability_service.find_slots(30, count=6, days=7, start=_monday(9, 5))
+
+        assert _hhmm(slots) == [("09:45", "10:15"), ("12:30", "13:00"), ("14:00", "14:30"),
+                                ("14:30", "15:00"), ("15:00", "15:30"), ("15:30", "16:00")]
+
+    def test_weekend_skipped(self, calendars):
+        friday_evening = _monday(17, 30) - datetime.timedelta(days=3)
+
+        slots = availability_service.find_slots(30, count=2, days=4, start=friday_evening)
+
+        assert datetime.datetime.fromisoformat(slots[0]["start"]) == friday_evening
+        assert datetime.datetime.fromisoformat(slots[1]["start"]) == _monday(9)
+
+    def test_tool(self, calendars):
+        from app.services.langgraph_tools import find_free_slots
+
+        result = json.loads(find_free_slots.invoke({"duration_minutes": 120, "count": 1,
+                                                    "start_date": _monday().date().isoformat()}))
+
+        assert _hhmm(result["slots"]) == [("14:00", "16:00")]
+
+    @pytest.mark.asyncio
+    async def test_routes(self, calendars, test_client):
+        response = await test_client.get("/calendar/free-slots", params={
+            "duration": 45, "count": 1, "start": _monday(12).isoformat(),
+        })
+        assert _hhmm(response.json()["slots"]) == [("14:00", "14:45")]
+
+        response = await test_client.get("/calendar/free-busy", params={"date": _monday().date().isoformat(),
+                                                                         "calendars": "team@example.com"})
+        assert _hhmm(response.json()["busy"]) == [("11:00", "12:30"), ("16:00", "18:00")]
+
+    @pytest.mark.asyncio
+    async def test_routes_reject_bad_input(self, calendars, test_client):
+        for params in ({"duration": 0}, {"count": -1}, {"days": 10_000}):
+            response = await test_client.get("/calendar/free-slots", params=params)
+            assert response.status_code == 422
+
+        response = await test_client.get("/calendar/free-slots", params={"start": "next tuesday"})
+        assert response.status_code == 200 and "Invalid start" in response.json()["error"]
+        response = await test_client.get("/calendar/free-busy", params={"date": "2024-13-45"})
+        assert response.status_code == 200 and "Invalid date" in response.json()["error"]
+        with pytest.raises(ValueError):
+            availability_service.find_slots(0)
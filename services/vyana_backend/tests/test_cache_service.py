@@ -0,0 +1,230 @@
+"""
+Tests for the response cache: in-process L1, Redis, and the semantic chat tier
+"""
+import asyncio
+
+import pytest
+
+from app.services import cache_service as cache_module
+from app.services import semantic_cache as semantic_module
+from app.services.cache_service import CacheService
+from app.services.local_cache import LocalCache
+from app.services.semantic_cache import SemanticCache
+from benchmarks.stub_redis import FakeRedisServer
+
+ANSWER = "Paris is the capital of France."
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(threshold=0.9, max_entries=3)
+
+
+class TestSemanticCache:
+    """Near-duplicate lookup, expiry, eviction and metrics"""
+
+    def test_paraphrase_hits(self, cache):
+        cache.set("deepseek-chat", "What is the capital of France?", ANSWER, ttl=60)
+
+        assert cache.get("deepseek-chat", "what's the capital of france") == ANSWER
+        assert cache.get("deepseek-chat", "Can you tell me what the capital of France is?") == ANSWER
+
+    def test_different_question_misses(self, cache):
+        cache.set("deepseek-chat", "What is the capital of France?", ANSWER, ttl=60)
+        cache.set("deepseek-chat", "what is 2+2", "2 + 2 = 4, of course.", ttl=60)
+
+        assert cache.get("deepseek-chat", "What is the capital of Spain?") is None
+        assert cache.get("deepseek-chat", "what is 2+3") is None
+        assert cache.get("deepseek-reasoner", "what is the capital of france") is None  # other model
+
+    @pytest.mark.parametrize("cached, asked", [
+        ("Convert celsius to fahrenheit", "Convert fahrenheit to celsius"),
+        ("How far is Chennai from Bangalore", "How far is Bangalore from Chennai"),
+        ("Is it safe to eat raw chicken", "Is it not safe to eat raw chicken"),
+        ("Why can't I sleep after coffee", "Why can I sleep after coffee"),
+    ])
+    def test_reversed_or_negated_question_misses(self, cache, cached, asked):
+        cache.set("deepseek-chat", cached, "cached answer", ttl=60)
+
+        assert cache.get("deepseek-chat", asked) is None
+        assert cache.get("deepseek-chat", cached.lower() + "?") == "cached answer"
+
+    def test_ttl_and_lru(self, cache, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr(semantic_module.time, "monotonic", lambda: clock[0])
+        cache.set("m", "capital of France", ANSWER, ttl=60)
+        cache.set("m", "capital of Italy", "Rome.", ttl=600)
+        cache.set("m", "capital of Japan", "Tokyo.", ttl=600)
+        assert cache.get("m", "capital of france?") == ANSWER  # now most recently used
+
+        cache.set("m", "capital of Peru", "Lima.", ttl=600)  # evicts Italy
+        clock[0] += 120
+
+        assert cache.get("m", "capital of italy") is None
+        assert cache.get("m", "capital of france") is None  # expired
+        assert cache.get("m", "capital of japan") == "Tokyo."
+        assert cache.stats() == {"entries": 2, "hits": 2, "misses": 2, "hit_rate": 50.0, "evictions": 1,
+                                 "expirations": 1, "threshold": 0.9}
+
+    def test_set_replaces_same_message(self, cache):
+        cache.set("m", "Tell me a joke", "Old joke, not funny.", ttl=60)
+        cache.set("m", "tell me a  joke", "New joke, very funny.", ttl=60)
+
+        assert cache.get("m", "tell me a joke please") == "New joke, very funny."
+        assert cache.stats()["entries"] == 1
+
+
+class TestChatCache:
+    """CacheService falls back to the semantic tier, with or without Redis"""
+
+    @pytest.mark.asyncio
+    async def test_semantic_tier_without_redis(self, monkeypatch):
+        monkeypatch.setattr(cache_module.settings, "CHAT_SEMANTIC_CACHE_ENABLED", True)
+        service = CacheService()
+        assert not service.is_connected
+
+        assert await service.set_chat_response("Explain quantum computing in simple terms", ANSWER * 2)
+        assert await service.get_chat_response("Can you explain quantum computing in simple terms?") == ANSWER * 2
+        assert await service.get_chat_response("explain quantum computing", tools_enabled=True) is None
+        assert (await service.get_stats())["semantic_chat"]["hits"] == 1
+
+        await service.clear_pattern("chat")
+        assert await service.get_chat_response("Explain quantum computing in simple terms") is None
+
+
+async def _worker(monkeypatch, server) -> CacheService:
+    """A CacheService connected to the fake Redis server, as one app worker would be"""
+    monkeypatch.setattr(cache_module.redis, "from_url", lambda *args, **kwargs: server.client())
+    service = CacheService()
+    await service.connect()
+    return service
+
+
+async def _deliver():
+    """Let listeners pick up published invalidations"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestTwoTierCache:
+    """In-process L1 in front of Redis, kept coherent over pub/sub"""
+
+    @pytest.mark.asyncio
+    async def test_l1_serves_repeats(self, monkeypatch):
+        server = FakeRedisServer()
+        service = await _worker(monkeypatch, server)
+        await service.set_weather("Chennai", {"temp": 31})
+        server.round_trips = 0
+
+        assert await service.get_weather("chennai") == {"temp": 31}
+        assert await service.get_stock_quote("INFY") is None
+        assert await service.get_stock_quote("INFY") is None  # remembered as missing
+        assert server.round_trips == 1
+
+        stats = (await service.get_stats())["namespaces"]
+        assert stats["weather"]["l1_hits"] == 1
+        assert stats["stock"] == {"l1_hits": 0, "l2_hits": 0, "negative_hits": 1, "misses": 1, "sets": 0,
+                                  "hit_rate": 0.0}
+        await service.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_writes_invalidate_other_workers(self, monkeypatch):
+        server = FakeRedisServer()
+        first, second = await _worker(monkeypatch, server), await _worker(monkeypatch, server)
+        await first.set_stock_quote("TCS", {"price": 4000})
+        assert await second.get_stock_quote("TCS") == {"price": 4000}  # now in second's L1
+        assert await second.get_search_results("monsoon") is None  # cached as missing
+
+        await first.set_stock_quote("TCS", {"price": 4100})
+        await first.set_search_results("monsoon", {"results": ["IMD forecast"]})
+        await _deliver()
+
+        assert await second.get_stock_quote("TCS") == {"price": 4100}
+        assert await second.get_search_results("monsoon") == {"results": ["IMD forecast"]}
+        await first.clear_pattern("stock")
+        await _deliver()
+        assert await second.get_stock_quote("TCS") is None
+        await first.disconnect()
+        await second.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_clearing_chat_reaches_other_workers_semantic_tier(self, monkeypatch):
+        monkeypatch.setattr(cache_module.settings, "CHAT_SEMANTIC_CACHE_ENABLED", True)
+        server = FakeRedisServer()
+        first, second = await _worker(monkeypatch, server), await _worker(monkeypatch, server)
+        await second.set_chat_response("Explain quantum computing in simple terms", ANSWER * 2)
+        server.data.clear()  # only the paraphrase tier can answer now
+
+        await first.clear_pattern("stock")
+        await _deliver()
+        assert await second.get_chat_response("explain quantum computing in simple terms please") == ANSWER * 2
+
+        await first.clear_pattern("chat")
+        await _deliver()
+        assert await second.get_chat_response("explain quantum computing in simple terms please") is None
+        await first.disconnect()
+        await second.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_lookup_in_flight_does_not_undo_a_write(self, monkeypatch):
+        server = FakeRedisServer(latency_ms=20)
+        service = await _worker(monkeypatch, server)
+        await service.set_stock_quote("WIPRO", {"price": 250})
+        service.local.clear()
+
+        lookup = asyncio.create_task(service.get_stock_quote("WIPRO"))  # reads the old value from Redis
+        await asyncio.sleep(0.005)
+        await service.set_stock_quote("WIPRO", {"price": 260})
+
+        assert await lookup == {"price": 250}
+        assert await service.get_stock_quote("WIPRO") == {"price": 260}
+        await service.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_l1_only_while_redis_is_down(self, monkeypatch):
+        monkeypatch.setattr(cache_module, "RECONNECT_DELAY", 0.01)
+        server = FakeRedisServer()
+        service = await _worker(monkeypatch, server)
+        await service.set("mcp:tools", "cached catalogue")
+
+        server.go_down()
+        await _deliver()
+        assert not service.is_connected
+        assert await service.get("mcp:tools") == "cached catalogue"
+        assert await service.set("mcp:prompts", "cached prompts")
+        assert await service.get("mcp:prompts") == "cached prompts"
+        assert (await service.get_stats())["status"] == "disconnected"
+
+        server.come_back()
+        await asyncio.sleep(0.1)
+        # Back on Redis, with a fresh L1
+        assert service.is_connected and len(service.local) == 0
+        assert await service.get("mcp:tools") == "cached catalogue"
+        assert await service.get("mcp:prompts") is None
+        await service.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_connects_once_redis_comes_up(self, monkeypatch):
+        monkeypatch.setattr(cache_module, "RECONNECT_DELAY", 0.01)
+        server = FakeRedisServer()
+        server.go_down()
+        service = await _worker(monkeypatch, server)
+        assert not service.is_connected
+        assert await service.set("mcp:tools", "cached catalogue")  # L1 only
+
+        server.come_back()
+        await asyncio.sleep(0.1)
+
+        assert service.is_connected
+        assert await service.set("mcp:tools", "fresh catalogue")
+        assert server.get("vyana:mcp:tools") is not None  # written through to Redis
+        await service.disconnect()
+
+    def test_local_cache_is_bounded_by_bytes(self):
+        cache = LocalCache(max_bytes=2000)
+        for i in range(20):
+            cache.set(f"vyana:search:{i}", "x" * 200, ttl=60)
+
+        assert cache.bytes <= 2000 and cache.evictions == 20 - len(cache)
+        assert cache.get("vyana:search:19") == (True, "x" * 200)
+        assert cache.get("vyana:search:0") == (False, None)
@@ -0,0 +1,268 @@
+"""
+Tests for CalendarService against an in-memory Calendar API transport
+"""
+import datetime
+import json
+import time
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.services import calendar_service as calendar_module
+from app.services.calendar_service import calendar_service
+from app.services.calendar_store import CalendarStore
+from benchmarks.stub_calendar import FakeCalendarHttp, build_service, make_event
+
+IST = ZoneInfo("Asia/Kolkata")
+LIST_PATH = ("GET", "/calendar/v3/calendars/primary/events")
+
+
+def _today(hour: int, minute: int = 0) -> datetime.datetime:
+    return datetime.datetime.now(IST).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def _agenda():
+    tomorrow = _today(9) + datetime.timedelta(days=1)
+    return [
+        make_event("standup", "Standup", _today(9, 30), minutes=15),
+        make_event("lunch", "Lunch", _today(13), minutes=60),
+        make_event("offsite", "Offsite", _today(0), minutes=1440, all_day=True),
+        make_event("flight", "Flight", tomorrow, minutes=120),
+        make_event("old", "Retro", _today(10) - datetime.timedelta(days=400), minutes=60),
+    ]
+
+
+@pytest.fixture
+def stored(mirrored_google):
+    return mirrored_google(
+        calendar_module, "calendar_store", CalendarStore, FakeCalendarHttp({"primary": _agenda()}), build_service,
+        getters=[(calendar_service, "_get_google_service")],
+        settings={"CALENDAR_STORE_ENABLED": True, "CALENDAR_SYNC_INTERVAL": 3600.0},
+        sync=("primary",),
+    )
+
+
+def _ids(events):
+    return [e["id"] for e in events]
+
+
+class TestCalendarStore:
+    """Range reads come from the local store once a calendar is synced"""
+
+    def test_today_answered_locally(self, stored):
+        http, _, _ = stored
+
+        events = calendar_service.get_events()
+
+        assert _ids(events) == ["offsite", "standup", "lunch"]
+        assert events[1]["start"] == _today(9, 30).isoformat()
+        assert events[0]["isAllDay"] is True
+        assert http.requests == []
+
+    def test_matches_live_api(self, stored, monkeypatch):
+        _, _, store = stored
+        tomorrow = (_today(0) + datetime.timedelta(days=1)).date().isoformat()
+        local = calendar_service.get_events(tomorrow)
+
+        monkeypatch.setattr(calendar_module.settings, "CALENDAR_STORE_ENABLED", False)
+        assert calendar_service.get_events(tomorrow) == local
+        assert _ids(local) == ["flight"]
+
+    def test_range_outside_window_goes_to_google(self, stored):
+        http, _, _ = stored
+        day = (_today(0) - datetime.timedelta(days=400)).date().isoformat()
+
+        events = calendar_service.get_events(day)
+
+        assert _ids(events) == ["old"]
+        assert http.requests == [LIST_PATH]
+
+    def test_incremental_sync_applies_changes(self, stored):
+        http, service, store = stored
+        http.put_event("primary", make_event("late", "Late call", _today(21), minutes=30))
+        http.cancel_event("primary", "lunch")
+
+        stats = store.sync("primary", service)
+
+        assert stats == {"mode": "incremental", "changed": 1, "deleted": 1}
+        assert _ids(calendar_service.get_events()) == ["offsite", "standup", "late"]
+
+    def test_moved_event_leaves_old_slot(self, stored):
+        http, service, store = stored
+        http.put_event("primary", make_event("standup", "Standup", _today(9, 30) + datetime.timedelta(days=2)))
+
+        store.sync("primary", service)
+
+        assert "standup" not in _ids(calendar_service.get_events())
+
+    def test_expired_sync_token_triggers_full_resync(self, stored):
+        http, service, store = stored
+        http.put_event("primary", make_event("late", "Late call", _today(21), minutes=30))
+        http.expire_sync_tokens()
+
+        stats = store.sync("primary", service)
+
+        assert stats["mode"] == "full"
+        assert "late" in _ids(calendar_service.get_events())
+
+
+class TestWriteThrough:
+    """Creates, updates and deletes are visible locally without a resync"""
+
+    def test_create(self, stored):
+        http, _, _ = stored
+
+        result = calendar_service.create_event("Review", _today(16).isoformat(), 45)
+        events = calendar_service.get_events()
+
+        assert result["success"]
+        assert "Review" in [e["summary"] for e in events]
+        assert LIST_PATH not in http.requests
+
+    def test_update_moves_event(self, stored):
+        calendar_service.update_event("lunch", summary="Team lunch", start_time=_today(12).isoformat(), duration_minutes=30)
+
+        lunch = next(e for e in calendar_service.get_events() if e["id"] == "lunch")
+
+        assert lunch["summary"] == "Team lunch"
+        assert lunch["start"] == _today(12).isoformat()
+
+    def test_delete(self, stored):
+        calendar_service.delete_event("standup")
+
+        assert "standup" not in _ids(calendar_service.get_events())
+
+    def test_recurring_create_pulls_instances(self, stored):
+        result = calendar_service.create_event("Gym", _today(7).isoformat(), 60, recurrence="DAILY", recurrence_count=3)
+        day_after = (_today(0) + datetime.timedelta(days=2)).date().isoformat()
+
+        assert "Gym" in [e["summary"] for e in calendar_service.get_events(day_after)]
+
+        calendar_service.delete_event(result["eventId"])
+        assert "Gym" not in [e["summary"] for e in calendar_service.get_events(day_after)]
+
+
+@pytest.fixture
+def live(monkeypatch):
+    """Live API path (store disabled)"""
+    http = FakeCalendarHttp({"primary": _agenda()})
+    service = build_service(http)
+    monkeypatch.setattr(calendar_service, "_get_google_service", lambda: service)
+    monkeypatch.setattr(calendar_module.settings, "CALENDAR_STORE_ENABLED", False)
+    return http
+
+
+class TestRangeQueries:
+    """Range queries push the window, page size and projection to Google"""
+
+    def test_window_sent_to_google(self, live):
+        start = _today(0)
+        events = calendar_service.get_events_in_range(start, start + datetime.timedelta(days=3))
+
+        assert [e.id for e in events] == ["offsite", "standup", "lunch", "flight"]
+        query = live.queries[-1]
+        assert query["timeMin"] == [start.isoformat()]
+        assert query["timeMax"] == [(start + datetime.timedelta(days=3)).isoformat()]
+        assert query["fields"] == [calendar_module.RANGE_FIELDS]
+        # Projected fields are all a compact event needs
+        assert events[1].summary == "Standup" and events[1].start == _today(9, 30).isoformat()
+        assert events[0].is_all_day and not events[1].is_all_day
+
+    def test_pages_followed_until_max_results(self, live, monkeypatch):
+        for i in range(12):
+            live.put_event("primary", make_event(f"extra{i}", "Extra", _today(18) + datetime.timedelta(days=1)))
+        monkeypatch.setattr(calendar_module, "RANGE_PAGE_SIZE", 5)
+
+        start = _today(0)
+        events = calendar_service.get_events_in_range(start, start + datetime.timedelta(days=2), max_results=12)
+
+        assert len(events) == 12
+        assert [q["maxResults"] for q in live.queries] == [["5"], ["5"], ["2"]]
+
+    def test_naive_datetimes_are_ist(self, live):
+        start = _today(0).replace(tzinfo=None)
+        calendar_service.get_events_in_range(start, start + datetime.timedelta(days=1))
+
+        assert live.queries[-1]["timeMin"] == [_today(0).isoformat()]
+
+    def test_not_connected(self, monkeypatch):
+        monkeypatch.setattr(calendar_service, "_get_google_service", lambda: None)
+
+        with pytest.raises(calendar_module.CalendarNotConnected):
+            calendar_service.get_upcoming_events(7)
+
+    def test_range_tool_includes_following_days(self, live):
+        from app.services.langgraph_tools import get_calendar_range
+
+        events = json.loads(get_calendar_range.invoke({"days": 3}))
+
+        # Not just today's events: tomorrow's flight is in range
+        assert "flight" in [e["id"] for e in events]
+        assert "old" not in [e["id"] for e in events]
+
+    def test_store_serves_ranges_it_covers(self, stored):
+        http, _, _ = stored
+        start = _today(0)
+
+        events = calendar_service.get_events_in_range(start, start + datetime.timedelta(days=3), max_results=3)
+
+        assert [e.id for e in events] == ["offsite", "standup", "lunch"]
+        assert http.requests == []
+
+
+@pytest.fixture
+def team(monkeypatch):
+    """Three calendars with 50ms round-trips; 'shared' is on both primary and team"""
+    shared = make_event("shared", "All hands", _today(11), minutes=60)
+    http = FakeCalendarHttp({
+        "primary": _agenda() + [shared],
+        "team@example.com": [make_event("deploy", "Deploy", _today(10)), shared,
+                             make_event("retro", "Retro", _today(15))],
+        "holidays@example.com": [make_event("diwali", "Diwali", _today(0), minutes=1440, all_day=True)],
+    }, latency_ms=50)
+    service = build_service(http)
+    monkeypatch.setattr(calendar_service, "_get_google_service", lambda: service)
+    monkeypatch.setattr(calendar_service, "_selected_ids", None)
+    monkeypatch.setattr(calendar_module.settings, "CALENDAR_STORE_ENABLED", False)
+    return http
+
+
+class TestMergedView:
+    """All selected calendars are read concurrently and merged in start order"""
+
+    def test_merged_in_start_order_without_duplicates(self, team):
+        events = list(calendar_service.iter_merged_events(*calendar_service.day_range()))
+
+        assert [e.id for e in events] == ["offsite", "diwali", "standup", "deploy", "shared", "lunch", "retro"]
+        assert [e.calendar_id for e in events][:4] == ["primary", "holidays@example.com", "primary", "team@example.com"]
+
+    def test_calendars_read_concurrently(self, team):
+        calendar_service.selected_calendar_ids()  # calendar list cached
+        start = time.perf_counter()
+
+        list(calendar_service.iter_merged_events(*calendar_service.day_range()))
+
+        # One round-trip per calendar, overlapped: close to a single 50ms call, not 150ms
+        assert time.perf_counter() - start < 0.12
+        assert team.requests.count(("GET", "/calendar/v3/users/me/calendarList")) == 1
+
+    def test_failing_calendar_left_out(self, team):
+        ids = ["primary", "missing@example.com"]
+
+        events = list(calendar_service.iter_merged_events(*calendar_service.day_range(), calendar_ids=ids))
+
+        assert [e.id for e in events] == ["offsite", "standup", "shared", "lunch"]
+
+    def test_max_results(self, team):
+        events = list(calendar_service.iter_merged_events(*calendar_service.day_range(), max_results=3))
+
+        assert [e.id for e in events] == ["offsite", "diwali", "standup"]
+
+    @pytest.mark.asyncio
+    async def test_route_streams_merged_events(self, team, test_client):
+        response = await test_client.get("/calendar/events", params={"calendars": "all"})
+
+        assert response.status_code == 200
+        events = response.json()["events"]
+        assert [e["id"] for e in events] == ["offsite", "diwali", "standup", "deploy", "shared", "lunch", "retro"]
+        assert events[0]["is_all_day"] is True
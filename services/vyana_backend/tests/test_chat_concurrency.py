@@ -0,0 +1,72 @@
+"""
+Load test: concurrent /chat/stream clients must not block each other or the
+event loop while the agent runs slow, blocking tools.
+"""
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from langchain_core.tools import tool
+
+CLIENTS = 8
+TOOL_SECONDS = 0.3
+
+
+@tool
+def slow_lookup(query: str = "") -> str:
+    """Blocking lookup used by the load test."""
+    time.sleep(TOOL_SECONDS)
+    return "found"
+
+
+@pytest.fixture
+def agent_client(monkeypatch, scripted_model):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "sk-test")
+    from app.services import deepseek_client as dc
+    from app.routes import chat
+
+    client = dc.DeepSeekClient()
+    client._llms[client.model_name] = scripted_model(
+        tool_calls=[{"name": "slow_lookup", "args": {"query": "x"}}],
+        latency=0.02,
+    )
+    monkeypatch.setattr(dc, "get_all_tools", lambda: [slow_lookup])
+    monkeypatch.setattr(chat, "deepseek_client", client)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_concurrent_streams_run_in_parallel(agent_client):
+    from app.main import app
+
+    payload = {
+        "messages": [{"role": "user", "content": "look it up"}],
+        "settings": {"tools_enabled": True, "mcp_enabled": False},
+    }
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test", timeout=30) as ac:
+        async def stream_one():
+            res = await ac.post("/chat/stream", json=payload)
+            return time.perf_counter(), res.text
+
+        async def probe_health():
+            await asyncio.sleep(TOOL_SECONDS / 3)
+            start = time.perf_counter()
+            res = await ac.get("/health")
+            return time.perf_counter() - start, res.status_code
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[stream_one() for _ in range(CLIENTS)], probe_health())
+        elapsed = time.perf_counter() - start
+
+    streams, (health_latency, health_status) = results[:-1], results[-1]
+    for _, body in streams:
+        assert '"type": "tool_end"' in body
+        assert "All done." in body
+
+    # Sequential execution would take CLIENTS * TOOL_SECONDS
+    assert elapsed < CLIENTS * TOOL_SECONDS / 2
+    # The event loop stays responsive while tools block
+    assert health_status == 200
+    assert health_latency < TOOL_SECONDS / 2
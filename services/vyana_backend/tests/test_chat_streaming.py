@@ -0,0 +1,62 @@
+"""
+Tests for incremental response formatting and token-level chat streaming.
+"""
+import json
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from app.services.response_formatter import StreamingFormatter, format_response
+
+
+def _stream(text: str, size: int) -> str:
+    formatter = StreamingFormatter()
+    parts = [formatter.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    return "".join(parts) + formatter.flush()
+
+
+class TestStreamingFormatter:
+    """The incremental formatter must not depend on chunk boundaries."""
+
+    LIST_TEXT = "Here are your events: 1.Standup Time: 10am 2. Review `Due:` 5pm\n\n\n\nDone "
+
+    def test_formats_numbered_list(self):
+        assert format_response(self.LIST_TEXT) == (
+            "Here are your events:\n\n1. Standup\nTime: 10am\n\n2. Review\nDue: 5pm\n\nDone"
+        )
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+    def test_chunked_output_matches_whole(self, size):
+        assert _stream(self.LIST_TEXT, size) == format_response(self.LIST_TEXT)
+
+    def test_plain_text_and_decimals_untouched(self):
+        text = "  Pi is 3.14 and the Time: now is fine."
+        assert format_response(text) == "Pi is 3.14 and the Time: now is fine."
+
+    def test_partial_word_is_held_back(self):
+        formatter = StreamingFormatter()
+        assert formatter.feed("Hello wor") == "Hello"
+        assert formatter.feed("ld ") == " world"
+        assert formatter.flush() == ""
+
+
+@pytest.mark.asyncio
+async def test_stream_chat_emits_token_deltas(monkeypatch):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "sk-test")
+    from app.services.deepseek_client import DeepSeekClient
+    from app.routes.chat import ChatMessage
+
+    answer = "Sure! 1. Buy milk 2. Call mom"
+    client = DeepSeekClient()
+    client._llms[client.model_name] = GenericFakeChatModel(messages=iter([AIMessage(content=answer)]))
+
+    events = []
+    async for line in client.stream_chat(
+        [ChatMessage(role="user", content="todo?")], "test",
+        tools_enabled=False, mcp_enabled=False
+    ):
+        events.append(json.loads(line[len("data: "):]))
+
+    text_events = [e for e in events if e["type"] == "text"]
+    assert len(text_events) > 1
+    assert "".join(e["content"] for e in text_events) == format_response(answer)
@@ -0,0 +1,113 @@
+"""
+Tests for the local SQLite ContactService
+"""
+import json
+import threading
+
+import pytest
+
+from app.services.contact_service import ContactService
+
+
+@pytest.fixture
+def contacts(tmp_path):
+    service = ContactService(db_path=tmp_path / "contacts.db", legacy_file=tmp_path / "contacts.json")
+    service.add_contact("Ravi Kumar", email="ravi.kumar@example.com", phone="+91 98450 12345", labels=["work"])
+    service.add_contact("Priya Nair", email="priya@example.com", company="Acme Corp", is_favorite=True)
+    service.add_contact("Nikita Rao", phone="080-2345-6789", labels=["family", "work"])
+    return service
+
+
+def _names(results):
+    return [c["name"] for c in results]
+
+
+class TestContactStore:
+    """CRUD, indexed lookups and the JSON import"""
+
+    def test_crud(self, contacts):
+        added = contacts.add_contact("Meera Iyer", email="meera@example.com")["contact"]
+
+        assert contacts.get_contact(added["id"]) == added
+        updated = contacts.update_contact(added["id"], phone="99000 11111", labels=["gym"])["contact"]
+        assert contacts.get_contact(added["id"]) == updated
+        assert updated["email"] == "meera@example.com" and updated["labels"] == ["gym"]
+
+        assert contacts.delete_contact(added["id"])["success"]
+        assert contacts.get_contact(added["id"]) is None
+        assert contacts.delete_contact(added["id"]) == {"success": False, "error": "Contact not found"}
+
+    @pytest.mark.parametrize("query, expected", [
+        ("ravi", ["Ravi Kumar"]),
+        ("KUM", ["Ravi Kumar"]),                  # word prefix, any case
+        ("acme", ["Priya Nair"]),                 # company
+        ("priya@example.com", ["Priya Nair"]),
+        ("9845012345", ["Ravi Kumar"]),           # phone without country code
+        ("080 2345", ["Nikita Rao"]),
+        ("kit", ["Nikita Rao"]),                  # substring fallback
+        ("zzz", []),
+    ])
+    def test_search(self, contacts, query, expected):
+        assert _names(contacts.search_contacts(query)) == expected
+
+    def test_search_follows_updates(self, contacts):
+        nikita = contacts.search_contacts("nikita")[0]
+        contacts.update_contact(nikita["id"], name="Nikita Shah")
+
+        assert _names(contacts.search_contacts("rao")) == []
+        assert _names(contacts.search_contacts("shah")) == ["Nikita Shah"]
+
+    def test_ai_lookups(self, contacts):
+        assert contacts.get_email_address("ravi") == "ravi.kumar@example.com (found: Ravi Kumar)"
+        assert contacts.get_phone_number("nikita") == "080-2345-6789 (found: Nikita Rao)"
+        assert contacts.get_email_address("nikita") == "Contact 'nikita' not found."
+
+    def test_listings(self, contacts):
+        assert _names(contacts.get_all_contacts_json()) == ["Nikita Rao", "Priya Nair", "Ravi Kumar"]
+        assert _names(contacts.get_all_contacts_json(favorites_only=True)) == ["Priya Nair"]
+        assert _names(contacts.get_contacts_by_label("work")) == ["Nikita Rao", "Ravi Kumar"]
+
+    def test_legacy_json_imported_once(self, tmp_path):
+        legacy = tmp_path / "contacts.json"
+        legacy.write_text(json.dumps([{
+            "id": "abc", "name": "Old Friend", "email": "old@example.com", "is_favorite": True,
+            "labels": ["school"], "created_at": "2024-01-01T00:00:00", "updated_at": "2024-01-01T00:00:00",
+        }]))
+
+        service = ContactService(db_path=tmp_path / "contacts.db", legacy_file=legacy)
+
+        assert service.get_contact("abc")["labels"] == ["school"]
+        assert not legacy.exists() and (tmp_path / "contacts.json.migrated").exists()
+        ContactService(db_path=tmp_path / "contacts.db", legacy_file=legacy)
+        assert len(service.get_all_contacts_json()) == 1
+
+
+class TestConcurrentWrites:
+    """Writers on different threads never overwrite each other's changes"""
+
+    def test_no_lost_updates(self, contacts):
+        ravi = contacts.search_contacts("ravi")[0]["id"]
+        errors = []
+
+        def toggle():
+            for _ in range(25):
+                if not contacts.toggle_favorite(ravi)["success"]:
+                    errors.append("toggle")
+
+        def edit(field):
+            for i in range(25):
+                if not contacts.update_contact(ravi, **{field: f"{field}-{i}"})["success"]:
+                    errors.append(field)
+
+        threads = [threading.Thread(target=toggle) for _ in range(4)]
+        threads += [threading.Thread(target=edit, args=(f,)) for f in ("company", "notes")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        contact = contacts.get_contact(ravi)
+        assert errors == []
+        # 100 toggles cancel out; each field keeps its own writer's last value
+        assert contact["is_favorite"] is False
+        assert contact["company"] == "company-24" and contact["notes"] == "notes-24"
@@ -0,0 +1,387 @@
+"""
+Tests for GmailService against an in-memory Gmail API transport
+"""
+import os
+
+import pytest
+
+from app.services import gmail_mirror as mirror_module
+from app.services import gmail_service as gmail_module
+from app.services.gmail_mirror import GmailMirror
+from app.services.gmail_service import gmail_service
+from benchmarks.stub_gmail import FakeGmailHttp, build_service, make_html_message, make_message, synthetic_mailbox
+
+
+@pytest.fixture
+def gmail(monkeypatch):
+    """Live API path (mirror disabled)"""
+    http = FakeGmailHttp(synthetic_mailbox(120))
+    service = build_service(http)
+    monkeypatch.setattr(gmail_service, "get_service", lambda: service)
+    monkeypatch.setattr(gmail_module.settings, "GMAIL_MIRROR_ENABLED", False)
+    return http
+
+
+@pytest.fixture
+def mirrored(mirrored_google):
+    """Mirror enabled, not yet synced"""
+    return mirrored_google(
+        gmail_module, "gmail_mirror", GmailMirror, FakeGmailHttp(synthetic_mailbox(120)), build_service,
+        getters=[(gmail_service, "get_service")],
+        settings={"GMAIL_MIRROR_ENABLED": True},
+    )
+
+
+class TestMetadataBatching:
+    """Listings fetch metadata in batch round-trips"""
+
+    def test_list_uses_one_batch_per_fifty_messages(self, gmail):
+        result = gmail_service.get_recent_messages(limit=60)
+
+        assert len(result["messages"]) == 60
+        assert gmail.requests == [
+            ("GET", "/gmail/v1/users/me/messages"),
+            ("POST", "/batch"),
+            ("POST", "/batch"),
+        ]
+        # Newest first, as listed
+        timestamps = [m["timestamp"] for m in result["messages"]]
+        assert timestamps == sorted(timestamps, reverse=True)
+
+    def test_only_listing_headers_requested(self, gmail, monkeypatch):
+        fetched = []
+        original = FakeGmailHttp._format
+
+        def spy(message, query):
+            fetched.append(query)
+            return original(message, query)
+
+        monkeypatch.setattr(FakeGmailHttp, "_format", staticmethod(spy))
+
+        result = gmail_service.search_messages("from:asha", limit=3)
+
+        assert len(result["messages"]) == 3
+        assert all(m["sender"].startswith("Asha Rao") and m["date"] for m in result["messages"])
+        assert all(q["format"] == ["metadata"] and q["metadataHeaders"] == ["Subject", "From", "Date"] for q in fetched)
+
+    def test_summary_skips_failed_messages(self, gmail, monkeypatch):
+        first_unread = next(m["id"] for m in gmail._sorted() if "UNREAD" in m["labelIds"])
+        original = gmail._route
+
+        def route(method, path, query):
+            if path.endswith(first_unread):
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+            return original(method, path, query)
+
+        monkeypatch.setattr(gmail, "_route", route)
+
+        summary = gmail_service.summarize_emails(3)
+
+        # The failed message is skipped, the rest still come back
+        assert summary.count("- From:") == 2
+        assert len(gmail.requests) == 2
+
+    def test_rate_limited_messages_retried_in_smaller_batch(self, gmail, monkeypatch):
+        monkeypatch.setattr(mirror_module, "BATCH_RETRY_DELAY", 0)
+        throttled = {m["id"]: 1 for m in gmail._sorted()[:5]}
+        throttled[gmail._sorted()[5]["id"]] = 99  # never recovers
+        original = gmail._route
+
+        def route(method, path, query):
+            msg_id = path.rsplit("/", 1)[-1]
+            if throttled.get(msg_id, 0) > 0:
+                throttled[msg_id] -= 1
+                return 429, {"error": {"code": 429, "message": "Too many concurrent requests for user"}}
+            return original(method, path, query)
+
+        monkeypatch.setattr(gmail, "_route", route)
+
+        result = gmail_service.get_recent_messages(limit=10)
+
+        assert len(result["messages"]) == 9
+        # One batch, then one follow-up per retry for what is still throttled
+        assert gmail.requests.count(("POST", "/batch")) == 1 + mirror_module.BATCH_RETRIES
+
+
+class TestMailboxMirror:
+    """Reads served locally, kept current through history.list"""
+
+    def test_first_read_goes_live_then_mirror_serves(self, mirrored):
+        http, _, mirror = mirrored
+
+        live = gmail_service.get_recent_messages(limit=5)
+        mirror._sync_thread.join(timeout=5)
+        http.requests.clear()
+
+        assert mirror.is_ready()
+        assert gmail_service.get_recent_messages(limit=5) == live
+        assert gmail_service.get_unread_count() == sum("UNREAD" in m["labelIds"] for m in http.messages.values())
+        assert gmail_service.summarize_emails(3).count("- From:") == 3
+        # Everything above was answered locally (mirror is fresh, no sync started)
+        assert http.requests == []
+
+    def test_incremental_sync_applies_history(self, mirrored):
+        http, service, mirror = mirrored
+        mirror.sync(service)
+        newest = http._sorted()[0]["id"]
+        oldest = http._sorted()[-1]["id"]
+
+        http.add_message(make_message(500, subject="Fresh news", labels=["INBOX", "UNREAD", "CATEGORY_UPDATES"]))
+        http.set_labels(newest, remove=["INBOX"])
+        http.delete_message(oldest)
+        http.requests.clear()
+
+        stats = mirror.sync(service)
+
+        assert stats == {"mode": "incremental", "added": 1, "deleted": 1, "relabeled": 1}
+        paths = [path for _, path in http.requests]
+        assert "/gmail/v1/users/me/messages" not in paths  # no full listing
+        assert [m["subject"] for m in mirror.recent(1, ["INBOX"])] == ["Fresh news"]
+        assert [m["subject"] for m in mirror.recent(5, ["INBOX", "CATEGORY_UPDATES"])] == ["Fresh news"]
+        assert newest not in {m["id"] for m in mirror.recent(200, ["INBOX"])}
+        assert mirror.message_count() == 120
+
+    def test_no_changes_costs_one_history_call(self, mirrored):
+        http, service, mirror = mirrored
+        mirror.sync(service)
+        http.requests.clear()
+
+        assert mirror.sync(service)["added"] == 0
+        assert http.requests == [("GET", "/gmail/v1/users/me/history")]
+
+    def test_expired_history_triggers_full_resync(self, mirrored):
+        http, service, mirror = mirrored
+        mirror.sync(service)
+        http.add_message(make_message(501, subject="After expiry"))
+        http.expire_history()
+
+        assert mirror.sync(service)["mode"] == "full"
+        assert mirror.recent(1)[0]["subject"] == "After expiry"
+        assert mirror.history_id() == str(http.history_id)
+
+    def test_unfetched_messages_hold_back_the_history_id(self, mirrored, monkeypatch):
+        http, service, mirror = mirrored
+        monkeypatch.setattr(mirror_module, "BATCH_RETRY_DELAY", 0)
+        failing = {http._sorted()[3]["id"]}
+        original = http._route
+
+        def route(method, path, query):
+            if path.rsplit("/", 1)[-1] in failing:
+                return 503, {"error": {"code": 503, "message": "Backend Error"}}
+            return original(method, path, query)
+
+        monkeypatch.setattr(http, "_route", route)
+
+        mirror.sync(service)
+        assert not mirror.is_ready() and not mirror.is_complete()
+
+        failing.clear()
+        mirror.sync(service)
+        assert mirror.is_ready() and mirror.is_complete()
+        synced = mirror.history_id()
+
+        http.add_message(make_message(502, subject="Throttled arrival"))
+        failing.add("m000502")
+        mirror.sync(service)
+        assert mirror.history_id() == synced and not mirror.is_complete()
+
+        failing.clear()
+        assert mirror.sync(service)["added"] == 1
+        assert mirror.history_id() == str(http.history_id) and mirror.is_complete()
+        assert mirror.recent(1)[0]["subject"] == "Throttled arrival"
+
+
+class TestEmailSearch:
+    """Local FTS5 index behind search_emails and /gmail/search"""
+
+    @pytest.fixture
+    def indexed(self, mirrored):
+        http, service, mirror = mirrored
+        http.add_message(make_message(
+            900, subject="Quarterly platypus", sender="Asha Rao <asha@example.com>",
+            body="Please find the platypus attached.", labels=["INBOX"],
+        ))
+        http.add_message(make_message(
+            901, subject="Lunch", sender="Ravi Kumar <ravi@example.org>",
+            body="Also, the platypus for the caterer is overdue. Zanzibar trip next?", labels=["INBOX", "UNREAD"],
+        ))
+        html_message = make_message(902, subject="Newsletter", labels=["INBOX"])
+        html_message["payload"] = {
+            "mimeType": "multipart/alternative",
+            "headers": html_message["payload"]["headers"],
+            "parts": [{"mimeType": "text/html", "body": {"data": "PHA-S29tb2RvIDxiPmRyYWdvbnM8L2I-PC9wPg=="}}],
+        }
+        http.add_message(html_message)
+        mirror.sync(service)
+        http.requests.clear()
+        return http, mirror
+
+    def test_query_translation(self):
+        from app.services.gmail_mirror import to_fts_query
+
+        assert to_fts_query('invo from:asha') == ('("invo"*) AND sender:("asha"*)', [])
+        assert to_fts_query('"quarterly invoice" is:unread category:primary') == (
+            '("quarterly invoice")', ['UNREAD', 'CATEGORY_PERSONAL'])
+        assert to_fts_query('after:2024/01/01 invoice') is None
+        assert to_fts_query('-invoice') is None
+        assert to_fts_query('label:starred invoice') == ('("invoice"*)', ['STARRED'])
+        # User labels are mirrored by id (Label_123), so Gmail has to resolve them
+        assert to_fts_query('label:work invoice') is None
+
+    def test_ranked_prefix_search(self, indexed):
+        _, mirror = indexed
+
+        results = mirror.search("platy", 5)
+
+        # Subject match outranks a body-only match
+        assert [m["id"] for m in results] == ["m000900", "m000901"]
+        assert [m["id"] for m in mirror.search("zanz", 5)] == ["m000901"]
+        assert [m["id"] for m in mirror.search("komodo dragons", 5)] == ["m000902"]
+
+    def test_field_and_label_filters(self, indexed):
+        _, mirror = indexed
+
+        assert [m["id"] for m in mirror.search("platypus from:ravi", 5)] == ["m000901"]
+        assert [m["id"] for m in mirror.search("platypus is:unread", 5)] == ["m000901"]
+        # Label names don't match free-text searches
+        assert "m000900" not in [m["id"] for m in mirror.search("unread", 200)]
+
+    def test_index_follows_sync(self, indexed, mirrored):
+        http, service, mirror = mirrored
+
+        http.set_labels("m000901", remove=["UNREAD"])
+        http.delete_message("m000900")
+        mirror.sync(service)
+
+        assert mirror.search("platypus is:unread", 5) == []
+        assert [m["id"] for m in mirror.search("platypus", 5)] == ["m000901"]
+
+    def test_search_messages_served_locally(self, indexed):
+        http, _ = indexed
+
+        result = gmail_service.search_messages("platypus", limit=2)
+
+        assert [m["subject"] for m in result["messages"]] == ["Quarterly platypus", "Lunch"]
+        assert http.requests == []
+
+    def test_unsupported_query_goes_to_gmail(self, indexed):
+        http, _ = indexed
+
+        gmail_service.search_messages("platypus after:2024/01/01", limit=2)
+
+        assert ("GET", "/gmail/v1/users/me/messages") in http.requests
+
+    @pytest.mark.asyncio
+    async def test_search_route(self, indexed, test_client):
+        async with test_client as client:
+            response = await client.get("/gmail/search", params={"q": "zanzibar"})
+
+        assert response.status_code == 200
+        assert [m["id"] for m in response.json()["messages"]] == ["m000901"]
+
+
+class TestInlineAttachments:
+    """Inline images are served lazily from the attachment endpoint"""
+
+    LOGO = b"\x89PNG\r\n\x1a\n" + b"logo" * 1000
+    CHART = b"\x89PNG\r\n\x1a\n" + b"chart" * 2000
+
+    @pytest.fixture
+    def newsletter(self, gmail, monkeypatch, tmp_path):
+        from app.services.attachment_cache import AttachmentCache
+
+        monkeypatch.setattr(gmail_module, "attachment_cache", AttachmentCache(str(tmp_path / "attachments")))
+        html = '<p><img src="cid:logo"> Weekly news <img src="cid:chart"></p>'
+        message, attachments = make_html_message(950, html, {"logo": self.LOGO, "chart": self.CHART})
+        second, more = make_html_message(951, '<img src="cid:logo">', {"logo": self.LOGO})
+        for m in (message, second):
+            gmail.messages[m["id"]] = m
+        gmail.attachments.update({**attachments, **more})
+        return gmail
+
+    def test_details_reference_endpoint_without_downloading(self, newsletter):
+        newsletter.requests.clear()
+
+        details = gmail_service.get_message_details("m000950")
+
+        # Root-relative, so the page's own scheme and host are used (no mixed content)
+        assert details["html_body"] == (
+            '<p><img src="/gmail/message/m000950/attachments/1"> Weekly news '
+            '<img src="/gmail/message/m000950/attachments/2"></p>'
+        )
+        assert newsletter.requests == [("GET", "/gmail/v1/users/me/messages/m000950")]
+
+    def test_configured_public_origin(self, newsletter, monkeypatch):
+        monkeypatch.setattr(gmail_module.settings, "GMAIL_ATTACHMENT_BASE_URL", "https://vyana.example.com/")
+
+        assert gmail_service.attachment_url("m000950", "1") == (
+            "https://vyana.example.com/gmail/message/m000950/attachments/1"
+        )
+
+    def test_attachment_fetched_once_and_content_addressed(self, newsletter):
+        first = gmail_service.get_attachment("m000950", "1")
+        newsletter.requests.clear()
+
+        again = gmail_service.get_attachment("m000950", "1")
+        same_logo = gmail_service.get_attachment("m000951", "1")
+
+        assert open(first.path, "rb").read() == self.LOGO
+        assert again.path == first.path
+        # Same bytes in another message: stored once, but that message's part is fetched
+        assert same_logo.path == first.path
+        assert len(newsletter.requests) == 2
+        assert gmail_service.get_attachment("m000950", "9") is None
+
+    def test_cache_evicts_least_recently_used(self, tmp_path):
+        from app.services.attachment_cache import AttachmentCache
+
+        cache = AttachmentCache(str(tmp_path / "lru"), max_bytes=25_000)
+        cache.put("a", "1", self.LOGO, "image/png")
+        cache.put("b", "1", self.CHART, "image/png")
+        cache.get("a", "1")
+        cache.put("c", "1", b"x" * 12_000, "image/png")
+
+        assert cache.get("b", "1") is None
+        assert cache.get("a", "1") is not None
+        assert cache.total_bytes() <= 25_000
+
+    def test_cache_cleared_on_logout(self, newsletter, monkeypatch, tmp_path):
+        from app.services import google_oauth as oauth_module
+
+        cached = gmail_service.get_attachment("m000950", "1")
+        monkeypatch.setattr(oauth_module, "attachment_cache", gmail_module.attachment_cache)
+
+        oauth_module.OAuthService(db_path=str(tmp_path / "auth.db")).logout()
+
+        assert gmail_module.attachment_cache.get("m000950", "1") is None
+        assert gmail_module.attachment_cache.total_bytes() == 0
+        assert not os.path.exists(cached.path)
+
+    @pytest.mark.asyncio
+    async def test_attachment_route_streams_with_cache_headers(self, newsletter, test_client):
+        async with test_client as client:
+            response = await client.get("/gmail/message/m000950/attachments/2")
+            etag = response.headers["etag"]
+            revalidated = await client.get(
+                "/gmail/message/m000950/attachments/2", headers={"If-None-Match": etag}
+            )
+            missing = await client.get("/gmail/message/m000950/attachments/7")
+            unknown_message = await client.get("/gmail/message/nope/attachments/1")
+
+        assert response.status_code == 200
+        assert response.content == self.CHART
+        assert response.headers["content-type"] == "image/png"
+        assert "immutable" in response.headers["cache-control"]
+        assert revalidated.status_code == 304
+        assert missing.status_code == 404
+        assert unknown_message.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_attachment_route_reports_gmail_failures(self, newsletter, test_client, monkeypatch):
+        monkeypatch.setattr(newsletter, "_route", lambda method, path, query: (
+            503, {"error": {"code": 503, "message": "Backend Error"}}))
+
+        async with test_client as client:
+            response = await client.get("/gmail/message/m000950/attachments/1")
+
+        assert response.status_code == 502
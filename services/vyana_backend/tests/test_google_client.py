@@ -0,0 +1,78 @@
+"""
+Tests for the cached Google API client factory
+"""
+import threading
+
+from google.oauth2.credentials import Credentials
+
+from app.services.google_client import GoogleClientFactory
+
+
+def _creds(token="access-1", refresh_token="refresh-1"):
+    return Credentials(
+        token=token,
+        refresh_token=refresh_token,
+        client_id="client",
+        client_secret="secret",
+        token_uri="https://oauth2.googleapis.com/token",
+    )
+
+
+class TestGoogleClientFactory:
+    """Service objects are reused per thread and rebuilt on refresh"""
+
+    def test_reuses_client_for_same_credentials(self):
+        factory = GoogleClientFactory()
+
+        first = factory.get("calendar", "v3", _creds())
+        # A fresh Credentials object for the same user (as loaded from the DB)
+        second = factory.get("calendar", "v3", _creds())
+
+        assert first is second
+        assert factory.stats() == {"builds": 1, "hits": 1}
+        assert first.events() is not None
+
+    def test_rebuilds_after_token_refresh(self):
+        factory = GoogleClientFactory()
+
+        first = factory.get("gmail", "v1", _creds(token="access-1"))
+        refreshed = factory.get("gmail", "v1", _creds(token="access-2"))
+
+        assert refreshed is not first
+        assert factory.get("gmail", "v1", _creds(token="access-2")) is refreshed
+
+    def test_keyed_by_api_and_identity(self):
+        factory = GoogleClientFactory()
+
+        calendar = factory.get("calendar", "v3", _creds())
+        tasks = factory.get("tasks", "v1", _creds())
+        other_user = factory.get("calendar", "v3", _creds(refresh_token="refresh-2"))
+
+        assert len({id(calendar), id(tasks), id(other_user)}) == 3
+
+    def test_one_client_per_thread(self):
+        factory = GoogleClientFactory()
+        services = []
+
+        def worker():
+            services.append(factory.get("people", "v1", _creds()))
+            services.append(factory.get("people", "v1", _creds()))
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert services[0] is services[1] and services[2] is services[3]
+        assert services[0] is not services[2]
+        assert services[0]._http is not services[2]._http
+
+    def test_invalidate_and_missing_credentials(self):
+        factory = GoogleClientFactory()
+
+        first = factory.get("tasks", "v1", _creds())
+        factory.invalidate()
+
+        assert factory.get("tasks", "v1", _creds()) is not first
+        assert factory.get("tasks", "v1", None) is None
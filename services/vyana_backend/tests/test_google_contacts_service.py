@@ -0,0 +1,149 @@
+"""
+Tests for GoogleContactsService against an in-memory People API transport
+"""
+import pytest
+
+from app.services import google_contacts_service as contacts_module
+from app.services.contacts_mirror import ContactsMirror, soundex
+from app.services.google_contacts_service import google_contacts_service
+from benchmarks.stub_people import FakePeopleHttp, build_service, make_person
+
+SEARCH_PATH = ("GET", "/v1/people:searchContacts")
+
+
+def _address_book():
+    return [
+        make_person(1, "Ravi Kumar", email="ravi.kumar@example.com", phone="+91 98450 12345"),
+        make_person(2, "Ravina Shetty", email="ravina@example.com", starred=True),
+        make_person(3, "Priya Nair", email="p.nair@work.example.com", phone="080-2345-6789", company="Acme"),
+        make_person(4, "Rahul Krishnan", phone="+91 99000 11111"),
+        make_person(5, "José Álvarez", email="jose@example.com"),
+    ]
+
+
+@pytest.fixture
+def mirrored(mirrored_google):
+    return mirrored_google(
+        contacts_module, "contacts_mirror", ContactsMirror, FakePeopleHttp(_address_book()), build_service,
+        getters=[(google_contacts_service, "_get_service")],
+        settings={"CONTACTS_MIRROR_ENABLED": True, "CONTACTS_SYNC_INTERVAL": 3600.0},
+        sync=(),
+    )
+
+
+def _names(contacts):
+    return [c["name"] for c in contacts]
+
+
+class TestContactsMirror:
+    """Contacts are read from the local mirror once it has synced"""
+
+    def test_all_contacts_local(self, mirrored):
+        http, _, _ = mirrored
+
+        contacts = google_contacts_service.get_all_contacts()
+
+        assert _names(contacts) == ["José Álvarez", "Priya Nair", "Rahul Krishnan", "Ravi Kumar", "Ravina Shetty"]
+        assert _names(google_contacts_service.get_all_contacts(favorites_only=True)) == ["Ravina Shetty"]
+        assert contacts[1]["company"] == "Acme" and contacts[1]["id"] == "c3"
+        assert http.requests == []
+
+    def test_incremental_sync_applies_changes(self, mirrored):
+        http, service, mirror = mirrored
+        http.put_person(make_person(6, "Meera Iyer", email="meera@example.com"))
+        http.remove_person("people/c4")
+
+        stats = mirror.sync(service)
+
+        assert stats == {"mode": "incremental", "changed": 1, "deleted": 1}
+        names = _names(google_contacts_service.get_all_contacts())
+        assert "Meera Iyer" in names and "Rahul Krishnan" not in names
+        assert _names(google_contacts_service.search_contacts("meera")) == ["Meera Iyer"]
+
+    def test_expired_sync_token_triggers_full_resync(self, mirrored):
+        http, service, mirror = mirrored
+        http.put_person(make_person(6, "Meera Iyer"))
+        http.expire_sync_tokens()
+
+        stats = mirror.sync(service)
+
+        assert stats == {"mode": "full", "contacts": 6}
+        assert "Meera Iyer" in _names(google_contacts_service.get_all_contacts())
+
+    def test_disabled_goes_to_google(self, mirrored, monkeypatch):
+        http, _, _ = mirrored
+        monkeypatch.setattr(contacts_module.settings, "CONTACTS_MIRROR_ENABLED", False)
+
+        assert _names(google_contacts_service.search_contacts("priya")) == ["Priya Nair"]
+        assert http.requests == [SEARCH_PATH]
+
+
+class TestContactSearch:
+    """The in-memory index matches prefixes, sound-alikes and typos"""
+
+    @pytest.mark.parametrize("query, expected", [
+        ("ravi", ["Ravi Kumar", "Ravina Shetty"]),             # exact word before prefix
+        ("rav", ["Ravina Shetty", "Ravi Kumar"]),              # both prefixes: favorite first
+        ("ravi kum", ["Ravi Kumar"]),                          # every term must match
+        ("shetti", ["Ravina Shetty"]),                         # phonetic
+        ("krishanan", ["Rahul Krishnan"]),                     # typo
+        ("jose alvarez", ["José Álvarez"]),                    # accents ignored
+        ("p.nair@work.example.com", ["Priya Nair"]),           # email
+        ("9845012345", ["Ravi Kumar"]),                        # phone without country code
+        ("080 2345", ["Priya Nair"]),                          # phone prefix
+        ("zzz", []),
+    ])
+    def test_queries(self, mirrored, query, expected):
+        assert _names(google_contacts_service.search_contacts(query)) == expected
+
+    def test_soundex(self):
+        assert soundex("Robert") == soundex("Rupert") == "R163"
+        assert soundex("Ashcraft") == "A261"
+        assert soundex("Shetty") == soundex("Shetti")
+
+    def test_email_lookup_is_local(self, mirrored):
+        http, _, _ = mirrored
+
+        assert google_contacts_service.get_email_address("ravi") == "ravi.kumar@example.com (found: Ravi Kumar)"
+        # Best match has no email: the next one that does is used
+        assert google_contacts_service.get_phone_number("rahul") == "+91 99000 11111 (found: Rahul Krishnan)"
+        assert google_contacts_service.get_email_address("rahul") == "Contact 'rahul' not found."
+        assert http.requests == []
+
+    def test_email_tool(self, mirrored):
+        from app.services.langgraph_tools import get_email_address
+
+        assert get_email_address.invoke({"name": "Priya"}) == "p.nair@work.example.com (found: Priya Nair)"
+
+
+class TestWriteThrough:
+    """Creates, updates, deletes and favorites are visible locally without a resync"""
+
+    def test_add(self, mirrored):
+        result = google_contacts_service.add_contact("Kavya Rao", email="kavya@example.com", is_favorite=True)
+
+        assert result["success"]
+        assert google_contacts_service.get_email_address("kavya") == "kavya@example.com (found: Kavya Rao)"
+        assert "Kavya Rao" in _names(google_contacts_service.get_all_contacts(favorites_only=True))
+
+    def test_update_reindexes(self, mirrored):
+        google_contacts_service.update_contact("c1", name="Ravi Menon", email="ravi@menon.example.com")
+
+        assert _names(google_contacts_service.search_contacts("kumar")) == []
+        assert google_contacts_service.get_email_address("menon") == "ravi@menon.example.com (found: Ravi Menon)"
+
+    def test_delete(self, mirrored):
+        google_contacts_service.delete_contact("c3")
+
+        assert _names(google_contacts_service.search_contacts("priya")) == []
+        assert google_contacts_service.get_contact("c3") is None
+
+    def test_toggle_favorite(self, mirrored):
+        http, _, _ = mirrored
+
+        assert google_contacts_service.toggle_favorite("c1") == {"success": True, "is_favorite": True}
+        http.requests.clear()
+
+        assert google_contacts_service.get_contact("c1")["is_favorite"] is True
+        assert _names(google_contacts_service.search_contacts("rav")) == ["Ravi Kumar", "Ravina Shetty"]
+        assert http.requests == []
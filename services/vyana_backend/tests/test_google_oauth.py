@@ -0,0 +1,137 @@
+"""
+Tests for the in-process Google credential cache
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import Flow
+
+from app.services.google_oauth import OAuthService
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _creds(expires_in: timedelta, token: str = "access-1") -> Credentials:
+    return Credentials(
+        token=token,
+        refresh_token="refresh",
+        client_id="client",
+        client_secret="secret",
+        token_uri="https://oauth2.googleapis.com/token",
+        expiry=_utcnow() + expires_in,
+    )
+
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    """Replace the network refresh with a slow fake; records each call"""
+    calls = []
+
+    def fake_refresh(self, request):
+        calls.append(threading.current_thread().name)
+        time.sleep(0.05)
+        self.token = f"access-{len(calls) + 1}"
+        self.expiry = _utcnow() + timedelta(hours=1)
+
+    monkeypatch.setattr(Credentials, "refresh", fake_refresh)
+    return calls
+
+
+@pytest.fixture
+def oauth(tmp_path):
+    return OAuthService(db_path=str(tmp_path / "auth.db"))
+
+
+def _count_loads(service: OAuthService, monkeypatch) -> list:
+    loads = []
+    original = service._load_creds
+
+    def counting_load():
+        loads.append(1)
+        return original()
+
+    monkeypatch.setattr(service, "_load_creds", counting_load)
+    return loads
+
+
+class TestCredentialCache:
+    """Hot path, single-flight and proactive refresh"""
+
+    def test_database_read_once(self, oauth, monkeypatch):
+        oauth._save_creds(_creds(timedelta(hours=1)))
+        loads = _count_loads(oauth, monkeypatch)
+
+        tokens = {oauth.get_credentials().token for _ in range(50)}
+
+        assert tokens == {"access-1"}
+        assert len(loads) == 1
+        assert oauth.is_authenticated()
+
+    def test_expired_token_refreshed_once_for_concurrent_callers(self, oauth, refreshes):
+        oauth._save_creds(_creds(timedelta(minutes=-5)))
+        results = []
+
+        def worker():
+            results.append(oauth.get_credentials())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(refreshes) == 1
+        assert {c.token for c in results} == {"access-2"}
+        # Written through to SQLite
+        assert OAuthService(db_path=oauth.db_path)._load_creds().token == "access-2"
+
+    def test_token_near_expiry_refreshed_in_background(self, oauth, refreshes):
+        # Still valid, but inside the refresh margin
+        oauth._save_creds(_creds(timedelta(seconds=280)))
+
+        assert oauth.get_credentials().token == "access-1"
+        oauth._refresh_thread.join(timeout=2)
+
+        assert refreshes == ["google-token-refresh"]
+        assert oauth.get_credentials().token == "access-2"
+
+    def test_background_failure_keeps_valid_token(self, oauth, monkeypatch):
+        def failing_refresh(self, request):
+            raise RuntimeError("network down")
+
+        monkeypatch.setattr(Credentials, "refresh", failing_refresh)
+        oauth._save_creds(_creds(timedelta(seconds=280)))
+
+        oauth.get_credentials()
+        oauth._refresh_thread.join(timeout=2)
+
+        assert oauth.get_credentials().token == "access-1"
+
+    def test_logout_clears_cache(self, oauth, monkeypatch):
+        oauth._save_creds(_creds(timedelta(hours=1)))
+        assert oauth.get_credentials() is not None
+        loads = _count_loads(oauth, monkeypatch)
+
+        oauth.logout()
+
+        assert oauth.get_credentials() is None
+        assert loads == []
+
+    def test_account_change_forgets_calendar_list(self, oauth, monkeypatch):
+        from app.services.calendar_service import calendar_service
+
+        monkeypatch.setattr(calendar_service, "_selected_ids", (time.monotonic() + 300, ["old@example.com"]))
+        monkeypatch.setattr(Flow, "fetch_token", lambda self, code: None)
+        monkeypatch.setattr(Flow, "credentials", property(lambda self: _creds(timedelta(hours=1))))
+
+        assert oauth.handle_callback("code").startswith("Authentication successful")
+        assert calendar_service._selected_ids is None
+
+        monkeypatch.setattr(calendar_service, "_selected_ids", (time.monotonic() + 300, ["old@example.com"]))
+        oauth.logout()
+        assert calendar_service._selected_ids is None
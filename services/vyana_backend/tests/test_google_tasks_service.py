@@ -0,0 +1,193 @@
+"""
+Tests for the Google Tasks service and its local mirror, against an in-memory Tasks API transport
+"""
+import json
+
+import pytest
+
+from app.services import google_tasks_service as gts
+from app.services.langgraph_tools import search_tasks as search_tasks_tool
+from app.services.tasks_mirror import TasksMirror, is_local_id
+from benchmarks.stub_tasks import DEFAULT_LIST, FakeTasksHttp, build_service, make_task
+
+BATCH = ("POST", "/batch")
+
+
+def _task_list():
+    return [
+        make_task(1, "Renew passport", due="2026-03-01"),
+        make_task(2, "Pay electricity bill"),
+        make_task(3, "Book flight to Goa", status="completed"),
+        make_task(4, "Pack passport photos", parent="t000001"),
+        make_task(5, "Call the plumber"),
+    ]
+
+
+@pytest.fixture
+def mirrored(mirrored_google, monkeypatch):
+    """Replays run only when a test flushes"""
+    http, service, mirror = mirrored_google(
+        gts, "tasks_mirror", TasksMirror, FakeTasksHttp(_task_list()), build_service,
+        getters=[(gts, "get_tasks_service"), (gts, "_connected_service")],
+        settings={"TASKS_MIRROR_ENABLED": True, "TASKS_SYNC_INTERVAL": 3600.0},
+        sync=("@default",),
+    )
+    monkeypatch.setattr(mirror, "flush_in_background", lambda get_service: None)
+    return http, service, mirror
+
+
+def _titles(tasks):
+    return [t["title"] for t in tasks]
+
+
+def _google(http):
+    """Titles and statuses of the tasks Google holds"""
+    return {t["title"]: t["status"] for t in http.live(DEFAULT_LIST)}
+
+
+class TestTasksMirrorReads:
+    """Task views come from the local mirror once the list has synced"""
+
+    def test_list_local(self, mirrored):
+        http, _, _ = mirrored
+
+        open_tasks = gts.list_tasks()
+
+        assert _titles(open_tasks) == ["Renew passport", "Pack passport photos", "Pay electricity bill",
+                                       "Call the plumber"]
+        assert open_tasks[1]["parent"] == "t000001" and open_tasks[0]["due"] == "2026-03-01T00:00:00.000Z"
+        assert len(gts.list_tasks(show_completed=True)) == 5
+        assert _titles(gts.list_tasks(max_results=1)) == ["Renew passport"]
+        assert gts.get_task("@default", "t000002")["title"] == "Pay electricity bill"
+        assert http.requests == []
+
+    def test_search_local(self, mirrored):
+        http, _, _ = mirrored
+
+        assert _titles(gts.search_tasks("PASSPORT")) == ["Renew passport", "Pack passport photos"]
+        assert _titles(gts.search_tasks("flight")) == []  # completed
+        assert json.loads(search_tasks_tool.invoke({"query": "plumber"}))[0]["id"] == "t000005"
+        assert http.requests == []
+
+    def test_poll_applies_changes(self, mirrored):
+        http, service, mirror = mirrored
+        http.put_task(make_task(2, "Pay electricity bill", status="completed"))
+        http.put_task(make_task(6, "Water the plants"))
+        service.tasks().delete(tasklist="@default", task="t000005").execute()
+
+        stats = mirror.sync("@default", service)
+
+        assert stats["mode"] == "incremental" and stats["deleted"] == 1
+        assert _titles(gts.list_tasks()) == ["Renew passport", "Pack passport photos", "Water the plants"]
+
+    def test_disabled_goes_to_google(self, mirrored, monkeypatch):
+        http, _, _ = mirrored
+        monkeypatch.setattr(gts.settings, "TASKS_MIRROR_ENABLED", False)
+
+        assert len(gts.list_tasks(show_completed=True)) == 5
+        assert http.requests == [("GET", "/tasks/v1/lists/@default/tasks")]
+
+
+class TestOptimisticWrites:
+    """Changes show up locally at once and reach Google in batches"""
+
+    def test_writes_are_local_then_sent_in_one_batch(self, mirrored):
+        http, service, mirror = mirrored
+
+        created = gts.create_task("Buy groceries", notes="milk, eggs", due="2026-02-01")
+        gts.complete_task("t000002")
+        gts.update_task("t000005", title="Call the electrician")
+        gts.delete_task("t000001")
+
+        assert is_local_id(created["id"])
+        assert _titles(gts.list_tasks()) == ["Buy groceries", "Call the electrician"]
+        assert http.requests == []
+
+        assert mirror.flush(service)["sent"] == 4
+        assert http.requests == [BATCH]
+        assert _google(http) == {"Buy groceries": "needsAction", "Pay electricity bill": "completed",
+                                 "Book flight to Goa": "completed", "Pack passport photos": "needsAction",
+                                 "Call the electrician": "needsAction"}
+        assert gts.list_tasks()[0]["id"] == http.live()[-1]["id"]
+
+    def test_changes_to_unsent_tasks_are_folded(self, mirrored):
+        http, service, mirror = mirrored
+
+        kept = gts.create_task("Draft")
+        gts.update_task(kept["id"], title="Final")
+        gts.complete_task(kept["id"])
+        dropped = gts.create_task("Typo")
+        gts.delete_task(dropped["id"])
+        gts.update_task("t000002", title="Pay water bill")
+        gts.update_task("t000002", notes="before Friday")
+
+        assert mirror.pending_count() == 2
+        mirror.flush(service)
+        assert _google(http)["Final"] == "completed" and "Typo" not in _google(http)
+        assert gts.get_task("@default", "t000002")["notes"] == "before Friday"
+
+    def test_local_ids_keep_resolving(self, mirrored):
+        http, service, mirror = mirrored
+        parent = gts.create_task("Plan trip")
+        child = gts.create_task("Book hotel", parent=parent["id"])
+
+        mirror.flush(service)
+        gts.complete_task(child["id"])
+        mirror.flush(service)
+
+        # The child waited for its parent's insert: two rounds, then the completion
+        assert http.requests == [BATCH, BATCH, BATCH]
+        remote_child = mirror.resolve(child["id"])
+        assert gts.get_task("@default", child["id"])["id"] == remote_child
+        google_child = next(t for t in http.live() if t["id"] == remote_child)
+        assert google_child["parent"] == mirror.resolve(parent["id"]) and google_child["status"] == "completed"
+
+    def test_outage_keeps_changes_queued(self, mirrored):
+        http, service, mirror = mirrored
+        gts.update_task("t000002", title="Pay gas bill")
+        http.fail_next()
+
+        assert mirror.flush(service)["stalled"]
+        # A poll meanwhile does not undo the local change
+        mirror.sync("@default", service)
+        assert gts.get_task("@default", "t000002")["title"] == "Pay gas bill"
+
+        assert mirror.flush(service)["sent"] == 1
+        assert "Pay gas bill" in _google(http)
+
+    def test_queue_survives_restart(self, mirrored):
+        http, service, mirror = mirrored
+        gts.create_task("Renew insurance")
+
+        restarted = TasksMirror(db_path=mirror.db_path)
+
+        assert restarted.pending_count() == 1
+        assert restarted.flush(service)["sent"] == 1
+        assert "Renew insurance" in _google(http)
+
+    def test_change_to_task_deleted_on_google_is_dropped(self, mirrored):
+        http, service, mirror = mirrored
+        gts.update_task("t000005", title="Call the plumber again")
+        service.tasks().delete(tasklist="@default", task="t000005").execute()
+
+        assert mirror.flush(service) == {"sent": 0, "dropped": 1, "pending": 0, "stalled": False}
+        assert "Call the plumber again" not in _titles(gts.list_tasks())
+
+    def test_background_replay(self, mirrored, monkeypatch):
+        http, service, _ = mirrored
+        monkeypatch.setattr(gts.settings, "TASKS_OUTBOX_FLUSH_DELAY", 0.0)
+        mirror = TasksMirror(db_path=gts.tasks_mirror.db_path)
+        mirror.create("@default", {"title": "Buy stamps", "status": "needsAction"})
+
+        mirror.flush_in_background(lambda: service).join(5)
+
+        assert mirror.pending_count() == 0 and "Buy stamps" in _google(http)
+
+    def test_move_sends_queued_changes_first(self, mirrored):
+        http, _, _ = mirrored
+        created = gts.create_task("Call bank")
+
+        moved = gts.move_task(created["id"], previous="t000005")
+
+        assert not is_local_id(moved["id"]) and moved["position"] == f"{int(make_task(5, '')['position']) + 1:020d}"
+        assert http.requests == [BATCH, ("POST", f"/tasks/v1/lists/@default/tasks/{moved['id']}/move")]
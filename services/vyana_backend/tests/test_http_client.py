@@ -0,0 +1,177 @@
+"""
+Integration tests for the shared HTTP client and the services using it,
+against local stub servers.
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request, Response
+
+from app.services import http_client as http_client_module
+from app.services.http_client import HTTPClient
+from benchmarks.common import LocalServer
+
+
+def _stub_app() -> FastAPI:
+    app = FastAPI()
+    app.state.client_ports = set()
+    app.state.flaky_calls = 0
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+
+    @app.get("/ok")
+    async def ok(request: Request):
+        app.state.client_ports.add(request.client.port)
+        return {"ok": True}
+
+    @app.api_route("/flaky", methods=["GET", "POST"])
+    async def flaky():
+        app.state.flaky_calls += 1
+        if app.state.flaky_calls <= 2:
+            return Response(status_code=503)
+        return {"ok": True}
+
+    @app.get("/slow")
+    async def slow():
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        await asyncio.sleep(0.05)
+        app.state.in_flight -= 1
+        return {"ok": True}
+
+    return app
+
+
+@pytest.fixture(scope="module")
+def stub_server():
+    with LocalServer(_stub_app()) as server:
+        yield server
+
+
+@pytest.fixture
+def client(stub_server, monkeypatch):
+    monkeypatch.setattr(http_client_module.settings, "HTTP_RETRY_BACKOFF", 0.01)
+    stub_server.app.state.client_ports.clear()
+    stub_server.app.state.flaky_calls = 0
+    stub_server.app.state.max_in_flight = 0
+    return HTTPClient()
+
+
+class TestHTTPClient:
+    """Pooling, limits, retries and timing hooks"""
+
+    @pytest.mark.asyncio
+    async def test_connections_are_kept_alive(self, client, stub_server):
+        for _ in range(10):
+            response = await client.get(f"{stub_server.base_url}/ok")
+            assert response.json() == {"ok": True}
+
+        assert len(stub_server.app.state.client_ports) == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_with_timing_hooks(self, client, stub_server):
+        timings = []
+        client.add_hook(timings.append)
+
+        response = await client.get(f"{stub_server.base_url}/flaky")
+
+        assert response.status_code == 200
+        assert [(t.attempt, t.status) for t in timings] == [(0, 503), (1, 503), (2, 200)]
+        assert all(t.host == "127.0.0.1" and t.elapsed_ms > 0 for t in timings)
+        assert client.stats()["127.0.0.1"]["retries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_post_not_retried_by_default(self, client, stub_server):
+        response = await client.post(f"{stub_server.base_url}/flaky")
+        assert response.status_code == 503
+        assert stub_server.app.state.flaky_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_per_host_concurrency_limit(self, client, stub_server):
+        client.set_host_limit("127.0.0.1", 2)
+
+        await asyncio.gather(*[client.get(f"{stub_server.base_url}/slow") for _ in range(6)])
+
+        assert stub_server.app.state.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_transport_errors_retried_then_raised(self, client, monkeypatch):
+        monkeypatch.setattr(http_client_module.settings, "HTTP_RETRIES", 1)
+        timings = []
+        client.add_hook(timings.append)
+
+        with pytest.raises(httpx.ConnectError):
+            await client.get("http://127.0.0.1:1/unreachable")
+
+        assert [t.attempt for t in timings] == [0, 1]
+        assert all(t.error for t in timings)
+
+
+def _integrations_app() -> FastAPI:
+    """Stands in for wttr.in, DuckDuckGo, open.er-api.com and Whisper"""
+    app = FastAPI()
+
+    @app.get("/")
+    async def duckduckgo(q: str):
+        return {"Heading": q.title(), "Abstract": "A stubbed answer.", "AbstractURL": "https://example.com"}
+
+    @app.get("/v6/latest/{base}")
+    async def rates(base: str):
+        return {"result": "success", "rates": {"INR": 83.0, base: 1.0}}
+
+    @app.post("/v1/audio/transcriptions")
+    async def transcribe(request: Request):
+        form = await request.form()
+        return {"text": f"heard {form['file'].filename}"}
+
+    @app.get("/{city}")
+    async def wttr(city: str, format: str):
+        if format == "j1":
+            day = {"date": "2026-01-01", "maxtempC": "31", "mintempC": "24",
+                   "hourly": [{"weatherDesc": [{"value": "Sunny"}]}]}
+            return {"weather": [day]}
+        return Response(f"Sunny +30°C 60% 10km/h in {city}", media_type="text/plain")
+
+    return app
+
+
+@pytest.fixture
+def integrations(monkeypatch):
+    stub = HTTPClient(transport=httpx.ASGITransport(app=_integrations_app()))
+    for module in ("weather_service", "search_service", "utils_service", "deepseek_client"):
+        monkeypatch.setattr(f"app.services.{module}.http_client", stub)
+    return stub
+
+
+class TestServicesUseSharedClient:
+    """Outbound integrations go through the shared client"""
+
+    @pytest.mark.asyncio
+    async def test_weather(self, integrations):
+        from app.services.weather_service import weather_service
+
+        assert "Sunny +30°C" in await weather_service.get_weather("Chennai")
+        assert "Sunny, 24°C - 31°C" in await weather_service.get_forecast("Chennai")
+
+    @pytest.mark.asyncio
+    async def test_search_falls_back_to_duckduckgo(self, integrations, monkeypatch):
+        from app.services.search_service import search_service
+
+        monkeypatch.setattr(search_service, "serp_api_key", None)
+        assert (await search_service.web_search("vyana")).startswith("Vyana: A stubbed answer.")
+
+    @pytest.mark.asyncio
+    async def test_currency(self, integrations):
+        from app.services.utils_service import utils_service
+
+        result = await utils_service.convert_currency(2, "usd", "inr")
+        assert result.startswith("2 USD = 166.00 INR")
+
+    @pytest.mark.asyncio
+    async def test_whisper_transcription(self, integrations, monkeypatch):
+        from app.services.deepseek_client import deepseek_client
+
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        assert await deepseek_client.transcribe_audio(b"RIFF", "note.wav") == "heard note.wav"
+        assert integrations.stats()["api.openai.com"]["requests"] == 1
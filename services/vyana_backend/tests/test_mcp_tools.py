@@ -0,0 +1,227 @@
+"""
+Tests for MCP client sessions and the MCP tools exposed to the agent,
+against the local stub MCP server (in-process via ASGI).
+"""
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.services.langgraph_tools import get_mcp_tools_as_langchain
+from app.services.http_client import HTTPClient
+from app.services.mcp_client import MCPSession
+from app.services.mcp_service import mcp_service, MCPConnection, MCPConnectionStatus
+from app.services.tool_executor import execute_tool_calls, run_blocking
+from benchmarks.stub_mcp_server import create_app
+
+STUB_URL = "http://stub/mcp"
+
+
+def _session(app, **kwargs) -> MCPSession:
+    return MCPSession(STUB_URL, http=HTTPClient(transport=httpx.ASGITransport(app=app)), **kwargs)
+
+
+@pytest.fixture
+def stub_app():
+    return create_app(latency_ms=50, tool_count=2)
+
+
+@pytest_asyncio.fixture
+async def stub_mcp(stub_app, monkeypatch):
+    """Connect the stub server as MCP connection 'stub'"""
+    session = _session(stub_app)
+    await session.initialize()
+    monkeypatch.setitem(mcp_service.connections, "stub", MCPConnection(
+        name="stub",
+        display_name="Stub",
+        url=STUB_URL,
+        status=MCPConnectionStatus.CONNECTED,
+        tools=await session.list_tools(),
+        session=session,
+    ))
+    yield stub_app
+    await session.close()
+
+
+class TestMCPSession:
+    """Persistent session behaviour"""
+
+    @pytest.mark.asyncio
+    async def test_initialize_reuses_session_and_increments_ids(self, stub_app):
+        session = _session(stub_app)
+        await session.initialize()
+        session_id = session.session_id
+
+        await session.list_tools()
+        await session.call_tool("echo_0", {"text": "a"})
+
+        assert session_id in stub_app.state.sessions
+        assert session.session_id == session_id
+        assert session.server_info["name"] == "stub-mcp"
+        assert stub_app.state.request_ids == [1, 2, 3]
+
+        await session.close()
+        assert session_id not in stub_app.state.sessions
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_in_flight(self, stub_app):
+        session = _session(stub_app)
+        await session.initialize()
+
+        results = await asyncio.gather(*[session.call_tool("echo_0", {"text": f"m{i}"}) for i in range(10)])
+
+        assert [r["content"][0]["text"] for r in results] == [f"m{i}" for i in range(10)]
+        assert stub_app.state.max_in_flight == 10
+        assert len(set(stub_app.state.request_ids)) == len(stub_app.state.request_ids)
+
+    @pytest.mark.asyncio
+    async def test_streamed_progress(self, stub_app):
+        session = _session(stub_app)
+        await session.initialize()
+        partials = []
+
+        result = await session.call_tool("echo_0", {"text": "hello"}, on_progress=partials.append)
+
+        assert result["content"][0]["text"] == "hello"
+        assert [p["message"] for p in partials] == ["hello (1/3)", "hello (2/3)", "hello (3/3)"]
+
+    @pytest.mark.asyncio
+    async def test_expired_session_is_renewed(self, stub_app):
+        session = _session(stub_app)
+        await session.initialize()
+        old_id = session.session_id
+        stub_app.state.sessions.clear()
+
+        result = await session.call_tool("echo_0", {"text": "again"})
+
+        assert result["content"][0]["text"] == "again"
+        assert session.session_id != old_id
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_handshake(self):
+        stub_app = create_app(latency_ms=20, tool_count=1, handshake_ms=20)
+        session = _session(stub_app)
+
+        # Before the first handshake, and again across a server-side expiry
+        for _ in range(2):
+            results = await asyncio.gather(*[session.call_tool("echo_0", {"text": f"m{i}"}) for i in range(10)])
+            assert [r["content"][0]["text"] for r in results] == [f"m{i}" for i in range(10)]
+            assert stub_app.state.sessions == {session.session_id}
+            stub_app.state.sessions.clear()
+
+
+class TestMCPToolPath:
+    """MCP tools run natively on the event loop"""
+
+    @pytest.mark.asyncio
+    async def test_tool_has_native_coroutine(self, stub_mcp):
+        tool = get_mcp_tools_as_langchain()[0]
+
+        assert tool.name == "mcp_stub_echo_0"
+        assert tool.coroutine is not None
+        assert await tool.ainvoke({"text": "hi"}) == "hi"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_the_loop(self, stub_mcp):
+        tool = get_mcp_tools_as_langchain()[0]
+
+        start = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*[tool.ainvoke({"text": f"m{i}"}) for i in range(20)])
+        elapsed = asyncio.get_running_loop().time() - start
+
+        assert results == [f"m{i}" for i in range(20)]
+        assert elapsed < 0.5
+
+    @pytest.mark.asyncio
+    async def test_sync_wrapper_hands_off_to_the_loop(self, stub_mcp):
+        await mcp_service.execute_tool_by_name("mcp_stub_echo_0", {"text": "warm"})
+        loop_thread = threading.get_ident()
+
+        def call_from_worker():
+            assert threading.get_ident() != loop_thread
+            return mcp_service.execute_tool_sync("mcp_stub_echo_0", {"text": "sync"})
+
+        assert await run_blocking(call_from_worker) == "sync"
+
+    @pytest.mark.asyncio
+    async def test_unknown_server_returns_error(self, stub_mcp):
+        result = json.loads(await mcp_service.execute_tool_by_name("mcp_nope_tool", {}))
+        assert "Not connected" in result["error"]
+
+    @pytest.mark.asyncio
+    async def test_progress_reaches_the_graph_stream(self, stub_mcp):
+        from langgraph.graph import END, START, MessagesState, StateGraph
+
+        tool = get_mcp_tools_as_langchain()[0]
+        call = {"name": tool.name, "args": {"text": "slow"}, "id": "call_1"}
+
+        async def tools_node(state, config):
+            return {"messages": await execute_tool_calls([call], {tool.name: tool}, config)}
+
+        builder = StateGraph(MessagesState)
+        builder.add_node("tools", tools_node)
+        builder.add_edge(START, "tools")
+        builder.add_edge("tools", END)
+        events = [chunk async for chunk in builder.compile().astream({"messages": []}, stream_mode="custom")]
+
+        assert [(e["type"], e["id"], e["name"], e["message"]) for e in events] == [
+            ("tool_progress", "call_1", "mcp_stub_echo_0", f"slow ({step}/3)") for step in (1, 2, 3)
+        ]
+        # Outside a graph there is nowhere to stream progress to
+        assert await tool.ainvoke({"text": "plain"}) == "plain"
+
+    @pytest.mark.asyncio
+    async def test_keep_alive_reopens_dropped_session(self, stub_mcp):
+        connection = mcp_service.connections["stub"]
+        old_id = connection.session.session_id
+        assert await mcp_service.keep_alive("stub")
+
+        stub_mcp.state.sessions.clear()  # server forgot the idle session
+
+        assert await mcp_service.keep_alive("stub")
+        assert connection.session.session_id != old_id
+        assert connection.status == MCPConnectionStatus.CONNECTED
+
+
+class TestMCPToolCatalogue:
+    """Tool schemas are converted once per catalogue change"""
+
+    @pytest.mark.asyncio
+    async def test_conversion_is_cached(self, stub_mcp):
+        first = get_mcp_tools_as_langchain()
+        second = get_mcp_tools_as_langchain()
+
+        assert [t.name for t in first] == ["mcp_stub_echo_0", "mcp_stub_echo_1"]
+        assert all(a is b for a, b in zip(first, second))
+        assert mcp_service.get_all_tools_for_llm()[0] is mcp_service.connections["stub"].llm_tools[0]
+
+    @pytest.mark.asyncio
+    async def test_refresh_only_rebuilds_on_change(self, stub_mcp):
+        before = get_mcp_tools_as_langchain()
+        version = mcp_service.tools_version
+
+        assert await mcp_service.refresh_tools("stub") is False
+        assert mcp_service.tools_version == version
+        assert get_mcp_tools_as_langchain()[0] is before[0]
+
+        stub_mcp.state.tools = stub_mcp.state.tools[:1]
+        assert await mcp_service.refresh_tools("stub") is True
+        assert mcp_service.tools_version == version + 1
+        after = get_mcp_tools_as_langchain()
+        assert [t.name for t in after] == ["mcp_stub_echo_0"]
+        assert after[0] is not before[0]
+
+    @pytest.mark.asyncio
+    async def test_list_changed_notification_triggers_refresh(self, stub_mcp):
+        connection = mcp_service.connections["stub"]
+        connection.session.on_notification = lambda message: mcp_service._handle_notification("stub", message)
+        stub_mcp.state.tools = stub_mcp.state.tools + [{"name": "added", "description": "New", "inputSchema": {"type": "object", "properties": {}}}]
+        stub_mcp.state.pending_notifications.append("notifications/tools/list_changed")
+
+        await connection.session.call_tool("echo_0", {"text": "x"}, on_progress=lambda p: None)
+        await asyncio.gather(*mcp_service._background_tasks)
+
+        assert "mcp_stub_added" in [t.name for t in get_mcp_tools_as_langchain()]
@@ -0,0 +1,128 @@
+"""
+Tests for the local SQLite NotesService
+"""
+import json
+
+import pytest
+
+from app.services import notes_service as notes_module
+from app.services.notes_service import NotesService
+
+
+@pytest.fixture
+def notes(tmp_path):
+    return NotesService(db_path=tmp_path / "notes.db", legacy_file=tmp_path / "notes.json")
+
+
+def _titles(results):
+    return [n["title"] for n in results]
+
+
+class TestNotesStore:
+    """Saving, listing, editing and the JSON import"""
+
+    def test_newest_first(self, notes):
+        for i in range(3):
+            notes.save_note(f"content {i}", f"Note {i}")
+
+        assert _titles(notes.get_notes()) == ["Note 2", "Note 1", "Note 0"]
+        assert _titles(notes.get_notes(limit=1)) == ["Note 2"]
+        assert notes.save_note("no title") == "Note saved: Quick Note"
+
+    def test_keyset_pages_cover_everything_once(self, notes):
+        notes.import_notes([
+            # Two notes share a timestamp: the cursor still keeps them apart
+            {"id": f"n{i}", "title": f"Note {i}", "content": "x", "created_at": f"2024-01-{1 + i // 2:02d}T00:00:00"}
+            for i in range(7)
+        ])
+
+        seen, cursor = [], None
+        while True:
+            page = notes.list_notes(limit=3, cursor=cursor)
+            seen += [n["id"] for n in page["notes"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == ["n6", "n5", "n4", "n3", "n2", "n1", "n0"]
+
+    def test_update_and_delete(self, notes):
+        notes.save_note("buy milk", "Groceries")
+        note = notes.get_notes()[0]
+
+        updated = notes.update_note(note["id"], content="buy oat milk")["note"]
+
+        assert updated["title"] == "Groceries" and updated["content"] == "buy oat milk"
+        assert notes.get_note(note["id"]) == updated
+        assert notes.delete_note(note["id"]) == {"success": True, "message": "Note deleted"}
+        assert notes.get_note(note["id"]) is None
+        assert notes.update_note(note["id"], title="x") == {"success": False, "error": "Note not found"}
+
+    def test_legacy_json_imported_once(self, tmp_path):
+        legacy = tmp_path / "notes.json"
+        legacy.write_text(json.dumps([  # stored newest first
+            {"id": "b", "title": "Second", "content": "passport renewal", "created_at": "2024-02-01T00:00:00",
+             "updated_at": "2024-02-01T00:00:00"},
+            {"id": "a", "title": "First", "content": "dentist", "created_at": "2024-01-01T00:00:00",
+             "updated_at": "2024-01-01T00:00:00"},
+        ]))
+
+        service = NotesService(db_path=tmp_path / "notes.db", legacy_file=legacy)
+
+        assert _titles(service.get_notes()) == ["Second", "First"]
+        assert _titles(service.search_notes("passport")) == ["Second"]
+        assert not legacy.exists() and (tmp_path / "notes.json.migrated").exists()
+
+    def test_reimport_updates_in_place(self, notes):
+        notes.import_notes([{"id": "a", "title": "Trip", "content": "book ferry", "created_at": "2024-01-01T00:00:00"}])
+        notes.import_notes([{"id": "a", "title": "Trip", "content": "book train", "created_at": "2024-01-01T00:00:00"}])
+
+        assert [n["content"] for n in notes.get_notes()] == ["book train"]
+        assert notes.search_notes("ferry") == []
+        assert _titles(notes.search_notes("train")) == ["Trip"]
+        assert _titles(notes.search_notes("trip")) == ["Trip"]
+
+
+class TestNotesSearch:
+    """Full-text search over title and content"""
+
+    @pytest.fixture
+    def notebook(self, notes):
+        notes.save_note("Call the plumber about the kitchen sink", "Home repairs")
+        notes.save_note("Passport renewal needs two photos", "Travel")
+        notes.save_note("Ideas for the passport photo booth startup", "Startup ideas")
+        notes.save_note("Dentist on Friday, ask about renewal of insurance", "Health")
+        return notes
+
+    @pytest.mark.parametrize("query, expected", [
+        ("plumber", ["Home repairs"]),
+        ("PASS", ["Travel", "Startup ideas"]),              # prefix, any case
+        ("passport renewal", ["Travel"]),                   # every word must match
+        ("travel", ["Travel"]),                             # titles are searched
+        ("renewal", ["Travel", "Health"]),
+        ("café", []),
+        ("!!", []),
+    ])
+    def test_queries(self, notebook, query, expected):
+        assert sorted(_titles(notebook.search_notes(query))) == sorted(expected)
+
+    def test_title_matches_rank_first(self, notebook):
+        notebook.save_note("Remember: startup pitch on Monday", "Pitch")
+
+        assert _titles(notebook.search_notes("startup"))[0] == "Startup ideas"
+
+    def test_index_follows_edits(self, notebook):
+        travel = notebook.search_notes("passport renewal")[0]
+        notebook.update_note(travel["id"], content="Visa appointment")
+        notebook.delete_note(notebook.search_notes("plumber")[0]["id"])
+
+        assert _titles(notebook.search_notes("passport renewal")) == []
+        assert _titles(notebook.search_notes("visa")) == ["Travel"]
+        assert _titles(notebook.search_notes("plumber")) == []
+
+    def test_broad_queries_rank_newest_matches(self, notes, monkeypatch):
+        monkeypatch.setattr(notes_module, "RANK_WINDOW", 3)
+        for i in range(6):
+            notes.save_note(f"weekly review {i}", f"Review {i}")
+
+        assert sorted(_titles(notes.search_notes("review"))) == ["Review 3", "Review 4", "Review 5"]
@@ -0,0 +1,139 @@
+"""
+Tests for parallel tool execution within one agent turn.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+from langchain_core.tools import tool
+
+from app.services import tool_executor
+from app.services.tool_executor import execute_tool_calls, is_mutating, mutating, offload_tools, tool_metrics
+
+
+def _calls(*names):
+    return [{"name": name, "args": {}, "id": f"call_{i}"} for i, name in enumerate(names)]
+
+
+@pytest.fixture
+def tools_by_name():
+    log = []
+
+    @tool
+    def read_a() -> str:
+        """Slow read A"""
+        time.sleep(0.2)
+        return "a"
+
+    @tool
+    def read_b() -> str:
+        """Slow read B"""
+        time.sleep(0.2)
+        return "b"
+
+    @tool
+    async def read_c() -> str:
+        """Slow async read C"""
+        await asyncio.sleep(0.2)
+        return "c"
+
+    @mutating
+    @tool
+    def write_x() -> str:
+        """Write X"""
+        log.append("x-start")
+        time.sleep(0.1)
+        log.append("x-end")
+        return "x"
+
+    @mutating
+    @tool
+    def write_y() -> str:
+        """Write Y"""
+        log.append("y-start")
+        time.sleep(0.1)
+        log.append("y-end")
+        return "y"
+
+    @tool
+    def broken() -> str:
+        """Always fails"""
+        raise RuntimeError("boom")
+
+    tools = offload_tools([read_a, read_b, read_c, write_x, write_y, broken])
+    by_name = {t.name: t for t in tools}
+    by_name["_log"] = log
+    tool_metrics.reset()
+    return by_name
+
+
+class TestExecuteToolCalls:
+    """Tests for execute_tool_calls"""
+
+    @pytest.mark.asyncio
+    async def test_read_only_calls_run_concurrently_in_call_order(self, tools_by_name):
+        start = time.perf_counter()
+        results = await execute_tool_calls(_calls("read_c", "read_a", "read_b"), tools_by_name)
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.4
+        assert [r.content for r in results] == ["c", "a", "b"]
+        assert [r.tool_call_id for r in results] == ["call_0", "call_1", "call_2"]
+        assert all(r.additional_kwargs["latency_ms"] >= 190 for r in results)
+
+    @pytest.mark.asyncio
+    async def test_mutating_tools_run_sequentially(self, tools_by_name):
+        assert is_mutating(tools_by_name["write_x"])
+        assert not is_mutating(tools_by_name["read_a"])
+
+        results = await execute_tool_calls(_calls("write_x", "write_y", "read_a"), tools_by_name)
+
+        assert [r.content for r in results] == ["x", "y", "a"]
+        assert tools_by_name["_log"] == ["x-start", "x-end", "y-start", "y-end"]
+
+    @pytest.mark.asyncio
+    async def test_timeout_and_errors_become_error_results(self, tools_by_name, monkeypatch):
+        monkeypatch.setattr(tool_executor.settings, "TOOL_TIMEOUT_SECONDS", 0.05)
+
+        results = await execute_tool_calls(_calls("read_a", "broken", "missing"), tools_by_name)
+
+        assert [r.status for r in results] == ["error", "error", "error"]
+        assert "timed out" in json.loads(results[0].content)["error"]
+        assert "boom" in results[1].content
+
+        stats = tool_metrics.snapshot()
+        assert stats["read_a"]["timeouts"] == 1
+        assert stats["broken"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_writes_are_not_abandoned(self, tools_by_name, monkeypatch):
+        monkeypatch.setattr(tool_executor.settings, "TOOL_TIMEOUT_SECONDS", 0.05)
+
+        @mutating
+        @tool
+        def send_slowly() -> str:
+            """Slow write"""
+            time.sleep(0.2)
+            return "sent"
+
+        slow = offload_tools([send_slowly])[0]
+        capped = slow.model_copy(update={"name": "send_capped", "metadata": {**slow.metadata, "timeout": 0.05}})
+        tools_by_name.update({slow.name: slow, capped.name: capped})
+
+        results = await execute_tool_calls(_calls("send_slowly", "send_capped"), tools_by_name)
+
+        # No timeout for writes by default; a configured one reports an unknown outcome
+        assert results[0].content == "sent" and results[0].status == "success"
+        capped_result = json.loads(results[1].content)
+        assert capped_result["outcome"] == "unknown" and "do not retry" in capped_result["error"]
+
+    @pytest.mark.asyncio
+    async def test_latency_metrics_recorded(self, tools_by_name):
+        await execute_tool_calls(_calls("read_a", "read_a"), tools_by_name)
+
+        stats = tool_metrics.snapshot()["read_a"]
+        assert stats["calls"] == 2
+        assert stats["errors"] == 0
+        assert stats["max_ms"] >= 190
+        assert stats["avg_ms"] >= 190
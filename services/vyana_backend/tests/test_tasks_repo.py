@@ -0,0 +1,117 @@
+"""
+Tests for the SQLite tasks repository
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from app.services import tasks_repo as tasks_module
+from app.services.tasks_repo import AsyncTasksRepo, SqliteTasksRepo
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = SqliteTasksRepo(db_path=str(tmp_path / "tasks.db"))
+    repo.add_task("Call the Plumber", "2026-01-05")
+    repo.add_task("Pay electricity bill")
+    repo.add_task("Book flight")
+    return repo
+
+
+def _titles(tasks):
+    return [t.title for t in tasks]
+
+
+class TestTasksRepo:
+    """CRUD, listing and search"""
+
+    def test_crud(self, repo):
+        task = repo.add_task("Renew passport", "2026-03-01")
+
+        assert repo.get_task(task.id) == task
+        assert repo.update_task(task.id, due_date="2026-04-01")
+        assert repo.get_task(task.id).title == "Renew passport"
+        assert repo.get_task(task.id).due_date == "2026-04-01"
+        assert repo.update_task(task.id) is False
+        assert repo.delete_task(task.id)
+        assert repo.get_task(task.id) is None
+        assert not repo.complete_task(task.id)
+
+    def test_list_open_and_completed(self, repo):
+        first = repo.list_tasks()[0]
+        repo.complete_task(first.id)
+
+        assert _titles(repo.list_tasks()) == ["Pay electricity bill", "Book flight"]
+        assert [t.is_completed for t in repo.list_tasks(include_completed=True)] == [True, False, False]
+
+    @pytest.mark.parametrize("query, expected", [
+        ("plumb", ["Call the Plumber"]),
+        ("BILL", ["Pay electricity bill"]),     # case-insensitive
+        ("ll", ["Call the Plumber", "Pay electricity bill"]),  # too short for the index: scan
+        ("tric", ["Pay electricity bill"]),      # inside a word
+        ("train", []),
+    ])
+    def test_search(self, repo, query, expected):
+        assert _titles(repo.search_tasks(query)) == expected
+
+    def test_search_follows_writes(self, repo):
+        plumber = repo.search_tasks("plumber")[0]
+        repo.update_task(plumber.id, title="Call the electrician")
+        repo.complete_task(repo.search_tasks("flight")[0].id)
+
+        assert _titles(repo.search_tasks("plumber")) == []
+        assert _titles(repo.search_tasks("electric")) == ["Call the electrician", "Pay electricity bill"]
+        assert _titles(repo.search_tasks("flight")) == []
+
+    def test_existing_database_gets_indexed(self, tmp_path):
+        path = str(tmp_path / "old.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("""CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                            is_completed BOOLEAN DEFAULT 0, created_at TEXT, due_date TEXT)""")
+            conn.execute("INSERT INTO tasks (title, created_at) VALUES ('Water the plants', '2025-01-01')")
+
+        repo = SqliteTasksRepo(db_path=path)
+
+        assert _titles(repo.search_tasks("plant")) == ["Water the plants"]
+
+    def test_search_without_trigram_index(self, repo, monkeypatch):
+        monkeypatch.setattr(repo, "_trigrams", False)
+
+        assert _titles(repo.search_tasks("plumb")) == ["Call the Plumber"]
+
+    def test_concurrent_writers(self, repo):
+        def add(worker):
+            for i in range(50):
+                repo.add_task(f"worker {worker} task {i}")
+
+        threads = [threading.Thread(target=add, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(repo.list_tasks()) == 3 + 200
+        assert len(repo.search_tasks("worker 2 task")) == 50
+
+
+class TestAsyncTasksRepo:
+    """The async front runs every call on its one database thread"""
+
+    @pytest.mark.asyncio
+    async def test_calls_run_on_db_thread(self, repo, monkeypatch):
+        async_repo = AsyncTasksRepo(repo)
+        threads = set()
+        original = repo.list_tasks
+        monkeypatch.setattr(repo, "list_tasks", lambda *a: threads.add(threading.current_thread().name) or original(*a))
+
+        task = await async_repo.add_task("Renew passport")
+        await async_repo.complete_task(task.id)
+        tasks = await async_repo.list_tasks()
+
+        assert "Renew passport" not in _titles(tasks)
+        assert _titles(await async_repo.search_tasks("flight")) == ["Book flight"]
+        assert all(name.startswith("tasks-db") for name in threads)
+
+    def test_module_singletons_share_repo(self):
+        assert tasks_module.async_tasks_repo.repo is tasks_module.tasks_repo